@@ -0,0 +1,40 @@
+from programacion_turnos import presupuesto_consultas
+from programacion_turnos.presupuesto_consultas import Caso
+
+
+class PresupuestoConsultasEmpresasTests(presupuesto_consultas.PresupuestoConsultasTestCase):
+    """Las vistas de empresas no hacen consultas por fila."""
+    urls_modulo = 'empresas.urls'
+    casos = {
+        'empresas:dashboard': Caso(),
+        'empresas:empresas_list': Caso(),
+        'empresas:empresa_create': Caso(),
+        'empresas:empresa_detail': Caso(lambda c: [c.empresa]),
+        'empresas:empresa_update': Caso(lambda c: [c.empresa]),
+        'empresas:empresa_delete': Caso(lambda c: [c.empresa], estado=302),
+        'empresas:proyectos_list': Caso(),
+        'empresas:proyecto_create': Caso(),
+        'empresas:proyecto_detail': Caso(lambda c: [c.proyecto]),
+        'empresas:proyecto_update': Caso(lambda c: [c.proyecto]),
+        'empresas:proyecto_delete': Caso(lambda c: [c.proyecto]),
+        'empresas:centros_operativos_list': Caso(),
+        'empresas:centro_operativo_create': Caso(),
+        'empresas:centro_operativo_detail': Caso(lambda c: [c.centro]),
+        'empresas:centro_operativo_update': Caso(lambda c: [c.centro]),
+        'empresas:centro_operativo_delete': Caso(lambda c: [c.centro]),
+        'empresas:unidades_negocio_list': Caso(),
+        'empresas:unidad_negocio_create': Caso(),
+        'empresas:unidad_negocio_detail': Caso(lambda c: [c.unidad]),
+        'empresas:unidad_negocio_update': Caso(lambda c: [c.unidad]),
+        'empresas:unidad_negocio_delete': Caso(lambda c: [c.unidad]),
+        'empresas:cargopredefinido_list': Caso(),
+        'empresas:cargopredefinido_create': Caso(),
+        'empresas:cargopredefinido_detail': Caso(lambda c: [c.cargo]),
+        'empresas:cargopredefinido_update': Caso(lambda c: [c.cargo]),
+        'empresas:cargopredefinido_delete': Caso(lambda c: [c.cargo]),
+        'empresas:api_health_check': Caso(),
+        'empresas:api_health_live': Caso(),
+        'empresas:api_health_ready': Caso(),
+        'empresas:api_debug_models': Caso(),
+        'empresas:api_empresas_activas': Caso(),
+    }
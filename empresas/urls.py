@@ -44,6 +44,8 @@ urlpatterns = [
     
     # ========== APIs BÁSICAS ==========
     path('api/health/', views.database_health_check, name='api_health_check'),
+    path('api/health/live/', views.liveness_check, name='api_health_live'),
+    path('api/health/ready/', views.database_health_check, name='api_health_ready'),
     path('api/debug-models/', views.debug_models_info, name='api_debug_models'),
     path('api/empresas-activas/', views.empresas_activas_api, name='api_empresas_activas'),
 ]
\ No newline at end of file
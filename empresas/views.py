@@ -11,7 +11,7 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.core.paginator import Paginator
 from django.db.models import Q
-from django.db import OperationalError
+from django.db import OperationalError, connection
 from django.utils import timezone
 from django.views.generic import CreateView, UpdateView, DetailView, ListView, DeleteView
 from django.urls import reverse_lazy
@@ -28,19 +28,22 @@ from .forms import EmpresaFiltroForm, EmpresaForm, ProyectoForm, UnidadNegocioFo
 #   APIs DE SISTEMA
 # =======================
 
-@api_view(['GET'])
+def liveness_check(request):
+    """Liveness: el proceso responde. No toca la base de datos."""
+    return JsonResponse({"status": "alive"})
+
 def database_health_check(request):
-    """Verificar salud de la base de datos"""
+    """Readiness: verificar la conexión a la base de datos con SELECT 1 (sin recorrer tablas)"""
     try:
-        count = Empresa.objects.count()
-        return Response(
-            {"status": "healthy", "empresas_count": count},
-            status=status.HTTP_200_OK
-        )
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        return JsonResponse({"status": "healthy"}, status=200)
     except OperationalError:
-        return Response(
+        return JsonResponse(
             {"status": "unhealthy", "message": "Database connection failed"},
-            status=status.HTTP_503_SERVICE_UNAVAILABLE
+            status=503
         )
 
 @login_required
@@ -57,7 +60,7 @@ def debug_models_info(request):
         info['total_empresas'] = Empresa.objects.count()
     except Exception as e:
         info['error'] = str(e)
-    return JsonResponse(info, indent=2)
+    return JsonResponse(info, json_dumps_params={'indent': 2})
 
 # =======================
 #       DASHBOARD
@@ -327,8 +330,8 @@ def proyectos_list(request):
         activo = request.GET.get('activo', '')
         unidad_negocio = request.GET.get('unidad_negocio', '')
         
-        # Base queryset
-        proyectos = Proyecto.objects.all()
+        # Base queryset (empresa y centros se cargan junto con la página)
+        proyectos = Proyecto.objects.select_related('id_empresa_proyecto').prefetch_related('centros_operativos')
         
         # Aplicar filtros
         if search:
@@ -544,7 +547,7 @@ def proyecto_centros_api(request, pk):
 def centros_operativos_list(request):
     """Lista de centros operativos con filtros y búsqueda"""
     try:
-        centros = CentroOperativo.objects.all().order_by('-id_centro')
+        centros = CentroOperativo.objects.prefetch_related('proyectos').order_by('-id_centro')
         
         # Filtros de búsqueda
         search = request.GET.get('search', '')
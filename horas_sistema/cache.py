@@ -0,0 +1,278 @@
+"""
+Backend de caché de dos niveles.
+
+Sirve las claves más consultadas desde un LRU en memoria del proceso y, si no
+las encuentra, consulta la caché compartida (hoy ``DatabaseCache``). Así las
+lecturas repetidas no generan una consulta SQL por cada ``cache.get``.
+
+Consistencia entre workers:
+- Toda escritura (set, delete, incr, clear...) se hace primero en la caché
+  compartida y luego incrementa un sello de versión también compartido.
+- Cada proceso lee ese sello como máximo una vez cada
+  ``VERSION_CHECK_INTERVAL`` segundos. Si cambió, vacía su LRU local.
+- Además, cada entrada local vence a los ``LOCAL_TIMEOUT`` segundos, lo que
+  acota la ventana de datos desactualizados aun con escrituras concurrentes.
+
+Configuración (settings.CACHES)::
+
+    'default': {
+        'BACKEND': 'horas_sistema.cache.CacheDosNiveles',
+        'LOCATION': 'principal',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'compartida',   # alias de la caché compartida
+            'LOCAL_MAX_ENTRIES': 1000,      # tamaño máximo del LRU local
+            'LOCAL_TIMEOUT': 30,            # segundos de vida en el LRU local
+            'VERSION_CHECK_INTERVAL': 2,    # segundos entre lecturas del sello
+        }
+    }
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Tipos inmutables que se guardan tal cual en el LRU; el resto se serializa
+# para que ningún llamador modifique el valor compartido por accidente.
+_TIPOS_INMUTABLES = (str, bytes, int, float, bool, type(None))
+
+# Almacenes locales por LOCATION. Django crea una instancia del backend por
+# hilo, así que el LRU debe vivir a nivel de módulo para ser de todo el proceso.
+_almacenes = {}
+_almacenes_lock = threading.Lock()
+
+
+class _AlmacenLocal:
+    """LRU en memoria compartido por todos los hilos del proceso."""
+
+    def __init__(self):
+        self.datos = OrderedDict()  # clave -> (expira_en, serializado, valor)
+        self.lock = threading.Lock()
+        self.version = None
+        self.proxima_verificacion = 0.0
+        self.estadisticas = {
+            'hits_locales': 0,
+            'hits_compartidos': 0,
+            'misses': 0,
+            'evictions': 0,
+            'invalidaciones': 0,
+        }
+
+
+def _obtener_almacen(nombre):
+    with _almacenes_lock:
+        if nombre not in _almacenes:
+            _almacenes[nombre] = _AlmacenLocal()
+        return _almacenes[nombre]
+
+
+class CacheDosNiveles(BaseCache):
+    """LRU local con TTL delante de la caché compartida configurada en SHARED_ALIAS."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._nombre = location or 'default'
+        self._alias_compartido = options.get('SHARED_ALIAS', 'compartida')
+        self._max_local = int(options.get('LOCAL_MAX_ENTRIES', 1000))
+        self._ttl_local = float(options.get('LOCAL_TIMEOUT', 30))
+        self._intervalo_version = float(options.get('VERSION_CHECK_INTERVAL', 2))
+        self._clave_version = options.get('VERSION_KEY', f'dos_niveles:version:{self._nombre}')
+        self._almacen = _obtener_almacen(self._nombre)
+
+    @property
+    def compartida(self):
+        return caches[self._alias_compartido]
+
+    # ========== SELLO DE VERSIÓN ==========
+
+    def _sincronizar_version(self):
+        """Lee el sello compartido si ya pasó el intervalo y vacía el LRU si cambió."""
+        almacen = self._almacen
+        ahora = time.monotonic()
+        if ahora < almacen.proxima_verificacion:
+            return
+        almacen.proxima_verificacion = ahora + self._intervalo_version
+        version = self.compartida.get(self._clave_version, 0)
+        with almacen.lock:
+            if almacen.version is not None and version != almacen.version:
+                almacen.datos.clear()
+                almacen.estadisticas['invalidaciones'] += 1
+            almacen.version = version
+
+    def _publicar_escritura(self):
+        """Incrementa el sello compartido para que los demás procesos vacíen su LRU."""
+        compartida = self.compartida
+        if compartida.add(self._clave_version, 1, timeout=None):
+            nueva = 1
+        else:
+            try:
+                nueva = compartida.incr(self._clave_version)
+            except ValueError:
+                # La clave expiró entre add() e incr()
+                compartida.set(self._clave_version, 1, timeout=None)
+                nueva = 1
+        almacen = self._almacen
+        with almacen.lock:
+            # Si nadie más escribió desde la última lectura, el LRU sigue válido
+            if almacen.version is not None and nueva != almacen.version + 1:
+                almacen.datos.clear()
+                almacen.estadisticas['invalidaciones'] += 1
+            almacen.version = nueva
+
+    # ========== LRU LOCAL ==========
+
+    def _leer_local(self, clave):
+        almacen = self._almacen
+        with almacen.lock:
+            entrada = almacen.datos.get(clave)
+            if entrada is None:
+                return self._missing_key
+            expira_en, serializado, valor = entrada
+            if expira_en <= time.monotonic():
+                del almacen.datos[clave]
+                return self._missing_key
+            almacen.datos.move_to_end(clave)
+            almacen.estadisticas['hits_locales'] += 1
+        return pickle.loads(valor) if serializado else valor
+
+    def _guardar_local(self, clave, valor, timeout=DEFAULT_TIMEOUT):
+        ttl = self._ttl_local
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            self._borrar_local(clave)
+            return
+        serializado = not isinstance(valor, _TIPOS_INMUTABLES)
+        if serializado:
+            valor = pickle.dumps(valor, pickle.HIGHEST_PROTOCOL)
+        almacen = self._almacen
+        with almacen.lock:
+            almacen.datos[clave] = (time.monotonic() + ttl, serializado, valor)
+            almacen.datos.move_to_end(clave)
+            while len(almacen.datos) > self._max_local:
+                almacen.datos.popitem(last=False)
+                almacen.estadisticas['evictions'] += 1
+
+    def _borrar_local(self, clave):
+        with self._almacen.lock:
+            self._almacen.datos.pop(clave, None)
+
+    # ========== API DE CACHÉ ==========
+
+    def get(self, key, default=None, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        self._sincronizar_version()
+        valor = self._leer_local(clave)
+        if valor is not self._missing_key:
+            return valor
+        valor = self.compartida.get(key, self._missing_key, version=version)
+        almacen = self._almacen
+        if valor is self._missing_key:
+            with almacen.lock:
+                almacen.estadisticas['misses'] += 1
+            return default
+        with almacen.lock:
+            almacen.estadisticas['hits_compartidos'] += 1
+        self._guardar_local(clave, valor)
+        return valor
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        self.compartida.set(key, value, timeout=timeout, version=version)
+        self._publicar_escritura()
+        self._guardar_local(clave, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        agregado = self.compartida.add(key, value, timeout=timeout, version=version)
+        if agregado:
+            self._publicar_escritura()
+            self._guardar_local(clave, value, timeout)
+        return agregado
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        self._borrar_local(clave)
+        return self.compartida.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        self._borrar_local(clave)
+        borrado = self.compartida.delete(key, version=version)
+        self._publicar_escritura()
+        return borrado
+
+    def has_key(self, key, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        self._sincronizar_version()
+        if self._leer_local(clave) is not self._missing_key:
+            return True
+        return self.compartida.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        clave = self.make_and_validate_key(key, version=version)
+        self._borrar_local(clave)
+        valor = self.compartida.incr(key, delta, version=version)
+        self._publicar_escritura()
+        return valor
+
+    def get_many(self, keys, version=None):
+        self._sincronizar_version()
+        resultado = {}
+        pendientes = []
+        for key in keys:
+            valor = self._leer_local(self.make_and_validate_key(key, version=version))
+            if valor is self._missing_key:
+                pendientes.append(key)
+            else:
+                resultado[key] = valor
+        if pendientes:
+            encontrados = self.compartida.get_many(pendientes, version=version)
+            with self._almacen.lock:
+                self._almacen.estadisticas['hits_compartidos'] += len(encontrados)
+                self._almacen.estadisticas['misses'] += len(pendientes) - len(encontrados)
+            for key, valor in encontrados.items():
+                self._guardar_local(self.make_key(key, version=version), valor)
+            resultado.update(encontrados)
+        return resultado
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        fallidas = self.compartida.set_many(data, timeout=timeout, version=version)
+        self._publicar_escritura()
+        for key, valor in data.items():
+            if key not in fallidas:
+                self._guardar_local(self.make_and_validate_key(key, version=version), valor, timeout)
+        return fallidas
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._borrar_local(self.make_and_validate_key(key, version=version))
+        self.compartida.delete_many(keys, version=version)
+        self._publicar_escritura()
+
+    def clear(self):
+        with self._almacen.lock:
+            self._almacen.datos.clear()
+        self.compartida.clear()
+        self._publicar_escritura()
+
+    # ========== MÉTRICAS ==========
+
+    def estadisticas(self):
+        """
+        Retorna una copia de los contadores del LRU local de este proceso.
+
+        Returns:
+            Dict con hits_locales, hits_compartidos, misses, evictions,
+            invalidaciones, entradas_locales y ratio_hits_locales.
+        """
+        almacen = self._almacen
+        with almacen.lock:
+            datos = dict(almacen.estadisticas)
+            datos['entradas_locales'] = len(almacen.datos)
+        lecturas = datos['hits_locales'] + datos['hits_compartidos'] + datos['misses']
+        datos['ratio_hits_locales'] = round(datos['hits_locales'] / lecturas, 4) if lecturas else 0.0
+        return datos
@@ -0,0 +1,62 @@
+"""
+Recorrido de querysets por llave (keyset), compartido por las apps del proyecto.
+
+``recorrer_keyset`` lee un queryset completo por lotes ``WHERE (campos) >
+(último) ORDER BY campos LIMIT n``: memoria constante y sin cursores del
+servidor. Lo usan la exportación de la bitácora, el listado de asignaciones
+y los listados en streaming (streaming.py); la paginación por cursor de
+programacion_turnos (services/paginacion.py) usa las mismas condiciones.
+"""
+from django.db.models import Q
+
+
+def campo_modelo(modelo, nombre):
+    return modelo._meta.pk if nombre == 'pk' else modelo._meta.get_field(nombre)
+
+
+def valor_campo(objeto, nombre):
+    # Instancias o filas de values() (cuyas claves son los nombres de los campos)
+    if isinstance(objeto, dict):
+        return objeto[nombre]
+    return getattr(objeto, 'pk' if nombre == 'pk' else campo_modelo(type(objeto), nombre).attname)
+
+
+def condicion_mas_alla(campos, valores, operador):
+    # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y)
+    condicion = Q()
+    for i, nombre in enumerate(campos):
+        iguales = {anterior: valor for anterior, valor in zip(campos[:i], valores[:i])}
+        condicion |= Q(**iguales, **{f'{nombre}__{operador}': valores[i]})
+    # Cota redundante sobre la primera columna: con ella el motor busca el rango en el
+    # índice en vez de recorrerlo desde el principio (SQLite/MySQL no lo deducen del OR)
+    return Q(**{f'{campos[0]}__{operador}e': valores[0]}) & condicion
+
+
+def recorrer_keyset(queryset, campos=('fecha_hora', 'id'), tamano=2000, descendente=False):
+    """
+    Recorre el queryset completo por lotes de llave, con memoria constante.
+
+    A diferencia de ``iterator()`` no depende de cursores del servidor (el driver
+    de MySQL trae el resultado completo a memoria): cada lote es una consulta
+    ``WHERE (campos) > (último) ORDER BY campos LIMIT tamano`` sobre el índice.
+
+    Args:
+        queryset: QuerySet de instancias o de ``values()`` (las filas deben incluir ``campos``)
+        campos: Columnas de orden; la última debe ser única
+        tamano: Filas por consulta
+        descendente: Recorrer de mayor a menor
+
+    Yields:
+        Cada fila del queryset, en orden
+    """
+    orden = [f'-{nombre}' if descendente else nombre for nombre in campos]
+    operador = 'lt' if descendente else 'gt'
+    filas = queryset.order_by(*orden)
+    lote = list(filas[:tamano])
+    while lote:
+        yield from lote
+        if len(lote) < tamano:
+            return
+        ultima = lote[-1]
+        valores = [valor_campo(ultima, nombre) for nombre in campos]
+        lote = list(filas.filter(condicion_mas_alla(campos, valores, operador))[:tamano])
@@ -0,0 +1,195 @@
+"""
+Métricas de ejecución en formato de texto de Prometheus.
+
+Registro mínimo de contadores, medidores (gauges) e histogramas con etiquetas,
+sin dependencias externas. Los valores viven en memoria del proceso: cada
+worker expone los suyos en ``/metrics`` y Prometheus los agrega por instancia.
+
+Uso::
+
+    from horas_sistema.metricas import GENERACION_DURACION
+
+    inicio = time.perf_counter()
+    ...
+    GENERACION_DURACION.observe(time.perf_counter() - inicio)
+"""
+import threading
+
+_BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+_BUCKETS_FILAS = (10, 100, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _formatear_etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, descripcion, etiquetas=()):
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        self._valores = {}
+
+    def _clave(self, labels):
+        return tuple(labels.get(e, '') for e in self.etiquetas)
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.descripcion}', f'# TYPE {self.nombre} {self.tipo}']
+        with self._lock:
+            items = list(self._valores.items())
+        for clave, valor in items:
+            lineas.extend(self._lineas(clave, valor))
+        return lineas
+
+    def _lineas(self, clave, valor):
+        return [f'{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {valor}']
+
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def inc(self, cantidad=1, **labels):
+        clave = self._clave(labels)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def fijar(self, total, **labels):
+        """Copia el total acumulado que lleva otro componente (para los colectores)."""
+        with self._lock:
+            self._valores[self._clave(labels)] = total
+
+
+class Medidor(_Metrica):
+    tipo = 'gauge'
+
+    def set(self, valor, **labels):
+        with self._lock:
+            self._valores[self._clave(labels)] = valor
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nombre, descripcion, etiquetas=(), buckets=_BUCKETS_SEGUNDOS):
+        super().__init__(nombre, descripcion, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor, **labels):
+        clave = self._clave(labels)
+        with self._lock:
+            datos = self._valores.get(clave)
+            if datos is None:
+                datos = self._valores[clave] = [[0] * len(self.buckets), 0, 0.0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    datos[0][i] += 1
+            datos[1] += 1
+            datos[2] += valor
+
+    def _lineas(self, clave, datos):
+        conteos, total, suma = datos
+        lineas = []
+        for limite, conteo in zip(self.buckets, conteos):
+            etiquetas = _formatear_etiquetas(self.etiquetas, clave, f'le="{limite}"')
+            lineas.append(f'{self.nombre}_bucket{etiquetas} {conteo}')
+        etiquetas_inf = _formatear_etiquetas(self.etiquetas, clave, 'le="+Inf"')
+        etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+        lineas.append(f'{self.nombre}_bucket{etiquetas_inf} {total}')
+        lineas.append(f'{self.nombre}_sum{etiquetas} {suma}')
+        lineas.append(f'{self.nombre}_count{etiquetas} {total}')
+        return lineas
+
+
+class Registro:
+    """Conjunto de métricas más colectores que se evalúan al exponer."""
+
+    def __init__(self):
+        self._metricas = []
+        self._colectores = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def agregar_colector(self, funcion):
+        """``funcion`` se llama en cada scrape para actualizar medidores."""
+        self._colectores.append(funcion)
+        return funcion
+
+    def exponer(self):
+        for colector in self._colectores:
+            try:
+                colector()
+            except Exception as e:
+                print(f"❌ Error en colector de métricas {colector.__name__}: {e}")
+        lineas = []
+        for metrica in self._metricas:
+            lineas.extend(metrica.exponer())
+        return '\n'.join(lineas) + '\n'
+
+
+registro = Registro()
+
+# ========== HTTP Y BASE DE DATOS ==========
+REQUEST_DURACION = registro.registrar(Histograma(
+    'horas_http_request_duracion_segundos', 'Latencia de requests por nombre de URL',
+    ('url_name', 'metodo')))
+REQUEST_TOTAL = registro.registrar(Contador(
+    'horas_http_requests_total', 'Requests atendidos por nombre de URL y estado',
+    ('url_name', 'metodo', 'estado')))
+REQUEST_CONSULTAS = registro.registrar(Histograma(
+    'horas_db_consultas_por_request', 'Consultas SQL ejecutadas por request',
+    ('url_name',), buckets=_BUCKETS_CONSULTAS))
+
+# ========== CACHÉ ==========
+# La fracción de hits locales se calcula en Prometheus a partir de los contadores
+CACHE_EVENTOS = registro.registrar(Contador(
+    'horas_cache_eventos_total', 'Eventos del LRU local de la caché de dos niveles',
+    ('alias', 'evento')))
+CACHE_ENTRADAS = registro.registrar(Medidor(
+    'horas_cache_entradas_locales', 'Entradas en el LRU local de la caché de dos niveles',
+    ('alias',)))
+
+# ========== PROGRAMACIÓN ==========
+GENERACION_DURACION = registro.registrar(Histograma(
+    'horas_generacion_asignaciones_duracion_segundos', 'Duración de generar_asignaciones'))
+GENERACION_FILAS = registro.registrar(Histograma(
+    'horas_generacion_asignaciones_filas', 'Asignaciones creadas por generación',
+    buckets=_BUCKETS_FILAS))
+EXTENSION_DURACION = registro.registrar(Histograma(
+    'horas_extension_programacion_duracion_segundos', 'Duración de la extensión de programaciones'))
+EXTENSION_FILAS = registro.registrar(Histograma(
+    'horas_extension_programacion_filas', 'Asignaciones creadas por extensión',
+    buckets=_BUCKETS_FILAS))
+
+# ========== BITÁCORA ==========
+BITACORA_REGISTROS = registro.registrar(Contador(
+    'horas_bitacora_registros_total', 'Registros escritos en la bitácora',
+    ('modulo', 'tipo_accion')))
+
+
+@registro.agregar_colector
+def _colectar_cache():
+    from django.conf import settings
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if not hasattr(cache, 'estadisticas'):
+            continue
+        datos = cache.estadisticas()
+        for evento in ('hits_locales', 'hits_compartidos', 'misses', 'evictions', 'invalidaciones'):
+            CACHE_EVENTOS.fijar(datos[evento], alias=alias, evento=evento)
+        CACHE_ENTRADAS.set(datos['entradas_locales'], alias=alias)
+
@@ -52,8 +52,21 @@ DATABASES = {
 }
 
 # Cache Configuration
+# 'default' sirve las claves calientes desde un LRU en memoria del proceso y
+# recurre a 'compartida' (tabla django_cache) cuando no las tiene.
 CACHES = {
     'default': {
+        'BACKEND': 'horas_sistema.cache.CacheDosNiveles',
+        'LOCATION': 'principal',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED_ALIAS': 'compartida',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 30,
+            'VERSION_CHECK_INTERVAL': 2,
+        }
+    },
+    'compartida': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'django_cache',
         'TIMEOUT': 300,
@@ -65,32 +78,48 @@ CACHES = {
 }
 
 # Logging Configuration 
+# Para encontrar consultas costosas use el perfilador SQL (SQL_PROFILER_ENABLED)
+# en lugar de registrar cada sentencia de django.db.backends en un archivo.
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'handlers': {
-        'db_file': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': str(LOGS_DIR / 'db.log'),
-            'formatter': 'verbose',
-        }
-    },
     'formatters': {
         'verbose': {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         }
     },
-    'loggers': {
-        'django.db.backends': {
-            'handlers': ['db_file'],
-            'level': 'DEBUG',
-            'propagate': False,
-        }
-    }
 }
 
+# Perfilador SQL por request (headers X-DB-Queries/X-DB-Time y reporte en /admin/perfil-sql/)
+SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER_ENABLED', 'False') == 'True'
+SQL_PROFILER_SLOWEST = 5            # sentencias más lentas guardadas por request
+SQL_PROFILER_WORST_PER_URL = 10     # peores requests guardados por nombre de URL
+SQL_PROFILER_MAX_URLS = 200
+SQL_PROFILER_N1_THRESHOLD = 5       # repeticiones de una misma huella para resaltarla como N+1
+
+# Captura cProfile + tracemalloc bajo demanda (staff, ?_profile=1 o header X-Profile: 1)
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_CAPTURES = 50         # capturas conservadas en disco (las más antiguas se eliminan)
+PROFILING_TOP_ALLOCATIONS = 25      # sitios de asignación listados por captura
+PROFILING_TRACEMALLOC_FRAMES = 1
+
+# Archivo de la bitácora (manage.py archivar_bitacora): los registros más antiguos que
+# la retención pasan a archivos JSONL comprimidos, uno por mes
+BITACORA_ARCHIVO_DIR = BASE_DIR / 'archivo_bitacora'
+BITACORA_RETENCION_DIAS = int(os.getenv('BITACORA_RETENCION_DIAS', '365'))
+BITACORA_ARCHIVO_LOTE = 1000        # registros escritos y eliminados por transacción
+
+# Cargas masivas de asignaciones: horas durante las que se recuerda cada Idempotency-Key
+IDEMPOTENCIA_HORAS = 24
+
+# Importación masiva de terceros: procesos para derivar las contraseñas de los usuarios creados
+IMPORTACION_PROCESOS_HASH = int(os.getenv('IMPORTACION_PROCESOS_HASH', str(min(4, os.cpu_count() or 1))))
+
+# Métricas en formato Prometheus (/metrics). Si METRICS_TOKEN está definido,
+# el scrape debe enviar 'Authorization: Bearer <token>'.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 # Database Backup Settings
 DBBACKUP_STORAGE = 'django.core.files.storage.FileSystemStorage'
 DBBACKUP_STORAGE_OPTIONS = {'location': str(BACKUP_DIR)}
@@ -116,6 +145,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'corsheaders',
     'rest_framework',
+    'rest_framework_simplejwt.token_blacklist',  # logout invalida el refresh token
     'drf_yasg',
     'usuarios',
     'empresas',
@@ -124,6 +154,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'programacion_turnos.middleware.MetricasMiddleware',  # Primero: mide el request completo
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -132,6 +163,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'programacion_turnos.middleware.RequestMiddleware',  # Middleware para bitácora
+    'programacion_turnos.middleware.PerfilSQLMiddleware',  # Solo activo con SQL_PROFILER_ENABLED
 ]
 
 ROOT_URLCONF = 'horas_sistema.urls'
@@ -256,8 +288,9 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        # Ventana deslizante en memoria con consolidación periódica (ver horas_sistema/throttling.py)
+        'horas_sistema.throttling.UsuarioRateThrottle',
+        'horas_sistema.throttling.AnonimoRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '1000/day',  # Ajusta según lo necesario
@@ -266,6 +299,10 @@ REST_FRAMEWORK = {
     # Con esto, se limita la cantidad de peticiones que pueden realizar usuarios autenticados y anónimos.
 }
 
+# Throttling: caché donde se consolidan los contadores y cada cuántos segundos
+THROTTLE_CACHE_ALIAS = 'compartida'
+THROTTLE_SYNC_INTERVAL = 5
+
 # Configuración de JWT
 #tiempo de vida del token de sesion
 SIMPLE_JWT = {
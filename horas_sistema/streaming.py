@@ -0,0 +1,84 @@
+"""
+Listados de la API enviados como un arreglo JSON en streaming.
+
+``ListadoStreamingMixin`` agrega a un ViewSet el modo ``?stream=1``: en vez
+de serializar todo el queryset y renderizar la lista completa, recorre el
+queryset por lotes de llave (``recorrer_keyset``: sin OFFSET ni cursores del
+servidor, que el driver de MySQL traería completos a memoria), serializa
+cada lote con el serializer del ViewSet y envía el arreglo con
+``StreamingHttpResponse``. La memoria queda acotada por el tamaño del lote,
+sin importar cuántas filas tenga el listado.
+
+Es para clientes que quieren el listado completo sin paginar. Una vez
+enviado el primer lote la respuesta ya es 200: un error a mitad del
+recorrido corta el arreglo (JSON inválido) en vez de cambiar el código.
+"""
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .keyset import recorrer_keyset
+
+VALORES_ACTIVO = ('1', 'true', 'si')
+
+
+def pide_streaming(request):
+    return (request.query_params.get('stream') or '').lower() in VALORES_ACTIVO
+
+
+def arreglo_json(lotes):
+    """
+    Fragmentos de un arreglo JSON a partir de lotes de filas ya serializadas.
+
+    Yields:
+        Un fragmento por lote ("[", filas separadas por comas y "]" al final)
+    """
+    yield '['
+    primero = True
+    for lote in lotes:
+        if not lote:
+            continue
+        texto = ','.join(json.dumps(fila, cls=JSONEncoder, ensure_ascii=False) for fila in lote)
+        yield texto if primero else ',' + texto
+        primero = False
+    yield ']'
+
+
+def respuesta_streaming(lotes):
+    return StreamingHttpResponse(arreglo_json(lotes), content_type='application/json')
+
+
+def en_lotes(filas, tamano):
+    """Agrupa un iterable en listas de hasta ``tamano`` elementos."""
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class ListadoStreamingMixin:
+    """
+    ``list`` con ``?stream=1`` envía el listado completo en streaming, ordenado por llave primaria.
+
+    Los filtros del ViewSet (``filter_queryset``) se aplican igual; la
+    paginación no. Los ``select_related``/``prefetch_related`` del queryset se
+    resuelven por lote.
+    """
+    tamano_lote_streaming = 500
+
+    def list(self, request, *args, **kwargs):
+        if not pide_streaming(request):
+            return super().list(request, *args, **kwargs)
+        return respuesta_streaming(self.lotes_streaming())
+
+    def lotes_streaming(self):
+        """Lotes de filas serializadas del listado (los ViewSets con listado propio lo redefinen)."""
+        queryset = self.filter_queryset(self.get_queryset())
+        for lote in en_lotes(recorrer_keyset(queryset, ('pk',), tamano=self.tamano_lote_streaming),
+                             self.tamano_lote_streaming):
+            yield self.get_serializer(lote, many=True).data
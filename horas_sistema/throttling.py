@@ -0,0 +1,219 @@
+"""
+Throttling de la API sin escrituras a la base de datos por cada petición.
+
+Los throttles de DRF guardan en la caché una lista con la marca de tiempo de
+cada petición, lo que con ``DatabaseCache`` implica un SELECT y un UPDATE por
+llamada. Aquí se usa un contador de ventana deslizante:
+
+- Cada proceso mantiene en memoria, por clave (scope + usuario/IP), el conteo
+  global de la ventana actual y de la anterior, más las peticiones locales que
+  aún no se han consolidado.
+- El conteo estimado es ``anterior * (1 - fracción transcurrida) + actual``,
+  la aproximación clásica de ventana deslizante con dos ventanas fijas.
+- Las peticiones pendientes se suman con ``incr`` en la caché compartida al
+  acumular un 5% del límite, o cada ``THROTTLE_SYNC_INTERVAL`` segundos desde
+  un hilo del proceso que consolida todas las claves a la vez: con tráfico
+  escaso la petición no escribe en la caché. Cada intervalo, la petición lee
+  el total de todos los workers con un ``get``.
+- Las claves que salen de memoria (más de ``_MAX_CLAVES``) se consolidan
+  antes de descartarlas.
+
+Las tasas configuradas en ``DEFAULT_THROTTLE_RATES`` ('user', 'anon') se
+mantienen sin cambios.
+"""
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+# Estado por clave, compartido por todos los hilos del proceso
+_estados = OrderedDict()
+_estados_lock = threading.Lock()
+_MAX_CLAVES = 10000
+# Proceso en que corre el hilo consolidador (tras un fork hay que iniciar otro)
+_pid_consolidador = None
+
+
+class _EstadoVentana:
+    __slots__ = ('ventana', 'actual', 'anterior', 'pendientes', 'proxima_sync', 'duracion', 'lock')
+
+    def __init__(self, duracion):
+        self.lock = threading.Lock()
+        self.duracion = duracion  # segundos de la ventana fija (según la tasa del scope)
+        self.ventana = None    # índice de la ventana fija (None hasta la primera lectura)
+        self.actual = 0        # total global de la ventana actual (última consolidación)
+        self.anterior = 0      # total global de la ventana anterior
+        self.pendientes = 0    # peticiones locales aún no consolidadas
+        self.proxima_sync = 0.0
+
+
+def _cache_compartida():
+    return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'compartida')]
+
+
+def _intervalo_sync():
+    return getattr(settings, 'THROTTLE_SYNC_INTERVAL', 5)
+
+
+def _consolidar(clave, estado):
+    """Suma las peticiones pendientes en la caché compartida y guarda el total global (con ``estado.lock``)."""
+    cache = _cache_compartida()
+    clave_ventana = f'{clave}:{estado.ventana}'
+    pendientes = estado.pendientes
+    estado.pendientes = 0
+    timeout = estado.duracion * 2
+    try:
+        if not cache.add(clave_ventana, pendientes, timeout=timeout):
+            estado.actual = cache.incr(clave_ventana, pendientes)
+        else:
+            estado.actual = pendientes
+    except ValueError:
+        # La clave expiró entre add() e incr(): reiniciar la ventana
+        cache.set(clave_ventana, pendientes, timeout=timeout)
+        estado.actual = pendientes
+
+
+def consolidar_pendientes():
+    """Consolida las peticiones pendientes de todas las claves del proceso."""
+    with _estados_lock:
+        estados = [(clave, estado) for clave, estado in _estados.items() if estado.pendientes]
+    for clave, estado in estados:
+        with estado.lock:
+            if estado.pendientes:
+                _consolidar(clave, estado)
+
+
+def _consolidar_periodicamente():
+    while True:
+        time.sleep(_intervalo_sync())
+        # Con DatabaseCache el hilo tiene su propia conexión: se renueva si el servidor la cerró
+        close_old_connections()
+        try:
+            consolidar_pendientes()
+        except Exception:
+            # Caché compartida caída: los pendientes que no alcanzaron a escribirse se pierden,
+            # el hilo sigue para el siguiente intervalo
+            continue
+
+
+def _iniciar_consolidador():
+    global _pid_consolidador
+    pid = os.getpid()
+    if _pid_consolidador == pid:
+        return
+    with _estados_lock:
+        if _pid_consolidador == pid:
+            return
+        _pid_consolidador = pid
+    threading.Thread(target=_consolidar_periodicamente, name='throttle-consolidador', daemon=True).start()
+
+
+def _consolidar_al_salir():
+    try:
+        consolidar_pendientes()
+    except Exception:
+        # Al cerrar el intérprete la caché puede no estar disponible (tabla de DatabaseCache
+        # inexistente, conexión cerrada): los pendientes se pierden sin ensuciar la salida
+        pass
+
+
+atexit.register(_consolidar_al_salir)
+
+
+class VentanaDeslizanteMixin:
+    """
+    Reemplaza el historial en caché de ``SimpleRateThrottle`` por contadores
+    en memoria con consolidación periódica a la caché compartida.
+    """
+    cache_format = 'throttle_vd_%(scope)s_%(ident)s'
+
+    def _obtener_estado(self, clave):
+        with _estados_lock:
+            estado = _estados.get(clave)
+            if estado is None:
+                estado = _EstadoVentana(self.duration)
+                _estados[clave] = estado
+            _estados.move_to_end(clave)
+            expulsados = []
+            while len(_estados) > _MAX_CLAVES:
+                expulsados.append(_estados.popitem(last=False))
+        # Fuera del lock global: consolidar no debe frenar a las demás claves
+        for clave_expulsada, expulsado in expulsados:
+            with expulsado.lock:
+                if expulsado.pendientes:
+                    _consolidar(clave_expulsada, expulsado)
+        return estado
+
+    def _refrescar(self, clave, estado, ahora):
+        """Lee el total global de la ventana (las peticiones de los demás workers)."""
+        estado.actual = max(estado.actual, self.cache_compartida.get(f'{clave}:{estado.ventana}', 0))
+        estado.proxima_sync = ahora + _intervalo_sync()
+
+    @property
+    def cache_compartida(self):
+        return _cache_compartida()
+
+    def _rotar_ventana(self, clave, estado, ventana):
+        """Al cambiar de ventana fija, la actual pasa a ser la anterior."""
+        if estado.pendientes:
+            _consolidar(clave, estado)
+        if estado.ventana is not None and ventana == estado.ventana + 1:
+            estado.anterior = estado.actual
+        else:
+            estado.anterior = self.cache_compartida.get(f'{clave}:{ventana - 1}', 0)
+        estado.ventana = ventana
+        estado.actual = self.cache_compartida.get(f'{clave}:{ventana}', 0)
+        estado.proxima_sync = self.now + _intervalo_sync()
+
+    def _conteo_estimado(self, estado, ahora):
+        transcurrido = (ahora % self.duration) / self.duration
+        return estado.anterior * (1 - transcurrido) + estado.actual + estado.pendientes
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        _iniciar_consolidador()
+        self.now = self.timer()
+        ventana = int(self.now // self.duration)
+        estado = self._obtener_estado(self.key)
+
+        with estado.lock:
+            if ventana != estado.ventana:
+                self._rotar_ventana(self.key, estado, ventana)
+            elif self.now >= estado.proxima_sync:
+                self._refrescar(self.key, estado, self.now)
+
+            self.conteo = self._conteo_estimado(estado, self.now)
+            if self.conteo >= self.num_requests:
+                return self.throttle_failure()
+
+            estado.pendientes += 1
+            if estado.pendientes >= max(1, self.num_requests // 20):
+                _consolidar(self.key, estado)
+        return True
+
+    def wait(self):
+        restante = self.duration - (self.now % self.duration)
+        disponibles = self.num_requests - getattr(self, 'conteo', 0)
+        if disponibles > 0:
+            return restante / disponibles
+        return restante
+
+
+class UsuarioRateThrottle(VentanaDeslizanteMixin, UserRateThrottle):
+    """Mismo scope y tasa que ``UserRateThrottle`` ('user')."""
+
+
+class AnonimoRateThrottle(VentanaDeslizanteMixin, AnonRateThrottle):
+    """Mismo scope y tasa que ``AnonRateThrottle`` ('anon')."""
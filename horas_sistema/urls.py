@@ -8,7 +8,9 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
-from programacion_turnos.views import asignacion_turno_edit_view
+from programacion_turnos.views import (
+    asignacion_turno_edit_view, perfil_sql_admin, perfiles_capturados_admin, perfil_captura_descarga,
+)
 from . import views
 
 schema_view = get_schema_view(
@@ -38,11 +40,17 @@ urlpatterns = [
     
     # ========== ADMINISTRACIÓN ==========
     path('admin/logout/', views.custom_logout, name='admin_logout'),  
+    path('admin/perfil-sql/', admin.site.admin_view(perfil_sql_admin), name='perfil_sql_admin'),
+    path('admin/perfiles/', admin.site.admin_view(perfiles_capturados_admin), name='perfiles_capturados_admin'),
+    path('admin/perfiles/<str:nombre_archivo>', admin.site.admin_view(perfil_captura_descarga), name='perfil_captura_descarga'),
     path('admin/', admin.site.urls),
     
     # ========== DASHBOARD WEB ==========
     path('welcome/', views.welcome_view, name='welcome'),
     path('logout/', views.custom_logout, name='logout'),
+
+    # ========== MÉTRICAS (PROMETHEUS) ==========
+    path('metrics', views.metrics_view, name='metrics'),
     
     # ========== APLICACIONES ==========
     path('empresas/', include('empresas.urls')),
@@ -1,6 +1,11 @@
 from django.contrib.auth import logout
 from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from .metricas import registro
 
 from empresas.models import Empresa, Proyecto, CentroOperativo
 from usuarios.models import Tercero
@@ -16,6 +21,15 @@ def home_redirect(request):
         return redirect('welcome')
     return redirect('admin:index')
 
+def metrics_view(request):
+    """Expone las métricas del proceso en formato de texto de Prometheus"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        enviado = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ').strip()
+        if not constant_time_compare(enviado, token):
+            return HttpResponse(status=401)
+    return HttpResponse(registro.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @login_required
 def welcome_view(request):
     context = {
@@ -2,11 +2,12 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.views.generic import ListView, DetailView
 from rest_framework import generics, viewsets
+from horas_sistema.streaming import ListadoStreamingMixin
 from .models import ModeloTurno
 from .serializers import ModeloTurnoSerializer
 from .forms import ModeloTurnoForm
 
-class ModeloTurnoViewSet(viewsets.ModelViewSet):
+class ModeloTurnoViewSet(ListadoStreamingMixin, viewsets.ModelViewSet):
     queryset = ModeloTurno.objects.all()
     serializer_class = ModeloTurnoSerializer
 
@@ -1,15 +1,27 @@
 from django.contrib import admin
 from django import forms
 from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.http import Http404
 from .models import ProgramacionHorario, AsignacionTurno, Bitacora, LetraTurno, CodigoTurno
 from .serializers import ProgramacionExtensionSerializer, generar_asignaciones
+from .services.conflictos_turnos import conflictos_para_claves
+from .services.extension_programacion import extender_programacion
+from .services.historial_objeto import historial_objeto, resolver_modelo
+from .services.indice_bitacora import filtrar_busqueda
+from .services.archivo_bitacora import total_archivado
+from .services.paginacion import SIGUIENTE, PaginadorConteoEstimado
+from .services.resumen_bitacora import total_resumen
+from .services.revision_programacion import agrupar_invalidaciones
+from django.utils.functional import cached_property
 from datetime import timedelta
 from django.urls import path, reverse
 from django.shortcuts import redirect, get_object_or_404, render
 from django.utils.html import format_html
 from usuarios.models import Tercero, CodigoTurno
-from .utils import programar_turnos
+from .utils import programar_turnos, intercambiar_letras_terceros
 from .services.holiday_service import get_holidays_for_range
+from .perfilador_python import perfilable
 
 class ProgramacionExtensionForm(forms.Form):
     fecha_inicio_ext = forms.DateField(label="Fecha de inicio de extensión")
@@ -34,6 +46,7 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
         ]
         return custom_urls + urls
 
+    @perfilable
     def editar_malla_view(self, request, programacion_id):
         from datetime import datetime, timedelta
 
@@ -47,19 +60,31 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
                 estado_tercero=1 )  # Solo activos
             fechas_qs = [programacion.fecha_inicio + timedelta(days=i) for i in range((programacion.fecha_fin - programacion.fecha_inicio).days + 1)]
 
+            enviados = {}
             for emp in empleados_qs:
                 for fecha in fechas_qs:
                     key = f"letra_{emp.id_tercero}_{fecha.strftime('%Y-%m-%d')}"
                     if key in request.POST:
-                        letra = request.POST.get(key, '').strip().upper()
-                        AsignacionTurno.objects.update_or_create(
-                            programacion=programacion,
-                            tercero=emp,
-                            dia=fecha,
-                            defaults={'letra_turno': letra}
-                        )
-                        cambios += 1
-
+                        enviados[(emp, fecha)] = request.POST.get(key, '').strip().upper()
+
+            # Una celda no se guarda si el tercero ya tiene turno ese día en otra programación activa
+            ocupadas = conflictos_para_claves(
+                {(emp.id_tercero, fecha) for emp, fecha in enviados}, excluir_programacion=programacion
+            )
+            with agrupar_invalidaciones():
+                for (emp, fecha), letra in enviados.items():
+                    if (emp.id_tercero, fecha) in ocupadas:
+                        continue
+                    AsignacionTurno.objects.update_or_create(
+                        programacion=programacion,
+                        tercero=emp,
+                        dia=fecha,
+                        defaults={'letra_turno': letra}
+                    )
+                    cambios += 1
+
+            if ocupadas:
+                messages.warning(request, f"Se omitieron {len(ocupadas)} celdas: el empleado ya tiene turno ese día en otra programación.")
             if cambios > 0:
                 messages.success(request, f"Malla actualizada correctamente. Se procesaron {cambios} celdas.")
             else:
@@ -178,23 +203,19 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
         filas_modelo = modelo_turno.letras.values_list('fila', flat=True).distinct().order_by('fila')
 
         # Obtener asignaciones para agrupar por fila
-        asignaciones = AsignacionTurno.objects.filter(programacion=programacion)
+        asignaciones = AsignacionTurno.objects.filter(programacion=programacion).values_list('fila', 'tercero_id')
         filas_empleados = {}
-        for asignacion in asignaciones:
-            fila = asignacion.fila
-            tercero_id = asignacion.tercero_id
+        for fila, tercero_id in asignaciones:
             if fila not in filas_empleados:
                 filas_empleados[fila] = set()
             filas_empleados[fila].add(tercero_id)
 
         # Crear bloques basados en las filas del modelo
+        terceros = Tercero.objects.in_bulk({t for ids in filas_empleados.values() for t in ids})
         empleados_agrupados = []
         for fila in filas_modelo:
             if fila in filas_empleados:
-                terceros_en_fila = []
-                for tercero_id in filas_empleados[fila]:
-                    tercero = Tercero.objects.get(id_tercero=tercero_id)
-                    terceros_en_fila.append(tercero)
+                terceros_en_fila = [terceros[tercero_id] for tercero_id in filas_empleados[fila] if tercero_id in terceros]
                 empleados_agrupados.append(terceros_en_fila)
 
         if request.method == 'POST':
@@ -206,27 +227,13 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
                     tercero1 = Tercero.objects.get(pk=tercero1_id)
                     tercero2 = Tercero.objects.get(pk=tercero2_id)
                     
-                    if tercero1.centro_operativo != tercero2.centro_operativo:
+                    if tercero1.centro_operativo_id != tercero2.centro_operativo_id:
                         messages.error(request, "Los terceros deben pertenecer al mismo centro operativo.")
                         return redirect(request.path)
                     
-                    asignaciones1 = AsignacionTurno.objects.filter(programacion=programacion, tercero=tercero1).order_by('dia')
-                    asignaciones2 = AsignacionTurno.objects.filter(programacion=programacion, tercero=tercero2).order_by('dia')
-
-                    letras_t1 = {a.dia: a.letra_turno for a in asignaciones1}
-                    letras_t2 = {a.dia: a.letra_turno for a in asignaciones2}
-
-                    cambios_realizados = 0
-                    for asig in asignaciones1:
-                        if asig.dia in letras_t2:
-                            asig.letra_turno = letras_t2[asig.dia]
-                            asig.save()
-                            cambios_realizados += 1
-                    for asig in asignaciones2:
-                        if asig.dia in letras_t1:
-                            asig.letra_turno = letras_t1[asig.dia]
-                            asig.save()
-                            cambios_realizados += 1
+                    cambios_realizados, _, _ = intercambiar_letras_terceros(
+                        programacion, tercero1, tercero2, request=request
+                    )
 
                     messages.success(request, f"Letras de turno intercambiadas correctamente: {tercero1} <-> {tercero2}. {cambios_realizados} cambios realizados.")
                     return redirect(request.path)
@@ -244,19 +251,8 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
         })
 
     def save_model(self, request, obj, form, change):
-        # Obtener empleados del centro operativo con el cargo específico y activos
-        from empresas.models import AsignacionTerceroEmpresa
-        
-        asignaciones_centro = AsignacionTerceroEmpresa.objects.filter(
-            centro_operativo=obj.centro_operativo,
-            activo=True
-        )
-        
-        empleados = [
-            asignacion.tercero for asignacion in asignaciones_centro
-            if asignacion.tercero.cargo_predefinido_id == obj.cargo_predefinido.id_cargo_predefinido
-            and asignacion.tercero.estado_tercero == 1
-        ]
+        # Empleados elegibles: los mismos que usará generar_asignaciones (queda en caché para ella)
+        empleados = obj.disponibilidad_terceros(obj.fecha_inicio, obj.fecha_fin).terceros
         
         from django.contrib import messages
         
@@ -285,6 +281,7 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
         except ValueError as e:
             messages.error(request, str(e))
 
+    @perfilable
     def extender_programacion_view(self, request, programacion_id):
         programacion = self.get_object(request, programacion_id)
         return self.extender_programacion(request, queryset=self.model.objects.filter(pk=programacion_id))
@@ -300,70 +297,18 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
                 data = form.cleaned_data
                 serializer = ProgramacionExtensionSerializer(data=data)
                 if serializer.is_valid():
-                    fecha_inicio_ext = serializer.validated_data['fecha_inicio_ext']
-                    fecha_fin_ext = serializer.validated_data['fecha_fin_ext']
-                    if fecha_inicio_ext <= programacion.fecha_fin:
-                        self.message_user(request, "La fecha de inicio de la extensión debe ser posterior al fin de la programación actual.", level=messages.ERROR)
-                        return redirect(request.path)
-                    letras_qs = LetraTurno.objects.filter(modelo_turno=programacion.modelo_turno)
-                    matriz = {}
-                    max_fila = 0
-                    max_col = 0
-                    for letra in letras_qs:
-                        matriz[(letra.fila, letra.columna)] = letra.valor
-                        max_fila = max(max_fila, letra.fila)
-                        max_col = max(max_col, letra.columna)
-                    if not matriz:
-                        self.message_user(request, "No se encontraron letras de turno para el modelo.", level=messages.ERROR)
-                        return redirect(request.path)
-                    ultimas_posiciones = {}
-                    for asignacion in AsignacionTurno.objects.filter(programacion=programacion).order_by('tercero_id', '-dia'):
-                        if asignacion.tercero.id_tercero not in ultimas_posiciones:
-                            ultimas_posiciones[asignacion.tercero.id_tercero] = {
-                                'fila': asignacion.fila,
-                                'columna': asignacion.columna,
-                                'dia': asignacion.dia
-                            }
-                    dias_ext = (fecha_fin_ext - fecha_inicio_ext).days + 1
-                    nuevas_asignaciones = []
-                    empleados_con_asignacion = set()
-                    for i in range(dias_ext):
-                        fecha = fecha_inicio_ext + timedelta(days=i)
-                        empleados_activos_en_fecha = programacion.obtener_terceros_activos(fecha)
-                        for empleado in empleados_activos_en_fecha:
-                            if empleado.id_tercero in ultimas_posiciones:
-                                ultima_pos = ultimas_posiciones[empleado.id_tercero]
-                                fila = ultima_pos['fila']
-                                dias_desde_ultima = (fecha - ultima_pos['dia']).days
-                                nueva_columna = (ultima_pos['columna'] + dias_desde_ultima) % (max_col + 1)
-                            else:
-                                fila = len(ultimas_posiciones) % (max_fila + 1)
-                                nueva_columna = i % (max_col + 1)
-                            letra = matriz.get((fila, nueva_columna))
-                            if letra:
-                                nuevas_asignaciones.append(
-                                    AsignacionTurno(
-                                        programacion=programacion,
-                                        tercero=empleado,
-                                        dia=fecha,
-                                        letra_turno=letra,
-                                        fila=fila,
-                                        columna=nueva_columna
-                                    )
-                                )
-                                empleados_con_asignacion.add(empleado.id_tercero)
-                                ultimas_posiciones[empleado.id_tercero] = {
-                                    'fila': fila,
-                                    'columna': nueva_columna,
-                                    'dia': fecha
-                                }
-                    if not nuevas_asignaciones:
-                        self.message_user(request, "No hay empleados activos en ninguna fecha del rango de extensión.", level=messages.ERROR)
+                    try:
+                        empleados, omitidas = extender_programacion(
+                            programacion,
+                            serializer.validated_data['fecha_inicio_ext'],
+                            serializer.validated_data['fecha_fin_ext']
+                        )
+                    except ValueError as e:
+                        self.message_user(request, str(e), level=messages.ERROR)
                         return redirect(request.path)
-                    AsignacionTurno.objects.bulk_create(nuevas_asignaciones)
-                    programacion.fecha_fin = fecha_fin_ext
-                    programacion.save(update_fields=['fecha_fin'])
-                    self.message_user(request, f"Extensión realizada correctamente para {len(empleados_con_asignacion)} empleados.", level=messages.SUCCESS)
+                    self.message_user(request, f"Extensión realizada correctamente para {empleados} empleados.", level=messages.SUCCESS)
+                    if omitidas:
+                        self.message_user(request, f"Se omitieron {omitidas} días en que el empleado ya tiene turno en otra programación.", level=messages.WARNING)
                     return redirect(request.path)
                 else:
                     self.message_user(request, f"Error de validación: {serializer.errors}", level=messages.ERROR)
@@ -380,10 +325,12 @@ class ProgramacionHorarioAdmin(admin.ModelAdmin):
         extra_context['extra_button'] = format_html(
             '<a class="button" href="{}">Extender programación</a> '
             '<a class="button" href="{}">Editar malla</a> '
-            '<a class="button" href="{}">Intercambiar Terceros</a>',
+            '<a class="button" href="{}">Intercambiar Terceros</a> '
+            '<a class="button" href="{}">Historial</a>',
             reverse('admin:programacionhorario-extender', args=[object_id]),
             reverse('admin:programacionhorario-editar-malla', args=[object_id]),
-            reverse('admin:programacionhorario-intercambiar-terceros', args=[object_id])
+            reverse('admin:programacionhorario-intercambiar-terceros', args=[object_id]),
+            reverse('admin:bitacora-historial', args=['programacionhorario', object_id])
         )
         return super().change_view(request, object_id, form_url, extra_context=extra_context)
 
@@ -393,15 +340,68 @@ class AsignacionTurnoAdmin(admin.ModelAdmin):
     list_filter = ('programacion', 'tercero')
     search_fields = ('programacion__centro_operativo__nombre', 'tercero__nombre_tercero', 'tercero__apellido_tercero')
 
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['extra_button'] = format_html(
+            '<a class="button" href="{}">Historial</a>',
+            reverse('admin:bitacora-historial', args=['asignacionturno', object_id])
+        )
+        return super().change_view(request, object_id, form_url, extra_context=extra_context)
+
+class PaginadorBitacora(PaginadorConteoEstimado):
+    """Sin filtros el total sale del resumen diario menos lo archivado; con filtros, un conteo estimado."""
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            # El resumen sigue contando los registros archivados (ver archivo_bitacora.py)
+            return max(total_resumen() - total_archivado(), 0)
+        return super().count
+
+
 @admin.register(Bitacora)
 class BitacoraAdmin(admin.ModelAdmin):
     list_display = ('usuario', 'fecha_hora', 'tipo_accion', 'modulo', 'modelo_afectado', 'descripcion')
+    list_select_related = ('usuario',)
+    paginator = PaginadorBitacora
+    # Sin el segundo COUNT(*) de la tabla completa ("x de y seleccionados")
+    show_full_result_count = False
     list_filter = ('tipo_accion', 'modulo', 'usuario', 'fecha_hora')
     search_fields = ('usuario__username', 'descripcion', 'modelo_afectado')
     readonly_fields = ('usuario', 'fecha_hora', 'ip_address', 'tipo_accion', 'modulo', 'modelo_afectado', 
                        'objeto_id', 'descripcion', 'valores_anteriores', 'valores_nuevos', 'campos_modificados')
     date_hierarchy = 'fecha_hora'
-    ordering = ('-fecha_hora',)
+    ordering = ('-fecha_hora', '-id')
+
+    def get_urls(self):
+        return [
+            path('historial/<str:modelo>/<int:objeto_id>/', self.admin_site.admin_view(self.historial_view),
+                 name='bitacora-historial'),
+        ] + super().get_urls()
+
+    def historial_view(self, request, modelo, objeto_id):
+        """Historial de cambios de un objeto (y de sus hijos), paginado por cursor."""
+        modelo_clase = resolver_modelo(modelo)
+        if modelo_clase is None:
+            raise Http404(f'Modelo desconocido: {modelo}')
+        pagina = historial_objeto(
+            modelo_clase, objeto_id, cursor=request.GET.get('cursor'),
+            direccion=request.GET.get('dir', SIGUIENTE), tamano=50,
+        )
+        return render(request, 'admin/historial_objeto.html', {
+            **self.admin_site.each_context(request),
+            'title': f'Historial de {modelo_clase._meta.verbose_name} #{objeto_id}',
+            'modelo': modelo_clase._meta.verbose_name,
+            'objeto_id': objeto_id,
+            'page_obj': pagina,
+        })
+
+    def get_search_results(self, request, queryset, search_term):
+        # Descripción, modelo e IP por el índice de búsqueda (BitacoraToken); el usuario, por nombre exacto
+        if not search_term.strip():
+            return queryset, False
+        usuarios = get_user_model().objects.filter(username__iexact=search_term.strip()).values('pk')
+        return filtrar_busqueda(queryset, search_term) | queryset.filter(usuario__in=usuarios), False
 
     def has_add_permission(self, request):
         return False
@@ -9,6 +9,13 @@ from .utils import (
     capturar_valores_anteriores_automatico
 )
 
+# Modelos derivados de la bitácora (auditarlos generaría registros por cada registro)
+# y respuestas guardadas de escrituras que ya tienen su propio registro
+MODELOS_SIN_BITACORA = {
+    'programacion_turnos.bitacoraresumendiario', 'programacion_turnos.bitacoratoken',
+    'programacion_turnos.solicitudidempotente',
+}
+
 def registrar_todos_los_modelos():
     """
     Registra automáticamente todos los modelos del sistema en la bitácora
@@ -31,7 +38,7 @@ def registrar_todos_los_modelos():
             
             for model in app_config.get_models():
                 # Excluir modelos del sistema Django
-                if model._meta.app_label in apps_a_rastrear:
+                if model._meta.app_label in apps_a_rastrear and model._meta.label_lower not in MODELOS_SIN_BITACORA:
                     try:
                         # Registrar signals para el modelo
                         post_save.connect(registrar_bitacora_automatica, sender=model)
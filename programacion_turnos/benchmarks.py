@@ -0,0 +1,317 @@
+"""
+Suite de benchmarks de los caminos críticos de programación y bitácora.
+
+Cada caso se ejecuta varias veces dentro de un savepoint que se revierte al
+final, de modo que todas las repeticiones parten de los mismos datos. Por caso
+se registra:
+
+- ``tiempo_ms``: mediana de las repeticiones (``tiempo_min_ms`` el mínimo)
+- ``consultas``: consultas SQL de la última repetición
+- ``memoria_pico_kib``: pico de tracemalloc en una corrida adicional (se mide
+  aparte porque tracemalloc distorsiona los tiempos)
+
+Los resultados se guardan en JSON y se pueden comparar con un baseline; una
+métrica que empeora más allá del umbral cuenta como regresión.
+
+Se usa desde ``manage.py benchmark`` sobre datos de ``generar_dataset``.
+"""
+import contextlib
+import fnmatch
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from usuarios.models import Tercero, Usuario
+from .models import AsignacionTurno, Bitacora, ProgramacionHorario
+from .services.paginacion import codificar_cursor
+from .serializers import generar_asignaciones
+from .services.fuerza_laboral import invalidar_fuerza_laboral
+
+# Métricas comparadas contra el baseline y tolerancia absoluta de cada una
+# (para no marcar como regresión un ruido de pocos milisegundos)
+METRICAS_RASTREADAS = {
+    'tiempo_ms': 5.0,
+    'consultas': 0,
+    'memoria_pico_kib': 64.0,
+}
+
+TAMANOS_GENERACION = [(10, 30), (25, 60), (50, 120)]    # (terceros, días)
+TAMANOS_EDICION = [10, 100, 500]                         # cambios por lote
+
+
+class _ContadorConsultas:
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class _Revertir(Exception):
+    """Se lanza para revertir el savepoint de una repetición."""
+
+
+def medir(funcion, preparar=None, repeticiones=3):
+    """
+    Mide una función con datos frescos en cada repetición.
+
+    Args:
+        funcion: Callable que recibe lo que retorna ``preparar``
+        preparar: Callable opcional ejecutado dentro del savepoint pero fuera de la medición
+        repeticiones: Cantidad de corridas cronometradas
+
+    Returns:
+        Dict con tiempo_ms, tiempo_min_ms, consultas, memoria_pico_kib y estado
+    """
+    tiempos = []
+    consultas = 0
+    estado = None
+    salida = io.StringIO()
+
+    def _una_corrida(con_memoria):
+        nonlocal consultas, estado
+        try:
+            # Las vistas imprimen trazas de depuración: se descartan para no medir la consola
+            with transaction.atomic(), contextlib.redirect_stdout(salida):
+                argumento = preparar() if preparar else None
+                contador = _ContadorConsultas()
+                if con_memoria:
+                    tracemalloc.start()
+                inicio = time.perf_counter()
+                with connection.execute_wrapper(contador):
+                    resultado = funcion(argumento)
+                duracion = time.perf_counter() - inicio
+                pico = 0
+                if con_memoria:
+                    _, pico = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                else:
+                    tiempos.append(duracion)
+                    consultas = contador.total
+                estado = getattr(resultado, 'status_code', estado)
+                raise _Revertir(pico)
+        except _Revertir as revertir:
+            salida.seek(0)
+            salida.truncate()
+            return revertir.args[0]
+
+    for _ in range(repeticiones):
+        _una_corrida(con_memoria=False)
+    memoria_pico = _una_corrida(con_memoria=True)
+
+    return {
+        'repeticiones': repeticiones,
+        'tiempo_ms': round(statistics.median(tiempos) * 1000, 2),
+        'tiempo_min_ms': round(min(tiempos) * 1000, 2),
+        'consultas': consultas,
+        'memoria_pico_kib': round(memoria_pico / 1024, 1),
+        'estado': estado,
+    }
+
+
+class SuiteBenchmarks:
+    """
+    Casos de la suite sobre el dataset presente en la base de datos.
+
+    Uso::
+
+        resultados = SuiteBenchmarks(repeticiones=3).ejecutar()
+    """
+
+    def __init__(self, repeticiones=3, filtro=None, reportar=None,
+                 tamanos_generacion=TAMANOS_GENERACION, tamanos_edicion=TAMANOS_EDICION):
+        self.repeticiones = repeticiones
+        self.filtro = filtro
+        self.tamanos_generacion = tamanos_generacion
+        self.tamanos_edicion = tamanos_edicion
+        self.reportar = reportar or (lambda mensaje: None)
+
+    # ========== PREPARACIÓN ==========
+
+    def _preparar_contexto(self):
+        self.usuario = Usuario.objects.filter(is_staff=True).first()
+        if self.usuario is None:
+            self.usuario = Usuario.objects.create_user(
+                username='benchmark_staff', password=None, nombre_usuario='Benchmark', is_staff=True,
+                is_superuser=True,
+            )
+        self.cliente = APIClient()
+        self.cliente.force_login(self.usuario)
+        self.cliente.force_authenticate(self.usuario)
+
+        # La programación con más asignaciones es el peor caso de malla y nómina
+        mayor = (
+            AsignacionTurno.objects.values('programacion')
+            .annotate(total=Count('id')).order_by('-total').first()
+        )
+        if mayor is None:
+            raise ValueError('No hay asignaciones: ejecute primero manage.py generar_dataset')
+        self.programacion = ProgramacionHorario.all_objects.get(pk=mayor['programacion'])
+        self.filas_programacion = mayor['total']
+        terceros = list(
+            AsignacionTurno.objects.filter(programacion=self.programacion)
+            .values_list('tercero_id', flat=True).distinct()[:2]
+        )
+        self.terceros_intercambio = terceros
+
+    def _casos(self):
+        casos = []
+        for terceros, dias in self.tamanos_generacion:
+            casos.append((f'generar_asignaciones/{terceros}x{dias}', *self._caso_generacion(terceros, dias)))
+        casos.append(('extender/30d', *self._caso_extender(30)))
+        casos.append(('malla_turnos', self._caso_get(reverse('malla_turnos', args=[self.programacion.pk])), None))
+        casos.append(('nomina_view', self._caso_get(reverse('nomina_view', args=[self.programacion.pk])), None))
+        for tamano in self.tamanos_edicion:
+            casos.append((f'editar_malla_api/{tamano}', *self._caso_editar_malla(tamano)))
+        casos.append(('intercambiar_terceros_api', self._caso_intercambio(), None))
+        casos.append(('bitacora_dashboard', self._caso_get(reverse('bitacora_dashboard')), None))
+        casos.append(('bitacora_dashboard/filtrado', self._caso_get(
+            reverse('bitacora_dashboard') + '?tipo_accion=EDITAR&modulo=programacion' + self._cursor_profundo()), None))
+        return casos
+
+    def _cursor_profundo(self):
+        # Equivalente a la página 20 con el paginador por OFFSET: el cursor de la fila 475 del filtro
+        fila = Bitacora.objects.filter(tipo_accion='EDITAR', modulo='programacion').order_by(
+            '-fecha_hora', '-id').only('fecha_hora', 'id')[474:475].first()
+        return f'&cursor={codificar_cursor(fila, ("fecha_hora", "id"))}' if fila else ''
+
+    # ========== CASOS ==========
+
+    def _caso_generacion(self, num_terceros, dias):
+        base = self.programacion
+
+        def preparar():
+            # Terceros nuevos en el mismo centro y cargo para fijar el tamaño de la grilla
+            centro = base.centro_operativo
+            cargo = base.cargo_predefinido
+            Tercero.objects.filter(centro_operativo=centro, cargo_predefinido=cargo).update(
+                estado_tercero=Tercero.Estado_Inactivo)
+            Tercero.objects.bulk_create([
+                Tercero(documento=f'BENCH{i:08d}', nombre_tercero='Bench', apellido_tercero=f'Tercero {i:05d}',
+                        correo_tercero=f'bench{i}@example.com', centro_operativo=centro, cargo_predefinido=cargo)
+                for i in range(num_terceros)
+            ])
+            invalidar_fuerza_laboral(centro)
+            return ProgramacionHorario.objects.create(
+                nombre='Benchmark generación', centro_operativo=centro, modelo_turno=base.modelo_turno,
+                cargo_predefinido=cargo, fecha_inicio=base.fecha_inicio,
+                fecha_fin=base.fecha_inicio + timedelta(days=dias - 1),
+            )
+
+        return generar_asignaciones, preparar
+
+    def _caso_extender(self, dias):
+        url = reverse('admin:programacionhorario-extender', args=[self.programacion.pk])
+        inicio = self.programacion.fecha_fin + timedelta(days=1)
+        datos = {
+            'apply': '1',
+            'fecha_inicio_ext': inicio.isoformat(),
+            'fecha_fin_ext': (inicio + timedelta(days=dias - 1)).isoformat(),
+        }
+        return (lambda _: self.cliente.post(url, datos)), None
+
+    def _caso_get(self, url):
+        return lambda _: self.cliente.get(url)
+
+    def _caso_editar_malla(self, tamano):
+        url = reverse('editar_malla_api', args=[self.programacion.pk])
+        filas = list(
+            AsignacionTurno.objects.filter(programacion=self.programacion)
+            .order_by('tercero_id', 'dia').values('tercero_id', 'dia', 'letra_turno')[:tamano]
+        )
+        cambios = [
+            {'tercero_id': f['tercero_id'], 'fecha': f['dia'].isoformat(),
+             'letra': 'X' if f['letra_turno'] != 'X' else 'D'}
+            for f in filas
+        ]
+        # forzar: se mide también la escritura aunque los cambios rompan reglas laborales
+        datos = {'cambios': cambios, 'forzar': True}
+        return (lambda _: self.cliente.post(url, datos, format='json')), None
+
+    def _caso_intercambio(self):
+        url = reverse('intercambiar_terceros_api', args=[self.programacion.pk])
+        tercero1, tercero2 = (self.terceros_intercambio + [None, None])[:2]
+        datos = {'tercero1_id': tercero1, 'tercero2_id': tercero2}
+        return lambda _: self.cliente.post(url, datos, format='json')
+
+    # ========== EJECUCIÓN ==========
+
+    def ejecutar(self):
+        """
+        Ejecuta los casos seleccionados.
+
+        Returns:
+            Dict con metadatos del entorno y ``resultados`` por nombre de caso
+        """
+        self._preparar_contexto()
+        resultados = {}
+        for nombre, funcion, preparar in self._casos():
+            if self.filtro and not fnmatch.fnmatch(nombre, self.filtro):
+                continue
+            resultados[nombre] = medir(funcion, preparar, self.repeticiones)
+            r = resultados[nombre]
+            self.reportar(
+                f"   {nombre:<34} {r['tiempo_ms']:>10.1f} ms {r['consultas']:>7} consultas "
+                f"{r['memoria_pico_kib']:>10.1f} KiB  [{r['estado'] or 'ok'}]"
+            )
+        return {
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'motor': connection.vendor,
+            'filas_asignacion': AsignacionTurno.objects.count(),
+            'filas_bitacora': Bitacora.objects.count(),
+            'filas_programacion_medida': self.filas_programacion,
+            'debug': settings.DEBUG,
+            'resultados': resultados,
+        }
+
+
+def comparar(actual, baseline, umbral):
+    """
+    Compara resultados contra un baseline.
+
+    Args:
+        actual: Dict retornado por SuiteBenchmarks.ejecutar
+        baseline: Dict con la misma estructura
+        umbral: Fracción de empeoramiento permitida (0.25 = 25%)
+
+    Returns:
+        Lista de dicts con caso, metrica, baseline, actual y variacion de cada regresión
+    """
+    regresiones = []
+    for caso, medidas in actual['resultados'].items():
+        base = baseline.get('resultados', {}).get(caso)
+        if not base:
+            continue
+        for metrica, tolerancia in METRICAS_RASTREADAS.items():
+            anterior, nuevo = base.get(metrica), medidas.get(metrica)
+            if anterior is None or nuevo is None:
+                continue
+            if nuevo > anterior * (1 + umbral) and nuevo - anterior > tolerancia:
+                regresiones.append({
+                    'caso': caso,
+                    'metrica': metrica,
+                    'baseline': anterior,
+                    'actual': nuevo,
+                    'variacion': round((nuevo - anterior) / anterior, 3) if anterior else None,
+                })
+    return regresiones
+
+
+def guardar_json(datos, ruta):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, indent=2, ensure_ascii=False, default=str)
+
+
+def cargar_json(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
@@ -55,6 +55,26 @@ class ProgramacionHorarioForm(forms.ModelForm):
        
         self.fields['activo'].initial = True
 
+    def clean(self):
+        cleaned_data = super().clean()
+        centro = cleaned_data.get('centro_operativo')
+        cargo = cleaned_data.get('cargo_predefinido')
+        fecha_inicio = cleaned_data.get('fecha_inicio')
+        fecha_fin = cleaned_data.get('fecha_fin')
+        # Revisión previa: empleados con turno en otra programación activa en el rango. No bloquea
+        # el guardado (la generación omite esos días); la vista la muestra como advertencia
+        self.advertencia_conflictos = None
+        if centro and cargo and fecha_inicio and fecha_fin and fecha_inicio <= fecha_fin:
+            from .services.conflictos_turnos import preflight_conflictos
+            conflictos = preflight_conflictos(centro, cargo, fecha_inicio, fecha_fin, excluir_programacion=self.instance.pk)
+            if conflictos:
+                dias = sum(len(fechas) for fechas in conflictos.values())
+                self.advertencia_conflictos = (
+                    f'{len(conflictos)} empleados ya tienen turno en otra programación activa '
+                    f'en {dias} de los días seleccionados; esos días no se les asignaron turnos.'
+                )
+        return cleaned_data
+
     def validar_hora_24h(self, hora):
         """Valida que la hora esté en formato 24h (HH:mm:ss)"""
         if not hora:
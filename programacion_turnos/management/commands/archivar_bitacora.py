@@ -0,0 +1,27 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from programacion_turnos.services.archivo_bitacora import archivar_bitacora
+
+
+class Command(BaseCommand):
+    help = ('Mueve los registros de bitácora más antiguos que la retención a archivos JSONL comprimidos '
+            'por mes (BITACORA_ARCHIVO_DIR) y los elimina de la tabla en lotes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.BITACORA_RETENCION_DIAS,
+                            help='Días de bitácora que se conservan en la tabla')
+        parser.add_argument('--antes-de', type=date.fromisoformat,
+                            help='Archivar los registros anteriores a esta fecha (AAAA-MM-DD); reemplaza --dias')
+        parser.add_argument('--lote', type=int, default=settings.BITACORA_ARCHIVO_LOTE,
+                            help='Registros por transacción')
+        parser.add_argument('--directorio', default=None, help='Carpeta de los archivos')
+
+    def handle(self, *args, **options):
+        antes_de = options['antes_de'] or date.today() - timedelta(days=options['dias'])
+        self.stdout.write(f'📦 Archivando registros anteriores a {antes_de.isoformat()}...')
+        total = archivar_bitacora(antes_de, directorio=options['directorio'], lote=options['lote'],
+                                  reportar=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f'✅ {total:,} registros archivados'))
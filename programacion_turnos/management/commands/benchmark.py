@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from programacion_turnos.benchmarks import SuiteBenchmarks, cargar_json, comparar, guardar_json
+from programacion_turnos.services.dataset_sintetico import ESCALAS, GeneradorDataset, parametros_para
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta la suite de benchmarks sobre datos sintéticos y la compara contra un baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', choices=sorted(ESCALAS), default='pequena',
+                            help='Escala del dataset sintético a generar')
+        parser.add_argument('--semilla', type=int, help='Semilla del dataset')
+        parser.add_argument('--terceros', type=int, help='Sobrescribe la cantidad de terceros de la escala')
+        parser.add_argument('--dias', type=int, help='Sobrescribe los días de la escala')
+        parser.add_argument('--bitacoras', type=int, help='Sobrescribe los registros de bitácora de la escala')
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--solo', help='Patrón (fnmatch) de los casos a ejecutar, ej: "editar_malla_api/*"')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--baseline', help='Archivo JSON de resultados previos para comparar')
+        parser.add_argument('--umbral', type=float, default=0.25,
+                            help='Empeoramiento permitido frente al baseline (0.25 = 25%%)')
+        parser.add_argument('--usar-bd-actual', action='store_true',
+                            help='Usar los datos de la BD configurada en vez de una BD de pruebas nueva '
+                                 '(los cambios de cada caso se revierten)')
+
+    def handle(self, *args, **options):
+        if options['usar_bd_actual']:
+            datos = self._ejecutar_suite(options)
+        else:
+            datos = self._en_bd_de_pruebas(options)
+
+        if options['salida']:
+            guardar_json(datos, options['salida'])
+            self.stdout.write(f"💾 Resultados guardados en {options['salida']}")
+
+        if options['baseline']:
+            regresiones = comparar(datos, cargar_json(options['baseline']), options['umbral'])
+            if regresiones:
+                self.stdout.write(self.style.ERROR(f'\n❌ {len(regresiones)} regresiones frente al baseline:'))
+                for r in regresiones:
+                    variacion = f"+{r['variacion'] * 100:.0f}%" if r['variacion'] is not None else 'nuevo'
+                    self.stdout.write(f"   {r['caso']} · {r['metrica']}: {r['baseline']} → {r['actual']} ({variacion})")
+                raise CommandError('La suite de benchmarks detectó regresiones')
+            self.stdout.write(self.style.SUCCESS('✅ Sin regresiones frente al baseline'))
+
+    def _en_bd_de_pruebas(self, options):
+        """Crea una BD de pruebas, genera el dataset, ejecuta la suite y destruye la BD."""
+        setup_test_environment()
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            parametros = parametros_para(
+                options['escala'], semilla=options['semilla'], terceros=options['terceros'],
+                dias=options['dias'], bitacoras=options['bitacoras'],
+            )
+            self.stdout.write(self.style.SUCCESS(f"🏗️  Generando dataset '{options['escala']}' en BD de pruebas"))
+            GeneradorDataset(parametros, reportar=lambda m: None).generar()
+            datos = self._ejecutar_suite(options)
+            datos['escala'] = options['escala']
+            datos['semilla'] = parametros.semilla
+            return datos
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+    def _ejecutar_suite(self, options):
+        self.stdout.write(self.style.SUCCESS('⏱️  Ejecutando benchmarks'))
+        suite = SuiteBenchmarks(
+            repeticiones=options['repeticiones'],
+            filtro=options['solo'],
+            reportar=self.stdout.write,
+        )
+        return suite.ejecutar()
@@ -0,0 +1,57 @@
+import gzip
+import sys
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from programacion_turnos.models import Bitacora
+from programacion_turnos.services.exportacion_bitacora import FORMATOS, lineas_exportacion
+
+
+class Command(BaseCommand):
+    help = ('Exporta la bitácora (tabla y meses archivados) en CSV o JSONL con los mismos filtros del dashboard, '
+            'escribiendo por partes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help='Primer día (AAAA-MM-DD)')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Último día (AAAA-MM-DD)')
+        parser.add_argument('--usuario', help='Username del usuario')
+        parser.add_argument('--tipo-accion', choices=[codigo for codigo, _ in Bitacora.TIPOS_ACCION])
+        parser.add_argument('--modulo', choices=[codigo for codigo, _ in Bitacora.MODULOS])
+        parser.add_argument('--modelo', help='Modelo afectado (contiene)')
+        parser.add_argument('--busqueda', help='Texto libre, como en el dashboard')
+        parser.add_argument('--formato', choices=FORMATOS, default='csv')
+        parser.add_argument('--salida', help='Archivo de salida (.gz para comprimir); por defecto la salida estándar')
+
+    def handle(self, *args, **options):
+        filtros = {
+            'fecha_desde': options['desde'],
+            'fecha_hasta': options['hasta'],
+            'tipo_accion': options['tipo_accion'],
+            'modulo': options['modulo'],
+            'modelo_afectado': options['modelo'],
+            'busqueda': options['busqueda'],
+        }
+        if options['usuario']:
+            filtros['usuario'] = get_user_model().objects.filter(username=options['usuario']).first()
+            if filtros['usuario'] is None:
+                raise CommandError(f"No existe el usuario {options['usuario']}")
+
+        salida = options['salida']
+        if not salida:
+            archivo = sys.stdout
+        elif salida.endswith('.gz'):
+            archivo = gzip.open(salida, 'wt', encoding='utf-8', newline='')
+        else:
+            archivo = open(salida, 'w', encoding='utf-8', newline='')
+        lineas = 0
+        try:
+            for linea in lineas_exportacion(filtros, options['formato']):
+                archivo.write(linea)
+                lineas += 1
+        finally:
+            if archivo is not sys.stdout:
+                archivo.close()
+        if salida:
+            self.stdout.write(self.style.SUCCESS(f'✅ {lineas:,} líneas escritas en {salida}'))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from programacion_turnos.services.dataset_sintetico import ESCALAS, GeneradorDataset, parametros_para
+
+
+class Command(BaseCommand):
+    help = 'Genera un dataset sintético reproducible (por semilla) para pruebas de carga y benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala',
+            choices=sorted(ESCALAS),
+            default='mediana',
+            help='Tamaño base del dataset (los demás parámetros lo sobrescriben)',
+        )
+        parser.add_argument('--semilla', type=int, help='Semilla del generador aleatorio')
+        parser.add_argument('--prefijo', help='Prefijo de los campos únicos (permite varios datasets en la misma BD)')
+        parser.add_argument('--empresas', type=int)
+        parser.add_argument('--centros', type=int)
+        parser.add_argument('--cargos', type=int)
+        parser.add_argument('--terceros', type=int)
+        parser.add_argument('--dias', type=int, help='Días cubiertos por las programaciones')
+        parser.add_argument('--dias-por-programacion', type=int)
+        parser.add_argument('--bitacoras', type=int, help='Registros de bitácora a generar')
+        parser.add_argument('--lote', type=int, help='Tamaño de lote para bulk_create')
+
+    def handle(self, *args, **options):
+        parametros = parametros_para(
+            options['escala'],
+            semilla=options['semilla'],
+            prefijo=options['prefijo'],
+            empresas=options['empresas'],
+            centros=options['centros'],
+            cargos=options['cargos'],
+            terceros=options['terceros'],
+            dias=options['dias'],
+            dias_por_programacion=options['dias_por_programacion'],
+            bitacoras=options['bitacoras'],
+            lote=options['lote'],
+        )
+        self.stdout.write(self.style.SUCCESS('🏗️  Generando dataset sintético'))
+        self.stdout.write(
+            f'   Terceros: {parametros.terceros:,} | Días: {parametros.dias} | '
+            f'Bitácora: {parametros.bitacoras:,} | Semilla: {parametros.semilla} | Prefijo: {parametros.prefijo}'
+        )
+        self.stdout.write(f'   Asignaciones estimadas: ~{parametros.terceros * parametros.dias:,}')
+
+        inicio = time.perf_counter()
+        resumen = GeneradorDataset(parametros, reportar=self.stdout.write).generar()
+        duracion = time.perf_counter() - inicio
+
+        self.stdout.write('=' * 50)
+        for modelo, total in resumen.items():
+            self.stdout.write(f'   {modelo}: {total:,}')
+        total = sum(resumen.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total:,} filas en {duracion:.1f} s ({total / max(duracion, 0.001):,.0f} filas/s)'
+        ))
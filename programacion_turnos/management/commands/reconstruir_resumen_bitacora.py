@@ -0,0 +1,21 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from programacion_turnos.services.resumen_bitacora import reconstruir_resumen_bitacora
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen diario de la bitácora (BitacoraResumenDiario) desde la tabla principal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=date.fromisoformat, help='Primer día a recalcular (AAAA-MM-DD)')
+        parser.add_argument('--hasta', type=date.fromisoformat, help='Último día a recalcular (AAAA-MM-DD)')
+
+    def handle(self, *args, **options):
+        total = reconstruir_resumen_bitacora(
+            fecha_desde=options['desde'],
+            fecha_hasta=options['hasta'],
+            reportar=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {total:,} filas de resumen reconstruidas'))
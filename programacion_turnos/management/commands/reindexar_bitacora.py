@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from programacion_turnos.services.indice_bitacora import reindexar_bitacora
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de la bitácora (BitacoraToken) desde la tabla principal'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde-id', type=int, help='Reindexar solo los registros con id mayor o igual')
+
+    def handle(self, *args, **options):
+        total = reindexar_bitacora(desde_id=options['desde_id'], reportar=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f'✅ {total:,} términos indexados'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from programacion_turnos.services.codigos_turno import TAMANO_LOTE, sincronizar_codigos_turno
+
+
+class Command(BaseCommand):
+    help = 'Rellena AsignacionTurno.codigo_turno a partir de letra_turno, en lotes por rango de id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todas', action='store_true',
+                            help='Recalcular todas las filas, no solo las que no tienen código')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Ancho de cada rango de ids')
+
+    def handle(self, *args, **options):
+        total = sincronizar_codigos_turno(
+            solo_pendientes=not options['todas'],
+            tamano_lote=options['lote'],
+            reportar=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {total:,} asignaciones sincronizadas'))
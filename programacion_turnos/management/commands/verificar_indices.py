@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from programacion_turnos.planes_consulta import verificar_planes
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas críticas y falla si alguna recorre una tabla completa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sql', action='store_true', help='Mostrar el SQL de cada consulta')
+        parser.add_argument('--solo-reportar', action='store_true',
+                            help='Reportar los recorridos completos sin terminar con error')
+
+    def handle(self, *args, **options):
+        resultados = verificar_planes()
+        if resultados is None:
+            raise CommandError('No hay asignaciones para armar las consultas: ejecute primero manage.py generar_dataset')
+
+        self.stdout.write(self.style.SUCCESS(f'🔍 Planes de ejecución ({connection.vendor})'))
+        con_full_scan = []
+        for resultado in resultados:
+            if resultado.recorridos_completos:
+                con_full_scan.append(resultado)
+                self.stdout.write(self.style.ERROR(f'❌ {resultado.nombre}'))
+            else:
+                self.stdout.write(f'✅ {resultado.nombre}')
+            if options['sql']:
+                self.stdout.write(f'   {resultado.sql}')
+            for paso in resultado.pasos:
+                marca = '   ⚠️ ' if paso.completo or paso.ordenamiento else '      '
+                indice = f' [{paso.indice}]' if paso.indice else ''
+                self.stdout.write(f'{marca}{paso.tabla}{indice}  {paso.detalle}')
+
+        if con_full_scan:
+            mensaje = f'{len(con_full_scan)} consultas recorren tablas completas (falta o no se usa un índice)'
+            if options['solo_reportar']:
+                self.stdout.write(self.style.WARNING(mensaje))
+            else:
+                raise CommandError(mensaje)
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Ninguna consulta clave recorre tablas completas'))
@@ -1,5 +1,11 @@
 import threading
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
+from horas_sistema.metricas import REQUEST_CONSULTAS, REQUEST_DURACION, REQUEST_TOTAL
+from .perfilador_sql import RegistroConsultas, peores_requests
 
 # Thread local para almacenar el request actual
 _request_local = threading.local()
@@ -28,4 +34,70 @@ class RequestMiddleware(MiddlewareMixin):
 
 def get_current_request():
     """Obtiene el request actual desde thread local"""
-    return getattr(_request_local, 'request', None) 
\ No newline at end of file
+    return getattr(_request_local, 'request', None) 
+
+class PerfilSQLMiddleware:
+    """
+    Middleware que perfila las consultas SQL de cada request.
+
+    Agrega los headers ``X-DB-Queries`` y ``X-DB-Time`` (milisegundos) y
+    guarda los peores requests por nombre de URL para el reporte del admin.
+    Solo se carga si ``SQL_PROFILER_ENABLED`` es True.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.top_lentas = getattr(settings, 'SQL_PROFILER_SLOWEST', 5)
+
+    def __call__(self, request):
+        registro = RegistroConsultas(top_lentas=self.top_lentas)
+        with connection.execute_wrapper(registro):
+            response = self.get_response(request)
+
+        response['X-DB-Queries'] = str(registro.total)
+        response['X-DB-Time'] = f'{registro.tiempo_total * 1000:.2f}'
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+        peores_requests.registrar(
+            registro.resumen(url_name, request.path, request.method, response.status_code)
+        )
+        return response
+
+
+class _ContadorConsultas:
+    """execute_wrapper mínimo: solo cuenta las consultas del request."""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class MetricasMiddleware:
+    """
+    Middleware que alimenta las métricas HTTP expuestas en ``/metrics``:
+    latencia por nombre de URL, requests por estado y consultas SQL por request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        contador = _ContadorConsultas()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(contador):
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        match = getattr(request, 'resolver_match', None)
+        # Sin resolver_match (404) se agrupa para no crear una serie por path
+        url_name = (match.view_name or match.route) if match else 'sin_resolver'
+        REQUEST_DURACION.observe(duracion, url_name=url_name, metodo=request.method)
+        REQUEST_TOTAL.inc(url_name=url_name, metodo=request.method, estado=response.status_code)
+        REQUEST_CONSULTAS.observe(contador.total, url_name=url_name)
+        return response
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0004_ampliar_letra_turno'),
+        ('usuarios', '0002_remove_codigoturno_segmentos_horas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacionturno',
+            index=models.Index(fields=['programacion', 'dia', 'tercero', 'letra_turno'], name='programacio_program_081b71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asignacionturno',
+            index=models.Index(fields=['tercero', 'dia'], name='programacio_tercero_3665f0_idx'),
+        ),
+    ]
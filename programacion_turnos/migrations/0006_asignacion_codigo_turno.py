@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0005_indices_asignacion_turno'),
+        ('usuarios', '0003_indices_tercero'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asignacionturno',
+            name='codigo_turno',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='asignaciones', to='usuarios.codigoturno', verbose_name='Código de turno'),
+        ),
+    ]
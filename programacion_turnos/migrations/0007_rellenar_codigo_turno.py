@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from programacion_turnos.services.codigos_turno import sincronizar_codigos_turno
+
+
+def rellenar_codigo_turno(apps, schema_editor):
+    sincronizar_codigos_turno(
+        asignacion_modelo=apps.get_model('programacion_turnos', 'AsignacionTurno'),
+        codigo_modelo=apps.get_model('usuarios', 'CodigoTurno'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+    # Cada lote se confirma por separado: en tablas grandes no se mantiene una transacción abierta
+    atomic = False
+
+    dependencies = [
+        ('programacion_turnos', '0006_asignacion_codigo_turno'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_codigo_turno, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0007_rellenar_codigo_turno'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BitacoraResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('modulo', models.CharField(choices=[('programacion', 'Programación'), ('turnos', 'Turnos'), ('empleados', 'Empleados'), ('modelos', 'Modelos de Turno'), ('usuarios', 'Usuarios')], max_length=20, verbose_name='Módulo')),
+                ('tipo_accion', models.CharField(choices=[('CREAR', 'Crear'), ('EDITAR', 'Editar'), ('ELIMINAR', 'Eliminar'), ('CONSULTAR', 'Consultar')], max_length=20, verbose_name='Tipo de Acción')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Registros')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de bitácora',
+                'verbose_name_plural': 'Resúmenes diarios de bitácora',
+                'indexes': [models.Index(fields=['fecha', 'tipo_accion'], name='programacio_fecha_4d50fb_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bitacoraresumendiario',
+            constraint=models.UniqueConstraint(fields=('fecha', 'usuario', 'modulo', 'tipo_accion'), name='resumen_bitacora_unico'),
+        ),
+    ]
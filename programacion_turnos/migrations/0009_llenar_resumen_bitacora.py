@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from programacion_turnos.services.resumen_bitacora import reconstruir_resumen_bitacora
+
+
+def llenar_resumen_bitacora(apps, schema_editor):
+    reconstruir_resumen_bitacora(
+        bitacora_modelo=apps.get_model('programacion_turnos', 'Bitacora'),
+        resumen_modelo=apps.get_model('programacion_turnos', 'BitacoraResumenDiario'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0008_bitacora_resumen_diario'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_resumen_bitacora, migrations.RunPython.noop),
+    ]
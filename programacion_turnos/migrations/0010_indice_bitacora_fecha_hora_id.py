@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0009_llenar_resumen_bitacora'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bitacora',
+            index=models.Index(fields=['fecha_hora', 'id'], name='programacio_fecha_h_48c4a9_idx'),
+        ),
+    ]
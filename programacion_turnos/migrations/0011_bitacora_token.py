@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0010_indice_bitacora_fecha_hora_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BitacoraToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=40, verbose_name='Término')),
+                ('bitacora', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='programacion_turnos.bitacora', verbose_name='Bitácora')),
+            ],
+            options={
+                'verbose_name': 'Término de bitácora',
+                'verbose_name_plural': 'Términos de bitácora',
+                'indexes': [models.Index(fields=['token', 'bitacora'], name='bitacora_token_busqueda', opclasses=['varchar_pattern_ops', 'int8_ops'])],
+            },
+        ),
+    ]
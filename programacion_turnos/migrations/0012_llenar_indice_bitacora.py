@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from programacion_turnos.services.indice_bitacora import reindexar_bitacora
+
+
+def llenar_indice_bitacora(apps, schema_editor):
+    reindexar_bitacora(
+        bitacora_modelo=apps.get_model('programacion_turnos', 'Bitacora'),
+        token_modelo=apps.get_model('programacion_turnos', 'BitacoraToken'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0011_bitacora_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_indice_bitacora, migrations.RunPython.noop),
+    ]
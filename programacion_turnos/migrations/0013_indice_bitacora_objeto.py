@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0012_llenar_indice_bitacora'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bitacora',
+            index=models.Index(fields=['modelo_afectado', 'objeto_id', 'fecha_hora', 'id'], name='programacio_modelo__4a985a_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0013_indice_bitacora_objeto'),
+        ('usuarios', '0004_periodo_laboral'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacionturno',
+            index=models.Index(fields=['dia', 'id'], name='programacio_dia_0dc835_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.2 on 2026-10-19 13:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0014_indice_asignacion_dia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100, verbose_name='Clave de idempotencia')),
+                ('huella', models.CharField(max_length=64, verbose_name='Huella de la solicitud')),
+                ('codigo', models.PositiveSmallIntegerField(verbose_name='Código HTTP')),
+                ('respuesta', models.JSONField(verbose_name='Respuesta')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Solicitud idempotente',
+                'verbose_name_plural': 'Solicitudes idempotentes',
+                'indexes': [models.Index(fields=['fecha'], name='programacio_fecha_b8dd8d_idx')],
+                'unique_together': {('usuario', 'clave')},
+            },
+        ),
+    ]
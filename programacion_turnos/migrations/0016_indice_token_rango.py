@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-19 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programacion_turnos', '0015_solicitud_idempotente'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='bitacoratoken',
+            name='bitacora_token_busqueda',
+        ),
+        migrations.AddIndex(
+            model_name='bitacoratoken',
+            index=models.Index(fields=['token', 'bitacora'], name='bitacora_token_busqueda'),
+        ),
+    ]
@@ -29,11 +29,19 @@ class ProgramacionHorario(models.Model):
     objects = ActivoProgramacionManager()  # Solo activos por defecto
     all_objects = models.Manager()         # Todos, incluso inactivos
 
+    def disponibilidad_terceros(self, fecha_inicio, fecha_fin):
+        """
+        Terceros del centro y cargo de la programación vinculados en cada día del rango.
+
+        Returns:
+            DisponibilidadTerceros (mapa de bits por tercero; ver services/fuerza_laboral.py)
+        """
+        from .services.fuerza_laboral import resolver_fuerza_laboral
+        return resolver_fuerza_laboral(self.centro_operativo_id, self.cargo_predefinido_id, fecha_inicio, fecha_fin)
+
     def obtener_terceros_activos(self, fecha):
-        return Tercero.objects.filter(
-            centro_operativo=self.centro_operativo,
-            estado_tercero=Tercero.Estado_Activo
-        )
+        ids = self.disponibilidad_terceros(fecha, fecha).terceros
+        return Tercero.objects.filter(pk__in=ids).order_by('apellido_tercero')
     
     def __str__(self):
         return f"Programación {self.centro_operativo} ({self.fecha_inicio} - {self.fecha_fin})"
@@ -46,11 +54,30 @@ class ProgramacionHorario(models.Model):
         self.activo = True
         self.save()
 
+
+PATRON_LETRA_TURNO = re.compile(r'^[A-Za-z0-9+\-*/&@#.]+$')
+
+
+def mensaje_letra_invalida(letra):
+    return (f'El código "{letra}" contiene caracteres no válidos. '
+            'Solo se permiten letras, números y símbolos: + - * / & @ # .')
+
+
 class AsignacionTurno(models.Model):
     programacion = models.ForeignKey(ProgramacionHorario, on_delete=models.CASCADE, related_name='asignaciones')
     tercero = models.ForeignKey('usuarios.Tercero', on_delete=models.CASCADE)
     dia = models.DateField()
     letra_turno = models.CharField(max_length=10)
+    # Referencia al código de la letra: se mantiene sincronizada con letra_turno
+    # mientras las vistas sigan leyendo el texto (ver sincronizar_codigo_turno)
+    codigo_turno = models.ForeignKey(
+        'usuarios.CodigoTurno',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='asignaciones',
+        verbose_name='Código de turno'
+    )
     fila = models.PositiveIntegerField(null= False)
     columna = models.PositiveIntegerField(null= False)
 
@@ -58,6 +85,15 @@ class AsignacionTurno(models.Model):
         verbose_name = 'Asignación de Turno'
         verbose_name_plural = 'Asignaciones de Turno'
         unique_together = ['programacion', 'tercero', 'dia']
+        # unique_together ya cubre (programacion, tercero, dia) ordenado por día.
+        # Malla y nómina leen (tercero, dia, letra_turno) por rango de días de una
+        # programación: el índice las resuelve sin tocar la tabla.
+        indexes = [
+            models.Index(fields=['programacion', 'dia', 'tercero', 'letra_turno']),
+            models.Index(fields=['tercero', 'dia']),
+            # Listado de la API paginado por cursor (dia, id) sin filtro de programación ni tercero
+            models.Index(fields=['dia', 'id']),
+        ]
 
 
     def clean(self):
@@ -66,18 +102,34 @@ class AsignacionTurno(models.Model):
 
         if self.letra_turno:
             # ✅ PERMITIR CARACTERES ALFANUMÉRICOS Y ALGUNOS ESPECIALES
-            patron_valido = r'^[A-Za-z0-9+\-*/&@#.]+$'
-            
-            if not re.match(patron_valido, self.letra_turno):
-                raise ValidationError({
-                    'letra_turno': f'El código "{self.letra_turno}" contiene caracteres no válidos. Solo se permiten letras, números y símbolos: + - * / & @ # .'
-                })
+            if not PATRON_LETRA_TURNO.match(self.letra_turno):
+                raise ValidationError({'letra_turno': mensaje_letra_invalida(self.letra_turno)})
             
 
         
+    def sincronizar_codigo_turno(self, ids_por_letra=None):
+        """
+        Asigna codigo_turno según letra_turno.
+
+        Args:
+            ids_por_letra: Dict de CodigoTurno.ids_por_letra() para lotes; sin él se consulta la BD
+        """
+        if ids_por_letra is not None:
+            self.codigo_turno_id = ids_por_letra.get(self.letra_turno)
+        else:
+            self.codigo_turno_id = CodigoTurno.objects.filter(letra_turno=self.letra_turno).order_by(
+                '-estado_codigo', 'id_codigo_turnos').values_list('id_codigo_turnos', flat=True).first()
+        self._letra_sincronizada = self.letra_turno
+
     def save(self, *args, **kwargs):
         """Override save para ejecutar validaciones"""
         self.full_clean()
+        # Solo se consulta el código si la letra cambió desde la última sincronización
+        if getattr(self, '_letra_sincronizada', None) != self.letra_turno:
+            self.sincronizar_codigo_turno()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'letra_turno' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'codigo_turno'}
         super().save(*args, **kwargs)
         
     def __str__(self):
@@ -123,8 +175,92 @@ class Bitacora(models.Model):
             models.Index(fields=['usuario', 'fecha_hora']),
             models.Index(fields=['tipo_accion', 'fecha_hora']),
             models.Index(fields=['modulo', 'fecha_hora']),
+            # Paginación por cursor del dashboard y del admin
+            models.Index(fields=['fecha_hora', 'id']),
+            # Historial de un objeto, ya ordenado para la paginación por cursor
+            models.Index(fields=['modelo_afectado', 'objeto_id', 'fecha_hora', 'id']),
         ]
     
     def __str__(self):
         return f"{self.usuario} - {self.tipo_accion} - {self.modulo} - {self.fecha_hora}"
-    
\ No newline at end of file
+    
+
+class BitacoraResumenDiario(models.Model):
+    """
+    Conteo de registros de bitácora por día, usuario, módulo y tipo de acción.
+
+    Se incrementa con cada registro nuevo (ver services/resumen_bitacora.py) y
+    se reconstruye con ``manage.py reconstruir_resumen_bitacora``. Las
+    estadísticas del dashboard leen esta tabla en vez de recorrer la bitácora.
+    """
+    fecha = models.DateField(verbose_name='Fecha')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, verbose_name='Usuario')
+    modulo = models.CharField(max_length=20, choices=Bitacora.MODULOS, verbose_name='Módulo')
+    tipo_accion = models.CharField(max_length=20, choices=Bitacora.TIPOS_ACCION, verbose_name='Tipo de Acción')
+    total = models.PositiveIntegerField(default=0, verbose_name='Registros')
+
+    class Meta:
+        verbose_name = 'Resumen diario de bitácora'
+        verbose_name_plural = 'Resúmenes diarios de bitácora'
+        # Con usuario NULL la restricción no evita duplicados en todos los motores;
+        # las estadísticas suman, así que un duplicado no altera los totales
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'usuario', 'modulo', 'tipo_accion'],
+                                    name='resumen_bitacora_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['fecha', 'tipo_accion']),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.usuario} - {self.modulo} - {self.tipo_accion}: {self.total}"
+
+
+class BitacoraToken(models.Model):
+    """
+    Índice invertido de la bitácora: una fila por término normalizado y registro.
+
+    Lo mantiene la señal de Bitacora (ver services/indice_bitacora.py) y se
+    reconstruye con ``manage.py reindexar_bitacora``. La búsqueda libre del
+    dashboard y del admin filtra por esta tabla en vez de usar ``icontains``.
+    """
+    token = models.CharField(max_length=40, verbose_name='Término')
+    bitacora = models.ForeignKey(Bitacora, on_delete=models.CASCADE, related_name='tokens', verbose_name='Bitácora')
+
+    class Meta:
+        verbose_name = 'Término de bitácora'
+        verbose_name_plural = 'Términos de bitácora'
+        indexes = [
+            # La búsqueda por prefijo es un rango sobre ``token`` (ver _coincidencias)
+            models.Index(fields=['token', 'bitacora'], name='bitacora_token_busqueda'),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.bitacora_id}"
+
+
+class SolicitudIdempotente(models.Model):
+    """
+    Respuesta de una escritura masiva identificada por la clave ``Idempotency-Key`` del cliente.
+
+    Se guarda en la misma transacción que la escritura: si el cliente reintenta
+    con la misma clave (por ejemplo, tras un timeout) recibe la respuesta
+    guardada y la escritura no se repite (ver services/idempotencia.py).
+    """
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name='Usuario')
+    clave = models.CharField(max_length=100, verbose_name='Clave de idempotencia')
+    huella = models.CharField(max_length=64, verbose_name='Huella de la solicitud')
+    codigo = models.PositiveSmallIntegerField(verbose_name='Código HTTP')
+    respuesta = models.JSONField(verbose_name='Respuesta')
+    fecha = models.DateTimeField(auto_now_add=True, verbose_name='Fecha')
+
+    class Meta:
+        verbose_name = 'Solicitud idempotente'
+        verbose_name_plural = 'Solicitudes idempotentes'
+        unique_together = ['usuario', 'clave']
+        indexes = [
+            models.Index(fields=['fecha']),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario} - {self.clave}"
@@ -0,0 +1,20 @@
+"""
+Parsers de DRF para cuerpos que no son JSON ni formularios.
+"""
+import codecs
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """Cuerpo ``text/csv``: ``request.data`` es el texto decodificado (UTF-8 por defecto)."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        codificacion = parser_context.get('encoding') or 'utf-8'
+        try:
+            return codecs.decode(stream.read(), codificacion)
+        except (UnicodeDecodeError, LookupError) as error:
+            raise ParseError(f'CSV con codificación inválida: {error}')
@@ -0,0 +1,161 @@
+"""
+Captura opcional de cProfile y tracemalloc por request.
+
+Un usuario staff puede pedir que una vista se ejecute perfilada agregando
+``?_profile=1`` a la URL o el header ``X-Profile: 1``. La captura guarda:
+
+- ``<nombre>.prof``: estadísticas de cProfile (abrir con pstats o snakeviz)
+- ``<nombre>.txt``: funciones con mayor tiempo acumulado y principales
+  sitios de asignación de memoria según tracemalloc
+- ``<nombre>.json``: metadatos (vista, path, usuario, duración, memoria pico)
+
+Las capturas viven en ``PROFILING_DIR`` y se conservan solo las
+``PROFILING_MAX_CAPTURES`` más recientes. Se listan en ``/admin/perfiles/``.
+
+Uso::
+
+    @perfilable
+    def malla_turnos(request, programacion_id):
+        ...
+"""
+import cProfile
+import functools
+import io
+import json
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.http import HttpRequest
+
+# cProfile y tracemalloc son globales al intérprete: una captura a la vez
+_captura_lock = threading.Lock()
+
+NOMBRE_VALIDO = re.compile(r'^[\w\-]+\.(prof|txt|json)$')
+
+
+def _directorio():
+    directorio = settings.PROFILING_DIR
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _buscar_request(args):
+    """Encuentra el request entre los argumentos (vista función, método de admin o de viewset)."""
+    for arg in args:
+        if isinstance(arg, HttpRequest) or hasattr(arg, '_request'):
+            return arg
+    return None
+
+
+def _solicita_perfil(request):
+    if request is None:
+        return False
+    pedido = request.GET.get('_profile') == '1' or request.META.get('HTTP_X_PROFILE') == '1'
+    if not pedido:
+        return False
+    usuario = getattr(request, 'user', None)
+    return bool(usuario and usuario.is_authenticated and usuario.is_staff)
+
+
+def _podar_capturas():
+    """Elimina las capturas más antiguas por encima de PROFILING_MAX_CAPTURES."""
+    maximo = getattr(settings, 'PROFILING_MAX_CAPTURES', 50)
+    capturas = sorted(_directorio().glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True)
+    for meta in capturas[maximo:]:
+        for sufijo in ('.prof', '.txt', '.json'):
+            meta.with_suffix(sufijo).unlink(missing_ok=True)
+
+
+def _guardar_captura(nombre_vista, request, perfil, snapshot, duracion, memoria_pico):
+    vista_segura = re.sub(r'[^\w]+', '-', nombre_vista)
+    base = f"{time.strftime('%Y%m%d-%H%M%S')}_{vista_segura}_{uuid.uuid4().hex[:6]}"
+    directorio = _directorio()
+    perfil.dump_stats(str(directorio / f'{base}.prof'))
+
+    top_alloc = getattr(settings, 'PROFILING_TOP_ALLOCATIONS', 25)
+    salida = io.StringIO()
+    salida.write(f'Vista: {nombre_vista}\nPath: {request.get_full_path()}\n')
+    salida.write(f'Duración: {duracion * 1000:.1f} ms | Memoria pico: {memoria_pico / 1024:.1f} KiB\n\n')
+    salida.write('=== FUNCIONES POR TIEMPO ACUMULADO ===\n')
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(40)
+    salida.write(f'\n=== TOP {top_alloc} SITIOS DE ASIGNACIÓN (tracemalloc) ===\n')
+    for estadistica in snapshot.statistics('lineno')[:top_alloc]:
+        salida.write(f'{estadistica}\n')
+    (directorio / f'{base}.txt').write_text(salida.getvalue(), encoding='utf-8')
+
+    metadatos = {
+        'nombre': base,
+        'vista': nombre_vista,
+        'path': request.get_full_path(),
+        'metodo': request.method,
+        'usuario': str(request.user),
+        'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'duracion_ms': round(duracion * 1000, 1),
+        'memoria_pico_kib': round(memoria_pico / 1024, 1),
+    }
+    (directorio / f'{base}.json').write_text(json.dumps(metadatos), encoding='utf-8')
+    _podar_capturas()
+    return base
+
+
+def perfilable(vista):
+    """
+    Decorador que ejecuta la vista bajo cProfile y tracemalloc cuando un
+    usuario staff lo pide con ``?_profile=1`` o ``X-Profile: 1``.
+
+    Si ya hay otra captura en curso, la vista se ejecuta sin perfilar.
+    """
+    nombre_vista = vista.__qualname__
+
+    @functools.wraps(vista)
+    def envoltura(*args, **kwargs):
+        request = _buscar_request(args)
+        if not _solicita_perfil(request) or not _captura_lock.acquire(blocking=False):
+            return vista(*args, **kwargs)
+        try:
+            perfil = cProfile.Profile()
+            tracemalloc.start(getattr(settings, 'PROFILING_TRACEMALLOC_FRAMES', 1))
+            inicio = time.perf_counter()
+            try:
+                respuesta = perfil.runcall(vista, *args, **kwargs)
+            finally:
+                duracion = time.perf_counter() - inicio
+                snapshot = tracemalloc.take_snapshot()
+                _, memoria_pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            nombre = _guardar_captura(nombre_vista, request, perfil, snapshot, duracion, memoria_pico)
+        finally:
+            _captura_lock.release()
+        respuesta['X-Profile-Capture'] = nombre
+        return respuesta
+
+    return envoltura
+
+
+def listar_capturas():
+    """
+    Retorna los metadatos de las capturas guardadas, de la más reciente a la más antigua.
+
+    Returns:
+        Lista de dicts leídos de los archivos .json de PROFILING_DIR
+    """
+    capturas = []
+    for meta in sorted(_directorio().glob('*.json'), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            capturas.append(json.loads(meta.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            continue
+    return capturas
+
+
+def ruta_captura(nombre_archivo):
+    """Ruta segura de un archivo de captura, o None si el nombre no es válido o no existe."""
+    if not NOMBRE_VALIDO.match(nombre_archivo):
+        return None
+    ruta = _directorio() / nombre_archivo
+    return ruta if ruta.is_file() else None
@@ -0,0 +1,140 @@
+"""
+Perfilador de SQL por petición.
+
+Registra, para cada request, la cantidad de consultas, el tiempo total en base
+de datos, las sentencias más lentas y las huellas (fingerprints) repetidas, que
+suelen delatar problemas N+1. Los peores requests por nombre de URL se guardan
+en memoria del proceso para consultarlos desde el admin.
+
+Se activa con ``SQL_PROFILER_ENABLED`` y lo usa ``PerfilSQLMiddleware``.
+"""
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+# Normalización de SQL para agrupar consultas iguales con distintos parámetros
+_RE_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_RE_LISTAS_IN = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_RE_ESPACIOS = re.compile(r'\s+')
+
+
+def huella_sql(sql):
+    """
+    Normaliza una sentencia SQL reemplazando literales por ``?``.
+
+    Args:
+        sql: Sentencia SQL (con parámetros ya interpolados o como %s)
+
+    Returns:
+        String con la huella normalizada de la consulta
+    """
+    sql = _RE_CADENAS.sub('?', sql)
+    sql = _RE_NUMEROS.sub('?', sql)
+    sql = _RE_LISTAS_IN.sub('IN (...)', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip()
+
+
+class RegistroConsultas:
+    """
+    Wrapper para ``connection.execute_wrapper`` que mide cada consulta.
+    """
+
+    def __init__(self, top_lentas=5):
+        self.total = 0
+        self.tiempo_total = 0.0
+        self.top_lentas = top_lentas
+        self.lentas = []  # heap de (duracion, orden, sql)
+        self.huellas = defaultdict(lambda: [0, 0.0])  # huella -> [conteo, tiempo]
+        self._orden = itertools.count()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.total += 1
+            self.tiempo_total += duracion
+            huella = self.huellas[huella_sql(sql)]
+            huella[0] += 1
+            huella[1] += duracion
+            entrada = (duracion, next(self._orden), sql)
+            if len(self.lentas) < self.top_lentas:
+                heapq.heappush(self.lentas, entrada)
+            elif self.lentas and duracion > self.lentas[0][0]:
+                heapq.heapreplace(self.lentas, entrada)
+
+    def duplicadas(self, minimo=2):
+        """Huellas ejecutadas al menos ``minimo`` veces, de mayor a menor conteo."""
+        repetidas = [
+            {'huella': huella, 'conteo': conteo, 'tiempo_ms': round(tiempo * 1000, 2)}
+            for huella, (conteo, tiempo) in self.huellas.items()
+            if conteo >= minimo
+        ]
+        return sorted(repetidas, key=lambda d: (-d['conteo'], -d['tiempo_ms']))
+
+    def resumen(self, url_name, path, metodo, estado):
+        return {
+            'url_name': url_name,
+            'path': path,
+            'metodo': metodo,
+            'estado': estado,
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'consultas': self.total,
+            'tiempo_db_ms': round(self.tiempo_total * 1000, 2),
+            'mas_lentas': [
+                {'sql': sql, 'tiempo_ms': round(duracion * 1000, 2)}
+                for duracion, _, sql in sorted(self.lentas, reverse=True)
+            ],
+            'duplicadas': self.duplicadas()[:10],
+        }
+
+
+class _PeoresPorURL:
+    """Conserva los N peores requests (por tiempo en BD) de cada nombre de URL."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_url = {}
+        self._orden = itertools.count()
+
+    def registrar(self, resumen):
+        limite = getattr(settings, 'SQL_PROFILER_WORST_PER_URL', 10)
+        max_urls = getattr(settings, 'SQL_PROFILER_MAX_URLS', 200)
+        clave = resumen['url_name'] or resumen['path']
+        entrada = (resumen['tiempo_db_ms'], next(self._orden), resumen)
+        with self._lock:
+            heap = self._por_url.get(clave)
+            if heap is None:
+                if len(self._por_url) >= max_urls:
+                    return
+                heap = self._por_url[clave] = []
+            if len(heap) < limite:
+                heapq.heappush(heap, entrada)
+            elif entrada[0] > heap[0][0]:
+                heapq.heapreplace(heap, entrada)
+
+    def reporte(self):
+        """Lista de URLs ordenadas por su peor tiempo en BD, con sus requests."""
+        with self._lock:
+            datos = {
+                clave: [r for _, _, r in sorted(heap, key=lambda e: e[0], reverse=True)]
+                for clave, heap in self._por_url.items()
+            }
+        return sorted(
+            ({'url': clave, 'requests': reqs, 'peor_ms': reqs[0]['tiempo_db_ms']} for clave, reqs in datos.items()),
+            key=lambda d: -d['peor_ms'],
+        )
+
+    def limpiar(self):
+        with self._lock:
+            self._por_url.clear()
+
+
+peores_requests = _PeoresPorURL()
@@ -0,0 +1,243 @@
+"""
+Verificación de planes de ejecución (EXPLAIN) de las consultas críticas.
+
+Cada consulta clave se arma con el ORM, igual que en las vistas, y se ejecuta
+con el EXPLAIN del motor configurado. El plan se resume en una lista de pasos
+por tabla con el índice usado y si se trata de un recorrido completo de la
+tabla (full scan), que es lo que indica que falta o se perdió un índice.
+
+Motores soportados: MySQL/MariaDB, PostgreSQL y SQLite.
+
+Se usa desde ``manage.py verificar_indices``.
+"""
+import json
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.db.models import Count, Q
+
+from usuarios.models import Tercero
+from .models import AsignacionTurno, Bitacora, ProgramacionHorario
+from .services.historial_objeto import filtro_historial
+from .services.indice_bitacora import filtrar_busqueda
+
+
+@dataclass
+class PasoPlan:
+    """Un acceso a tabla dentro del plan."""
+    tabla: str
+    indice: str = ''
+    completo: bool = False      # Recorre toda la tabla
+    ordenamiento: bool = False  # Ordena en memoria/temporal (filesort)
+    detalle: str = ''
+
+
+@dataclass
+class ResultadoPlan:
+    nombre: str
+    sql: str
+    pasos: list = field(default_factory=list)
+
+    @property
+    def recorridos_completos(self):
+        return [paso for paso in self.pasos if paso.completo]
+
+    @property
+    def ordenamientos(self):
+        return [paso for paso in self.pasos if paso.ordenamiento]
+
+
+# ========== CONSULTAS CLAVE ==========
+
+def _valores_muestra():
+    """
+    Ids reales para armar las consultas (la programación con más asignaciones).
+
+    Returns:
+        Dict con programacion, tercero, centro, cargo, fecha_inicio y fecha_fin, o None si no hay datos
+    """
+    mayor = (
+        AsignacionTurno.objects.values('programacion')
+        .annotate(total=Count('id')).order_by('-total').first()
+    )
+    if mayor is None:
+        return None
+    programacion = ProgramacionHorario.all_objects.values('fecha_inicio', 'fecha_fin').get(pk=mayor['programacion'])
+    fila = (
+        AsignacionTurno.objects.filter(programacion=mayor['programacion'])
+        .values('tercero_id', 'tercero__centro_operativo_id', 'tercero__cargo_predefinido_id')
+        .first()
+    )
+    bitacora = Bitacora.objects.order_by('-fecha_hora', '-id').values('fecha_hora', 'id')[100:101].first()
+    return {
+        'bitacora': bitacora,
+        'programacion': mayor['programacion'],
+        'tercero': fila['tercero_id'],
+        'centro': fila['tercero__centro_operativo_id'],
+        'cargo': fila['tercero__cargo_predefinido_id'],
+        'fecha_inicio': programacion['fecha_inicio'],
+        'fecha_fin': programacion['fecha_fin'],
+    }
+
+
+def consultas_clave(valores):
+    """
+    Consultas de los caminos críticos con los filtros de las vistas.
+
+    Args:
+        valores: Dict retornado por _valores_muestra
+
+    Returns:
+        Lista de (nombre, queryset)
+    """
+    rango = (valores['fecha_inicio'], valores['fecha_fin'])
+    consultas = [
+        ('malla/nomina: asignaciones por programación y rango de días',
+         AsignacionTurno.objects.filter(programacion=valores['programacion'], dia__range=rango)
+         .values_list('tercero_id', 'dia', 'letra_turno').order_by('dia')),
+        ('extender: última posición por tercero',
+         AsignacionTurno.objects.filter(programacion=valores['programacion'])
+         .order_by('tercero_id', '-dia').values('tercero_id', 'fila', 'columna', 'dia')),
+        ('edición: asignaciones de un tercero en una programación',
+         AsignacionTurno.objects.filter(programacion=valores['programacion'], tercero=valores['tercero'])
+         .order_by('dia')),
+        ('horarios_tercero: asignaciones de un tercero por día',
+         AsignacionTurno.objects.filter(tercero=valores['tercero'], dia__gte=valores['fecha_inicio'])
+         .order_by('dia')),
+        ('conflictos: claves (tercero, dia) ocupadas en programaciones activas',
+         AsignacionTurno.objects.filter(programacion__activo=True, tercero_id__in=[valores['tercero']],
+                                        dia__range=rango)
+         .values_list('tercero_id', 'dia', 'programacion_id')),
+        ('generar: terceros elegibles por centro, cargo y estado',
+         Tercero.objects.filter(centro_operativo=valores['centro'], cargo_predefinido=valores['cargo'],
+                                estado_tercero=Tercero.Estado_Activo)
+         .order_by('apellido_tercero')),
+        ('api asignaciones: página por cursor (dia, id) en un rango de días',
+         AsignacionTurno.objects.filter(Q(dia__gte=valores['fecha_inicio']),
+                                        Q(dia__gt=valores['fecha_inicio']) | Q(dia=valores['fecha_inicio'], id__gt=0),
+                                        dia__lte=valores['fecha_fin'])
+         .order_by('dia', 'id').values('id', 'dia', 'letra_turno')[:101]),
+        ('api asignaciones: página de un tercero',
+         AsignacionTurno.objects.filter(tercero=valores['tercero']).order_by('dia', 'id')[:101]),
+        ('historial_objeto: registros de una programación por (modelo_afectado, objeto_id)',
+         Bitacora.objects.filter(filtro_historial(ProgramacionHorario, valores['programacion'], incluir_hijos=False))
+         .order_by('-fecha_hora', '-id')[:51]),
+    ]
+    if valores['bitacora']:
+        fecha_hora, id_bitacora = valores['bitacora']['fecha_hora'], valores['bitacora']['id']
+        consultas.append((
+            'bitacora_dashboard: página siguiente por cursor (fecha_hora, id)',
+            Bitacora.objects.filter(Q(fecha_hora__lte=fecha_hora),
+                                    Q(fecha_hora__lt=fecha_hora) | Q(fecha_hora=fecha_hora, id__lt=id_bitacora))
+            .order_by('-fecha_hora', '-id')[:26],
+        ))
+        consultas.append((
+            'bitacora_dashboard: búsqueda libre por el índice de términos',
+            filtrar_busqueda(Bitacora.objects.all(), 'editar programacion').order_by('-fecha_hora', '-id')[:26],
+        ))
+    return consultas
+
+
+# ========== EXPLAIN POR MOTOR ==========
+
+def _explain_mysql(cursor, sql, params):
+    cursor.execute(f'EXPLAIN {sql}', params)
+    columnas = [c[0].lower() for c in cursor.description]
+    pasos = []
+    for fila in cursor.fetchall():
+        datos = dict(zip(columnas, fila))
+        extra = datos.get('extra') or ''
+        pasos.append(PasoPlan(
+            tabla=datos.get('table') or '',
+            indice=datos.get('key') or '',
+            completo=datos.get('type') == 'ALL',
+            ordenamiento='filesort' in extra,
+            detalle=f"type={datos.get('type')} rows={datos.get('rows')} {extra}".strip(),
+        ))
+    return pasos
+
+
+def _explain_postgresql(cursor, sql, params):
+    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    pasos = []
+
+    def recorrer(nodo):
+        tipo = nodo.get('Node Type', '')
+        if 'Relation Name' in nodo or tipo == 'Sort':
+            pasos.append(PasoPlan(
+                tabla=nodo.get('Relation Name', ''),
+                indice=nodo.get('Index Name', ''),
+                completo=tipo == 'Seq Scan',
+                ordenamiento=tipo == 'Sort',
+                detalle=tipo,
+            ))
+        for hijo in nodo.get('Plans', []):
+            recorrer(hijo)
+
+    recorrer(plan[0]['Plan'])
+    return pasos
+
+
+def _explain_sqlite(cursor, sql, params):
+    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+    pasos = []
+    for fila in cursor.fetchall():
+        detalle = fila[-1]
+        palabras = detalle.split()
+        if palabras[:1] in (['SCAN'], ['SEARCH']):
+            indice = ''
+            if ' INDEX ' in detalle:
+                indice = detalle.split(' INDEX ', 1)[1].split()[0]
+            pasos.append(PasoPlan(
+                tabla=palabras[1],
+                indice=indice,
+                # "SCAN tabla USING INDEX" recorre el índice en orden: no es un full scan de la tabla
+                completo=palabras[0] == 'SCAN' and not indice,
+                detalle=detalle,
+            ))
+        elif detalle.startswith('USE TEMP B-TREE'):
+            pasos.append(PasoPlan(tabla='', ordenamiento=True, detalle=detalle))
+    return pasos
+
+
+_EXPLAIN_POR_MOTOR = {
+    'mysql': _explain_mysql,
+    'postgresql': _explain_postgresql,
+    'sqlite': _explain_sqlite,
+}
+
+
+def explicar(nombre, queryset):
+    """
+    Ejecuta EXPLAIN sobre un queryset.
+
+    Args:
+        nombre: Nombre descriptivo de la consulta
+        queryset: QuerySet a analizar
+
+    Returns:
+        ResultadoPlan con los pasos del plan
+    """
+    explain = _EXPLAIN_POR_MOTOR.get(connection.vendor)
+    if explain is None:
+        raise NotImplementedError(f'EXPLAIN no soportado para el motor {connection.vendor}')
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        pasos = explain(cursor, sql, params)
+    return ResultadoPlan(nombre=nombre, sql=sql % tuple(repr(p) for p in params), pasos=pasos)
+
+
+def verificar_planes():
+    """
+    Analiza todas las consultas clave con los datos presentes en la BD.
+
+    Returns:
+        Lista de ResultadoPlan, o None si no hay asignaciones para armar las consultas
+    """
+    valores = _valores_muestra()
+    if valores is None:
+        return None
+    return [explicar(nombre, queryset) for nombre, queryset in consultas_clave(valores)]
@@ -0,0 +1,226 @@
+"""
+Arnés para pruebas de presupuesto de consultas SQL.
+
+Cada vista se ejecuta contra dos datasets sintéticos de distinto tamaño (uno
+pequeño y otro con el triple de terceros, días y bitácora). Si la cantidad de
+consultas crece con las filas, la vista tiene un patrón N+1 y la prueba falla
+mostrando las huellas SQL repetidas de la corrida grande.
+
+Uso (en el tests.py de cada app; se importa el módulo y no la clase para que
+el runner no ejecute la base)::
+
+    from programacion_turnos import presupuesto_consultas
+
+    class PresupuestoConsultasEmpresasTests(presupuesto_consultas.PresupuestoConsultasTestCase):
+        urls_modulo = 'empresas.urls'
+        casos = {
+            'empresas:empresa_detail': Caso(lambda c: [c.empresa]),
+        }
+        excluidas = {'empresas:api_debug_models': 'motivo'}
+"""
+import contextlib
+import importlib
+import io
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+from django.contrib.auth.models import Group, Permission
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.urls import URLResolver, reverse
+from rest_framework.test import APIClient
+
+from .perfilador_sql import RegistroConsultas
+from .services.dataset_sintetico import GeneradorDataset, parametros_para
+from .services.revision_programacion import descartar_pendientes
+
+DATASET_PEQUENO = dict(prefijo='QA', centros=2, cargos=1, terceros=12, usuarios=2,
+                       dias=14, dias_por_programacion=14, bitacoras=40)
+DATASET_GRANDE = dict(prefijo='QB', centros=2, cargos=1, terceros=36, usuarios=6,
+                      dias=42, dias_por_programacion=42, bitacoras=120)
+
+
+@dataclass
+class Caso:
+    """
+    Cómo invocar una URL con los objetos de un dataset.
+
+    Args:
+        args: Función contexto -> lista de argumentos para reverse()
+        metodo: 'get' o 'post'
+        datos: Función contexto -> payload (JSON para APIs, form para vistas web)
+        formato: 'json' para enviar el payload como JSON
+        query: Query string agregado a la URL
+        lotes: Consultas extra toleradas por escrituras en lote (``bulk_create`` crece
+            con filas / tamaño del lote, no con cada fila)
+        estado: Código HTTP esperado (una respuesta de error mediría otro camino de la vista)
+    """
+    args: Callable = field(default=lambda c: [])
+    metodo: str = 'get'
+    datos: Optional[Callable] = None
+    formato: Optional[str] = None
+    query: str = ''
+    lotes: int = 0
+    estado: int = 200
+
+
+def nombres_de_urls(modulo, namespace=None):
+    """Nombres (con namespace) de todas las URLs de un módulo, incluyendo los includes."""
+    urls = importlib.import_module(modulo)
+    namespace = namespace if namespace is not None else getattr(urls, 'app_name', None)
+
+    def recorrer(patrones):
+        for patron in patrones:
+            if isinstance(patron, URLResolver):
+                yield from recorrer(patron.url_patterns)
+            elif patron.name:
+                yield f'{namespace}:{patron.name}' if namespace else patron.name
+
+    return set(recorrer(urls.urlpatterns))
+
+
+def contexto_dataset(prefijo):
+    """
+    Objetos representativos de un dataset sintético para construir las URLs.
+
+    Args:
+        prefijo: Prefijo con el que se generó el dataset
+
+    Returns:
+        SimpleNamespace con ids de programación, centro, tercero, etc.
+    """
+    from empresas.models import CargoPredefinido, CentroOperativo, Empresa, Proyecto, UnidadNegocio
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from usuarios.models import CentroDeCosto, CodigoTurno, Rol, Usuario
+    from .models import AsignacionTurno, ProgramacionHorario
+
+    programacion = (
+        ProgramacionHorario.all_objects.filter(nombre__startswith=f'{prefijo} ')
+        .annotate(filas=Count('asignaciones')).order_by('-filas').first()
+    )
+    terceros = list(
+        AsignacionTurno.objects.filter(programacion=programacion)
+        .order_by('tercero_id').values_list('tercero_id', flat=True).distinct()[:2]
+    )
+    asignacion = AsignacionTurno.objects.filter(programacion=programacion, tercero_id=terceros[0]).first()
+    centro = CentroOperativo.objects.get(pk=programacion.centro_operativo_id)
+    empresa = Empresa.all_objects.filter(nit__startswith=f'{prefijo}-').first()
+    usuario = Usuario.all_objects.filter(username__startswith=f'{prefijo.lower()}_usuario_').first()
+    grupo = Group.objects.create(name=f'Grupo {prefijo}')
+    grupo.permissions.set(Permission.objects.order_by('id')[:10 if prefijo == DATASET_PEQUENO['prefijo'] else 30])
+
+    return SimpleNamespace(
+        prefijo=prefijo,
+        programacion=programacion.pk,
+        centro=centro.pk,
+        proyecto=Proyecto.all_objects.filter(nombre__startswith=f'Proyecto {prefijo} ').first().pk,
+        empresa=empresa.pk,
+        unidad=UnidadNegocio.all_objects.filter(nombre__startswith=f'UEN {prefijo} ').first().pk,
+        cargo=CargoPredefinido.objects.get(pk=programacion.cargo_predefinido_id).pk,
+        centro_costo=CentroDeCosto.objects.filter(codigo__startswith=f'{prefijo}-CC').first().pk,
+        codigo_turno=CodigoTurno.objects.order_by('pk').first().pk,
+        usuario=usuario.pk,
+        refresh=str(RefreshToken.for_user(usuario)),
+        rol=Rol.objects.create(nombre=f'Rol {prefijo}').pk,
+        modelo_turno=programacion.modelo_turno_id,
+        grupo=grupo.pk,
+        tercero=terceros[0],
+        tercero2=terceros[1],
+        asignacion=asignacion.pk,
+        asignacion_dia=asignacion.dia.isoformat(),
+        asignacion_letra=asignacion.letra_turno,
+        fecha_fin=programacion.fecha_fin,
+    )
+
+
+def huellas_que_crecen(pequeno, grande):
+    """
+    Huellas SQL que se ejecutan más veces en la corrida grande que en la pequeña.
+
+    Returns:
+        Lista de (huella, conteo en la corrida grande), de mayor a menor crecimiento
+    """
+    crecimiento = []
+    for huella, (conteo, _) in grande.huellas.items():
+        anterior = pequeno.huellas[huella][0] if huella in pequeno.huellas else 0
+        if conteo > anterior:
+            crecimiento.append((conteo - anterior, huella, conteo))
+    return [(huella, conteo) for _, huella, conteo in sorted(crecimiento, key=lambda c: -c[0])]
+
+
+# La caché de dos niveles consulta la tabla django_cache según el tiempo transcurrido;
+# en memoria el conteo depende solo de la vista
+CACHES_EN_MEMORIA = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'presupuesto'},
+    'compartida': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'presupuesto-compartida'},
+}
+
+
+@override_settings(CACHES=CACHES_EN_MEMORIA)
+class PresupuestoConsultasTestCase(TestCase):
+    """
+    Base de las pruebas de presupuesto de consultas.
+
+    Las subclases definen ``urls_modulo``, ``casos`` (nombre de URL -> Caso) y
+    ``excluidas`` (nombre de URL -> motivo). Toda URL del módulo debe estar en
+    uno de los dos.
+    """
+    urls_modulo = None
+    casos = {}
+    excluidas = {}
+    # Consultas extra toleradas en el dataset grande (p. ej. paginadores que agregan un enlace)
+    tolerancia = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        from usuarios.models import Usuario
+
+        if not cls.urls_modulo:
+            return
+        cls.usuario = Usuario.objects.create_superuser('presupuesto', 'presupuesto@example.com', 'x')
+        cls.resultados = {}
+        # Se mide el dataset pequeño antes de crear el grande para que los listados también crezcan
+        for nombre, parametros in (('pequeno', DATASET_PEQUENO), ('grande', DATASET_GRANDE)):
+            GeneradorDataset(parametros_para('pequena', **parametros)).generar()
+            contexto = contexto_dataset(parametros['prefijo'])
+            cls.resultados[nombre] = {url: cls._medir(url, caso, contexto) for url, caso in cls.casos.items()}
+
+    @classmethod
+    def _medir(cls, nombre_url, caso, contexto):
+        cliente = APIClient()
+        cliente.force_login(cls.usuario)
+        cliente.force_authenticate(cls.usuario)
+        url = reverse(nombre_url, args=caso.args(contexto)) + caso.query
+        datos = caso.datos(contexto) if caso.datos else None
+        registro = RegistroConsultas(top_lentas=0)
+        with transaction.atomic(), contextlib.redirect_stdout(io.StringIO()):
+            with connection.execute_wrapper(registro):
+                respuesta = getattr(cliente, caso.metodo)(url, datos, format=caso.formato)
+            transaction.set_rollback(True)
+        descartar_pendientes()
+        registro.estado = respuesta.status_code
+        return registro
+
+    def test_todas_las_urls_tienen_caso(self):
+        faltantes = nombres_de_urls(self.urls_modulo) - set(self.casos) - set(self.excluidas)
+        self.assertFalse(faltantes, f'URLs sin caso de presupuesto de consultas: {sorted(faltantes)}')
+
+    def test_consultas_no_crecen_con_los_datos(self):
+        for nombre_url in self.casos:
+            pequeno = self.resultados['pequeno'][nombre_url]
+            grande = self.resultados['grande'][nombre_url]
+            with self.subTest(url=nombre_url):
+                esperado = self.casos[nombre_url].estado
+                self.assertEqual((pequeno.estado, grande.estado), (esperado, esperado),
+                                 f'{nombre_url} respondió {pequeno.estado}/{grande.estado} (se esperaba {esperado})')
+                if grande.total > pequeno.total + self.tolerancia + self.casos[nombre_url].lotes:
+                    repetidas = '\n'.join(
+                        f"   ×{conteo}  {huella[:200]}" for huella, conteo in huellas_que_crecen(pequeno, grande)[:5]
+                    )
+                    print(f'\n⚠️  {nombre_url}: {pequeno.total} → {grande.total} consultas\n{repetidas}')
+                    self.fail(
+                        f'{nombre_url}: las consultas crecen con los datos '
+                        f'({pequeno.total} → {grande.total}). Huellas repetidas:\n{repetidas}'
+                    )
@@ -5,6 +5,12 @@ from rest_framework import serializers
 from programacion_turnos.forms import ProgramacionHorarioForm
 from .models import ProgramacionHorario, AsignacionTurno, ModeloTurno, LetraTurno
 from datetime import timedelta
+import time
+from horas_sistema.metricas import GENERACION_DURACION, GENERACION_FILAS
+from .services.carga_asignaciones import MAXIMO_FILAS, MODOS, TAMANO_LOTE
+from .services.consulta_asignaciones import campos_solicitados
+from .services.revision_programacion import invalidar_programacion
+from .utils import _valores_auditables, registrar_bitacora_lote
 
 
 class ProgramacionHorarioSerializer(serializers.ModelSerializer):
@@ -53,6 +59,98 @@ class ProgramacionExtensionSerializer(serializers.Serializer):
             raise serializers.ValidationError("La fecha de inicio debe ser anterior o igual a la fecha de fin.")
         return data
 
+class RangoConflictosSerializer(serializers.Serializer):
+    fecha_inicio = serializers.DateField(required=False)
+    fecha_fin = serializers.DateField(required=False)
+    limite = serializers.IntegerField(required=False, min_value=1, max_value=5000, default=500)
+
+    def validate(self, data):
+        if data.get('fecha_inicio') and data.get('fecha_fin') and data['fecha_inicio'] > data['fecha_fin']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior o igual a la fecha de fin.")
+        return data
+
+class ReporteReglasLaboralesSerializer(RangoConflictosSerializer):
+    max_horas_ventana = serializers.FloatField(required=False, min_value=1, default=48)
+    descanso_minimo_horas = serializers.FloatField(required=False, min_value=0, default=10)
+
+class RangoCoberturaSerializer(serializers.Serializer):
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+
+    def validate(self, data):
+        if data['fecha_inicio'] > data['fecha_fin']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior o igual a la fecha de fin.")
+        if (data['fecha_fin'] - data['fecha_inicio']).days > 366:
+            raise serializers.ValidationError("El rango no puede superar un año.")
+        return data
+
+class HistorialObjetoSerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    dir = serializers.ChoiceField(choices=['siguiente', 'anterior'], required=False, default='siguiente')
+    tamano = serializers.IntegerField(required=False, min_value=1, max_value=200, default=50)
+    hijos = serializers.BooleanField(required=False, default=True)
+
+class ListadoAsignacionesSerializer(serializers.Serializer):
+    programacion = serializers.IntegerField(required=False)
+    tercero = serializers.IntegerField(required=False)
+    desde = serializers.DateField(required=False)
+    hasta = serializers.DateField(required=False)
+    fields = serializers.CharField(required=False, allow_blank=True)
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    dir = serializers.ChoiceField(choices=['siguiente', 'anterior'], required=False, default='siguiente')
+    tamano = serializers.IntegerField(required=False, min_value=1, max_value=1000, default=100)
+
+    def validate_fields(self, value):
+        try:
+            return campos_solicitados(value)
+        except ValueError as error:
+            raise serializers.ValidationError(str(error))
+
+    def validate(self, data):
+        if data.get('desde') and data.get('hasta') and data['desde'] > data['hasta']:
+            raise serializers.ValidationError("La fecha desde debe ser anterior o igual a la fecha hasta.")
+        return data
+
+class CargaAsignacionesSerializer(serializers.Serializer):
+    # Las filas se validan en lote en services/carga_asignaciones.py, no una por una aquí
+    asignaciones = serializers.ListField(allow_empty=False, max_length=MAXIMO_FILAS)
+    modo = serializers.ChoiceField(choices=MODOS, required=False, default='upsert')
+    forzar = serializers.BooleanField(required=False, default=False)
+
+class PreflightConflictosSerializer(serializers.Serializer):
+    centro_operativo = serializers.IntegerField()
+    cargo_predefinido = serializers.IntegerField()
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    programacion = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        if data['fecha_inicio'] > data['fecha_fin']:
+            raise serializers.ValidationError("La fecha de inicio debe ser anterior o igual a la fecha de fin.")
+        return data
+
+def _registrar_generacion_en_bitacora(programacion, nuevas):
+    """Un registro CREAR por asignación generada, igual al de la bitácora automática, en un solo lote."""
+    from .middleware import get_current_request
+
+    if not nuevas:
+        return
+    if nuevas[0].pk is None:
+        # MySQL no devuelve los ids de bulk_create: se leen por (tercero, dia); la programación se acaba de limpiar
+        ids = {
+            (tercero_id, dia): pk for pk, tercero_id, dia in
+            AsignacionTurno.objects.filter(programacion=programacion).values_list('pk', 'tercero_id', 'dia')
+        }
+        for asignacion in nuevas:
+            asignacion.pk = ids[(asignacion.tercero_id, asignacion.dia)]
+    registrar_bitacora_lote(get_current_request(), 'CREAR', 'programacion', 'asignacionturno', [
+        {'objeto_id': asignacion.pk,
+         'descripcion': f'{AsignacionTurno._meta.verbose_name} crear: {asignacion}',
+         'valores_nuevos': _valores_auditables(asignacion)}
+        for asignacion in nuevas
+    ])
+
+
 def generar_asignaciones(programacion):
     """
     Genera asignaciones de turnos para una programación específica.
@@ -69,25 +167,27 @@ def generar_asignaciones(programacion):
     print(f"Modelo de turno: {programacion.modelo_turno.nombre}")
     print(f"Cargo predefinido: {programacion.cargo_predefinido.nombre}")
     print(f"Fechas: {programacion.fecha_inicio} - {programacion.fecha_fin}")
+    inicio_generacion = time.perf_counter()
     
     try:
         # PASO 1: OBTENER TERCEROS DEL CENTRO OPERATIVO CON EL CARGO SELECCIONADO
         from usuarios.models import Tercero
+        from .services.fuerza_laboral import diagnostico_fuerza_laboral
         
-        # LÓGICA CORRECTA: Buscar directamente en Tercero por centro_operativo y cargo_predefinido
+        # Terceros vinculados al centro con el cargo seleccionado en algún día del rango
+        # (periodos laborales), con un mapa de bits para saber qué días trabaja cada uno
+        disponibilidad = programacion.disponibilidad_terceros(programacion.fecha_inicio, programacion.fecha_fin)
         terceros_candidatos = Tercero.objects.filter(
-            centro_operativo=programacion.centro_operativo,  # Centro seleccionado
-            cargo_predefinido=programacion.cargo_predefinido,  # Cargo seleccionado
-            estado_tercero=1  # Solo activos
-        ).select_related('cargo_predefinido').order_by('apellido_tercero')
+            pk__in=disponibilidad.terceros
+        ).select_related('cargo_predefinido', 'centro_operativo').order_by('apellido_tercero')
   ###MOMENTO DE REALIZAR LAS ASIGNACIONES SE REALIZA FILTRO DE NOMBRE####
 
         print(f"\n=== ANÁLISIS DE TERCEROS ===")
         print(f"Centro operativo seleccionado: {programacion.centro_operativo.nombre}")
         print(f"Cargo seleccionado: {programacion.cargo_predefinido.nombre}")
-        print(f"Total de terceros encontrados: {terceros_candidatos.count()}")
+        print(f"Total de terceros encontrados: {len(disponibilidad.terceros)}")
         
-        if not terceros_candidatos.exists():
+        if not disponibilidad.terceros:
             print("❌ NO HAY TERCEROS VÁLIDOS PARA LA PROGRAMACIÓN")
             print("\n🔍 DIAGNÓSTICO:")
             print("Verificar que:")
@@ -95,31 +195,19 @@ def generar_asignaciones(programacion):
             print("2. Los terceros tengan asignado el cargo correcto")
             print("3. Los terceros estén activos (estado_tercero = 1)")
             
-            # Mostrar estadísticas para debugging
-            total_terceros_centro = Tercero.objects.filter(
-                centro_operativo=programacion.centro_operativo
-            ).count()
-            
-            terceros_con_cargo = Tercero.objects.filter(
-                centro_operativo=programacion.centro_operativo,
-                cargo_predefinido=programacion.cargo_predefinido
-            ).count()
-                                                                        
-            terceros_activos = Tercero.objects.filter(
-                centro_operativo=programacion.centro_operativo,
-                estado_tercero=1
-            ).count()
+            # Estadísticas para debugging (una sola consulta de agregación)
+            diagnostico = diagnostico_fuerza_laboral(programacion.centro_operativo_id, programacion.cargo_predefinido_id)
+            total_terceros_centro = diagnostico['total_centro']
+            terceros_con_cargo = diagnostico['con_cargo']
+            terceros_activos = diagnostico['activos_centro']
             
             print(f"\n📊 ESTADÍSTICAS DEL CENTRO '{programacion.centro_operativo.nombre}':")
             print(f"   - Total terceros en centro: {total_terceros_centro}")
             print(f"   - Terceros con cargo '{programacion.cargo_predefinido.nombre}': {terceros_con_cargo}")
             print(f"   - Terceros activos: {terceros_activos}")
             
-            # Verificar si hay terceros con el cargo en otros centros
-            terceros_cargo_total = Tercero.objects.filter(
-                cargo_predefinido=programacion.cargo_predefinido,
-                estado_tercero=1
-            ).count()
+            # Terceros con el cargo en otros centros
+            terceros_cargo_total = diagnostico['cargo_en_empresa']
             
             print(f"\n📊 ESTADÍSTICAS GENERALES:")
             print(f"   - Total terceros con cargo '{programacion.cargo_predefinido.nombre}' en TODA la empresa: {terceros_cargo_total}")
@@ -175,11 +263,13 @@ def generar_asignaciones(programacion):
         fecha_fin = programacion.fecha_fin
         dias = (fecha_fin - fecha_inicio).days + 1
         num_terceros = len(terceros_candidatos)
+        # Días-tercero vinculados: bits encendidos de cada mapa
+        dias_vinculados = sum(mascara.bit_count() for mascara in disponibilidad.mascaras.values())
         
         print(f"\n=== PARÁMETROS DE PROGRAMACIÓN ===")
         print(f"Rango de días: {dias} días")
         print(f"Total de terceros: {num_terceros}")
-        print(f"Total de asignaciones a crear: {dias * num_terceros}")
+        print(f"Total de asignaciones a crear: {dias_vinculados}")
         
         if not matriz:
             print("❌ Matriz vacía, no se crean asignaciones.")
@@ -194,20 +284,30 @@ def generar_asignaciones(programacion):
             print(f"⚠️ Eliminando {asignaciones_existentes.count()} asignaciones existentes...")
             asignaciones_existentes.delete()
         
+        # Celdas que el tercero ya tiene ocupadas en otra programación activa: no se duplican
+        from .services.conflictos_turnos import claves_de_disponibilidad, conflictos_para_claves
+        ocupadas = conflictos_para_claves(claves_de_disponibilidad(disponibilidad), excluir_programacion=programacion)
+        if ocupadas:
+            print(f"⚠️ {len(ocupadas)} días-tercero ya tienen turno en otra programación y se omiten")
+
         # Crear nuevas asignaciones
-        asignaciones_creadas = 0
+        from usuarios.models import CodigoTurno
+        codigos_por_letra = CodigoTurno.ids_por_letra()
+        nuevas = []
         for idx, tercero in enumerate(terceros_candidatos):
             fila = idx % (max_fila + 1)
             print(f"\n👤 Tercero {idx+1}: {tercero.nombre_tercero} {tercero.apellido_tercero} - Asignado a Fila {fila}")
-            
+        
             for dia_offset in range(dias):
                 fecha = fecha_inicio + timedelta(days=dia_offset)
                 columna = dia_offset % (max_col + 1)
                 letra = matriz.get((fila, columna))
-                
+            
+                if not disponibilidad.activo(tercero.id_tercero, fecha) or (tercero.id_tercero, fecha) in ocupadas:
+                    continue
                 if letra:
                     try:
-                        AsignacionTurno.objects.create(
+                        asignacion = AsignacionTurno(
                             programacion=programacion,
                             tercero=tercero,
                             dia=fecha,
@@ -215,13 +315,25 @@ def generar_asignaciones(programacion):
                             fila=fila,
                             columna=columna
                         )
-                        asignaciones_creadas += 1
+                        # Misma validación de la letra que save(), sin consultas por celda
+                        asignacion.clean()
+                        asignacion.sincronizar_codigo_turno(codigos_por_letra)
+                        nuevas.append(asignacion)
                         print(f"   ✅ {fecha.strftime('%Y-%m-%d')}: {letra}")
                     except Exception as e:
                         print(f"   ❌ Error al crear asignación: {e}")
                 else:
                     print(f"   ⚠️ {fecha.strftime('%Y-%m-%d')}: Letra vacía para fila={fila}, columna={columna}")
+
+        # Un bulk_create y una bitácora por lote en vez de un save (y sus señales) por celda
+        AsignacionTurno.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+        asignaciones_creadas = len(nuevas)
+        invalidar_programacion(programacion)
+        _registrar_generacion_en_bitacora(programacion, nuevas)
         
+        GENERACION_DURACION.observe(time.perf_counter() - inicio_generacion)
+        GENERACION_FILAS.observe(asignaciones_creadas)
+
         # PASO 5: VERIFICACIÓN FINAL
         total_asignaciones = AsignacionTurno.objects.filter(programacion=programacion).count()
         print(f"\n=== PROGRAMACIÓN COMPLETADA ===")
@@ -229,8 +341,8 @@ def generar_asignaciones(programacion):
         print(f"✅ Total de asignaciones en BD: {total_asignaciones}")
         print(f"✅ Programación exitosa para {num_terceros} terceros en {dias} días")
         
-        if asignaciones_creadas != dias * num_terceros:
-            print(f"⚠️ Se esperaban {dias * num_terceros} asignaciones, se crearon {asignaciones_creadas}")
+        if asignaciones_creadas != dias_vinculados - len(ocupadas):
+            print(f"⚠️ Se esperaban {dias_vinculados - len(ocupadas)} asignaciones, se crearon {asignaciones_creadas}")
         
     except Exception as e:
         print(f"❌ ERROR GENERAL EN GENERAR_ASIGNACIONES: {e}")
@@ -250,7 +362,7 @@ class EditarLetraTurnoSerializer(serializers.Serializer):
 
     def validate_letra_turno(self, value):
         # Solo letras permitidas en la tabla LetraTurno
-        if not LetraTurno.objects.filter(codigo_letra=value).exists():
+        if not LetraTurno.objects.filter(valor=value).exists():
             raise serializers.ValidationError("La letra de turno no es válida.")
         # Solo letras, sin números ni caracteres especiales
         if not value.isalpha():
@@ -278,4 +390,6 @@ class CambioMallaSerializer(serializers.Serializer):
 
 class EditarMallaRequestSerializer(serializers.Serializer):
     cambios = CambioMallaSerializer(many=True)
+    # Guardar aunque los cambios generen violaciones de reglas laborales (se devuelven como advertencias)
+    forzar = serializers.BooleanField(required=False, default=False)
 
@@ -0,0 +1,376 @@
+"""
+Archivo en frío de la bitácora: JSONL comprimido, un archivo por mes.
+
+``archivar_bitacora`` mueve los registros anteriores a una fecha de corte a
+``BITACORA_ARCHIVO_DIR/bitacora-AAAA-MM.jsonl.gz`` (según el mes de
+``fecha_hora``) y los elimina de la tabla en lotes pequeños, cada uno en su
+propia transacción, para que ningún bloqueo dure más que un lote. Cada lote
+se agrega como un miembro gzip nuevo, y ``gzip`` lee los miembros
+concatenados como un solo flujo.
+
+Junto a cada archivo, ``bitacora-AAAA-MM.idx.jsonl`` guarda una línea por
+miembro: su posición en el archivo, el primer y el último (fecha_hora, id) y
+la cantidad de filas. Los lotes se escriben en orden de (fecha_hora, id) y
+sin repetir lo ya archivado, así que el archivo queda ordenado: una página
+del dashboard solo descomprime los miembros que siguen al cursor, y la
+exportación lee un miembro a la vez. Si el proceso se interrumpe entre
+escribir un lote y eliminarlo de la tabla, la siguiente ejecución no lo
+vuelve a escribir (solo lo elimina); un miembro escrito sin su línea de
+índice se descarta al escribir el siguiente.
+
+El resumen diario no se descuenta (ver resumen_bitacora.py), así que las
+estadísticas del dashboard siguen contando los meses archivados
+(``total_archivado`` da cuántos son). Los registros archivados vuelven a
+aparecer en el dashboard cuando el filtro de fechas alcanza un mes archivado
+(``paginar_bitacora``).
+"""
+import datetime
+import gzip
+import itertools
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Bitacora
+from .indice_bitacora import terminos_busqueda, tokens_bitacora
+from .paginacion import ANTERIOR, SIGUIENTE, paginar_keyset
+from .resumen_bitacora import _fecha
+
+CAMPOS_ARCHIVO = ('id', 'fecha_hora', 'usuario_id', 'ip_address', 'tipo_accion', 'modulo', 'modelo_afectado',
+                  'objeto_id', 'descripcion', 'valores_anteriores', 'valores_nuevos', 'campos_modificados')
+_PATRON_ARCHIVO = re.compile(r'^bitacora-(\d{4})-(\d{2})\.jsonl\.gz$')
+
+
+@dataclass
+class Miembro:
+    """Un lote del archivo de un mes: bytes [inicio, fin) y su rango de (fecha_hora, id)."""
+    inicio: int
+    fin: int
+    primero: tuple
+    ultimo: tuple
+    filas: int
+
+
+def _directorio(directorio=None):
+    return Path(directorio or settings.BITACORA_ARCHIVO_DIR)
+
+
+def ruta_mes(anio, mes, directorio=None):
+    return _directorio(directorio) / f'bitacora-{anio:04d}-{mes:02d}.jsonl.gz'
+
+
+def ruta_indice(anio, mes, directorio=None):
+    return _directorio(directorio) / f'bitacora-{anio:04d}-{mes:02d}.idx.jsonl'
+
+
+def meses_archivados(directorio=None):
+    """Meses con archivo, como tuplas (año, mes) ordenadas de la más antigua a la más reciente."""
+    carpeta = _directorio(directorio)
+    if not carpeta.is_dir():
+        return []
+    meses = []
+    for nombre in os.listdir(carpeta):
+        coincidencia = _PATRON_ARCHIVO.match(nombre)
+        if coincidencia:
+            meses.append((int(coincidencia.group(1)), int(coincidencia.group(2))))
+    return sorted(meses)
+
+
+def _clave(fila):
+    return fila['fecha_hora'], fila['id']
+
+
+def _clave_json(clave):
+    return [clave[0].isoformat(), clave[1]]
+
+
+def _clave_de_json(valor):
+    return datetime.datetime.fromisoformat(valor[0]), valor[1]
+
+
+def miembros_mes(anio, mes, directorio=None):
+    """Índice del archivo de un mes: un Miembro por lote, en orden de (fecha_hora, id)."""
+    ruta = ruta_indice(anio, mes, directorio)
+    if not ruta.exists():
+        return []
+    with open(ruta, encoding='utf-8') as archivo:
+        return [
+            Miembro(datos['inicio'], datos['fin'], _clave_de_json(datos['primero']),
+                    _clave_de_json(datos['ultimo']), datos['filas'])
+            for datos in map(json.loads, archivo)
+        ]
+
+
+def ultimo_archivado(directorio=None):
+    """(fecha_hora, id) del registro archivado más reciente, o None si no hay archivo."""
+    for anio, mes in reversed(meses_archivados(directorio)):
+        miembros = miembros_mes(anio, mes, directorio)
+        if miembros:
+            return miembros[-1].ultimo
+    return None
+
+
+def total_archivado(directorio=None):
+    """Registros en el archivo, sumando los índices (sin descomprimir nada)."""
+    return sum(miembro.filas for anio, mes in meses_archivados(directorio)
+               for miembro in miembros_mes(anio, mes, directorio))
+
+
+def _linea(fila):
+    fila = dict(fila, fecha_hora=fila['fecha_hora'].isoformat())
+    return json.dumps(fila, ensure_ascii=False, default=str) + '\n'
+
+
+def _fsync(archivo):
+    archivo.flush()
+    os.fsync(archivo.fileno())
+
+
+def _agregar(anio, mes, filas, directorio=None):
+    """
+    Agrega al mes un miembro con las filas (ordenadas) posteriores a lo ya archivado.
+
+    Returns:
+        Cantidad de filas escritas
+    """
+    miembros = miembros_mes(anio, mes, directorio)
+    if miembros:
+        # Un lote reescrito tras una interrupción ya está en el archivo
+        filas = [fila for fila in filas if _clave(fila) > miembros[-1].ultimo]
+    if not filas:
+        return 0
+    ruta = ruta_mes(anio, mes, directorio)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    inicio = miembros[-1].fin if miembros else 0
+    with open(ruta, 'ab') as crudo:
+        # Un miembro escrito sin su línea de índice (interrupción) se reemplaza
+        crudo.truncate(inicio)
+        crudo.write(gzip.compress(''.join(_linea(fila) for fila in filas).encode('utf-8')))
+        _fsync(crudo)
+        fin = crudo.tell()
+    miembros.append(Miembro(inicio, fin, _clave(filas[0]), _clave(filas[-1]), len(filas)))
+    # El índice se reemplaza entero (os.replace es atómico): nunca queda una línea a medias
+    temporal = ruta_indice(anio, mes, directorio).with_suffix('.tmp')
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        for miembro in miembros:
+            archivo.write(json.dumps({
+                'inicio': miembro.inicio, 'fin': miembro.fin, 'primero': _clave_json(miembro.primero),
+                'ultimo': _clave_json(miembro.ultimo), 'filas': miembro.filas,
+            }) + '\n')
+        _fsync(archivo)
+    os.replace(temporal, ruta_indice(anio, mes, directorio))
+    return len(filas)
+
+
+def archivar_bitacora(antes_de, directorio=None, lote=None, reportar=None):
+    """
+    Mueve a los archivos mensuales los registros con ``fecha_hora`` anterior a ``antes_de``.
+
+    Args:
+        antes_de: Fecha de corte (los registros de ese día se conservan)
+        directorio: Carpeta de los archivos (por defecto BITACORA_ARCHIVO_DIR)
+        lote: Registros por lote de escritura y eliminación (por defecto BITACORA_ARCHIVO_LOTE)
+        reportar: Callable opcional que recibe mensajes de progreso
+
+    Returns:
+        Cantidad de registros archivados
+    """
+    lote = lote or settings.BITACORA_ARCHIVO_LOTE
+    reportar = reportar or (lambda mensaje: None)
+    corte = datetime.datetime.combine(antes_de, datetime.time.min)
+    if settings.USE_TZ:
+        corte = timezone.make_aware(corte)
+
+    registros = Bitacora.objects.filter(fecha_hora__lt=corte).order_by('fecha_hora', 'id').values(*CAMPOS_ARCHIVO)
+    archivados = 0
+    while True:
+        # Siempre el primer lote: los anteriores ya se eliminaron
+        filas = list(registros[:lote])
+        if not filas:
+            break
+        por_mes = {}
+        for fila in filas:
+            dia = _fecha(fila['fecha_hora'])
+            por_mes.setdefault((dia.year, dia.month), []).append(fila)
+        for (anio, mes), filas_mes in por_mes.items():
+            _agregar(anio, mes, filas_mes, directorio)
+        with transaction.atomic():
+            Bitacora.objects.filter(id__in=[fila['id'] for fila in filas]).delete()
+        archivados += len(filas)
+        reportar(f'   {archivados:,} registros archivados')
+    return archivados
+
+
+def _leer_miembro(ruta, miembro):
+    with open(ruta, 'rb') as crudo:
+        crudo.seek(miembro.inicio)
+        texto = gzip.decompress(crudo.read(miembro.fin - miembro.inicio)).decode('utf-8')
+    filas = []
+    for linea in texto.splitlines():
+        # Dicts en vez de instancias: construir el modelo para cada línea cuesta más que leerla
+        datos = json.loads(linea)
+        datos['fecha_hora'] = datetime.datetime.fromisoformat(datos['fecha_hora'])
+        filas.append(datos)
+    return filas
+
+
+def _filas_mes(anio, mes, directorio=None, desde=None, invertir=False):
+    """
+    Filas archivadas de un mes en orden de (fecha_hora, id), o del más reciente al más antiguo si ``invertir``.
+
+    Con ``desde`` solo las filas más allá de esa clave: los miembros que quedan
+    enteros del lado ya recorrido no se leen. Se descomprime un miembro a la vez.
+    """
+    ruta = ruta_mes(anio, mes, directorio)
+    miembros = miembros_mes(anio, mes, directorio)
+    for miembro in reversed(miembros) if invertir else miembros:
+        if desde is not None and (miembro.primero >= desde if invertir else miembro.ultimo <= desde):
+            continue
+        filas = _leer_miembro(ruta, miembro)
+        for fila in reversed(filas) if invertir else filas:
+            if desde is None or (_clave(fila) < desde if invertir else _clave(fila) > desde):
+                yield fila
+
+
+def leer_mes(anio, mes, directorio=None):
+    """Registros archivados de un mes como instancias de Bitacora sin guardar, en orden."""
+    for datos in _filas_mes(anio, mes, directorio):
+        yield Bitacora(**datos)
+
+
+def _primer_dia(anio, mes):
+    return datetime.date(anio, mes, 1)
+
+
+def _ultimo_dia(anio, mes):
+    return _primer_dia(anio + mes // 12, mes % 12 + 1) - datetime.timedelta(days=1)
+
+
+def meses_en_rango(fecha_desde=None, fecha_hasta=None, directorio=None):
+    """
+    Meses archivados que alcanza un filtro de fechas.
+
+    Sin ninguna de las dos fechas el dashboard no lee el archivo: devuelve una lista vacía.
+    """
+    if not fecha_desde and not fecha_hasta:
+        return []
+    return [
+        (anio, mes) for anio, mes in meses_archivados(directorio)
+        if (not fecha_desde or _ultimo_dia(anio, mes) >= fecha_desde)
+        and (not fecha_hasta or _primer_dia(anio, mes) <= fecha_hasta)
+    ]
+
+
+def _coincide(fila, filtros, terminos):
+    dia = _fecha(fila['fecha_hora'])
+    if filtros.get('fecha_desde') and dia < filtros['fecha_desde']:
+        return False
+    if filtros.get('fecha_hasta') and dia > filtros['fecha_hasta']:
+        return False
+    usuario = filtros.get('usuario')
+    if usuario and fila['usuario_id'] != getattr(usuario, 'pk', usuario):
+        return False
+    for campo in ('tipo_accion', 'modulo'):
+        if filtros.get(campo) and fila[campo] != filtros[campo]:
+            return False
+    if filtros.get('modelo_afectado') and filtros['modelo_afectado'].lower() not in fila['modelo_afectado'].lower():
+        return False
+    if terminos:
+        # Misma semántica que el índice de búsqueda: cada término es prefijo de algún término del registro
+        tokens = tokens_bitacora(Bitacora(**fila))
+        return all(any(token.startswith(termino) for token in tokens) for termino in terminos)
+    return True
+
+
+def registros_archivados(filtros, valores=None, invertir=True, limite=25, directorio=None):
+    """
+    Registros archivados que cumplen los filtros, más allá del cursor ``valores``.
+
+    Los meses y sus miembros se leen en el orden pedido y la lectura se detiene
+    al completar ``limite``, así que una página cuesta lo que los miembros que
+    recorre, no el mes entero. Los registros que siguen en la tabla (un
+    archivado interrumpido antes de eliminarlos) se descartan con una consulta
+    por tanda: ya aparecen del lado de la tabla.
+
+    Args:
+        filtros: Dict con los filtros del dashboard (fecha_desde, fecha_hasta, usuario, tipo_accion,
+            modulo, modelo_afectado, busqueda)
+        valores: (fecha_hora, id) del cursor, o None para empezar por el extremo
+        invertir: De mayor a menor (True) o de menor a mayor
+        limite: Máximo de registros
+        directorio: Carpeta de los archivos
+
+    Returns:
+        Lista de instancias de Bitacora sin guardar, en el orden pedido
+    """
+    terminos = terminos_busqueda(filtros['busqueda']) if filtros.get('busqueda') else []
+    cursor = tuple(valores) if valores is not None else None
+
+    resultado = []
+    meses = meses_en_rango(filtros.get('fecha_desde'), filtros.get('fecha_hasta'), directorio)
+    if cursor is not None:
+        # Los meses que quedan enteros del lado ya recorrido no se leen
+        dia_cursor = _fecha(cursor[0])
+        meses = [(anio, mes) for anio, mes in meses
+                 if (_primer_dia(anio, mes) <= dia_cursor if invertir else _ultimo_dia(anio, mes) >= dia_cursor)]
+    for anio, mes in (reversed(meses) if invertir else meses):
+        candidatos = (fila for fila in _filas_mes(anio, mes, directorio, cursor, invertir)
+                      if _coincide(fila, filtros, terminos))
+        while len(resultado) < limite:
+            tanda = list(itertools.islice(candidatos, limite - len(resultado)))
+            if not tanda:
+                break
+            vivos = set(Bitacora.objects.filter(id__in=[fila['id'] for fila in tanda]).values_list('id', flat=True))
+            resultado.extend(Bitacora(**fila) for fila in tanda if fila['id'] not in vivos)
+        if len(resultado) >= limite:
+            break
+    return resultado
+
+
+def registros_archivados_en_orden(filtros, directorio=None):
+    """
+    Todos los registros archivados que cumplen los filtros, en orden de (fecha_hora, id).
+
+    Se descomprime un miembro a la vez: la memoria no depende del tamaño del mes.
+    """
+    terminos = terminos_busqueda(filtros['busqueda']) if filtros.get('busqueda') else []
+    for anio, mes in meses_en_rango(filtros.get('fecha_desde'), filtros.get('fecha_hasta'), directorio):
+        for fila in _filas_mes(anio, mes, directorio):
+            if _coincide(fila, filtros, terminos):
+                yield Bitacora(**fila)
+
+
+def paginar_bitacora(queryset, filtros, cursor=None, direccion=SIGUIENTE, tamano=25, directorio=None):
+    """
+    Página por cursor de la bitácora que incluye los meses archivados que alcanza el filtro de fechas.
+
+    Sin meses archivados en el rango, o si la tabla sola completa la página, es
+    ``paginar_keyset`` sobre la tabla. Los registros archivados de la página
+    traen su usuario con una sola consulta.
+    """
+    pagina = paginar_keyset(queryset, ('fecha_hora', 'id'), cursor=cursor, direccion=direccion, tamano=tamano)
+    meses = meses_en_rango(filtros.get('fecha_desde'), filtros.get('fecha_hasta'), directorio)
+    # Lo archivado es más antiguo que todo lo vivo: si la tabla llena la página hacia los
+    # registros antiguos, los archivos no aportan nada (hacia los recientes, registros_archivados
+    # ya descarta los meses anteriores al cursor)
+    if not meses or (not (cursor and direccion == ANTERIOR) and pagina.has_next):
+        return pagina
+
+    pagina = paginar_keyset(
+        queryset, ('fecha_hora', 'id'), cursor=cursor, direccion=direccion, tamano=tamano,
+        adicionales=lambda valores, invertir, limite: registros_archivados(
+            filtros, valores, invertir, limite, directorio),
+    )
+    archivados = [registro for registro in pagina if registro._state.adding]
+    usuarios = get_user_model().objects.in_bulk({registro.usuario_id for registro in archivados} - {None})
+    for registro in archivados:
+        registro.archivado = True
+        registro.usuario = usuarios.get(registro.usuario_id)
+    return pagina
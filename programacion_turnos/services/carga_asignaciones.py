@@ -0,0 +1,326 @@
+"""
+Carga masiva de asignaciones (crear, actualizar o ambas) por (programación, tercero, día).
+
+Pensada para herramientas externas que envían miles de cambios de una vez:
+
+1. ``filas_csv`` convierte un CSV en la misma lista de dicts que llega en JSON.
+2. ``cargar_asignaciones`` valida todas las filas en lote (una consulta para
+   las programaciones, una para los terceros y una por programación para las
+   asignaciones existentes), revisa cruces con otras programaciones activas y
+   las reglas laborales de las celdas que cambian, y solo si todo es válido
+   escribe por lotes en una transacción (``bulk_create`` para las nuevas y un
+   ``UPDATE`` por letra para las existentes).
+
+Una carga con errores no escribe nada y los reporta por número de registro
+(1 = primera fila de datos). Las escrituras masivas no disparan señales: la
+carga renueva la revisión de cada programación y deja un registro de
+bitácora por asignación creada o modificada (``registrar_bitacora_lote``),
+como la edición de la malla.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.db import transaction
+
+from usuarios.models import CodigoTurno, Tercero
+from ..models import PATRON_LETRA_TURNO, AsignacionTurno, ProgramacionHorario, mensaje_letra_invalida
+from ..utils import registrar_bitacora_lote
+from .conflictos_turnos import conflictos_para_claves
+from .reglas_laborales import validar_cambios_malla, violacion_a_dict
+from .revision_programacion import agrupar_invalidaciones, invalidar_programacion
+
+MODOS = ('upsert', 'crear', 'actualizar')
+COLUMNAS_CSV = ('programacion', 'tercero', 'dia', 'letra_turno', 'fila', 'columna')
+MAXIMO_FILAS = 50000
+MAXIMO_ERRORES = 100
+TAMANO_LOTE = 1000
+_LONGITUD_LETRA = AsignacionTurno._meta.get_field('letra_turno').max_length
+CAMPOS_EDITABLES = ('letra_turno', 'codigo_turno_id', 'fila', 'columna')
+CAMPOS_BITACORA = ('programacion_id', 'tercero_id', 'dia', *CAMPOS_EDITABLES)
+
+
+@dataclass
+class ResultadoCarga:
+    creadas: int = 0
+    actualizadas: int = 0
+    sin_cambios: int = 0
+    errores: list = field(default_factory=list)      # [{'registro': n, 'errores': {campo: mensaje}}]
+    violaciones: list = field(default_factory=list)  # Reglas laborales (bloquean salvo con forzar)
+
+    def a_dict(self):
+        datos = {'creadas': self.creadas, 'actualizadas': self.actualizadas, 'sin_cambios': self.sin_cambios}
+        # Miles de filas pueden fallar juntas: se devuelven las primeras y el total
+        if self.errores:
+            datos['errores'] = self.errores[:MAXIMO_ERRORES]
+            datos['total_errores'] = len(self.errores)
+        if self.violaciones:
+            datos['violaciones'] = self.violaciones[:MAXIMO_ERRORES]
+            datos['total_violaciones'] = len(self.violaciones)
+        return datos
+
+
+def filas_csv(texto):
+    """
+    Filas de un CSV con encabezado (programacion, tercero, dia, letra_turno y opcionalmente fila, columna).
+
+    Raises:
+        ValueError: Si faltan columnas obligatorias
+    """
+    lector = csv.DictReader(io.StringIO(texto.lstrip('\ufeff')))
+    faltantes = [columna for columna in COLUMNAS_CSV[:4] if columna not in (lector.fieldnames or [])]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+    return [{columna: fila.get(columna) for columna in COLUMNAS_CSV} for fila in lector]
+
+
+def _entero(valor, errores, campo, opcional=False):
+    if valor in (None, ''):
+        if not opcional:
+            errores[campo] = 'Este campo es obligatorio.'
+        return None
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        errores[campo] = 'Debe ser un número entero.'
+        return None
+    if numero < 0:
+        errores[campo] = 'Debe ser mayor o igual a 0.'
+        return None
+    return numero
+
+
+def _normalizar(fila):
+    # (programacion, tercero, dia, letra, fila, columna) y los errores de formato de la fila
+    errores = {}
+    if not isinstance(fila, dict):
+        return None, {'registro': 'Cada registro debe ser un objeto.'}
+    programacion = _entero(fila.get('programacion'), errores, 'programacion')
+    tercero = _entero(fila.get('tercero'), errores, 'tercero')
+    dia = None
+    try:
+        dia = date.fromisoformat(str(fila.get('dia') or ''))
+    except ValueError:
+        errores['dia'] = 'Fecha inválida (AAAA-MM-DD).'
+    letra = str(fila.get('letra_turno') or '').strip()
+    if not letra:
+        errores['letra_turno'] = 'Este campo es obligatorio.'
+    elif len(letra) > _LONGITUD_LETRA:
+        errores['letra_turno'] = f'Máximo {_LONGITUD_LETRA} caracteres.'
+    elif not PATRON_LETRA_TURNO.match(letra):
+        errores['letra_turno'] = mensaje_letra_invalida(letra)
+    posicion_fila = _entero(fila.get('fila'), errores, 'fila', opcional=True)
+    posicion_columna = _entero(fila.get('columna'), errores, 'columna', opcional=True)
+    return (programacion, tercero, dia, letra, posicion_fila, posicion_columna), errores
+
+
+def _validar_formato(filas):
+    registros, errores, vistas = [], {}, {}
+    for numero, fila in enumerate(filas, start=1):
+        valores, errores_fila = _normalizar(fila)
+        if not errores_fila:
+            clave = valores[:3]
+            if clave in vistas:
+                errores_fila['registro'] = f'Repite (programación, tercero, día) del registro {vistas[clave]}.'
+            vistas.setdefault(clave, numero)
+        if errores_fila:
+            errores[numero] = errores_fila
+        else:
+            registros.append((numero, *valores))
+    return registros, errores
+
+
+def _validar_referencias(registros, errores):
+    # Programaciones activas que contienen el día y terceros existentes: una consulta por tabla
+    programaciones = ProgramacionHorario.objects.in_bulk({registro[1] for registro in registros})
+    terceros = set(Tercero.objects.filter(pk__in={registro[2] for registro in registros})
+                   .values_list('pk', flat=True))
+    validos = []
+    for registro in registros:
+        numero, programacion_id, tercero_id, dia = registro[:4]
+        programacion = programaciones.get(programacion_id)
+        errores_fila = {}
+        if programacion is None:
+            errores_fila['programacion'] = 'Programación inexistente o inactiva.'
+        elif not programacion.fecha_inicio <= dia <= programacion.fecha_fin:
+            errores_fila['dia'] = (f'Fuera del rango de la programación '
+                                   f'({programacion.fecha_inicio} a {programacion.fecha_fin}).')
+        if tercero_id not in terceros:
+            errores_fila['tercero'] = 'Tercero inexistente.'
+        if errores_fila:
+            errores.setdefault(numero, {}).update(errores_fila)
+        else:
+            validos.append(registro)
+    return programaciones, validos
+
+
+def _existentes(por_programacion):
+    # Una consulta por programación sobre el índice (programacion, dia, ...), acotada a los terceros y días
+    existentes = {}
+    for programacion_id, registros in por_programacion.items():
+        dias = [registro[3] for registro in registros]
+        for asignacion in AsignacionTurno.objects.filter(
+            programacion_id=programacion_id,
+            tercero_id__in={registro[2] for registro in registros},
+            dia__range=(min(dias), max(dias)),
+        ).only('id', 'programacion_id', 'tercero_id', 'dia', 'letra_turno', 'codigo_turno', 'fila', 'columna'):
+            existentes[(programacion_id, asignacion.tercero_id, asignacion.dia)] = asignacion
+    return existentes
+
+
+def _actualizar_letras(asignaciones):
+    # Un UPDATE ... WHERE id IN (...) por letra y lote: hay pocas letras distintas, y el
+    # CASE WHEN por fila de bulk_update cuesta más en armarse que en ejecutarse
+    por_letra = {}
+    for asignacion in asignaciones:
+        por_letra.setdefault((asignacion.letra_turno, asignacion.codigo_turno_id), []).append(asignacion.pk)
+    for (letra, codigo_id), ids in por_letra.items():
+        for inicio in range(0, len(ids), TAMANO_LOTE):
+            AsignacionTurno.objects.filter(pk__in=ids[inicio:inicio + TAMANO_LOTE]).update(
+                letra_turno=letra, codigo_turno_id=codigo_id)
+
+
+def _valores_bitacora(asignacion, campos):
+    # Mismas claves que la bitácora automática: el nombre del campo, no el de la columna
+    valores = {}
+    for campo in campos:
+        valor = getattr(asignacion, campo)
+        valores[campo.removesuffix('_id')] = None if valor is None else str(valor)
+    return valores
+
+
+def _asignar_ids(nuevas):
+    # MySQL no devuelve los ids de bulk_create: se leen por (programacion, tercero, dia), una consulta por programación
+    por_programacion = {}
+    for asignacion in nuevas:
+        por_programacion.setdefault(asignacion.programacion_id, []).append(asignacion)
+    for programacion_id, grupo in por_programacion.items():
+        dias = [asignacion.dia for asignacion in grupo]
+        ids = {
+            (tercero_id, dia): pk
+            for pk, tercero_id, dia in AsignacionTurno.objects.filter(
+                programacion_id=programacion_id,
+                tercero_id__in={asignacion.tercero_id for asignacion in grupo},
+                dia__range=(min(dias), max(dias)),
+            ).values_list('pk', 'tercero_id', 'dia')
+        }
+        for asignacion in grupo:
+            asignacion.pk = ids[(asignacion.tercero_id, asignacion.dia)]
+
+
+def _registrar_en_bitacora(nuevas, modificadas, anteriores, request):
+    # Un registro por asignación, como si se hubieran guardado una por una
+    if nuevas and nuevas[0].pk is None:
+        _asignar_ids(nuevas)
+    registrar_bitacora_lote(request, 'CREAR', 'programacion', 'asignacionturno', [
+        {'objeto_id': asignacion.pk, 'descripcion': 'Carga masiva de asignaciones: asignación creada',
+         'valores_nuevos': _valores_bitacora(asignacion, CAMPOS_BITACORA)}
+        for asignacion in nuevas
+    ])
+    editadas = []
+    for asignacion in modificadas:
+        anterior = anteriores[asignacion.pk]
+        nuevo = _valores_bitacora(asignacion, CAMPOS_EDITABLES)
+        editadas.append({
+            'objeto_id': asignacion.pk, 'descripcion': 'Carga masiva de asignaciones: asignación actualizada',
+            'valores_anteriores': anterior,
+            # La programación no cambia: va para el historial de la programación (historial_objeto.py)
+            'valores_nuevos': {**nuevo, 'programacion': str(asignacion.programacion_id)},
+            'campos_modificados': [campo for campo in nuevo if anterior[campo] != nuevo[campo]],
+        })
+    registrar_bitacora_lote(request, 'EDITAR', 'programacion', 'asignacionturno', editadas)
+
+
+def _errores_a_lista(errores):
+    return [{'registro': numero, 'errores': errores[numero]} for numero in sorted(errores)]
+
+
+def cargar_asignaciones(filas, modo='upsert', forzar=False, request=None):
+    """
+    Valida y escribe una carga masiva de asignaciones.
+
+    Args:
+        filas: Lista de dicts con programacion, tercero, dia, letra_turno y opcionalmente fila, columna
+            (obligatorias para crear)
+        modo: 'upsert' (crear o actualizar), 'crear' (error si ya existe) o 'actualizar' (error si no existe)
+        forzar: Escribir aunque los cambios incumplan reglas laborales
+        request: Request para la bitácora
+
+    Returns:
+        ResultadoCarga (sin escrituras si tiene errores o violaciones sin forzar)
+    """
+    resultado = ResultadoCarga()
+    registros, errores = _validar_formato(filas)
+    programaciones, registros = _validar_referencias(registros, errores) if registros else ({}, [])
+
+    por_programacion = {}
+    for registro in registros:
+        por_programacion.setdefault(registro[1], []).append(registro)
+    existentes = _existentes(por_programacion)
+
+    codigos_por_letra = CodigoTurno.ids_por_letra()
+    nuevas, modificadas, movidas, anteriores = [], [], [], {}
+    for numero, programacion_id, tercero_id, dia, letra, posicion_fila, posicion_columna in registros:
+        asignacion = existentes.get((programacion_id, tercero_id, dia))
+        if asignacion is None:
+            if modo == 'actualizar':
+                errores[numero] = {'registro': 'La asignación no existe.'}
+            elif posicion_fila is None or posicion_columna is None:
+                errores[numero] = {'registro': 'fila y columna son obligatorias para crear una asignación.'}
+            else:
+                asignacion = AsignacionTurno(programacion_id=programacion_id, tercero_id=tercero_id, dia=dia,
+                                             letra_turno=letra, fila=posicion_fila, columna=posicion_columna)
+                asignacion.sincronizar_codigo_turno(codigos_por_letra)
+                nuevas.append((numero, asignacion))
+            continue
+        if modo == 'crear':
+            errores[numero] = {'registro': 'La asignación ya existe.'}
+            continue
+        cambios = (letra != asignacion.letra_turno
+                   or posicion_fila not in (None, asignacion.fila)
+                   or posicion_columna not in (None, asignacion.columna))
+        if not cambios:
+            resultado.sin_cambios += 1
+            continue
+        anteriores[asignacion.pk] = _valores_bitacora(asignacion, CAMPOS_EDITABLES)
+        if posicion_fila not in (None, asignacion.fila) or posicion_columna not in (None, asignacion.columna):
+            asignacion.fila = asignacion.fila if posicion_fila is None else posicion_fila
+            asignacion.columna = asignacion.columna if posicion_columna is None else posicion_columna
+            movidas.append(asignacion)
+        asignacion.letra_turno = letra
+        asignacion.sincronizar_codigo_turno(codigos_por_letra)
+        modificadas.append(asignacion)
+
+    # Un tercero no puede tener turno el mismo día en otra programación activa (ya guardada o en la carga)
+    ocupadas = conflictos_para_claves({(a.tercero_id, a.dia) for _, a in nuevas})
+    for numero, asignacion in nuevas:
+        clave = (asignacion.tercero_id, asignacion.dia)
+        otras = [p for p in ocupadas.get(clave, []) if p != asignacion.programacion_id]
+        if otras:
+            errores[numero] = {'registro': f'El tercero ya tiene turno ese día en la programación {otras[0]}.'}
+        ocupadas.setdefault(clave, []).append(asignacion.programacion_id)
+
+    if errores:
+        resultado.errores = _errores_a_lista(errores)
+        return resultado
+
+    nuevas = [asignacion for _, asignacion in nuevas]
+    celdas = {}
+    for asignacion in [*nuevas, *modificadas]:
+        celdas.setdefault(asignacion.programacion_id, []).append(
+            (asignacion.tercero_id, asignacion.dia, asignacion.letra_turno))
+    for programacion_id, cambios in celdas.items():
+        resultado.violaciones.extend(
+            violacion_a_dict(v) for v in validar_cambios_malla(programaciones[programacion_id], cambios))
+    if resultado.violaciones and not forzar:
+        return resultado
+
+    with transaction.atomic(), agrupar_invalidaciones():
+        _actualizar_letras(modificadas)
+        AsignacionTurno.objects.bulk_update(movidas, ['fila', 'columna'], batch_size=TAMANO_LOTE)
+        AsignacionTurno.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+        invalidar_programacion(*celdas)
+        _registrar_en_bitacora(nuevas, modificadas, anteriores, request)
+    resultado.creadas, resultado.actualizadas = len(nuevas), len(modificadas)
+    return resultado
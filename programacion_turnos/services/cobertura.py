@@ -0,0 +1,164 @@
+"""
+Cobertura de un centro operativo frente a su promesa de valor.
+
+Para cada día del rango se cuenta cuántas personas tienen una letra que se
+trabaja (duración > 0 según CodigoTurno) en las programaciones activas del
+centro, y con el horario de cada código se reparte esa gente en las 24 horas
+del día (los turnos nocturnos cubren la madrugada del día siguiente). Ambas
+cifras se comparan con ``CentroOperativo.promesa_valor``.
+
+Los conteos salen de una consulta agrupada por (programación, día, letra)
+sobre el índice de la malla y se guardan en la caché por programación con su
+revisión (ver revision_programacion.py): una edición de la malla solo obliga
+a recalcular esa programación.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from empresas.models import CentroOperativo
+from ..models import AsignacionTurno, ProgramacionHorario
+from .malla_matrix import PerfilesTurno
+from .revision_programacion import revisiones_programacion
+
+TIMEOUT_CONTEOS = 60 * 60 * 24
+_CLAVE_CONTEOS = 'cobertura:conteos:{programacion}:r{revision}'
+
+
+@dataclass
+class CoberturaDia:
+    dia: object
+    personas: int
+    por_hora: list
+    requeridas: int
+
+    @property
+    def minimo_hora(self):
+        return min(self.por_hora)
+
+    @property
+    def deficit_dia(self):
+        return max(self.requeridas - self.personas, 0)
+
+    @property
+    def horas_con_deficit(self):
+        return sum(1 for personas in self.por_hora if personas < self.requeridas)
+
+    @property
+    def deficit_horas(self):
+        """Horas-persona que faltan para cubrir la promesa de valor en todas las horas."""
+        return sum(max(self.requeridas - personas, 0) for personas in self.por_hora)
+
+    @property
+    def con_brecha(self):
+        return self.deficit_dia > 0 or self.horas_con_deficit > 0
+
+
+@dataclass
+class CoberturaCentro:
+    centro_operativo: int
+    promesa_valor: object
+    fecha_inicio: object
+    fecha_fin: object
+    programaciones: list = field(default_factory=list)
+    dias: list = field(default_factory=list)
+
+    def brechas(self):
+        return [dia for dia in self.dias if dia.con_brecha]
+
+
+def conteos_programaciones(programacion_ids):
+    """
+    Personas por día y letra de cada programación, desde la caché o con una consulta para las faltantes.
+
+    Returns:
+        Dict id de programación -> dict día -> dict letra -> personas
+    """
+    revisiones = revisiones_programacion(programacion_ids)
+    claves = {
+        _CLAVE_CONTEOS.format(programacion=programacion_id, revision=revision): programacion_id
+        for programacion_id, revision in revisiones.items()
+    }
+    conteos = {claves[clave]: valor for clave, valor in cache.get_many(claves).items()}
+    faltantes = [programacion_id for programacion_id in programacion_ids if programacion_id not in conteos]
+    if faltantes:
+        nuevos = {programacion_id: {} for programacion_id in faltantes}
+        # (programación, tercero, día) es único: contar filas es contar personas
+        for programacion_id, dia, letra, personas in AsignacionTurno.objects.filter(
+                programacion_id__in=faltantes).values_list('programacion_id', 'dia', 'letra_turno').annotate(
+                personas=Count('tercero_id')).order_by():
+            nuevos[programacion_id].setdefault(dia, {})[letra] = personas
+        cache.set_many({
+            _CLAVE_CONTEOS.format(programacion=programacion_id, revision=revisiones[programacion_id]): valor
+            for programacion_id, valor in nuevos.items()
+        }, timeout=TIMEOUT_CONTEOS)
+        conteos.update(nuevos)
+    return conteos
+
+
+def calcular_cobertura(centro_operativo, fecha_inicio, fecha_fin):
+    """
+    Cobertura diaria y por hora del centro en el rango.
+
+    Args:
+        centro_operativo: CentroOperativo o su id
+        fecha_inicio: Primer día
+        fecha_fin: Último día
+
+    Returns:
+        CoberturaCentro con un CoberturaDia por día del rango
+    """
+    centro_id = getattr(centro_operativo, 'pk', centro_operativo)
+    # El día anterior aporta los turnos nocturnos que terminan en la madrugada del primer día
+    desde = fecha_inicio - timedelta(days=1)
+    promesa_valor = CentroOperativo.objects.filter(pk=centro_id).values_list('promesa_valor', flat=True).first()
+    programacion_ids = list(ProgramacionHorario.objects.filter(
+        centro_operativo=centro_id, fecha_inicio__lte=fecha_fin, fecha_fin__gte=desde,
+    ).order_by('pk').values_list('pk', flat=True))
+
+    # Conteos del centro por día y letra (suma de sus programaciones)
+    por_dia = {}
+    for conteos in conteos_programaciones(programacion_ids).values():
+        for dia, letras in conteos.items():
+            if desde <= dia <= fecha_fin:
+                acumulado = por_dia.setdefault(dia, {})
+                for letra, personas in letras.items():
+                    acumulado[letra] = acumulado.get(letra, 0) + personas
+
+    letras = sorted({letra for letras_dia in por_dia.values() for letra in letras_dia})
+    perfiles = PerfilesTurno.para_letras(letras)
+    # Horas del día (0-47) que cubre cada letra: las 24-47 son la madrugada del día siguiente
+    horas_letra = {
+        letra: range(inicio // 60, -(-fin // 60)) if horas > 0 else range(0)
+        for letra, horas, inicio, fin in zip(letras, perfiles.horas, perfiles.inicio, perfiles.fin)
+    }
+
+    total_dias = (fecha_fin - fecha_inicio).days + 1
+    cubiertas = [[0] * 24 for _ in range(total_dias + 1)]  # columna 0 = día anterior
+    personas = [0] * (total_dias + 1)
+    for dia, letras_dia in por_dia.items():
+        columna = (dia - desde).days
+        for letra, cantidad in letras_dia.items():
+            rango = horas_letra[letra]
+            if not rango:
+                continue
+            personas[columna] += cantidad
+            for hora in rango:
+                destino = columna + hora // 24
+                if destino <= total_dias:
+                    cubiertas[destino][hora % 24] += cantidad
+
+    requeridas = promesa_valor or 0
+    return CoberturaCentro(
+        centro_operativo=centro_id,
+        promesa_valor=promesa_valor,
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        programaciones=programacion_ids,
+        dias=[
+            CoberturaDia(fecha_inicio + timedelta(days=i), personas[i + 1], cubiertas[i + 1], requeridas)
+            for i in range(total_dias)
+        ],
+    )
@@ -0,0 +1,71 @@
+"""
+Sincronización de AsignacionTurno.codigo_turno con la letra de cada fila.
+
+Mientras las vistas sigan leyendo ``letra_turno`` las dos columnas conviven:
+``save()`` y los caminos masivos mantienen el código al día, y este servicio
+rellena o corrige las filas existentes (migración de datos y
+``manage.py sincronizar_codigos_turno``).
+
+El recorrido es por rangos de id y cada rango se actualiza con un solo
+``UPDATE ... CASE letra_turno`` en su propia transacción, para no bloquear la
+tabla completa ni generar una transacción enorme en MySQL.
+"""
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Min, Value, When
+
+TAMANO_LOTE = 5000
+
+
+def ids_por_letra(codigo_modelo, using='default'):
+    """
+    Igual que CodigoTurno.ids_por_letra, pero recibe el modelo para poder usarse
+    con los modelos históricos de una migración (que no tienen sus métodos).
+    """
+    ids = {}
+    for id_codigo, letra in codigo_modelo.objects.using(using).order_by('-estado_codigo', 'id_codigo_turnos').values_list(
+            'id_codigo_turnos', 'letra_turno'):
+        ids.setdefault(letra, id_codigo)
+    return ids
+
+
+def sincronizar_codigos_turno(asignacion_modelo=None, codigo_modelo=None, solo_pendientes=True,
+                              tamano_lote=TAMANO_LOTE, using='default', reportar=None):
+    """
+    Asigna codigo_turno según letra_turno en lotes por rango de id.
+
+    Args:
+        asignacion_modelo: Modelo AsignacionTurno (por defecto el actual)
+        codigo_modelo: Modelo CodigoTurno (por defecto el actual)
+        solo_pendientes: Solo filas con codigo_turno NULL; si es False se recalculan todas
+        tamano_lote: Ancho de cada rango de ids
+        using: Alias de la base de datos
+        reportar: Callable opcional que recibe mensajes de progreso
+
+    Returns:
+        Cantidad de filas actualizadas
+    """
+    if asignacion_modelo is None:
+        from programacion_turnos.models import AsignacionTurno as asignacion_modelo
+    if codigo_modelo is None:
+        from usuarios.models import CodigoTurno as codigo_modelo
+    reportar = reportar or (lambda mensaje: None)
+
+    ids = ids_por_letra(codigo_modelo, using)
+    codigo = Case(
+        *[When(letra_turno=letra, then=Value(id_codigo)) for letra, id_codigo in ids.items()],
+        default=Value(None),
+        output_field=IntegerField(),
+    )
+    filas = asignacion_modelo.objects.using(using)
+    if solo_pendientes:
+        filas = filas.filter(codigo_turno__isnull=True)
+    rango = filas.aggregate(desde=Min('pk'), hasta=Max('pk'))
+    if rango['desde'] is None:
+        return 0
+
+    total = 0
+    for desde in range(rango['desde'], rango['hasta'] + 1, tamano_lote):
+        with transaction.atomic(using=using):
+            total += filas.filter(pk__gte=desde, pk__lt=desde + tamano_lote).update(codigo_turno=codigo)
+        reportar(f'   ids {desde:,}-{min(desde + tamano_lote - 1, rango["hasta"]):,}: {total:,} filas')
+    return total
@@ -0,0 +1,121 @@
+"""
+Detección de terceros con turno en dos programaciones activas el mismo día.
+
+Todas las consultas parten del índice (tercero, dia) de AsignacionTurno:
+
+- ``detectar_conflictos``: reporte completo agrupando por (tercero, dia) con
+  una sola consulta (HAVING programaciones > 1).
+- ``conflictos_para_claves``: revisión incremental que solo mira las claves
+  (tercero, dia) que se van a escribir; la usan la generación, la extensión y
+  la edición de la malla para no crear cruces.
+- ``preflight_conflictos``: revisión rápida del formulario de creación, antes
+  de guardar la programación.
+"""
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db.models import Count, Q
+
+from ..models import AsignacionTurno
+from .fuerza_laboral import resolver_fuerza_laboral
+
+
+@dataclass
+class Conflicto:
+    tercero_id: int
+    dia: object
+    programaciones: list = field(default_factory=list)
+
+
+def _asignaciones_activas():
+    return AsignacionTurno.objects.filter(programacion__activo=True)
+
+
+def detectar_conflictos(centro_operativo=None, fecha_inicio=None, fecha_fin=None):
+    """
+    Cruces de programaciones activas por (tercero, dia).
+
+    Args:
+        centro_operativo: Limita a cruces donde participa una programación del centro (id u objeto)
+        fecha_inicio: Primer día a revisar (opcional)
+        fecha_fin: Último día a revisar (opcional)
+
+    Returns:
+        Lista de Conflicto ordenada por día y tercero
+    """
+    asignaciones = _asignaciones_activas()
+    if fecha_inicio:
+        asignaciones = asignaciones.filter(dia__gte=fecha_inicio)
+    if fecha_fin:
+        asignaciones = asignaciones.filter(dia__lte=fecha_fin)
+
+    grupos = asignaciones.values('tercero_id', 'dia').annotate(programaciones=Count('programacion', distinct=True))
+    if centro_operativo is not None:
+        # El cruce puede ser con una programación de otro centro: se filtra en el HAVING, no en el WHERE
+        centro_id = getattr(centro_operativo, 'pk', centro_operativo)
+        grupos = grupos.annotate(
+            en_centro=Count('id', filter=Q(programacion__centro_operativo=centro_id))
+        ).filter(en_centro__gt=0)
+    claves = [
+        (grupo['tercero_id'], grupo['dia'])
+        for grupo in grupos.filter(programaciones__gt=1).order_by('dia', 'tercero_id')
+    ]
+    if not claves:
+        return []
+
+    # Programaciones de cada cruce: solo las filas de las claves encontradas
+    detalle = conflictos_para_claves(claves)
+    return [Conflicto(tercero_id, dia, detalle.get((tercero_id, dia), [])) for tercero_id, dia in claves]
+
+
+def conflictos_para_claves(claves, excluir_programacion=None):
+    """
+    Programaciones activas que ya ocupan las claves (tercero, dia) indicadas.
+
+    Args:
+        claves: Iterable de (tercero_id, dia)
+        excluir_programacion: Programación (id u objeto) que se está escribiendo y no cuenta como cruce
+
+    Returns:
+        Dict (tercero_id, dia) -> lista de ids de programación, solo con las claves ocupadas
+    """
+    claves = set(claves)
+    if not claves:
+        return {}
+    dias = [dia for _, dia in claves]
+    filas = _asignaciones_activas().filter(
+        tercero_id__in={tercero_id for tercero_id, _ in claves},
+        dia__range=(min(dias), max(dias)),
+    )
+    if excluir_programacion is not None:
+        filas = filas.exclude(programacion=getattr(excluir_programacion, 'pk', excluir_programacion))
+
+    ocupadas = {}
+    for tercero_id, dia, programacion_id in filas.values_list('tercero_id', 'dia', 'programacion_id'):
+        if (tercero_id, dia) in claves:
+            ocupadas.setdefault((tercero_id, dia), []).append(programacion_id)
+    return ocupadas
+
+
+def claves_de_disponibilidad(disponibilidad):
+    """Claves (tercero_id, dia) de los días vinculados de cada tercero."""
+    fechas = [disponibilidad.fecha_inicio + timedelta(days=i) for i in range(disponibilidad.dias)]
+    return {
+        (tercero_id, fecha)
+        for tercero_id, mascara in disponibilidad.mascaras.items()
+        for i, fecha in enumerate(fechas) if mascara >> i & 1
+    }
+
+
+def preflight_conflictos(centro_operativo, cargo_predefinido, fecha_inicio, fecha_fin, excluir_programacion=None):
+    """
+    Terceros elegibles para una programación nueva que ya tienen turno en otra el mismo día.
+
+    Returns:
+        Dict tercero_id -> lista ordenada de días en conflicto
+    """
+    disponibilidad = resolver_fuerza_laboral(centro_operativo, cargo_predefinido, fecha_inicio, fecha_fin)
+    por_tercero = {}
+    for tercero_id, dia in conflictos_para_claves(claves_de_disponibilidad(disponibilidad), excluir_programacion):
+        por_tercero.setdefault(tercero_id, []).append(dia)
+    return {tercero_id: sorted(dias) for tercero_id, dias in por_tercero.items()}
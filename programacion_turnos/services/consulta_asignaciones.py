@@ -0,0 +1,90 @@
+"""
+Listado de asignaciones para integraciones: filtros, campos a elección y cursor.
+
+El listado se pagina por llave sobre (dia, id) (ver paginacion.py) y se lee
+con ``values()``: cada fila es un dict con las mismas claves que
+``AsignacionTurnoSerializer`` (las llaves foráneas como id), sin construir una
+instancia del modelo ni pasar por el serializer. ``filas_asignaciones``
+recorre el listado completo por lotes para el modo streaming de la API.
+
+Los filtros usan los índices de AsignacionTurno: (tercero, dia) para un
+tercero, (programacion, dia, ...) para una programación y (dia, id) para un
+rango de días sin más filtros.
+"""
+from ..models import AsignacionTurno
+from .paginacion import SIGUIENTE, paginar_keyset, recorrer_keyset
+
+CAMPOS_ASIGNACION = ('id', 'programacion', 'tercero', 'dia', 'letra_turno', 'codigo_turno', 'fila', 'columna')
+CAMPOS_CURSOR = ('dia', 'id')
+TAMANO_LOTE = 2000
+
+
+def campos_solicitados(texto):
+    """
+    Campos pedidos en el parámetro ``fields`` ("id,dia,letra_turno").
+
+    Returns:
+        Tupla de campos en el orden pedido (todos si el texto está vacío)
+
+    Raises:
+        ValueError: Si algún campo no existe
+    """
+    if not texto:
+        return CAMPOS_ASIGNACION
+    campos = tuple(dict.fromkeys(campo.strip() for campo in texto.split(',') if campo.strip()))
+    desconocidos = [campo for campo in campos if campo not in CAMPOS_ASIGNACION]
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}")
+    return campos or CAMPOS_ASIGNACION
+
+
+def filtrar_asignaciones(queryset, filtros):
+    """
+    Aplica los filtros del listado (programacion, tercero, desde, hasta) a un queryset de AsignacionTurno.
+    """
+    if filtros.get('programacion'):
+        queryset = queryset.filter(programacion_id=filtros['programacion'])
+    if filtros.get('tercero'):
+        queryset = queryset.filter(tercero_id=filtros['tercero'])
+    if filtros.get('desde'):
+        queryset = queryset.filter(dia__gte=filtros['desde'])
+    if filtros.get('hasta'):
+        queryset = queryset.filter(dia__lte=filtros['hasta'])
+    return queryset
+
+
+def pagina_asignaciones(filtros, campos=CAMPOS_ASIGNACION, cursor=None, direccion=SIGUIENTE, tamano=100):
+    """
+    Una página de asignaciones ordenada por (dia, id).
+
+    Args:
+        filtros: Dict con programacion, tercero, desde y hasta (todos opcionales)
+        campos: Campos de cada fila (ver ``campos_solicitados``)
+        cursor: Cursor de la página anterior
+        direccion: SIGUIENTE o ANTERIOR
+        tamano: Filas por página
+
+    Returns:
+        Tupla (filas, pagina): las filas como dicts con ``campos`` y la PaginaKeyset con los cursores
+    """
+    # Las columnas del cursor se leen siempre, aunque no se devuelvan
+    columnas = tuple(dict.fromkeys(campos + CAMPOS_CURSOR))
+    registros = filtrar_asignaciones(AsignacionTurno.objects.all(), filtros).values(*columnas)
+    pagina = paginar_keyset(registros, CAMPOS_CURSOR, cursor=cursor, direccion=direccion, tamano=tamano,
+                            descendente=False)
+    filas = [{campo: fila[campo] for campo in campos} for fila in pagina]
+    return filas, pagina
+
+
+def filas_asignaciones(filtros, campos=CAMPOS_ASIGNACION, tamano=TAMANO_LOTE):
+    """
+    Todas las asignaciones que cumplen los filtros, ordenadas por (dia, id), leídas por lotes de llave.
+
+    Yields:
+        Dicts con ``campos``
+    """
+    columnas = tuple(dict.fromkeys(campos + CAMPOS_CURSOR))
+    registros = filtrar_asignaciones(AsignacionTurno.objects.all(), filtros).values(*columnas)
+    for fila in recorrer_keyset(registros, CAMPOS_CURSOR, tamano=tamano):
+        # Un dict nuevo: la fila original sigue sirviendo de cursor a recorrer_keyset
+        yield {campo: fila[campo] for campo in campos}
@@ -0,0 +1,424 @@
+"""
+Generador de datos sintéticos para pruebas de carga y benchmarks.
+
+Construye un dataset reproducible (misma semilla, mismos datos) con toda la
+cadena del sistema: empresas, proyectos, centros operativos, cargos, terceros,
+códigos de turno, modelos de turno con sus letras, programaciones que cubren
+varios años, sus asignaciones y registros de bitácora.
+
+Los catálogos se insertan con ``bulk_create`` y las tablas grandes
+(asignaciones y bitácora) con ``executemany`` sobre tuplas ya adaptadas, sin
+instanciar modelos ni pasar por ``save()`` o las señales de bitácora
+automática, para poder construir millones de filas en pocos minutos. Los
+campos únicos llevan el prefijo indicado para poder generar más de un dataset
+en la misma base de datos.
+"""
+import json
+import random
+from dataclasses import dataclass, fields
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from empresas.models import (
+    AsignacionTerceroEmpresa, CargoPredefinido, CentroOperativo, Empresa, Proyecto, UnidadNegocio,
+)
+from programacion_models.models import LetraTurno, ModeloTurno
+from programacion_turnos.models import AsignacionTurno, Bitacora, ProgramacionHorario
+from programacion_turnos.services.indice_bitacora import reindexar_bitacora
+from programacion_turnos.services.resumen_bitacora import reconstruir_resumen_bitacora
+from usuarios.models import CentroDeCosto, CodigoTurno, Tercero, Usuario
+from .fuerza_laboral import invalidar_fuerza_laboral
+
+# (letra, tipo, hora_inicio, hora_final)
+CODIGOS_TURNO = [
+    ('M', 'N', time(6, 0), time(14, 0)),
+    ('T', 'N', time(14, 0), time(22, 0)),
+    ('N', 'N', time(22, 0), time(6, 0)),
+    ('D', 'N', time(6, 0), time(18, 0)),
+    ('NO', 'N', time(18, 0), time(6, 0)),
+    ('A', 'N', time(7, 0), time(17, 0)),
+    ('X', 'D', None, None),
+    ('F', 'F', time(6, 0), time(18, 0)),
+    ('V', 'ND', None, None),
+    ('I', 'ND', None, None),
+]
+
+# (filas, columnas, secuencia base que se desplaza por fila)
+PATRONES_MODELO = [
+    (4, 4, ['D', 'NO', 'X', 'X']),
+    (3, 7, ['M', 'M', 'T', 'T', 'N', 'N', 'X']),
+    (5, 7, ['A', 'A', 'A', 'A', 'A', 'X', 'X']),
+    (4, 8, ['D', 'D', 'NO', 'NO', 'X', 'X', 'X', 'X']),
+    (6, 21, ['M'] * 7 + ['T'] * 7 + ['N'] * 5 + ['X'] * 2),
+    (7, 28, ['D'] * 6 + ['X'] + ['NO'] * 6 + ['X'] + ['M'] * 6 + ['X'] + ['T'] * 6 + ['X']),
+]
+
+TIPOS_ACCION = ['CREAR', 'EDITAR', 'EDITAR', 'EDITAR', 'ELIMINAR', 'CONSULTAR']
+MODULOS_BITACORA = [
+    ('programacion', 'ProgramacionHorario'),
+    ('programacion', 'AsignacionTurno'),
+    ('turnos', 'AsignacionTurno'),
+    ('empleados', 'Tercero'),
+    ('modelos', 'ModeloTurno'),
+    ('usuarios', 'Usuario'),
+]
+NOMBRES = ['Ana', 'Luis', 'Carlos', 'María', 'Jorge', 'Paula', 'Andrés', 'Diana', 'Felipe', 'Laura',
+           'Camilo', 'Sandra', 'Julián', 'Natalia', 'Óscar', 'Valentina', 'Mateo', 'Sofía']
+APELLIDOS = ['Gómez', 'Rodríguez', 'Martínez', 'López', 'García', 'Pérez', 'Sánchez', 'Ramírez',
+             'Torres', 'Díaz', 'Vargas', 'Rojas', 'Moreno', 'Castro', 'Ortiz', 'Jiménez']
+CIUDADES = ['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Cartagena', 'Bucaramanga', 'Pereira']
+
+
+@dataclass
+class ParametrosDataset:
+    """Tamaño del dataset. Las filas de asignación ≈ terceros × dias."""
+    empresas: int = 3
+    proyectos_por_empresa: int = 4
+    centros: int = 20
+    cargos: int = 6
+    terceros: int = 2000
+    usuarios: int = 20
+    dias: int = 365
+    dias_por_programacion: int = 90
+    bitacoras: int = 200000
+    fecha_inicio: date = date(2023, 1, 1)
+    semilla: int = 42
+    prefijo: str = 'SINT'
+    lote: int = 5000
+
+
+ESCALAS = {
+    'pequena': ParametrosDataset(empresas=1, proyectos_por_empresa=2, centros=3, cargos=2, terceros=60,
+                                 usuarios=3, dias=60, dias_por_programacion=30, bitacoras=2000),
+    'mediana': ParametrosDataset(),
+    'grande': ParametrosDataset(empresas=5, proyectos_por_empresa=6, centros=50, cargos=10, terceros=5000,
+                                usuarios=50, dias=730, dias_por_programacion=90, bitacoras=1000000),
+}
+
+
+def parametros_para(escala='mediana', **cambios):
+    """
+    Retorna los parámetros de una escala predefinida con los cambios indicados.
+
+    Args:
+        escala: 'pequena', 'mediana' o 'grande'
+        **cambios: Campos de ParametrosDataset a sobrescribir (se ignoran los None)
+
+    Returns:
+        ParametrosDataset
+    """
+    base = ESCALAS[escala]
+    valores = {f.name: getattr(base, f.name) for f in fields(ParametrosDataset)}
+    valores.update({k: v for k, v in cambios.items() if v is not None})
+    return ParametrosDataset(**valores)
+
+
+class GeneradorDataset:
+    """
+    Construye el dataset sintético descrito por ``ParametrosDataset``.
+
+    Uso::
+
+        resumen = GeneradorDataset(parametros_para('pequena')).generar()
+    """
+
+    def __init__(self, parametros, reportar=None):
+        self.p = parametros
+        self.rnd = random.Random(parametros.semilla)
+        self.reportar = reportar or (lambda mensaje: None)
+        self.resumen = {}
+
+    def _insertar(self, modelo, objetos):
+        creados = modelo.objects.bulk_create(objetos, batch_size=self.p.lote)
+        self.resumen[modelo.__name__] = self.resumen.get(modelo.__name__, 0) + len(objetos)
+        return creados
+
+    def _insertar_por_lotes(self, modelo, columnas, filas):
+        """
+        Inserta tuplas con ``executemany`` en lotes transaccionales.
+
+        Args:
+            modelo: Modelo destino
+            columnas: Nombres de atributo en el orden de cada tupla
+            filas: Iterable de tuplas con valores ya adaptados a la BD
+        """
+        opts = modelo._meta
+        nombres = ', '.join(connection.ops.quote_name(opts.get_field(c).column) for c in columnas)
+        marcadores = ', '.join(['%s'] * len(columnas))
+        sql = f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({nombres}) VALUES ({marcadores})'
+        tam_lote = self.p.lote * 4
+        lote = []
+        total = 0
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= tam_lote:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(sql, lote)
+                total += len(lote)
+                lote = []
+                self.reportar(f'   {modelo.__name__}: {total:,} filas')
+        if lote:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, lote)
+            total += len(lote)
+        self.resumen[modelo.__name__] = self.resumen.get(modelo.__name__, 0) + total
+        self.reportar(f'✅ {modelo.__name__}: {total:,} filas')
+        return total
+
+    def generar(self):
+        """
+        Genera todo el dataset.
+
+        Returns:
+            Dict con la cantidad de filas insertadas por modelo
+        """
+        with transaction.atomic():
+            self._generar_catalogos()
+            self._generar_terceros()
+            self._generar_modelos_turno()
+            self._generar_programaciones()
+        # Los terceros se insertan sin señales: se renueva la caché de fuerza laboral a mano
+        invalidar_fuerza_laboral(*self.centros)
+        self._generar_asignaciones()
+        self._generar_bitacora()
+        # La bitácora también se inserta sin señales: el resumen diario y el índice de búsqueda se recalculan completos
+        reconstruir_resumen_bitacora()
+        reindexar_bitacora(reportar=self.reportar)
+        return self.resumen
+
+    # ========== CATÁLOGOS ==========
+
+    def _generar_catalogos(self):
+        p, rnd = self.p, self.rnd
+        self.usuarios = self._insertar(Usuario, [
+            Usuario(
+                username=f'{p.prefijo.lower()}_usuario_{i}',
+                nombre_usuario=f'Usuario sintético {i}',
+                email=f'{p.prefijo.lower()}_usuario_{i}@example.com',
+                password=make_password(None),
+                is_staff=i == 0,
+            )
+            for i in range(p.usuarios)
+        ])
+        self.usuarios_ids = list(Usuario.all_objects.filter(
+            username__startswith=f'{p.prefijo.lower()}_usuario_'
+        ).values_list('id', flat=True))
+
+        self._insertar(Empresa, [
+            Empresa(nombre=f'Empresa {p.prefijo} {i}', nit=f'{p.prefijo}-{900000000 + i}',
+                    direccion=f'Calle {i} # {i}-{i}', telefono='6010000000',
+                    email=f'empresa{i}@example.com')
+            for i in range(p.empresas)
+        ])
+        self.empresas = list(Empresa.all_objects.filter(nit__startswith=f'{p.prefijo}-'))
+
+        self._insertar(Proyecto, [
+            Proyecto(nombre=f'Proyecto {p.prefijo} {empresa.id_empresa}-{j}', descripcion='Proyecto sintético',
+                     fecha_inicio=p.fecha_inicio, id_empresa_proyecto=empresa)
+            for empresa in self.empresas
+            for j in range(p.proyectos_por_empresa)
+        ])
+        self.proyectos = list(Proyecto.all_objects.filter(nombre__startswith=f'Proyecto {p.prefijo} '))
+
+        self._insertar(UnidadNegocio, [
+            UnidadNegocio(nombre=f'UEN {p.prefijo} {i}', descripcion='Unidad sintética', fecha_inicio=p.fecha_inicio)
+            for i in range(max(1, p.empresas))
+        ])
+        self.unidades = list(UnidadNegocio.all_objects.filter(nombre__startswith=f'UEN {p.prefijo} '))
+
+        self._insertar(CentroOperativo, [
+            CentroOperativo(nombre=f'Centro {p.prefijo} {i}', descripcion='Centro sintético',
+                            direccion=f'Carrera {i}', ciudad=rnd.choice(CIUDADES),
+                            promesa_valor=rnd.randint(2, 12))
+            for i in range(p.centros)
+        ])
+        self.centros = list(CentroOperativo.objects.filter(nombre__startswith=f'Centro {p.prefijo} '))
+        Relacion = CentroOperativo.proyectos.through
+        self._insertar(Relacion, [
+            Relacion(centrooperativo_id=centro.id_centro, proyecto_id=rnd.choice(self.proyectos).id_proyecto)
+            for centro in self.centros
+        ])
+
+        self._insertar(CargoPredefinido, [
+            CargoPredefinido(nombre=f'Cargo {p.prefijo} {i}', descripcion='Cargo sintético',
+                             salario=Decimal(1300000 + 150000 * i))
+            for i in range(p.cargos)
+        ])
+        self.cargos = list(CargoPredefinido.objects.filter(nombre__startswith=f'Cargo {p.prefijo} '))
+
+        self._insertar(CentroDeCosto, [
+            CentroDeCosto(codigo=f'{p.prefijo}-CC{i}', nombre=f'Centro de costo {i}') for i in range(5)
+        ])
+        self.centros_costo = list(CentroDeCosto.objects.filter(codigo__startswith=f'{p.prefijo}-CC'))
+
+        # Los códigos se crean una sola vez: la letra no es única pero las vistas buscan por letra
+        existentes = set(CodigoTurno.objects.values_list('letra_turno', flat=True))
+        codigos = []
+        for letra, tipo, inicio, fin in CODIGOS_TURNO:
+            if letra in existentes:
+                continue
+            codigo = CodigoTurno(letra_turno=letra, tipo=tipo, hora_inicio=inicio, hora_final=fin,
+                                 descripcion_novedad=None if tipo == 'N' else 'Novedad sintética')
+            if inicio and fin and tipo not in ('D', 'ND'):
+                minutos = (datetime.combine(p.fecha_inicio, fin) - datetime.combine(p.fecha_inicio, inicio)).seconds / 60
+                codigo.duracion_total = Decimal(str(round(minutos / 60, 1)))
+            else:
+                codigo.duracion_total = Decimal('0')
+            codigos.append(codigo)
+        self._insertar(CodigoTurno, codigos)
+        self.codigos_por_letra = CodigoTurno.ids_por_letra()
+        self.reportar('✅ Catálogos generados')
+
+    # ========== TERCEROS ==========
+
+    def _generar_terceros(self):
+        p, rnd = self.p, self.rnd
+        terceros = []
+        for i in range(p.terceros):
+            centro = rnd.choice(self.centros)
+            terceros.append(Tercero(
+                documento=f'{p.prefijo}{i:09d}'[-20:],
+                nombre_tercero=rnd.choice(NOMBRES),
+                apellido_tercero=f'{rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}',
+                correo_tercero=f'tercero{i}@example.com',
+                cargo_predefinido=rnd.choice(self.cargos),
+                centro_operativo=centro,
+                unidad_negocio=rnd.choice(self.unidades),
+                centro_de_costo=rnd.choice(self.centros_costo),
+                proyecto=rnd.choice(self.proyectos),
+                # ~5% inactivos para que los filtros por estado tengan efecto
+                estado_tercero=Tercero.Estado_Inactivo if rnd.random() < 0.05 else Tercero.Estado_Activo,
+            ))
+        with transaction.atomic():
+            for inicio in range(0, len(terceros), p.lote):
+                self._insertar(Tercero, terceros[inicio:inicio + p.lote])
+
+        # Grupos (centro, cargo) -> ids de terceros activos, en el orden de generar_asignaciones
+        self.grupos = {}
+        for tercero_id, centro_id, cargo_id in Tercero.objects.filter(
+            documento__startswith=p.prefijo
+        ).order_by('apellido_tercero', 'id_tercero').values_list('id_tercero', 'centro_operativo_id', 'cargo_predefinido_id'):
+            self.grupos.setdefault((centro_id, cargo_id), []).append(tercero_id)
+
+        empresas_ids = [e.id_empresa for e in self.empresas]
+        self._insertar(AsignacionTerceroEmpresa, [
+            AsignacionTerceroEmpresa(tercero_id=tercero_id, empresa_id=rnd.choice(empresas_ids),
+                                     centro_operativo_id=centro_id)
+            for (centro_id, _), ids in self.grupos.items()
+            for tercero_id in ids
+        ])
+        self.reportar(f'✅ Terceros: {p.terceros:,} en {len(self.grupos)} grupos centro/cargo')
+
+    # ========== MODELOS DE TURNO ==========
+
+    def _generar_modelos_turno(self):
+        p = self.p
+        self._insertar(ModeloTurno, [
+            ModeloTurno(nombre=f'Modelo {p.prefijo} {filas}x{columnas}', descripcion='Patrón sintético',
+                        unidad_negocio=self.unidades[i % len(self.unidades)], tipo='F' if i % 2 == 0 else 'V')
+            for i, (filas, columnas, _) in enumerate(PATRONES_MODELO)
+        ])
+        self.modelos = list(ModeloTurno.objects.filter(nombre__startswith=f'Modelo {p.prefijo} ').order_by('id'))
+
+        # Matriz por modelo: cada fila es la secuencia base desplazada
+        self.matrices = {}
+        letras = []
+        for modelo, (filas, columnas, secuencia) in zip(self.modelos, PATRONES_MODELO):
+            matriz = {}
+            for fila in range(filas):
+                for columna in range(columnas):
+                    valor = secuencia[(columna + fila * (columnas // filas or 1)) % len(secuencia)]
+                    matriz[(fila, columna)] = valor
+                    letras.append(LetraTurno(modelo_turno=modelo, fila=fila, columna=columna, valor=valor))
+            self.matrices[modelo.id] = (filas, columnas, matriz)
+        self._insertar(LetraTurno, letras)
+
+    # ========== PROGRAMACIONES ==========
+
+    def _generar_programaciones(self):
+        p, rnd = self.p, self.rnd
+        programaciones = []
+        for (centro_id, cargo_id), ids in self.grupos.items():
+            modelo = rnd.choice(self.modelos)
+            for inicio in range(0, p.dias, p.dias_por_programacion):
+                desde = p.fecha_inicio + timedelta(days=inicio)
+                hasta = p.fecha_inicio + timedelta(days=min(inicio + p.dias_por_programacion, p.dias) - 1)
+                programaciones.append(ProgramacionHorario(
+                    nombre=f'{p.prefijo} {centro_id}-{cargo_id} {desde:%Y-%m}',
+                    centro_operativo_id=centro_id,
+                    modelo_turno=modelo,
+                    cargo_predefinido_id=cargo_id,
+                    fecha_inicio=desde,
+                    fecha_fin=hasta,
+                    creado_por_id=rnd.choice(self.usuarios_ids) if self.usuarios_ids else None,
+                ))
+        self._insertar(ProgramacionHorario, programaciones)
+        self.programaciones = list(ProgramacionHorario.all_objects.filter(
+            nombre__startswith=f'{p.prefijo} '
+        ).order_by('id').values_list('id', 'centro_operativo_id', 'cargo_predefinido_id', 'modelo_turno_id',
+                                     'fecha_inicio', 'fecha_fin'))
+        self.reportar(f'✅ Programaciones: {len(self.programaciones):,}')
+
+    # ========== ASIGNACIONES ==========
+
+    def _iterar_asignaciones(self):
+        adaptar_fecha = connection.ops.adapt_datefield_value
+        for prog_id, centro_id, cargo_id, modelo_id, desde, hasta in self.programaciones:
+            filas, columnas, matriz = self.matrices[modelo_id]
+            fechas = [adaptar_fecha(desde + timedelta(days=offset)) for offset in range((hasta - desde).days + 1)]
+            # La columna continúa entre programaciones consecutivas del mismo grupo
+            desfase = (desde - self.p.fecha_inicio).days
+            for idx, tercero_id in enumerate(self.grupos[(centro_id, cargo_id)]):
+                fila = idx % filas
+                for offset, fecha in enumerate(fechas):
+                    columna = (desfase + offset) % columnas
+                    letra = matriz[(fila, columna)]
+                    yield (prog_id, tercero_id, fecha, letra, self.codigos_por_letra.get(letra), fila, columna)
+
+    def _generar_asignaciones(self):
+        self._insertar_por_lotes(
+            AsignacionTurno,
+            ['programacion', 'tercero', 'dia', 'letra_turno', 'codigo_turno', 'fila', 'columna'],
+            self._iterar_asignaciones(),
+        )
+
+    # ========== BITÁCORA ==========
+
+    def _iterar_bitacora(self):
+        p, rnd = self.p, self.rnd
+        adaptar_fecha_hora = connection.ops.adapt_datetimefield_value
+        inicio = datetime.combine(p.fecha_inicio, time(6, 0))
+        paso = p.dias * 86400 / max(p.bitacoras, 1)
+        prog_ids = [prog[0] for prog in self.programaciones] or [None]
+        usuarios_ids = self.usuarios_ids or [None]
+        letras = [codigo[0] for codigo in CODIGOS_TURNO]
+        for i in range(p.bitacoras):
+            modulo, modelo = rnd.choice(MODULOS_BITACORA)
+            tipo = rnd.choice(TIPOS_ACCION)
+            objeto_id = rnd.choice(prog_ids) if modelo == 'ProgramacionHorario' else rnd.randint(1, 100000)
+            editar = tipo == 'EDITAR'
+            yield (
+                rnd.choice(usuarios_ids),
+                # Fechas crecientes con algo de ruido, como llegarían en producción
+                adaptar_fecha_hora(inicio + timedelta(seconds=(i + rnd.random()) * paso)),
+                f'10.{rnd.randint(0, 20)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}',
+                tipo,
+                modulo,
+                modelo,
+                objeto_id,
+                f'{tipo.capitalize()} {modelo} #{objeto_id}',
+                json.dumps({'letra_turno': rnd.choice(letras)}) if editar else None,
+                json.dumps({'letra_turno': rnd.choice(letras)}) if tipo != 'CONSULTAR' else None,
+                '["letra_turno"]' if editar else None,
+            )
+
+    def _generar_bitacora(self):
+        self._insertar_por_lotes(
+            Bitacora,
+            ['usuario', 'fecha_hora', 'ip_address', 'tipo_accion', 'modulo', 'modelo_afectado', 'objeto_id',
+             'descripcion', 'valores_anteriores', 'valores_nuevos', 'campos_modificados'],
+            self._iterar_bitacora(),
+        )
@@ -0,0 +1,98 @@
+"""
+Terceros vinculados a un centro operativo en cada día de un rango.
+
+La vinculación sale de los periodos laborales (usuarios.PeriodoLaboral), sin
+importar el estado actual del tercero: un tercero inactivado tras su retiro
+sigue vinculado los días que cubre su periodo. Los terceros sin periodos
+registrados se toman de sus campos actuales (centro, cargo y estado activo) y
+cuentan como vinculados todo el rango.
+
+El rango completo se resuelve con una sola consulta y el resultado se guarda
+como un mapa de bits por tercero: el bit ``i`` indica si el tercero está
+vinculado el día ``fecha_inicio + i``. Así la extensión y la generación
+consultan cada día en memoria en vez de repetir la consulta por fecha.
+"""
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+
+from usuarios.models import Tercero
+
+
+@dataclass
+class DisponibilidadTerceros:
+    """
+    Mapa de bits de vinculación por tercero en un rango de fechas.
+
+    Args:
+        fecha_inicio: Primer día del rango (bit 0)
+        fecha_fin: Último día del rango
+        mascaras: Dict tercero_id -> int, en el orden de la programación (apellido)
+    """
+    fecha_inicio: object
+    fecha_fin: object
+    mascaras: dict = field(default_factory=dict)
+
+    @property
+    def dias(self):
+        return (self.fecha_fin - self.fecha_inicio).days + 1
+
+    @property
+    def terceros(self):
+        """Ids de los terceros vinculados al menos un día del rango, en orden."""
+        return [tercero_id for tercero_id, mascara in self.mascaras.items() if mascara]
+
+    def _bit(self, fecha):
+        offset = (fecha - self.fecha_inicio).days
+        if not 0 <= offset < self.dias:
+            raise ValueError(f'La fecha {fecha} está fuera del rango {self.fecha_inicio} - {self.fecha_fin}')
+        return 1 << offset
+
+    def activo(self, tercero_id, fecha):
+        return bool(self.mascaras.get(tercero_id, 0) & self._bit(fecha))
+
+    def activos_en(self, fecha):
+        """Ids de los terceros vinculados en una fecha, en orden."""
+        bit = self._bit(fecha)
+        return [tercero_id for tercero_id, mascara in self.mascaras.items() if mascara & bit]
+
+
+def resolver_disponibilidad(centro_operativo, fecha_inicio, fecha_fin, cargo_predefinido=None):
+    """
+    Resuelve qué terceros están vinculados a un centro en cada día del rango.
+
+    Args:
+        centro_operativo: CentroOperativo o su id
+        fecha_inicio: Primer día del rango
+        fecha_fin: Último día del rango
+        cargo_predefinido: CargoPredefinido o id para limitar a un cargo (opcional)
+
+    Returns:
+        DisponibilidadTerceros
+    """
+    # Todas las condiciones sobre periodos_laborales van en un solo filter() para
+    # compartir el mismo LEFT JOIN; sin periodos el join trae NULL
+    sin_periodos = Q(periodos_laborales__isnull=True, centro_operativo=centro_operativo, estado_tercero=1)
+    en_periodo = (
+        Q(periodos_laborales__centro_operativo=centro_operativo, periodos_laborales__fecha_inicio__lte=fecha_fin)
+        & (Q(periodos_laborales__fecha_fin__isnull=True) | Q(periodos_laborales__fecha_fin__gte=fecha_inicio))
+    )
+    if cargo_predefinido is not None:
+        sin_periodos &= Q(cargo_predefinido=cargo_predefinido)
+        en_periodo &= Q(periodos_laborales__cargo_predefinido=cargo_predefinido)
+
+    # all_objects: en los periodos decide el intervalo, no el estado actual
+    filas = (
+        Tercero.all_objects.filter(sin_periodos | en_periodo)
+        .order_by('apellido_tercero', 'id_tercero')
+        .values_list('id_tercero', 'periodos_laborales__fecha_inicio', 'periodos_laborales__fecha_fin')
+    )
+
+    disponibilidad = DisponibilidadTerceros(fecha_inicio, fecha_fin)
+    ultimo = disponibilidad.dias - 1
+    for tercero_id, desde, hasta in filas:
+        primero = max((desde - fecha_inicio).days, 0) if desde else 0
+        final = min((hasta - fecha_inicio).days, ultimo) if hasta else ultimo
+        mascara = ((1 << (final - primero + 1)) - 1) << primero if final >= primero else 0
+        disponibilidad.mascaras[tercero_id] = disponibilidad.mascaras.get(tercero_id, 0) | mascara
+    return disponibilidad
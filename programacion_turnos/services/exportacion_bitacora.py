@@ -0,0 +1,126 @@
+"""
+Exportación de la bitácora en CSV o JSONL con memoria constante.
+
+``filtrar_bitacora`` aplica los mismos filtros que el dashboard y
+``lineas_exportacion`` produce el archivo línea por línea: primero los meses
+archivados que alcanza el filtro de fechas (ver archivo_bitacora.py), leídos
+un miembro a la vez, y después la tabla, recorrida por lotes de llave
+(``recorrer_keyset``) desde el último registro archivado: los que siguen en
+la tabla tras un archivado interrumpido ya salieron del archivo. La vista
+envía esas líneas con ``StreamingHttpResponse`` y ``manage.py
+exportar_bitacora`` las escribe a disco, así que ningún rango, por grande que
+sea, se arma completo en memoria.
+"""
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from ..models import Bitacora
+from .archivo_bitacora import meses_en_rango, registros_archivados_en_orden, ultimo_archivado
+from .indice_bitacora import filtrar_busqueda
+from .paginacion import recorrer_keyset
+
+FORMATOS = ('csv', 'jsonl')
+TAMANO_LOTE = 2000
+COLUMNAS = ('id', 'fecha_hora', 'usuario', 'ip_address', 'tipo_accion', 'modulo', 'modelo_afectado', 'objeto_id',
+            'descripcion', 'valores_anteriores', 'valores_nuevos', 'campos_modificados')
+_CAMPOS_JSON = {'valores_anteriores', 'valores_nuevos', 'campos_modificados'}
+_VALORES = ('id', 'fecha_hora', 'usuario__username', 'ip_address', 'tipo_accion', 'modulo', 'modelo_afectado',
+            'objeto_id', 'descripcion', 'valores_anteriores', 'valores_nuevos', 'campos_modificados')
+
+
+def filtrar_bitacora(queryset, filtros):
+    """
+    Aplica los filtros del dashboard (``BitacoraFiltrosForm.cleaned_data``) a un queryset de Bitacora.
+    """
+    if filtros.get('fecha_desde'):
+        queryset = queryset.filter(fecha_hora__date__gte=filtros['fecha_desde'])
+    if filtros.get('fecha_hasta'):
+        queryset = queryset.filter(fecha_hora__date__lte=filtros['fecha_hasta'])
+    if filtros.get('usuario'):
+        queryset = queryset.filter(usuario=filtros['usuario'])
+    if filtros.get('tipo_accion'):
+        queryset = queryset.filter(tipo_accion=filtros['tipo_accion'])
+    if filtros.get('modulo'):
+        queryset = queryset.filter(modulo=filtros['modulo'])
+    if filtros.get('modelo_afectado'):
+        queryset = queryset.filter(modelo_afectado__icontains=filtros['modelo_afectado'])
+    if filtros.get('busqueda'):
+        # Índice invertido (BitacoraToken) en vez de tres icontains sobre toda la tabla
+        queryset = filtrar_busqueda(queryset, filtros['busqueda'])
+    return queryset
+
+
+def _filas_tabla(filtros, despues_de=None):
+    registros = filtrar_bitacora(Bitacora.objects.all(), filtros)
+    if despues_de is not None:
+        fecha_hora, id_ = despues_de
+        registros = registros.filter(Q(fecha_hora__gt=fecha_hora) | Q(fecha_hora=fecha_hora, id__gt=id_))
+    registros = registros.values(*_VALORES)
+    for fila in recorrer_keyset(registros, ('fecha_hora', 'id'), tamano=TAMANO_LOTE):
+        fila['usuario'] = fila.pop('usuario__username')
+        yield fila
+
+
+def _filas_archivo(filtros, directorio):
+    usuarios = None
+    for registro in registros_archivados_en_orden(filtros, directorio):
+        if usuarios is None:
+            # Los usuarios son pocos: un solo diccionario id -> username para todo el archivo
+            usuarios = dict(get_user_model().objects.values_list('id', 'username'))
+        fila = {columna: getattr(registro, columna) for columna in COLUMNAS if columna != 'usuario'}
+        fila['usuario'] = usuarios.get(registro.usuario_id)
+        yield fila
+
+
+def filas_exportacion(filtros, directorio=None):
+    """
+    Registros que cumplen los filtros, del más antiguo al más reciente, como dicts con ``COLUMNAS``.
+    """
+    if not meses_en_rango(filtros.get('fecha_desde'), filtros.get('fecha_hasta'), directorio):
+        yield from _filas_tabla(filtros)
+        return
+    yield from _filas_archivo(filtros, directorio)
+    yield from _filas_tabla(filtros, despues_de=ultimo_archivado(directorio))
+
+
+def _texto_csv(columna, valor):
+    if valor is None:
+        return ''
+    if columna == 'fecha_hora':
+        return valor.isoformat()
+    if columna in _CAMPOS_JSON:
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+class _Eco:
+    # Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla
+    def write(self, valor):
+        return valor
+
+
+def lineas_exportacion(filtros, formato='csv', directorio=None):
+    """
+    Líneas del archivo de exportación (con encabezado en CSV).
+
+    Args:
+        filtros: Filtros del dashboard
+        formato: 'csv' o 'jsonl'
+        directorio: Carpeta del archivo de la bitácora (por defecto BITACORA_ARCHIVO_DIR)
+
+    Yields:
+        Cadenas terminadas en salto de línea
+    """
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(COLUMNAS)
+        for fila in filas_exportacion(filtros, directorio):
+            yield escritor.writerow([_texto_csv(columna, fila[columna]) for columna in COLUMNAS])
+    else:
+        for fila in filas_exportacion(filtros, directorio):
+            # Un dict nuevo: la fila original sigue sirviendo de cursor a recorrer_keyset
+            datos = dict(fila, fecha_hora=fila['fecha_hora'].isoformat())
+            yield json.dumps({columna: datos[columna] for columna in COLUMNAS}, ensure_ascii=False, default=str) + '\n'
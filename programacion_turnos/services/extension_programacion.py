@@ -0,0 +1,107 @@
+"""
+Extensión de una programación a un nuevo rango de fechas.
+
+Lógica común de la acción ``extender`` de la API y de la vista del admin:
+cada tercero continúa el ciclo del modelo de turno desde su última posición,
+y solo recibe turnos los días en que está vinculado al centro (según
+``disponibilidad_terceros``, resuelta para todo el rango en una consulta) y
+no tiene turno ese día en otra programación activa.
+"""
+import time
+from datetime import timedelta
+
+from django.db import transaction
+
+from horas_sistema.metricas import EXTENSION_DURACION, EXTENSION_FILAS
+from usuarios.models import CodigoTurno
+from ..models import AsignacionTurno, LetraTurno
+from .conflictos_turnos import claves_de_disponibilidad, conflictos_para_claves
+from .revision_programacion import invalidar_programacion
+
+
+def extender_programacion(programacion, fecha_inicio_ext, fecha_fin_ext):
+    """
+    Crea las asignaciones del rango de extensión y mueve el fin de la programación.
+
+    Args:
+        programacion: ProgramacionHorario a extender
+        fecha_inicio_ext: Primer día de la extensión (posterior al fin actual)
+        fecha_fin_ext: Último día de la extensión
+
+    Returns:
+        Tupla (empleados con al menos una asignación nueva, días omitidos porque el
+        tercero ya tiene turno ese día en otra programación activa)
+
+    Raises:
+        ValueError: Si el rango se solapa, el modelo no tiene letras o no hay empleados vinculados
+    """
+    inicio_extension = time.perf_counter()
+    if fecha_inicio_ext <= programacion.fecha_fin:
+        raise ValueError("La fecha de inicio de la extensión debe ser posterior al fin de la programación actual.")
+
+    # Matriz de letras del modelo de turno
+    matriz = {}
+    max_fila = 0
+    max_col = 0
+    for fila, columna, valor in LetraTurno.objects.filter(
+            modelo_turno=programacion.modelo_turno_id).values_list('fila', 'columna', 'valor'):
+        matriz[(fila, columna)] = valor
+        max_fila = max(max_fila, fila)
+        max_col = max(max_col, columna)
+    if not matriz:
+        raise ValueError("No se encontraron letras de turno para el modelo.")
+
+    # Última posición de cada tercero en la programación actual
+    ultimas_posiciones = {}
+    for asignacion in AsignacionTurno.objects.filter(
+            programacion=programacion).order_by('tercero_id', '-dia').values('tercero_id', 'fila', 'columna', 'dia'):
+        if asignacion['tercero_id'] not in ultimas_posiciones:
+            ultimas_posiciones[asignacion['tercero_id']] = {
+                'fila': asignacion['fila'],
+                'columna': asignacion['columna'],
+                'dia': asignacion['dia']
+            }
+
+    disponibilidad = programacion.disponibilidad_terceros(fecha_inicio_ext, fecha_fin_ext)
+    ocupadas = conflictos_para_claves(claves_de_disponibilidad(disponibilidad), excluir_programacion=programacion)
+    codigos_por_letra = CodigoTurno.ids_por_letra()
+    nuevas_asignaciones = []
+    empleados_con_asignacion = set()
+    for i in range(disponibilidad.dias):
+        fecha = fecha_inicio_ext + timedelta(days=i)
+        for tercero_id in disponibilidad.activos_en(fecha):
+            ultima = ultimas_posiciones.get(tercero_id)
+            if ultima:
+                fila = ultima['fila']
+                dias_desde_ultima = (fecha - ultima['dia']).days
+                nueva_columna = (ultima['columna'] + dias_desde_ultima) % (max_col + 1)
+            else:
+                # Si es nuevo, se asigna la siguiente fila disponible
+                fila = len(ultimas_posiciones) % (max_fila + 1)
+                nueva_columna = i % (max_col + 1)
+
+            letra = matriz.get((fila, nueva_columna))
+            if letra and (tercero_id, fecha) not in ocupadas:
+                nuevas_asignaciones.append(AsignacionTurno(
+                    programacion=programacion,
+                    tercero_id=tercero_id,
+                    dia=fecha,
+                    letra_turno=letra,
+                    codigo_turno_id=codigos_por_letra.get(letra),
+                    fila=fila,
+                    columna=nueva_columna
+                ))
+                empleados_con_asignacion.add(tercero_id)
+                ultimas_posiciones[tercero_id] = {'fila': fila, 'columna': nueva_columna, 'dia': fecha}
+
+    if not nuevas_asignaciones:
+        raise ValueError("No hay empleados activos en ninguna fecha del rango de extensión.")
+
+    with transaction.atomic():
+        AsignacionTurno.objects.bulk_create(nuevas_asignaciones)
+        invalidar_programacion(programacion)
+        programacion.fecha_fin = fecha_fin_ext
+        programacion.save(update_fields=['fecha_fin'])
+    EXTENSION_DURACION.observe(time.perf_counter() - inicio_extension)
+    EXTENSION_FILAS.observe(len(nuevas_asignaciones))
+    return len(empleados_con_asignacion), len(ocupadas)
@@ -0,0 +1,102 @@
+"""
+Fuerza laboral elegible de un centro operativo para un cargo y un rango de fechas.
+
+Es la única definición de "terceros que se pueden programar": la usan la
+generación de asignaciones, la vista de creación de programaciones y la
+validación del admin. El cálculo es el de ``resolver_disponibilidad`` (una
+sola consulta indexada) y el resultado se guarda en la caché por poco tiempo.
+
+La clave de la caché incluye una versión por centro que se renueva cuando se
+guarda o elimina un Tercero o un PeriodoLaboral del centro (ver signals.py).
+Las escrituras masivas (``bulk_create``/``update``) no disparan señales: quien
+las haga debe llamar a ``invalidar_fuerza_laboral``; en el peor caso el dato
+vence a los ``TIMEOUT_FUERZA_LABORAL`` segundos.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from usuarios.models import Tercero
+from .disponibilidad_terceros import resolver_disponibilidad
+
+TIMEOUT_FUERZA_LABORAL = 60
+_CLAVE_VERSION = 'fuerza_laboral:version:{centro}'
+
+
+def _id(valor):
+    return getattr(valor, 'pk', valor)
+
+
+def version_fuerza_laboral(centro_operativo):
+    """Versión vigente de la fuerza laboral de un centro (se crea si no existe)."""
+    clave = _CLAVE_VERSION.format(centro=_id(centro_operativo))
+    version = cache.get(clave)
+    if version is None:
+        # Un valor nuevo (y no un contador desde 0) para no revivir entradas si la clave se desalojó
+        cache.add(clave, time.time_ns(), timeout=None)
+        version = cache.get(clave)
+    return version
+
+
+def invalidar_fuerza_laboral(*centros_operativos):
+    """
+    Renueva la versión de los centros indicados: las entradas anteriores dejan de usarse.
+
+    Se renueva de inmediato y otra vez al confirmar la transacción, para que
+    otro proceso no deje en caché los datos previos al commit con la versión nueva.
+    """
+    claves = {_CLAVE_VERSION.format(centro=_id(centro)) for centro in centros_operativos if centro is not None}
+
+    def renovar():
+        for clave in claves:
+            cache.set(clave, time.time_ns(), timeout=None)
+
+    if claves:
+        renovar()
+        transaction.on_commit(renovar)
+
+
+def resolver_fuerza_laboral(centro_operativo, cargo_predefinido, fecha_inicio, fecha_fin):
+    """
+    Terceros elegibles y los días en que cada uno está vinculado.
+
+    Args:
+        centro_operativo: CentroOperativo o su id
+        cargo_predefinido: CargoPredefinido o su id (None para todos los cargos)
+        fecha_inicio: Primer día del rango
+        fecha_fin: Último día del rango
+
+    Returns:
+        DisponibilidadTerceros (``terceros`` da los ids en orden de apellido)
+    """
+    centro_id, cargo_id = _id(centro_operativo), _id(cargo_predefinido)
+    clave = (
+        f'fuerza_laboral:{centro_id}:{cargo_id}:{fecha_inicio.isoformat()}:{fecha_fin.isoformat()}'
+        f':v{version_fuerza_laboral(centro_id)}'
+    )
+    disponibilidad = cache.get(clave)
+    if disponibilidad is None:
+        disponibilidad = resolver_disponibilidad(centro_id, fecha_inicio, fecha_fin, cargo_id)
+        cache.set(clave, disponibilidad, timeout=TIMEOUT_FUERZA_LABORAL)
+    return disponibilidad
+
+
+def diagnostico_fuerza_laboral(centro_operativo, cargo_predefinido):
+    """
+    Conteos para explicar por qué un centro no tiene terceros elegibles, en una sola consulta.
+
+    Returns:
+        Dict con total_centro, con_cargo, activos_centro y cargo_en_empresa (activos con el cargo en cualquier centro)
+    """
+    centro_id, cargo_id = _id(centro_operativo), _id(cargo_predefinido)
+    en_centro = Q(centro_operativo=centro_id)
+    con_cargo = Q(cargo_predefinido=cargo_id)
+    activo = Q(estado_tercero=Tercero.Estado_Activo)
+    return Tercero.all_objects.filter(en_centro | con_cargo).aggregate(
+        total_centro=Count('pk', filter=en_centro),
+        con_cargo=Count('pk', filter=en_centro & con_cargo),
+        activos_centro=Count('pk', filter=en_centro & activo),
+        cargo_en_empresa=Count('pk', filter=con_cargo & activo),
+    )
@@ -0,0 +1,114 @@
+"""
+Historial de cambios de un objeto en la bitácora.
+
+Los registros de un objeto se buscan por (modelo_afectado, objeto_id) sobre el
+índice (modelo_afectado, objeto_id, fecha_hora, id): para un solo objeto el
+índice ya entrega las filas en orden y la página es un rango del índice.
+
+``modelo_afectado`` no es uniforme: la bitácora automática guarda el
+``model_name`` ("asignacionturno") y otros registros el nombre de la clase
+("AsignacionTurno"); se buscan ambas formas. El historial de una programación
+incluye el de sus asignaciones (con las ediciones masivas de la malla, que
+dejan un registro por asignación): los registros de un hijo se buscan por los
+ids de los hijos vigentes, nunca por el id del padre en ``objeto_id``, y por
+el id del padre guardado en los valores del registro, que cubre a los hijos
+ya eliminados. La bitácora automática guarda la llave foránea con el resto de
+los campos; los registros por lote de las asignaciones la agregan a
+``valores_nuevos``.
+"""
+from django.apps import apps
+from django.db.models import Q
+
+from ..models import AsignacionTurno, Bitacora, ProgramacionHorario
+from .paginacion import SIGUIENTE, paginar_keyset
+
+APPS_AUDITADAS = ('programacion_turnos', 'usuarios', 'empresas', 'programacion_models')
+# Modelo padre -> (modelo hijo, llave foránea al padre) cuyo historial se incluye con el del padre
+HIJOS_HISTORIAL = {
+    ProgramacionHorario: [(AsignacionTurno, 'programacion')],
+}
+
+
+def resolver_modelo(nombre):
+    """
+    Modelo auditado a partir de su nombre ("asignacionturno", "AsignacionTurno" o "app.modelo").
+
+    Returns:
+        Clase del modelo, o None si no existe
+    """
+    nombre = nombre.lower()
+    if '.' in nombre:
+        app_label, _, nombre = nombre.partition('.')
+        etiquetas = [app_label]
+    else:
+        etiquetas = APPS_AUDITADAS
+    for app_label in etiquetas:
+        try:
+            return apps.get_model(app_label, nombre)
+        except LookupError:
+            continue
+    return None
+
+
+def nombres_bitacora(modelo):
+    """Valores de ``modelo_afectado`` con que la bitácora registra un modelo."""
+    return [modelo._meta.model_name, modelo.__name__]
+
+
+def filtro_historial(modelo, objeto_id, incluir_hijos=True):
+    """
+    Condición sobre Bitacora para el historial de un objeto.
+
+    Args:
+        modelo: Clase del modelo
+        objeto_id: Id del objeto
+        incluir_hijos: Incluir el historial de los hijos (ver HIJOS_HISTORIAL)
+
+    Returns:
+        Q para filtrar Bitacora
+    """
+    condicion = Q(modelo_afectado__in=nombres_bitacora(modelo), objeto_id=objeto_id)
+    for hijo, campo in HIJOS_HISTORIAL.get(modelo, []) if incluir_hijos else []:
+        # Los valores de la bitácora son textos: {"programacion": "15"}
+        condicion |= Q(modelo_afectado__in=nombres_bitacora(hijo)) & (
+            Q(objeto_id__in=hijo.objects.filter(**{campo: objeto_id}).values('pk'))
+            | Q(**{f'valores_nuevos__{campo}': str(objeto_id)})
+            | Q(**{f'valores_anteriores__{campo}': str(objeto_id)})
+        )
+    return condicion
+
+
+def historial_objeto(modelo, objeto_id, cursor=None, direccion=SIGUIENTE, tamano=50, incluir_hijos=True):
+    """
+    Una página del historial de un objeto, del cambio más reciente al más antiguo.
+
+    Args:
+        modelo: Clase del modelo
+        objeto_id: Id del objeto
+        cursor: Cursor de la página anterior (ver paginacion.py)
+        direccion: SIGUIENTE o ANTERIOR
+        tamano: Registros por página
+        incluir_hijos: Incluir el historial de los hijos
+
+    Returns:
+        PaginaKeyset de registros de Bitacora
+    """
+    registros = Bitacora.objects.select_related('usuario').filter(
+        filtro_historial(modelo, objeto_id, incluir_hijos=incluir_hijos)
+    )
+    return paginar_keyset(registros, ('fecha_hora', 'id'), cursor=cursor, direccion=direccion, tamano=tamano)
+
+
+def registro_a_dict(bitacora):
+    return {
+        'id': bitacora.id,
+        'fecha_hora': bitacora.fecha_hora,
+        'usuario': bitacora.usuario.username if bitacora.usuario else None,
+        'tipo_accion': bitacora.tipo_accion,
+        'modelo_afectado': bitacora.modelo_afectado,
+        'objeto_id': bitacora.objeto_id,
+        'descripcion': bitacora.descripcion,
+        'campos_modificados': bitacora.campos_modificados,
+        'valores_anteriores': bitacora.valores_anteriores,
+        'valores_nuevos': bitacora.valores_nuevos,
+    }
@@ -0,0 +1,96 @@
+"""
+Escrituras idempotentes con la clave ``Idempotency-Key`` del cliente.
+
+La respuesta de una escritura exitosa se guarda (SolicitudIdempotente) en la
+misma transacción que la escritura, así que existe si y solo si la escritura
+se confirmó. Un reintento con la misma clave y el mismo contenido recibe esa
+respuesta sin volver a escribir; con otro contenido es un error del cliente.
+Si dos solicitudes con la misma clave llegan a la vez, la restricción única
+(usuario, clave) deja pasar solo a la primera: la segunda deshace su escritura
+y responde lo que guardó la primera.
+
+Las respuestas con error no se guardan: corregir los datos y reintentar con la
+misma clave es válido. Las claves se olvidan a las ``IDEMPOTENCIA_HORAS``.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from ..models import SolicitudIdempotente
+
+LONGITUD_CLAVE = 100
+
+
+class ClaveReutilizada(Exception):
+    """La clave ya se usó con un contenido distinto."""
+
+
+def huella_solicitud(*partes):
+    """SHA-256 del contenido de la solicitud (cuerpo y parámetros que cambian su efecto)."""
+    resumen = hashlib.sha256()
+    for parte in partes:
+        resumen.update(parte if isinstance(parte, bytes) else str(parte).encode('utf-8'))
+        resumen.update(b'\0')
+    return resumen.hexdigest()
+
+
+def _vigentes():
+    return SolicitudIdempotente.objects.filter(
+        fecha__gte=timezone.now() - timedelta(hours=settings.IDEMPOTENCIA_HORAS)
+    )
+
+
+def _guardada(usuario, clave, huella, bloquear=False):
+    solicitudes = _vigentes()
+    if bloquear:
+        # Lectura con bloqueo: en REPEATABLE READ (MySQL) es la única que ve la fila recién confirmada
+        solicitudes = solicitudes.select_for_update()
+    solicitud = solicitudes.filter(usuario=usuario, clave=clave).first()
+    if solicitud is not None and solicitud.huella != huella:
+        raise ClaveReutilizada(f'La clave {clave} ya se usó con otro contenido.')
+    return solicitud
+
+
+def ejecutar_idempotente(usuario, clave, huella, escribir):
+    """
+    Ejecuta ``escribir`` una sola vez por (usuario, clave).
+
+    Args:
+        usuario: Usuario autenticado
+        clave: Valor de Idempotency-Key (None = sin idempotencia)
+        huella: Huella del contenido (ver ``huella_solicitud``)
+        escribir: Callable sin argumentos que hace la escritura y devuelve (código HTTP, dict de respuesta)
+
+    Returns:
+        Tupla (código, respuesta, repetida): ``repetida`` indica que la respuesta es la guardada
+
+    Raises:
+        ClaveReutilizada: Si la clave ya se usó con otro contenido
+    """
+    if not clave:
+        codigo, respuesta = escribir()
+        return codigo, respuesta, False
+
+    solicitud = _guardada(usuario, clave, huella)
+    if solicitud is not None:
+        return solicitud.codigo, solicitud.respuesta, True
+    try:
+        with transaction.atomic():
+            codigo, respuesta = escribir()
+            if 200 <= codigo < 300:
+                SolicitudIdempotente.objects.filter(
+                    fecha__lt=timezone.now() - timedelta(hours=settings.IDEMPOTENCIA_HORAS)
+                ).delete()
+                SolicitudIdempotente.objects.create(
+                    usuario=usuario, clave=clave, huella=huella, codigo=codigo, respuesta=respuesta,
+                )
+    except IntegrityError:
+        # Otra solicitud con la misma clave se confirmó primero: su escritura es la que vale
+        solicitud = _guardada(usuario, clave, huella, bloquear=True)
+        if solicitud is None:
+            raise
+        return solicitud.codigo, solicitud.respuesta, True
+    return codigo, respuesta, False
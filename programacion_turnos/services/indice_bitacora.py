@@ -0,0 +1,179 @@
+"""
+Índice invertido de la bitácora (BitacoraToken) para la búsqueda libre.
+
+Cada registro se parte en términos normalizados (minúsculas, sin tildes) de su
+descripción, modelo afectado, IP y de las claves y valores de
+``valores_anteriores``/``valores_nuevos``; se guarda una fila (término,
+registro) por término distinto. Buscar "programacion 10.3" es entonces un
+``id IN (registros con un término que empieza por 'programacion')`` por cada
+palabra, que el índice (token, bitacora) resuelve por rango en vez de recorrer
+la tabla con tres ``icontains``.
+
+La señal post_save de Bitacora (signals.py) indexa cada registro nuevo y
+``registrar_bitacora_lote`` (utils.py) indexa su lote. Las demás inserciones
+masivas (dataset sintético) no la disparan: después hay que llamar a
+``reindexar_bitacora`` o ejecutar ``manage.py reindexar_bitacora``. Los
+términos de un registro se borran con él (CASCADE).
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Q
+
+LONGITUD_MINIMA = 2
+LONGITUD_MAXIMA = 40
+MAXIMO_TOKENS = 64
+TAMANO_LOTE = 1000
+# Palabras demasiado frecuentes para filtrar algo: no se indexan ni se buscan
+PALABRAS_VACIAS = frozenset({
+    'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los', 'para', 'por', 'se', 'su', 'un', 'una',
+})
+# Las IP y los números con puntos se conservan enteros para poder buscarlos por prefijo ("10.3")
+_PATRON_TOKEN = re.compile(r'\d+(?:\.\d+)+|[a-z0-9]+')
+_CAMPOS_INDEXADOS = ('descripcion', 'modelo_afectado', 'ip_address', 'valores_anteriores', 'valores_nuevos')
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes ("Programación" -> "programacion")."""
+    descompuesto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter)).lower()
+
+
+def _terminos(texto):
+    for termino in _PATRON_TOKEN.findall(normalizar(texto)):
+        if len(termino) >= LONGITUD_MINIMA and termino not in PALABRAS_VACIAS:
+            yield termino[:LONGITUD_MAXIMA]
+
+
+def _textos_json(valor):
+    # Claves y valores escalares de un JSON anidado
+    if isinstance(valor, dict):
+        for clave, anidado in valor.items():
+            yield str(clave)
+            yield from _textos_json(anidado)
+    elif isinstance(valor, (list, tuple)):
+        for anidado in valor:
+            yield from _textos_json(anidado)
+    elif valor is not None:
+        yield str(valor)
+
+
+def tokens_bitacora(bitacora):
+    """
+    Términos distintos de un registro de bitácora, en orden de aparición.
+
+    Returns:
+        Lista de a lo sumo MAXIMO_TOKENS términos
+    """
+    textos = [bitacora.descripcion, bitacora.modelo_afectado, bitacora.ip_address]
+    textos.extend(_textos_json(bitacora.valores_anteriores))
+    textos.extend(_textos_json(bitacora.valores_nuevos))
+    tokens = {}
+    for texto in textos:
+        if texto:
+            for termino in _terminos(texto):
+                tokens.setdefault(termino, None)
+                if len(tokens) >= MAXIMO_TOKENS:
+                    return list(tokens)
+    return list(tokens)
+
+
+def terminos_busqueda(texto):
+    """Términos de una búsqueda, normalizados igual que el índice (sin repetir)."""
+    return list(dict.fromkeys(_terminos(texto)))
+
+
+def indexar_bitacoras(bitacoras, token_modelo=None, using='default'):
+    """
+    Inserta los términos de los registros indicados (que aún no deben estar indexados).
+
+    Returns:
+        Cantidad de filas de índice escritas
+    """
+    if token_modelo is None:
+        from ..models import BitacoraToken as token_modelo
+    filas = [
+        token_modelo(token=termino, bitacora_id=bitacora.pk)
+        for bitacora in bitacoras
+        for termino in tokens_bitacora(bitacora)
+    ]
+    token_modelo.objects.using(using).bulk_create(filas, batch_size=TAMANO_LOTE)
+    return len(filas)
+
+
+def reindexar_bitacora(desde_id=None, bitacora_modelo=None, token_modelo=None, using='default', reportar=None):
+    """
+    Reconstruye el índice por lotes de registros, en orden de id.
+
+    Args:
+        desde_id: Primer id a reindexar (None = toda la bitácora)
+        bitacora_modelo: Modelo Bitacora (por defecto el actual; en migraciones, el histórico)
+        token_modelo: Modelo BitacoraToken
+        using: Alias de la base de datos
+        reportar: Callable opcional que recibe mensajes de progreso
+
+    Returns:
+        Cantidad de filas de índice escritas
+    """
+    if bitacora_modelo is None:
+        from ..models import Bitacora as bitacora_modelo
+    if token_modelo is None:
+        from ..models import BitacoraToken as token_modelo
+    reportar = reportar or (lambda mensaje: None)
+
+    registros = bitacora_modelo.objects.using(using).only('id', *_CAMPOS_INDEXADOS).order_by('id')
+    tokens = token_modelo.objects.using(using)
+    if desde_id is not None:
+        registros = registros.filter(id__gte=desde_id)
+        tokens = tokens.filter(bitacora_id__gte=desde_id)
+    borradas, _ = tokens.delete()
+    reportar(f'   {borradas:,} filas de índice eliminadas')
+
+    escritas = procesados = 0
+    ultimo = None
+    while True:
+        lote = list((registros.filter(id__gt=ultimo) if ultimo is not None else registros)[:TAMANO_LOTE])
+        if not lote:
+            break
+        with transaction.atomic(using=using):
+            escritas += indexar_bitacoras(lote, token_modelo=token_modelo, using=using)
+        procesados += len(lote)
+        ultimo = lote[-1].pk
+        reportar(f'   {procesados:,} registros indexados ({escritas:,} términos)')
+    return escritas
+
+
+def _coincidencias(termino, token_modelo, using):
+    # El prefijo como rango en todos los motores: LIKE ... ESCAPE no usa el índice en
+    # SQLite y en MySQL ``startswith`` es LIKE BINARY, que compara bytes en vez de usar
+    # la intercalación de la columna (los términos son [a-z0-9.], todos menores que '\uffff')
+    prefijo = Q(token__gte=termino, token__lt=termino + '\uffff')
+    return token_modelo.objects.using(using).filter(prefijo).values('bitacora_id')
+
+
+def filtrar_busqueda(queryset, texto):
+    """
+    Filtra registros de bitácora por texto libre usando el índice.
+
+    Cada término debe aparecer (como prefijo de alguna palabra) en el registro.
+    Si el texto no tiene términos indexables (solo símbolos o palabras vacías)
+    se conserva la búsqueda por ``icontains``.
+
+    Args:
+        queryset: QuerySet de Bitacora
+        texto: Texto ingresado en el filtro
+
+    Returns:
+        QuerySet filtrado
+    """
+    from ..models import BitacoraToken
+
+    terminos = terminos_busqueda(texto)
+    if not terminos:
+        return queryset.filter(
+            Q(descripcion__icontains=texto) | Q(ip_address__icontains=texto) | Q(modelo_afectado__icontains=texto)
+        )
+    for termino in terminos:
+        queryset = queryset.filter(id__in=_coincidencias(termino, BitacoraToken, queryset.db))
+    return queryset
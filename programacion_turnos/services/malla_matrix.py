@@ -0,0 +1,149 @@
+"""
+Malla de turnos en memoria: una fila por tercero y una columna por día.
+
+Las celdas guardan el índice de la letra en ``letras`` (codificación por
+diccionario, 0 = sin asignación), de modo que una malla de un año con cientos
+de terceros ocupa pocos KiB y las reglas se calculan sobre listas de enteros.
+
+``PerfilesTurno`` traduce cada letra a su perfil horario (horas, minuto de
+inicio y de fin) a partir de CodigoTurno, para el motor de reglas laborales y
+el análisis de cobertura.
+"""
+from array import array
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from usuarios.models import CodigoTurno
+from ..models import AsignacionTurno
+
+SIN_LETRA = 0
+
+
+@dataclass
+class MallaMatrix:
+    """
+    Args:
+        fecha_inicio: Día de la columna 0
+        dias: Cantidad de columnas
+        terceros: Ids de tercero en el orden de las filas
+        letras: Letra de cada índice (la posición 0 es '' = sin asignación)
+        filas: Una ``array('H')`` por tercero con el índice de letra de cada día
+    """
+    fecha_inicio: object
+    dias: int
+    terceros: list = field(default_factory=list)
+    letras: list = field(default_factory=lambda: [''])
+    filas: list = field(default_factory=list)
+    _posiciones: dict = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def desde_programacion(cls, programacion, fecha_inicio=None, fecha_fin=None, terceros=None):
+        """
+        Carga la malla con una sola consulta (índice de programación, día, tercero y letra).
+
+        Args:
+            programacion: ProgramacionHorario
+            fecha_inicio: Primer día (por defecto el de la programación)
+            fecha_fin: Último día (por defecto el de la programación)
+            terceros: Limitar a estos ids de tercero (opcional)
+        """
+        fecha_inicio = fecha_inicio or programacion.fecha_inicio
+        fecha_fin = fecha_fin or programacion.fecha_fin
+        asignaciones = AsignacionTurno.objects.filter(
+            programacion=programacion, dia__range=(fecha_inicio, fecha_fin)
+        )
+        if terceros is not None:
+            asignaciones = asignaciones.filter(tercero_id__in=terceros)
+        malla = cls(fecha_inicio, (fecha_fin - fecha_inicio).days + 1)
+        for tercero_id, dia, letra in asignaciones.values_list('tercero_id', 'dia', 'letra_turno'):
+            malla.asignar(tercero_id, dia, letra)
+        return malla
+
+    # ========== ACCESO ==========
+
+    def _indice_letra(self, letra):
+        if not letra:
+            return SIN_LETRA
+        try:
+            return self.letras.index(letra)
+        except ValueError:
+            self.letras.append(letra)
+            return len(self.letras) - 1
+
+    def _fila(self, tercero_id):
+        if self._posiciones is None:
+            self._posiciones = {tercero_id: i for i, tercero_id in enumerate(self.terceros)}
+        posicion = self._posiciones.get(tercero_id)
+        if posicion is None:
+            posicion = self._posiciones[tercero_id] = len(self.terceros)
+            self.terceros.append(tercero_id)
+            self.filas.append(array('H', bytes(2 * self.dias)))
+        return self.filas[posicion]
+
+    def fecha(self, columna):
+        return self.fecha_inicio + timedelta(days=columna)
+
+    def asignar(self, tercero_id, dia, letra):
+        """Escribe una celda (ignora días fuera del rango de la malla)."""
+        columna = (dia - self.fecha_inicio).days
+        if 0 <= columna < self.dias:
+            self._fila(tercero_id)[columna] = self._indice_letra(letra)
+
+    def letra(self, tercero_id, dia):
+        columna = (dia - self.fecha_inicio).days
+        if tercero_id not in self.terceros or not 0 <= columna < self.dias:
+            return ''
+        return self.letras[self._fila(tercero_id)[columna]]
+
+    def copia(self):
+        return MallaMatrix(self.fecha_inicio, self.dias, list(self.terceros), list(self.letras),
+                           [array('H', fila) for fila in self.filas])
+
+
+@dataclass
+class PerfilesTurno:
+    """
+    Perfil horario de cada letra, alineado con ``MallaMatrix.letras``.
+
+    Las listas se indexan con el índice de letra de la malla: ``horas[i]``,
+    ``inicio[i]`` y ``fin[i]`` (minutos desde la medianoche del día del turno;
+    ``fin`` pasa de 1440 si el turno termina al día siguiente).
+    """
+    horas: list
+    inicio: list
+    fin: list
+
+    @property
+    def trabaja(self):
+        return [horas > 0 for horas in self.horas]
+
+    @classmethod
+    def para(cls, malla):
+        """Perfiles de las letras presentes en la malla, con una consulta a CodigoTurno."""
+        return cls.para_letras(malla.letras)
+
+    @classmethod
+    def para_letras(cls, letras):
+        """
+        Perfiles de una lista de letras (en el mismo orden), con una consulta a CodigoTurno.
+
+        Las letras sin código (o vacías) quedan con 0 horas.
+        """
+        codigos = {}
+        for letra, horas, inicio, fin in CodigoTurno.objects.filter(letra_turno__in=[l for l in letras if l]).order_by(
+                'estado_codigo', '-id_codigo_turnos').values_list('letra_turno', 'duracion_total', 'hora_inicio',
+                                                                  'hora_final'):
+            # El último que se asigna gana: activo y de id más bajo, como CodigoTurno.ids_por_letra
+            codigos[letra] = (float(horas or 0), inicio, fin)
+
+        horas, inicios, fines = [], [], []
+        for letra in letras:
+            duracion, inicio, fin = codigos.get(letra, (0.0, None, None))
+            minuto_inicio = inicio.hour * 60 + inicio.minute if inicio else 0
+            minuto_fin = fin.hour * 60 + fin.minute if fin else minuto_inicio + round(duracion * 60)
+            if minuto_fin <= minuto_inicio and duracion > 0:
+                minuto_fin += 1440
+            horas.append(duracion)
+            inicios.append(minuto_inicio)
+            fines.append(minuto_fin)
+        return cls(horas, inicios, fines)
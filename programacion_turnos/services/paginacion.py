@@ -0,0 +1,187 @@
+"""
+Paginación por llave (keyset) y conteos estimados.
+
+``paginar_keyset`` pagina con un cursor sobre las columnas de orden (por
+ejemplo ``(fecha_hora, id)``): cada página es un ``WHERE (fecha_hora, id) <
+(cursor) ORDER BY ... LIMIT n`` que el índice resuelve igual en la página 1
+que en la 1000, a diferencia de OFFSET. El cursor es opaco para el cliente
+(base64 de los valores de la última fila mostrada). El recorrido completo por
+lotes (``recorrer_keyset``) vive en horas_sistema/keyset.py, porque también lo
+usan los listados en streaming del proyecto.
+
+``contar_estimado`` evita el ``COUNT(*)`` completo: en PostgreSQL usa la
+estimación del planificador y en los demás motores cuenta con tope.
+"""
+import base64
+import binascii
+import datetime
+import heapq
+import json
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from horas_sistema.keyset import campo_modelo, condicion_mas_alla, recorrer_keyset, valor_campo
+
+SIGUIENTE = 'siguiente'
+ANTERIOR = 'anterior'
+TOPE_CONTEO = 10000
+
+
+@dataclass
+class PaginaKeyset:
+    objetos: list = field(default_factory=list)
+    cursor_siguiente: str = None
+    cursor_anterior: str = None
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    @property
+    def has_next(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def has_previous(self):
+        return self.cursor_anterior is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _serializable(valor):
+    # isoformat completo: DjangoJSONEncoder recorta los microsegundos y el cursor dejaría de ser exacto
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, (int, float, str)) or valor is None:
+        return valor
+    return str(valor)
+
+
+def codificar_cursor(objeto, campos):
+    valores = [_serializable(valor_campo(objeto, nombre)) for nombre in campos]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, modelo, campos):
+    """
+    Valores del cursor convertidos al tipo de cada campo.
+
+    Returns:
+        Lista de valores, o None si el cursor no es válido
+    """
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(valores, list) or len(valores) != len(campos):
+            return None
+        return [campo_modelo(modelo, nombre).to_python(valor) for nombre, valor in zip(campos, valores)]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+def paginar_keyset(queryset, campos=('fecha_hora', 'id'), cursor=None, direccion=SIGUIENTE, tamano=25,
+                   descendente=True, adicionales=None):
+    """
+    Una página del queryset ordenado por ``campos``, a partir de un cursor.
+
+    Args:
+        queryset: QuerySet ya filtrado, de instancias o de ``values()`` con ``campos`` (su orden se
+            reemplaza por ``campos``)
+        campos: Columnas de orden; la última debe ser única (normalmente el id)
+        cursor: Cursor recibido del cliente (None o inválido = primera página)
+        direccion: SIGUIENTE (filas después del cursor) o ANTERIOR (filas antes del cursor)
+        tamano: Filas por página
+        descendente: Orden de mayor a menor (los registros más recientes primero)
+        adicionales: Callable opcional ``(valores, invertir, limite)`` con filas de otra fuente
+            (por ejemplo, el archivo de la bitácora) que se intercalan con las del queryset: debe
+            devolver hasta ``limite`` instancias del modelo más allá de ``valores`` (None = desde
+            el principio), de mayor a menor si ``invertir``
+
+    Returns:
+        PaginaKeyset con los objetos y los cursores para avanzar y retroceder
+    """
+    valores = decodificar_cursor(cursor, queryset.model, campos) if cursor else None
+    hacia_atras = valores is not None and direccion == ANTERIOR
+    # Retroceder es recorrer en el orden inverso desde el cursor y luego dar vuelta la página
+    invertir = descendente != hacia_atras
+    orden = [f'-{nombre}' if invertir else nombre for nombre in campos]
+    filas = queryset.order_by(*orden)
+    if valores is not None:
+        filas = filas.filter(condicion_mas_alla(campos, valores, 'lt' if invertir else 'gt'))
+
+    objetos = list(filas[:tamano + 1])
+    if adicionales is not None:
+        atributos = [campo_modelo(queryset.model, nombre).attname for nombre in campos]
+
+        def clave(objeto):
+            return tuple(getattr(objeto, atributo) for atributo in atributos)
+
+        objetos = list(heapq.merge(objetos, adicionales(valores, invertir, tamano + 1), key=clave,
+                                   reverse=invertir))[:tamano + 1]
+    hay_mas = len(objetos) > tamano
+    objetos = objetos[:tamano]
+    if hacia_atras:
+        objetos.reverse()
+        hay_siguiente, hay_anterior = True, hay_mas
+    else:
+        hay_siguiente, hay_anterior = hay_mas, valores is not None
+
+    return PaginaKeyset(
+        objetos=objetos,
+        cursor_siguiente=codificar_cursor(objetos[-1], campos) if objetos and hay_siguiente else None,
+        cursor_anterior=codificar_cursor(objetos[0], campos) if objetos and hay_anterior else None,
+    )
+
+
+def estimacion_planificador(queryset):
+    """Filas estimadas por el planificador de PostgreSQL (None en otros motores)."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def contar_estimado(queryset, tope=TOPE_CONTEO):
+    """
+    Conteo aproximado sin recorrer toda la tabla.
+
+    Returns:
+        Tupla (conteo, exacto): en PostgreSQL la estimación del planificador; en
+        otros motores el conteo exacto hasta ``tope`` (si lo supera se devuelve ``tope``)
+    """
+    estimado = estimacion_planificador(queryset)
+    if estimado is not None:
+        return estimado, False
+    conteo = queryset.order_by()[:tope + 1].count()
+    return min(conteo, tope), conteo <= tope
+
+
+class PaginadorConteoEstimado(Paginator):
+    """
+    Paginator cuyo ``count`` es una estimación (ver ``contar_estimado``).
+
+    Para el changelist del admin: las páginas siguen siendo OFFSET, pero ya no
+    se cuenta la tabla completa en cada vista. Si el conteo acotado llega al
+    tope se cuenta todo: con el tope como total las páginas siguientes no se
+    podrían abrir.
+    """
+
+    @cached_property
+    def count(self):
+        conteo, exacto = contar_estimado(self.object_list)
+        if exacto or estimacion_planificador(self.object_list) is not None:
+            return conteo
+        return self.object_list.count()
@@ -0,0 +1,155 @@
+"""
+Motor de reglas laborales sobre una MallaMatrix completa.
+
+Reglas:
+
+- ``max_horas_ventana``: no más de ``max_horas_ventana`` horas en cualquier
+  ventana móvil de ``dias_ventana`` días.
+- ``dia_descanso``: al menos ``dias_descanso_ventana`` días sin turno
+  trabajado en cada ventana móvil de ``dias_ventana`` días.
+- ``descanso_entre_turnos``: entre el fin de un turno y el inicio del
+  siguiente (día consecutivo) deben pasar ``descanso_minimo_horas`` horas.
+
+Cada fila se convierte una vez en listas de horas y de días trabajados y las
+ventanas se calculan con sumas acumuladas (resta de prefijos desplazados),
+de modo que el costo es lineal en la cantidad de celdas sin importar el
+ancho de la ventana. Las ventanas solo se evalúan completas dentro de la malla.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from itertools import accumulate
+from typing import NamedTuple
+
+from .malla_matrix import MallaMatrix, PerfilesTurno
+
+REGLA_HORAS_VENTANA = 'max_horas_ventana'
+REGLA_DIA_DESCANSO = 'dia_descanso'
+REGLA_DESCANSO_ENTRE_TURNOS = 'descanso_entre_turnos'
+
+
+@dataclass(frozen=True)
+class ReglasLaborales:
+    max_horas_ventana: float = 48
+    dias_ventana: int = 7
+    dias_descanso_ventana: int = 1
+    descanso_minimo_horas: float = 10
+
+
+REGLAS_POR_DEFECTO = ReglasLaborales()
+
+
+class Violacion(NamedTuple):
+    tercero_id: int
+    fecha: object
+    regla: str
+    detalle: str = ''
+
+    @property
+    def clave(self):
+        return self.tercero_id, self.fecha, self.regla
+
+
+def validar_malla(malla, perfiles=None, reglas=REGLAS_POR_DEFECTO):
+    """
+    Evalúa todas las reglas para todos los terceros de la malla.
+
+    Args:
+        malla: MallaMatrix
+        perfiles: PerfilesTurno alineados con ``malla.letras`` (se consultan si no se pasan)
+        reglas: ReglasLaborales
+
+    Returns:
+        Lista de Violacion; las de ventana se reportan en el último día de la ventana
+    """
+    perfiles = perfiles or PerfilesTurno.para(malla)
+    horas, inicio, fin, trabaja = perfiles.horas, perfiles.inicio, perfiles.fin, perfiles.trabaja
+    ventana = reglas.dias_ventana
+    descanso_minimo = reglas.descanso_minimo_horas * 60
+    violaciones = []
+
+    for tercero_id, fila in zip(malla.terceros, malla.filas):
+        # Sumas por ventana: prefijo[k + ventana] - prefijo[k] es la ventana que termina en el día k + ventana - 1
+        horas_acumuladas = list(accumulate((horas[c] for c in fila), initial=0.0))
+        sumas = [b - a for a, b in zip(horas_acumuladas, horas_acumuladas[ventana:])]
+        dias_trabajados = list(accumulate((trabaja[c] for c in fila), initial=0))
+        trabajados = [b - a for a, b in zip(dias_trabajados, dias_trabajados[ventana:])]
+
+        for k, suma in enumerate(sumas):
+            if suma > reglas.max_horas_ventana:
+                violaciones.append(Violacion(
+                    tercero_id, malla.fecha(k + ventana - 1), REGLA_HORAS_VENTANA,
+                    f'{suma:g} h en {ventana} días (máximo {reglas.max_horas_ventana:g})'
+                ))
+        for k, dias in enumerate(trabajados):
+            if ventana - dias < reglas.dias_descanso_ventana:
+                violaciones.append(Violacion(
+                    tercero_id, malla.fecha(k + ventana - 1), REGLA_DIA_DESCANSO,
+                    f'{dias} días trabajados en {ventana} días'
+                ))
+
+        # Descanso entre turnos de días consecutivos (minutos desde el fin del anterior)
+        for j, (anterior, actual) in enumerate(zip(fila, fila[1:]), start=1):
+            if trabaja[anterior] and trabaja[actual]:
+                descanso = 1440 + inicio[actual] - fin[anterior]
+                if descanso < descanso_minimo:
+                    violaciones.append(Violacion(
+                        tercero_id, malla.fecha(j), REGLA_DESCANSO_ENTRE_TURNOS,
+                        f'{descanso / 60:g} h de descanso (mínimo {reglas.descanso_minimo_horas:g})'
+                    ))
+    return violaciones
+
+
+def violaciones_nuevas(malla, cambios, reglas=REGLAS_POR_DEFECTO):
+    """
+    Violaciones que aparecerían al aplicar cambios a la malla (las que ya existían no cuentan).
+
+    Args:
+        malla: MallaMatrix con el estado actual (incluyendo los días vecinos de los cambios)
+        cambios: Iterable de (tercero_id, fecha, letra)
+
+    Returns:
+        Lista de Violacion presentes solo después de los cambios
+    """
+    modificada = malla.copia()
+    for tercero_id, fecha, letra in cambios:
+        modificada.asignar(tercero_id, fecha, letra)
+    # La copia conserva los índices de letra de la original y agrega las nuevas al final
+    perfiles = PerfilesTurno.para(modificada)
+    previas = {v.clave for v in validar_malla(malla, perfiles, reglas)}
+    return [v for v in validar_malla(modificada, perfiles, reglas) if v.clave not in previas]
+
+
+def validar_cambios_malla(programacion, cambios, reglas=REGLAS_POR_DEFECTO):
+    """
+    Revisión previa al guardado de una edición de la malla.
+
+    Carga solo los terceros editados y los días que comparten una ventana con
+    algún cambio (limitados al rango de la programación), en una consulta.
+
+    Args:
+        programacion: ProgramacionHorario editada
+        cambios: Lista de (tercero_id, fecha, letra)
+
+    Returns:
+        Lista de Violacion que introducirían los cambios
+    """
+    if not cambios:
+        return []
+    fechas = [fecha for _, fecha, _ in cambios]
+    margen = timedelta(days=max(reglas.dias_ventana - 1, 1))
+    malla = MallaMatrix.desde_programacion(
+        programacion,
+        max(min(fechas) - margen, programacion.fecha_inicio),
+        min(max(fechas) + margen, programacion.fecha_fin),
+        terceros={tercero_id for tercero_id, _, _ in cambios},
+    )
+    return violaciones_nuevas(malla, cambios, reglas)
+
+
+def violacion_a_dict(violacion):
+    return {
+        'tercero_id': violacion.tercero_id,
+        'fecha': violacion.fecha.isoformat(),
+        'regla': violacion.regla,
+        'detalle': violacion.detalle,
+    }
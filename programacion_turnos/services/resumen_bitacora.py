@@ -0,0 +1,149 @@
+"""
+Resumen diario de la bitácora (BitacoraResumenDiario).
+
+Cada registro nuevo de Bitacora suma 1 a la fila de su (día, usuario,
+módulo, tipo de acción) desde la señal post_save (signals.py); las
+estadísticas del dashboard se calculan sobre el resumen, que tiene a lo sumo
+unas decenas de filas por día.
+
+Las inserciones masivas (``bulk_create``, dataset sintético) no disparan la
+señal: ``registrar_bitacora_lote`` (utils.py) suma su lote con
+``registrar_lote_en_resumen``; para las demás hay que llamar a
+``reconstruir_resumen_bitacora`` o ejecutar ``manage.py reconstruir_resumen_bitacora``. Eliminar registros de la bitácora
+no descuenta el resumen; la reconstrucción lo recalcula desde la tabla.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+TAMANO_LOTE = 1000
+
+
+def _fecha(fecha_hora):
+    return timezone.localtime(fecha_hora).date() if timezone.is_aware(fecha_hora) else fecha_hora.date()
+
+
+def registrar_en_resumen(bitacora, cantidad=1):
+    """Suma ``cantidad`` registros como ``bitacora`` a su fila del resumen (la crea si no existe)."""
+    from ..models import BitacoraResumenDiario
+
+    clave = {
+        'fecha': _fecha(bitacora.fecha_hora),
+        'usuario_id': bitacora.usuario_id,
+        'modulo': bitacora.modulo,
+        'tipo_accion': bitacora.tipo_accion,
+    }
+    filas = BitacoraResumenDiario.objects.filter(**clave)
+    if filas.update(total=F('total') + cantidad):
+        return
+    try:
+        with transaction.atomic():
+            BitacoraResumenDiario.objects.create(total=cantidad, **clave)
+    except IntegrityError:
+        # Otro proceso creó la fila entre el UPDATE y el INSERT
+        filas.update(total=F('total') + cantidad)
+
+
+def registrar_lote_en_resumen(bitacoras):
+    """Suma al resumen un lote de registros insertados con ``bulk_create`` (un UPDATE por fila de resumen)."""
+    grupos = {}
+    for bitacora in bitacoras:
+        clave = (_fecha(bitacora.fecha_hora), bitacora.usuario_id, bitacora.modulo, bitacora.tipo_accion)
+        primero, cantidad = grupos.get(clave, (bitacora, 0))
+        grupos[clave] = (primero, cantidad + 1)
+    for bitacora, cantidad in grupos.values():
+        registrar_en_resumen(bitacora, cantidad)
+
+
+def reconstruir_resumen_bitacora(fecha_desde=None, fecha_hasta=None, bitacora_modelo=None, resumen_modelo=None,
+                                 using='default', reportar=None):
+    """
+    Recalcula el resumen desde la bitácora con una sola consulta agrupada.
+
+    Args:
+        fecha_desde: Primer día a recalcular (opcional)
+        fecha_hasta: Último día a recalcular (opcional)
+        bitacora_modelo: Modelo Bitacora (por defecto el actual; en migraciones, el histórico)
+        resumen_modelo: Modelo BitacoraResumenDiario
+        using: Alias de la base de datos
+        reportar: Callable opcional que recibe mensajes de progreso
+
+    Returns:
+        Cantidad de filas de resumen escritas
+    """
+    if bitacora_modelo is None:
+        from ..models import Bitacora as bitacora_modelo
+    if resumen_modelo is None:
+        from ..models import BitacoraResumenDiario as resumen_modelo
+    reportar = reportar or (lambda mensaje: None)
+
+    registros = bitacora_modelo.objects.using(using).annotate(fecha=TruncDate('fecha_hora'))
+    resumen = resumen_modelo.objects.using(using)
+    if fecha_desde:
+        registros = registros.filter(fecha__gte=fecha_desde)
+        resumen = resumen.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        registros = registros.filter(fecha__lte=fecha_hasta)
+        resumen = resumen.filter(fecha__lte=fecha_hasta)
+    grupos = registros.values('fecha', 'usuario_id', 'modulo', 'tipo_accion').annotate(
+        total=Count('id')).order_by()
+
+    escritas = 0
+    with transaction.atomic(using=using):
+        borradas, _ = resumen.delete()
+        reportar(f'   {borradas:,} filas de resumen eliminadas')
+        lote = []
+        for grupo in grupos.iterator(chunk_size=TAMANO_LOTE):
+            lote.append(resumen_modelo(**grupo))
+            if len(lote) >= TAMANO_LOTE:
+                resumen_modelo.objects.using(using).bulk_create(lote)
+                escritas += len(lote)
+                lote = []
+                reportar(f'   {escritas:,} filas de resumen escritas')
+        resumen_modelo.objects.using(using).bulk_create(lote)
+        escritas += len(lote)
+    return escritas
+
+
+def estadisticas_bitacora(fecha_desde=None, fecha_hasta=None, usuario=None, tipo_accion=None, modulo=None):
+    """
+    Estadísticas del dashboard de bitácora leídas del resumen diario.
+
+    Los filtros solo aplican a ``acciones_por_tipo`` (los totales son globales, como en el dashboard).
+
+    Returns:
+        Dict con total_registros, registros_hoy, usuarios_activos y acciones_por_tipo
+    """
+    from ..models import BitacoraResumenDiario
+
+    totales = BitacoraResumenDiario.objects.aggregate(
+        total_registros=Sum('total'),
+        registros_hoy=Sum('total', filter=Q(fecha=_fecha(timezone.now()))),
+    )
+    filtradas = BitacoraResumenDiario.objects.all()
+    if fecha_desde:
+        filtradas = filtradas.filter(fecha__gte=fecha_desde)
+    if fecha_hasta:
+        filtradas = filtradas.filter(fecha__lte=fecha_hasta)
+    if usuario:
+        filtradas = filtradas.filter(usuario=usuario)
+    if tipo_accion:
+        filtradas = filtradas.filter(tipo_accion=tipo_accion)
+    if modulo:
+        filtradas = filtradas.filter(modulo=modulo)
+    return {
+        'total_registros': totales['total_registros'] or 0,
+        'registros_hoy': totales['registros_hoy'] or 0,
+        'usuarios_activos': BitacoraResumenDiario.objects.values('usuario').distinct().count(),
+        'acciones_por_tipo': list(
+            filtradas.values('tipo_accion').annotate(count=Sum('total')).filter(count__gt=0).order_by('-count')
+        ),
+    }
+
+
+def total_resumen():
+    """Total de registros según el resumen (sin recorrer la bitácora)."""
+    from ..models import BitacoraResumenDiario
+
+    return BitacoraResumenDiario.objects.aggregate(total=Sum('total'))['total'] or 0
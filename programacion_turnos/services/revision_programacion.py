@@ -0,0 +1,125 @@
+"""
+Revisión de las asignaciones de una programación, para cachear cálculos derivados.
+
+Igual que la versión de la fuerza laboral (ver fuerza_laboral.py): la revisión
+es un valor en la caché que se renueva cuando cambian las asignaciones o la
+programación, y los resultados se guardan con la revisión en la clave.
+
+Las señales de AsignacionTurno y ProgramacionHorario (signals.py) renuevan la
+revisión de los ``save``/``delete`` individuales; las escrituras masivas
+(``bulk_create``/``bulk_update``/``update``) deben llamar a
+``invalidar_programacion``. Los procesos que guardan muchas filas una por una
+pueden usar ``agrupar_invalidaciones`` para renovar una sola vez al final.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import transaction
+
+_CLAVE_REVISION = 'programacion:revision:{programacion}'
+_agrupadas = threading.local()
+
+
+def _id(valor):
+    return getattr(valor, 'pk', valor)
+
+
+def _clave(programacion):
+    return _CLAVE_REVISION.format(programacion=_id(programacion))
+
+
+def revisiones_programacion(programaciones):
+    """
+    Revisión vigente de cada programación (se crea la que no exista).
+
+    Returns:
+        Dict id de programación -> revisión
+    """
+    claves = {_clave(programacion): _id(programacion) for programacion in programaciones}
+    encontradas = cache.get_many(claves)
+    faltantes = {clave: time.time_ns() for clave in claves if clave not in encontradas}
+    if faltantes:
+        for clave, valor in faltantes.items():
+            # add: si otro proceso la creó primero se respeta la suya
+            cache.add(clave, valor, timeout=None)
+        encontradas.update(cache.get_many(faltantes))
+    return {claves[clave]: revision for clave, revision in encontradas.items()}
+
+
+def revision_programacion(programacion):
+    return revisiones_programacion([programacion])[_id(programacion)]
+
+
+def _renovar(ids):
+    if ids:
+        cache.set_many({_clave(programacion_id): time.time_ns() for programacion_id in ids}, timeout=None)
+
+
+def _al_confirmar():
+    # Se registra en cada llamada (los de un savepoint deshecho se descartan), pero
+    # solo el primero que se ejecute renueva: los demás encuentran el registro vacío
+    renovadas = getattr(_agrupadas, 'transaccion', None)
+    _agrupadas.transaccion = None
+    _renovar(renovadas)
+
+
+def descartar_pendientes():
+    """
+    Olvida las renovaciones pendientes de una transacción que se deshizo.
+
+    Django no avisa de los rollbacks: se llama fuera de todo bloque atómico (al
+    empezar cada petición, ver signals.py; al salir de ``agrupar_invalidaciones``;
+    en cada invalidación sin transacción) y tras deshacer un bloque a propósito.
+    """
+    _agrupadas.transaccion = None
+
+
+def _descartar_fuera_de_transaccion():
+    if not transaction.get_connection().in_atomic_block:
+        descartar_pendientes()
+
+
+def invalidar_programacion(*programaciones):
+    """
+    Renueva la revisión de las programaciones indicadas (de inmediato y al confirmar la transacción).
+
+    Dentro de una transacción cada programación se renueva de inmediato solo la
+    primera vez, y todas juntas una sola vez al confirmar (un solo ``set_many``
+    aunque se guarden miles de asignaciones). Dentro de ``agrupar_invalidaciones``
+    solo se acumulan y se renuevan al salir del bloque.
+    """
+    ids = {_id(programacion) for programacion in programaciones if programacion is not None}
+    pendientes = getattr(_agrupadas, 'ids', None)
+    if pendientes is not None:
+        pendientes.update(ids)
+        return
+    if not ids:
+        return
+    if not transaction.get_connection().in_atomic_block:
+        descartar_pendientes()
+        _renovar(ids)
+        return
+    renovadas = getattr(_agrupadas, 'transaccion', None)
+    if renovadas is None:
+        renovadas = _agrupadas.transaccion = set()
+    transaction.on_commit(_al_confirmar)
+    nuevas = ids - renovadas
+    renovadas.update(nuevas)
+    _renovar(nuevas)
+
+
+@contextmanager
+def agrupar_invalidaciones():
+    """Acumula las invalidaciones del bloque y renueva cada programación una sola vez al salir."""
+    if getattr(_agrupadas, 'ids', None) is not None:
+        yield
+        return
+    _agrupadas.ids = set()
+    try:
+        yield
+    finally:
+        ids, _agrupadas.ids = _agrupadas.ids, None
+        _descartar_fuera_de_transaccion()
+        invalidar_programacion(*ids)
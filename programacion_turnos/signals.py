@@ -7,4 +7,79 @@ from .auto_bitacora import registrar_todos_los_modelos
 # Registrar automáticamente todos los modelos del sistema
 print("🚀 Iniciando registro automático de bitácora...")
 modelos_registrados = registrar_todos_los_modelos()
-print(f"✅ Sistema de bitácora automática activado para {len(modelos_registrados)} modelos") 
\ No newline at end of file
+print(f"✅ Sistema de bitácora automática activado para {len(modelos_registrados)} modelos") 
+
+# ========== VERSIÓN DE LA FUERZA LABORAL POR CENTRO ==========
+
+from usuarios.models import PeriodoLaboral, Tercero
+from .services.fuerza_laboral import invalidar_fuerza_laboral
+
+
+@receiver(pre_save, sender=Tercero)
+def capturar_centro_anterior(sender, instance, **kwargs):
+    # Si el tercero cambia de centro también cambia la fuerza laboral del centro anterior
+    instance._centro_anterior_id = (
+        Tercero.all_objects.filter(pk=instance.pk).values_list('centro_operativo_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Tercero)
+@receiver(post_delete, sender=Tercero)
+def invalidar_por_tercero(sender, instance, **kwargs):
+    invalidar_fuerza_laboral(instance.centro_operativo_id, getattr(instance, '_centro_anterior_id', None))
+
+
+@receiver(post_save, sender=PeriodoLaboral)
+@receiver(post_delete, sender=PeriodoLaboral)
+def invalidar_por_periodo(sender, instance, **kwargs):
+    invalidar_fuerza_laboral(instance.centro_operativo_id)
+
+
+# ========== REVISIÓN DE LAS ASIGNACIONES POR PROGRAMACIÓN ==========
+
+from django.core.signals import request_started
+from django.db import connection
+from .models import AsignacionTurno, ProgramacionHorario
+from .services.revision_programacion import descartar_pendientes, invalidar_programacion
+
+
+@receiver(post_save, sender=AsignacionTurno)
+@receiver(post_delete, sender=AsignacionTurno)
+def invalidar_por_asignacion(sender, instance, **kwargs):
+    invalidar_programacion(instance.programacion_id)
+
+
+@receiver(post_save, sender=ProgramacionHorario)
+@receiver(post_delete, sender=ProgramacionHorario)
+def invalidar_por_programacion(sender, instance, **kwargs):
+    invalidar_programacion(instance.pk)
+
+
+@receiver(request_started)
+def descartar_invalidaciones_pendientes(sender, **kwargs):
+    # Con ATOMIC_REQUESTS una petición anterior que falló deja su registro sin confirmar
+    if not connection.in_atomic_block:
+        descartar_pendientes()
+
+
+# ========== RESUMEN DIARIO DE LA BITÁCORA ==========
+
+from .services.resumen_bitacora import registrar_en_resumen
+
+
+@receiver(post_save, sender=Bitacora)
+def sumar_al_resumen(sender, instance, created, **kwargs):
+    if created:
+        registrar_en_resumen(instance)
+
+
+# ========== ÍNDICE DE BÚSQUEDA DE LA BITÁCORA ==========
+
+from .services.indice_bitacora import indexar_bitacoras
+
+
+@receiver(post_save, sender=Bitacora)
+def indexar_registro(sender, instance, created, **kwargs):
+    if created:
+        indexar_bitacoras([instance])
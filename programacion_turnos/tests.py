@@ -1,3 +1,940 @@
-from django.test import TestCase
+import contextlib
+import csv
+import io
+import json
+import tempfile
+from datetime import date, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from horas_sistema.streaming import ListadoStreamingMixin
+from usuarios.models import CodigoTurno, PeriodoLaboral, Tercero, Usuario
+from .admin import PaginadorBitacora
+from .benchmarks import SuiteBenchmarks, comparar
+from .forms import ProgramacionHorarioForm
+from .models import AsignacionTurno, Bitacora, BitacoraResumenDiario, BitacoraToken, ProgramacionHorario
+from .planes_consulta import verificar_planes
+from . import presupuesto_consultas
+from .presupuesto_consultas import Caso
+from .services.dataset_sintetico import GeneradorDataset, parametros_para
+from .serializers import generar_asignaciones
+from .utils import cambio_letra_bitacora, registrar_bitacora, registrar_bitacora_lote
+from .services.archivo_bitacora import (CAMPOS_ARCHIVO, _agregar, archivar_bitacora, leer_mes, meses_archivados,
+                                        paginar_bitacora, ruta_mes, total_archivado)
+from .services.cobertura import calcular_cobertura
+from .services.conflictos_turnos import detectar_conflictos, preflight_conflictos
+from .services.disponibilidad_terceros import resolver_disponibilidad
+from .services.exportacion_bitacora import filas_exportacion
+from .services.extension_programacion import extender_programacion
+from .services.fuerza_laboral import diagnostico_fuerza_laboral
+from .services.historial_objeto import historial_objeto, resolver_modelo
+from .services.indice_bitacora import filtrar_busqueda, reindexar_bitacora
+from .services.malla_matrix import MallaMatrix, PerfilesTurno
+from .services.paginacion import ANTERIOR, contar_estimado, paginar_keyset, recorrer_keyset
+from .services.resumen_bitacora import estadisticas_bitacora, reconstruir_resumen_bitacora
+from .services.reglas_laborales import (
+    REGLA_DESCANSO_ENTRE_TURNOS, REGLA_DIA_DESCANSO, REGLA_HORAS_VENTANA, validar_malla, violaciones_nuevas,
+)
+from .services.revision_programacion import descartar_pendientes
+
+
+class DatasetTestCase(TestCase):
+    """TestCase con un dataset sintético pequeño, generado una vez por clase con los parámetros de ``dataset``."""
+    dataset = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        GeneradorDataset(parametros_para('pequena', **cls.dataset)).generar()
+
+    def setUp(self):
+        # Cada prueba corre en un bloque atómico que se deshace al terminar
+        descartar_pendientes()
+
+
+class SuiteBenchmarksTests(DatasetTestCase):
+    """La suite de benchmarks corre completa sobre un dataset mínimo."""
+    dataset = dict(terceros=30, dias=30, bitacoras=300)
+
+    def test_suite_registra_metricas_de_todos_los_casos(self):
+        datos = SuiteBenchmarks(repeticiones=1, tamanos_generacion=[(5, 10)], tamanos_edicion=[5]).ejecutar()
+
+        casos = set(datos['resultados'])
+        self.assertEqual(casos, {
+            'generar_asignaciones/5x10', 'extender/30d', 'malla_turnos', 'nomina_view',
+            'editar_malla_api/5', 'intercambiar_terceros_api', 'bitacora_dashboard',
+            'bitacora_dashboard/filtrado',
+        })
+        for nombre, resultado in datos['resultados'].items():
+            self.assertGreater(resultado['consultas'], 0, nombre)
+            self.assertIn(resultado['estado'], (None, 200, 302), nombre)
+
+    def test_comparar_detecta_regresion_sobre_el_umbral(self):
+        baseline = {'resultados': {'caso': {'tiempo_ms': 100.0, 'consultas': 10, 'memoria_pico_kib': 500.0}}}
+        actual = {'resultados': {'caso': {'tiempo_ms': 120.0, 'consultas': 20, 'memoria_pico_kib': 510.0}}}
+
+        regresiones = comparar(actual, baseline, umbral=0.25)
+
+        self.assertEqual([(r['caso'], r['metrica']) for r in regresiones], [('caso', 'consultas')])
+
+
+class PlanesConsultaTests(DatasetTestCase):
+    """Las consultas clave usan índices (EXPLAIN sin recorridos completos)."""
+    dataset = dict(terceros=40, dias=30, bitacoras=10)
+
+    def test_consultas_clave_no_recorren_tablas_completas(self):
+        resultados = verificar_planes()
+
+        self.assertTrue(resultados)
+        for resultado in resultados:
+            with self.subTest(consulta=resultado.nombre):
+                self.assertFalse(resultado.recorridos_completos, [p.detalle for p in resultado.pasos])
+
+
+class DisponibilidadTercerosTests(DatasetTestCase):
+    """Los periodos laborales definen qué días recibe turnos cada tercero."""
+    dataset = dict(terceros=12, centros=1, cargos=1, dias=14, dias_por_programacion=14, bitacoras=0)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.programacion = ProgramacionHorario.objects.order_by('pk').first()
+        cls.terceros = list(
+            AsignacionTurno.objects.filter(programacion=cls.programacion)
+            .order_by('tercero_id').values_list('tercero_id', flat=True).distinct()[:3]
+        )
+
+    def _periodo(self, tercero_id, desde, hasta=None):
+        PeriodoLaboral.objects.create(
+            tercero_id=tercero_id, centro_operativo_id=self.programacion.centro_operativo_id,
+            cargo_predefinido_id=self.programacion.cargo_predefinido_id, fecha_inicio=desde, fecha_fin=hasta,
+        )
+
+    def test_mapa_de_bits_respeta_ingresos_y_retiros(self):
+        inicio = self.programacion.fecha_fin + timedelta(days=1)
+        retirado, nuevo, sin_periodos = self.terceros
+        self._periodo(retirado, inicio - timedelta(days=30), inicio + timedelta(days=2))
+        self._periodo(nuevo, inicio + timedelta(days=5))
+
+        with self.assertNumQueries(1):
+            disponibilidad = resolver_disponibilidad(
+                self.programacion.centro_operativo_id, inicio, inicio + timedelta(days=9),
+                self.programacion.cargo_predefinido_id,
+            )
+
+        self.assertEqual(disponibilidad.mascaras[retirado], 0b0000000111)
+        self.assertEqual(disponibilidad.mascaras[nuevo], 0b1111100000)
+        self.assertEqual(disponibilidad.mascaras[sin_periodos], 0b1111111111)
+        self.assertNotIn(retirado, disponibilidad.activos_en(inicio + timedelta(days=3)))
+
+    def test_tercero_inactivo_cuenta_los_dias_de_su_periodo(self):
+        inicio = self.programacion.fecha_fin + timedelta(days=1)
+        retirado, _, sin_periodos = self.terceros
+        self._periodo(retirado, inicio - timedelta(days=30), inicio + timedelta(days=2))
+        Tercero.all_objects.filter(pk__in=[retirado, sin_periodos]).update(estado_tercero=0)
+
+        disponibilidad = resolver_disponibilidad(
+            self.programacion.centro_operativo_id, inicio, inicio + timedelta(days=9),
+            self.programacion.cargo_predefinido_id,
+        )
+
+        self.assertEqual(disponibilidad.mascaras[retirado], 0b0000000111)
+        self.assertNotIn(sin_periodos, disponibilidad.mascaras)
+
+    @override_settings(CACHES=presupuesto_consultas.CACHES_EN_MEMORIA)
+    def test_fuerza_laboral_en_cache_hasta_que_cambia_el_centro(self):
+        inicio, fin = self.programacion.fecha_inicio, self.programacion.fecha_fin
+        primera = self.programacion.disponibilidad_terceros(inicio, fin)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.programacion.disponibilidad_terceros(inicio, fin), primera)
+
+        self._periodo(self.terceros[0], inicio, inicio)
+        nueva = self.programacion.disponibilidad_terceros(inicio, fin)
+        self.assertEqual(nueva.mascaras[self.terceros[0]], 1)
+
+    def test_diagnostico_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            diagnostico = diagnostico_fuerza_laboral(
+                self.programacion.centro_operativo_id, self.programacion.cargo_predefinido_id)
+
+        # Un solo centro y un solo cargo: los activos del centro son los activos con el cargo
+        self.assertEqual(diagnostico['total_centro'], 12)
+        self.assertEqual(diagnostico['con_cargo'], 12)
+        self.assertEqual(diagnostico['activos_centro'], diagnostico['cargo_en_empresa'])
+
+    def test_extension_solo_asigna_dias_vinculados(self):
+        inicio = self.programacion.fecha_fin + timedelta(days=1)
+        retirado = self.terceros[0]
+        self._periodo(retirado, inicio - timedelta(days=30), inicio + timedelta(days=1))
+
+        extender_programacion(self.programacion, inicio, inicio + timedelta(days=6))
+
+        dias = AsignacionTurno.objects.filter(
+            programacion=self.programacion, tercero_id=retirado, dia__gte=inicio).values_list('dia', flat=True)
+        self.assertEqual(sorted(dias), [inicio, inicio + timedelta(days=1)])
+        self.programacion.refresh_from_db()
+        self.assertEqual(self.programacion.fecha_fin, inicio + timedelta(days=6))
+
+
+class ConflictosTurnosTests(DatasetTestCase):
+    """Un tercero no queda con turno en dos programaciones activas el mismo día."""
+    dataset = dict(terceros=8, centros=1, cargos=1, dias=10, dias_por_programacion=10, bitacoras=0)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.original = ProgramacionHorario.objects.order_by('pk').first()
+        cls.tercero = AsignacionTurno.objects.filter(programacion=cls.original).values_list('tercero_id', flat=True).first()
+        cls.dia = cls.original.fecha_inicio
+        # Segunda programación del mismo centro con un cruce en un solo día
+        cls.cruzada = ProgramacionHorario.objects.create(
+            nombre='Cruzada', centro_operativo_id=cls.original.centro_operativo_id,
+            modelo_turno_id=cls.original.modelo_turno_id, cargo_predefinido_id=cls.original.cargo_predefinido_id,
+            fecha_inicio=cls.dia, fecha_fin=cls.dia,
+        )
+        AsignacionTurno.objects.bulk_create([AsignacionTurno(
+            programacion=cls.cruzada, tercero_id=cls.tercero, dia=cls.dia, letra_turno='X', fila=0, columna=0)])
+
+    def test_detecta_el_cruce_en_una_consulta_agrupada(self):
+        with self.assertNumQueries(2):
+            conflictos = detectar_conflictos(self.original.centro_operativo_id)
+
+        self.assertEqual([(c.tercero_id, c.dia) for c in conflictos], [(self.tercero, self.dia)])
+        self.assertEqual(sorted(conflictos[0].programaciones), [self.original.pk, self.cruzada.pk])
+
+    def test_programacion_inactiva_no_cuenta(self):
+        ProgramacionHorario.all_objects.filter(pk=self.cruzada.pk).update(activo=False)
+
+        self.assertEqual(detectar_conflictos(), [])
+
+    def test_preflight_reporta_los_dias_ocupados(self):
+        fin = self.dia + timedelta(days=2)
+        conflictos = preflight_conflictos(
+            self.original.centro_operativo_id, self.original.cargo_predefinido_id, self.dia, fin,
+            excluir_programacion=self.cruzada.pk,
+        )
+
+        # Todos los elegibles tienen turno en la programación original; el tercero cruzado no se excluye
+        self.assertIn(self.tercero, conflictos)
+        self.assertEqual(conflictos[self.tercero], [self.dia, self.dia + timedelta(days=1), fin])
+
+    def test_formulario_advierte_sin_bloquear(self):
+        programacion = self.original
+        form = ProgramacionHorarioForm(data={
+            'nombre': 'Nueva', 'centro_operativo': programacion.centro_operativo_id,
+            'modelo_turno': programacion.modelo_turno_id, 'cargo_predefinido': programacion.cargo_predefinido_id,
+            'fecha_inicio': self.dia, 'fecha_fin': self.dia + timedelta(days=2), 'activo': True,
+        })
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertIn('ya tienen turno en otra programación activa', form.advertencia_conflictos)
+
+    def test_generacion_omite_los_dias_ocupados(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generar_asignaciones(self.cruzada)
+
+        # El único día de la programación cruzada ya lo ocupa la original para todos sus terceros
+        self.assertFalse(AsignacionTurno.objects.filter(programacion=self.cruzada).exists())
+
+    def test_generacion_registra_la_bitacora_por_lote(self):
+        original = self.original
+        desde = Bitacora.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            generar_asignaciones(original)
+
+        creadas = set(AsignacionTurno.objects.filter(programacion=original).values_list('pk', flat=True))
+        self.assertTrue(creadas)
+        registros = Bitacora.objects.filter(id__gt=desde, modelo_afectado='asignacionturno', tipo_accion='CREAR')
+        self.assertEqual(set(registros.values_list('objeto_id', flat=True)), creadas)
+        self.assertEqual(registros.count(), len(creadas))
+        self.assertFalse(registros.filter(tokens__isnull=True).exists())
+        self.assertEqual(BitacoraResumenDiario.objects.aggregate(total=Sum('total'))['total'], Bitacora.objects.count())
+
+
+class ReglasLaboralesTests(TestCase):
+    """Reglas sobre la malla en memoria, con perfiles fijos (sin consultas)."""
+
+    inicio = date(2025, 1, 6)
+
+    def _malla(self, letras):
+        malla = MallaMatrix(self.inicio, len(letras), letras=['', 'D', 'N', 'X'])
+        for i, letra in enumerate(letras):
+            malla.asignar(1, self.inicio + timedelta(days=i), letra)
+        return malla
+
+    def _perfiles(self):
+        # D: 07:00-19:00, N: 19:00-07:00 (día siguiente), X: descanso
+        return PerfilesTurno([0.0, 12.0, 12.0, 0.0], [0, 420, 1140, 0], [0, 1140, 1860, 0])
+
+    def _reglas(self, letras):
+        return sorted((v.regla, (v.fecha - self.inicio).days) for v in validar_malla(self._malla(letras), self._perfiles()))
+
+    def test_malla_valida(self):
+        self.assertEqual(self._reglas(['D', 'D', 'D', 'D', 'X', 'X', 'X', 'D']), [])
+
+    def test_horas_y_descanso_semanal_por_ventana(self):
+        self.assertEqual(
+            self._reglas(['D', 'D', 'D', 'D', 'D', 'X', 'X', 'D']),
+            [(REGLA_HORAS_VENTANA, 6), (REGLA_HORAS_VENTANA, 7)],
+        )
+        self.assertIn((REGLA_DIA_DESCANSO, 6), self._reglas(['D'] * 3 + ['N'] * 4))
+
+    def test_descanso_minimo_entre_turnos(self):
+        # N termina a las 07:00 y D empieza a las 07:00 del mismo día: 0 h de descanso
+        self.assertEqual(self._reglas(['N', 'D', 'X']), [(REGLA_DESCANSO_ENTRE_TURNOS, 1)])
+
+    def test_solo_cuentan_las_violaciones_nuevas(self):
+        CodigoTurno.objects.bulk_create([
+            CodigoTurno(letra_turno='D', hora_inicio=time(7), hora_final=time(19), duracion_total=12),
+            CodigoTurno(letra_turno='N', hora_inicio=time(19), hora_final=time(7), duracion_total=12),
+            CodigoTurno(letra_turno='X', tipo='D', duracion_total=0),
+        ])
+        # La ventana que termina el día 6 ya excede las horas; el cambio agrega un turno
+        # sin descanso tras la noche y excede también la ventana que termina el día 7
+        malla = self._malla(['D', 'D', 'D', 'D', 'N', 'X', 'X', 'X'])
+        cambios = [(1, self.inicio + timedelta(days=5), 'D')]
+        with self.assertNumQueries(1):
+            nuevas = violaciones_nuevas(malla, cambios)
+
+        self.assertEqual(
+            sorted((v.regla, (v.fecha - self.inicio).days) for v in nuevas),
+            [(REGLA_DESCANSO_ENTRE_TURNOS, 5), (REGLA_HORAS_VENTANA, 7)],
+        )
+        self.assertEqual(malla.letra(1, self.inicio + timedelta(days=5)), 'X')
+
+
+class CoberturaTests(DatasetTestCase):
+    """Cobertura del centro frente a la promesa de valor, cacheada por revisión de la programación."""
+    dataset = dict(terceros=8, centros=1, cargos=1, dias=10, dias_por_programacion=10, bitacoras=0)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.programacion = ProgramacionHorario.objects.order_by('pk').first()
+        cls.centro = cls.programacion.centro_operativo_id
+        trabajadas = set(CodigoTurno.objects.filter(duracion_total__gt=0).values_list('letra_turno', flat=True))
+        cls.asignacion = AsignacionTurno.objects.filter(
+            programacion=cls.programacion, letra_turno__in=trabajadas).order_by('dia', 'tercero_id').first()
+        cls.esperadas = {}
+        for dia, letra in AsignacionTurno.objects.filter(
+                programacion__centro_operativo=cls.centro).values_list('dia', 'letra_turno'):
+            if letra in trabajadas:
+                cls.esperadas[dia] = cls.esperadas.get(dia, 0) + 1
+
+    def _cobertura(self):
+        return calcular_cobertura(self.centro, self.programacion.fecha_inicio, self.programacion.fecha_fin)
+
+    def test_personas_en_letras_trabajadas_por_dia(self):
+        cobertura = self._cobertura()
+
+        self.assertEqual({d.dia: d.personas for d in cobertura.dias if d.personas}, self.esperadas)
+        for dia in cobertura.dias:
+            self.assertEqual(len(dia.por_hora), 24)
+            self.assertEqual(dia.deficit_dia, max(cobertura.promesa_valor - dia.personas, 0))
+
+    @override_settings(CACHES=presupuesto_consultas.CACHES_EN_MEMORIA)
+    def test_conteos_en_cache_hasta_que_cambia_la_malla(self):
+        self._cobertura()
+        # Centro, programaciones y perfiles de las letras: la consulta agrupada sale de la caché
+        with self.assertNumQueries(3):
+            self._cobertura()
+
+        self.asignacion.letra_turno = 'X'
+        self.asignacion.save()
+        dias = {d.dia: d.personas for d in self._cobertura().dias}
+        self.assertEqual(dias[self.asignacion.dia], self.esperadas[self.asignacion.dia] - 1)
+
+    def test_una_renovacion_por_transaccion(self):
+        asignaciones = AsignacionTurno.objects.filter(programacion=self.programacion).order_by('pk')[:5]
+        with mock.patch('programacion_turnos.services.revision_programacion.cache') as cache:
+            with self.captureOnCommitCallbacks(execute=True):
+                for asignacion in asignaciones:
+                    asignacion.save()
+                # Solo la primera vez de la programación en la transacción
+                self.assertEqual(cache.set_many.call_count, 1)
+
+        # Y una vez más al confirmar, para todas juntas
+        self.assertEqual(cache.set_many.call_count, 2)
+
+    def test_savepoint_deshecho_no_pierde_la_renovacion_al_confirmar(self):
+        asignaciones = list(AsignacionTurno.objects.filter(programacion=self.programacion).order_by('pk')[:2])
+        with mock.patch('programacion_turnos.services.revision_programacion.cache') as cache:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        asignaciones[0].save()
+                        raise ValueError
+                except ValueError:
+                    pass
+                asignaciones[1].save()
+                self.assertEqual(cache.set_many.call_count, 1)
+
+        self.assertEqual(cache.set_many.call_count, 2)
+
+
+class ResumenBitacoraTests(DatasetTestCase):
+    """El resumen diario coincide con la bitácora al crecer y al reconstruirse."""
+    dataset = dict(terceros=4, centros=1, cargos=1, dias=5, dias_por_programacion=5, bitacoras=300)
+
+    def _esperado(self):
+        return {
+            (g['fecha_hora__date'], g['usuario'], g['modulo'], g['tipo_accion']): g['total']
+            for g in Bitacora.objects.values('fecha_hora__date', 'usuario', 'modulo', 'tipo_accion').annotate(
+                total=Count('id'))
+        }
+
+    def _resumen(self):
+        return {
+            (r.fecha, r.usuario_id, r.modulo, r.tipo_accion): r.total for r in BitacoraResumenDiario.objects.all()
+        }
+
+    def test_cada_registro_nuevo_suma_al_resumen(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            registrar_bitacora(None, 'CONSULTAR', 'turnos', 'prueba', descripcion='uno')
+            registrar_bitacora(None, 'CONSULTAR', 'turnos', 'prueba', descripcion='dos')
+
+        self.assertEqual(self._resumen(), self._esperado())
+
+    def test_lote_registra_cada_objeto_con_resumen_e_indice(self):
+        asignaciones = list(AsignacionTurno.objects.order_by('pk')[:3])
+        registrar_bitacora_lote(None, 'EDITAR', 'programacion', 'asignacionturno', [
+            cambio_letra_bitacora(asignacion, 'Z', 'Edición de malla') for asignacion in asignaciones
+        ])
+
+        nuevas = Bitacora.objects.filter(descripcion='Edición de malla')
+        self.assertEqual(sorted(nuevas.values_list('objeto_id', flat=True)), [a.pk for a in asignaciones])
+        self.assertEqual(set(nuevas.values_list('modelo_afectado', flat=True)), {'asignacionturno'})
+        self.assertEqual(self._resumen(), self._esperado())
+        self.assertEqual(BitacoraToken.objects.filter(bitacora__in=nuevas, token='malla').count(), 3)
+
+    def test_reconstruir_recalcula_desde_la_tabla(self):
+        BitacoraResumenDiario.objects.update(total=0)
+        reconstruir_resumen_bitacora()
+
+        self.assertEqual(self._resumen(), self._esperado())
+
+    def test_estadisticas_sin_recorrer_la_bitacora(self):
+        with self.assertNumQueries(3):
+            stats = estadisticas_bitacora(tipo_accion='EDITAR')
+
+        self.assertEqual(stats['total_registros'], Bitacora.objects.count())
+        self.assertEqual(stats['usuarios_activos'], Bitacora.objects.values('usuario').distinct().count())
+        self.assertEqual(stats['acciones_por_tipo'],
+                         [{'tipo_accion': 'EDITAR', 'count': Bitacora.objects.filter(tipo_accion='EDITAR').count()}])
+
+
+class PaginacionKeysetTests(DatasetTestCase):
+    """El cursor recorre la bitácora filtrada completa y una página profunda cuesta una consulta."""
+    dataset = dict(terceros=4, centros=1, cargos=1, dias=5, dias_por_programacion=5, bitacoras=400)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.filtradas = Bitacora.objects.filter(tipo_accion='EDITAR')
+        cls.esperadas = list(cls.filtradas.order_by('-fecha_hora', '-id').values_list('id', flat=True))
+
+    def test_avanza_y_retrocede_por_todas_las_paginas(self):
+        paginas, cursor = [], None
+        while True:
+            pagina = paginar_keyset(self.filtradas, cursor=cursor, tamano=25)
+            paginas.append([b.id for b in pagina])
+            if not pagina.has_next:
+                break
+            cursor = pagina.cursor_siguiente
+        self.assertEqual([i for ids in paginas for i in ids], self.esperadas)
+        self.assertFalse(paginar_keyset(self.filtradas, tamano=25).has_previous)
+
+        anterior = paginar_keyset(self.filtradas, cursor=pagina.cursor_anterior, direccion=ANTERIOR, tamano=25)
+        self.assertEqual([b.id for b in anterior], paginas[-2])
+
+    def test_pagina_profunda_en_una_consulta(self):
+        cursor = paginar_keyset(self.filtradas, tamano=len(self.esperadas) - 10).cursor_siguiente
+        with self.assertNumQueries(1):
+            pagina = paginar_keyset(self.filtradas, cursor=cursor, tamano=25)
+
+        self.assertEqual([b.id for b in pagina], self.esperadas[-10:])
+        self.assertFalse(pagina.has_next)
+
+    def test_cursor_invalido_vuelve_a_la_primera_pagina(self):
+        pagina = paginar_keyset(self.filtradas, cursor='no-es-un-cursor', tamano=5)
+
+        self.assertEqual([b.id for b in pagina], self.esperadas[:5])
+
+
+class IndiceBitacoraTests(DatasetTestCase):
+    """La búsqueda por el índice de términos encuentra lo mismo que los icontains que reemplaza."""
+    dataset = dict(terceros=4, centros=1, cargos=1, dias=5, dias_por_programacion=5, bitacoras=300)
+
+    def _buscar(self, texto):
+        return set(filtrar_busqueda(Bitacora.objects.all(), texto).values_list('id', flat=True))
+
+    def test_busqueda_sin_tildes_ni_mayusculas_y_por_prefijo(self):
+        esperadas = set(Bitacora.objects.filter(
+            descripcion__icontains='Editar ProgramacionHorario').values_list('id', flat=True))
+
+        self.assertTrue(esperadas)
+        self.assertEqual(self._buscar('EDITAR programación'), esperadas)
+
+    def test_busqueda_por_ip(self):
+        ip = Bitacora.objects.exclude(ip_address=None).values_list('ip_address', flat=True).first()
+        prefijo = ip.rsplit('.', 1)[0]
+
+        self.assertEqual(self._buscar(ip), set(Bitacora.objects.filter(ip_address=ip).values_list('id', flat=True)))
+        self.assertEqual(self._buscar(prefijo),
+                         set(Bitacora.objects.filter(ip_address__startswith=prefijo).values_list('id', flat=True)))
+
+    def test_registro_nuevo_indexado_y_reindexar(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            registrar_bitacora(None, 'EDITAR', 'turnos', 'AsignacionTurno', descripcion='Cambio de letra',
+                               valores_nuevos={'letra_turno': 'Nocturno'})
+        nuevo = Bitacora.objects.latest('id')
+
+        self.assertEqual(self._buscar('cambio nocturno'), {nuevo.id})
+        esperado = set(BitacoraToken.objects.values_list('token', 'bitacora_id'))
+        BitacoraToken.objects.all().delete()
+        reindexar_bitacora()
+        self.assertEqual(set(BitacoraToken.objects.values_list('token', 'bitacora_id')), esperado)
+        nuevo.delete()
+        self.assertFalse(BitacoraToken.objects.filter(bitacora_id=nuevo.id).exists())
+
+
+class HistorialObjetoTests(DatasetTestCase):
+    """El historial de un objeto trae sus registros (y los de sus hijos) en orden, por páginas."""
+    dataset = dict(terceros=4, centros=2, cargos=1, dias=5, dias_por_programacion=5, bitacoras=300)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.programacion = ProgramacionHorario.objects.order_by('pk').last()
+        cls.asignacion = AsignacionTurno.objects.filter(programacion=cls.programacion).order_by('pk').last()
+        # Asignación de otra programación cuyo id coincide con el de esta programación
+        cls.ajena = AsignacionTurno.objects.get(pk=cls.programacion.pk)
+        with contextlib.redirect_stdout(io.StringIO()):
+            registrar_bitacora(None, 'EDITAR', 'programacion', 'asignacionturno', objeto_id=cls.asignacion.pk,
+                               descripcion='Cambio de letra')
+            registrar_bitacora(None, 'EDITAR', 'programacion', 'asignacionturno', objeto_id=cls.ajena.pk,
+                               descripcion='Cambio de letra ajeno')
+            registrar_bitacora(None, 'EDITAR', 'programacion', 'ProgramacionHorario', objeto_id=cls.asignacion.pk,
+                               descripcion='Programación con el id de la asignación')
+
+    def _recorrer(self, modelo, objeto_id, **kwargs):
+        ids, cursor = [], None
+        while True:
+            pagina = historial_objeto(modelo, objeto_id, cursor=cursor, tamano=7, **kwargs)
+            ids.extend(registro.id for registro in pagina)
+            if not pagina.has_next:
+                return ids
+            cursor = pagina.cursor_siguiente
+
+    def test_programacion_incluye_sus_asignaciones(self):
+        self.assertNotEqual(self.ajena.programacion_id, self.programacion.pk)
+        asignaciones = AsignacionTurno.objects.filter(programacion=self.programacion).values_list('pk', flat=True)
+        esperadas = Bitacora.objects.filter(
+            Q(modelo_afectado__in=['programacionhorario', 'ProgramacionHorario'], objeto_id=self.programacion.pk) |
+            Q(modelo_afectado__in=['asignacionturno', 'AsignacionTurno'], objeto_id__in=list(asignaciones))
+        ).order_by('-fecha_hora', '-id').values_list('id', flat=True)
+
+        self.assertGreater(len(esperadas), 7)
+        recorridas = self._recorrer(ProgramacionHorario, self.programacion.pk)
+        self.assertEqual(recorridas, list(esperadas))
+        self.assertFalse(Bitacora.objects.filter(id__in=recorridas, descripcion='Cambio de letra ajeno').exists())
+        self.assertEqual(
+            self._recorrer(ProgramacionHorario, self.programacion.pk, incluir_hijos=False),
+            list(Bitacora.objects.filter(modelo_afectado__in=['programacionhorario', 'ProgramacionHorario'],
+                                         objeto_id=self.programacion.pk)
+                 .order_by('-fecha_hora', '-id').values_list('id', flat=True)),
+        )
+
+    def test_programacion_incluye_asignaciones_eliminadas(self):
+        asignacion = self.asignacion
+        with contextlib.redirect_stdout(io.StringIO()):
+            registrar_bitacora_lote(None, 'EDITAR', 'programacion', 'asignacionturno',
+                                    [cambio_letra_bitacora(asignacion, asignacion.letra_turno, 'Edición de malla')])
+            asignacion_id = asignacion.pk
+            asignacion.delete()
+        registros = Bitacora.objects.filter(modelo_afectado='asignacionturno', objeto_id=asignacion_id)
+        edicion = registros.get(descripcion='Edición de malla')
+        eliminacion = registros.get(tipo_accion='ELIMINAR')
+
+        recorridas = self._recorrer(ProgramacionHorario, self.programacion.pk)
+        self.assertIn(edicion.id, recorridas)
+        self.assertIn(eliminacion.id, recorridas)
+
+    def test_modelo_por_nombre_y_pagina_en_una_consulta(self):
+        self.assertIs(resolver_modelo('AsignacionTurno'), AsignacionTurno)
+        self.assertIs(resolver_modelo('programacion_turnos.asignacionturno'), AsignacionTurno)
+        self.assertIsNone(resolver_modelo('noexiste'))
+        with self.assertNumQueries(1):
+            pagina = historial_objeto(AsignacionTurno, self.asignacion.pk)
+
+        descripciones = [registro.descripcion for registro in pagina]
+        self.assertEqual(descripciones[:1], ['Cambio de letra'])
+        self.assertNotIn('Programación con el id de la asignación', descripciones)
+
+
+class ArchivoBitacoraTests(DatasetTestCase):
+    """Archivar mueve los registros a los archivos mensuales y el dashboard los sigue mostrando."""
+    # 70 días desde el 1 de enero: la bitácora cubre tres meses
+    dataset = dict(terceros=2, centros=1, cargos=1, dias=70, dias_por_programacion=10, bitacoras=300)
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        self.corte = Bitacora.objects.order_by('fecha_hora').values_list('fecha_hora', flat=True)[150].date()
+
+    def _ids(self, **filtros):
+        ids, cursor = [], None
+        while True:
+            # Los mismos filtros que aplica el dashboard a la tabla
+            registros = Bitacora.objects.filter(tipo_accion=filtros['tipo_accion'])
+            if filtros.get('fecha_desde'):
+                registros = registros.filter(fecha_hora__date__gte=filtros['fecha_desde'])
+            pagina = paginar_bitacora(registros, filtros, cursor=cursor, tamano=20, directorio=self.directorio)
+            ids.extend(registro.id for registro in pagina)
+            if not pagina.has_next:
+                return ids
+            cursor = pagina.cursor_siguiente
+
+    def test_archivar_por_mes_y_en_lotes(self):
+        anteriores = set(Bitacora.objects.filter(fecha_hora__date__lt=self.corte).values_list('id', flat=True))
+        archivados = archivar_bitacora(self.corte, directorio=self.directorio, lote=40)
+
+        self.assertEqual(archivados, len(anteriores))
+        self.assertFalse(Bitacora.objects.filter(fecha_hora__date__lt=self.corte).exists())
+        meses = meses_archivados(self.directorio)
+        self.assertGreater(len(meses), 1)
+        leidos = [registro for anio, mes in meses for registro in leer_mes(anio, mes, self.directorio)]
+        self.assertEqual({registro.id for registro in leidos}, anteriores)
+        self.assertTrue(all((r.fecha_hora.year, r.fecha_hora.month) in meses for r in leidos))
+
+    def test_dashboard_lee_los_meses_archivados(self):
+        desde = Bitacora.objects.order_by('fecha_hora').first().fecha_hora.date()
+        esperados = self._ids(fecha_desde=desde, tipo_accion='EDITAR')
+        sin_fechas = self._ids(tipo_accion='EDITAR')
+        archivar_bitacora(self.corte, directorio=self.directorio)
+
+        self.assertEqual(self._ids(fecha_desde=desde, tipo_accion='EDITAR'), esperados)
+        # Sin filtro de fechas solo la tabla
+        self.assertLess(len(self._ids(tipo_accion='EDITAR')), len(sin_fechas))
+
+    def test_archivado_interrumpido_no_duplica(self):
+        desde = Bitacora.objects.order_by('fecha_hora').first().fecha_hora.date()
+        esperados = self._ids(fecha_desde=desde, tipo_accion='EDITAR')
+        # Un lote escrito pero no eliminado de la tabla, y bytes de un lote escrito sin su línea de índice
+        filas = list(Bitacora.objects.order_by('fecha_hora', 'id').values(*CAMPOS_ARCHIVO)[:30])
+        dia = filas[0]['fecha_hora']
+        _agregar(dia.year, dia.month, filas, self.directorio)
+        with open(ruta_mes(dia.year, dia.month, self.directorio), 'ab') as archivo:
+            archivo.write(b'lote sin indice')
+
+        self.assertEqual(self._ids(fecha_desde=desde, tipo_accion='EDITAR'), esperados)
+        anteriores = Bitacora.objects.filter(fecha_hora__date__lt=self.corte).count()
+        self.assertEqual(archivar_bitacora(self.corte, directorio=self.directorio, lote=40), anteriores)
+        leidos = [registro.id for anio, mes in meses_archivados(self.directorio)
+                  for registro in leer_mes(anio, mes, self.directorio)]
+        self.assertEqual(len(leidos), len(set(leidos)))
+        self.assertEqual(total_archivado(self.directorio), len(leidos))
+        self.assertEqual(self._ids(fecha_desde=desde, tipo_accion='EDITAR'), esperados)
+
+    def test_paginador_del_admin_cuenta_sin_lo_archivado_y_pasado_el_tope(self):
+        total = Bitacora.objects.count()
+        with override_settings(BITACORA_ARCHIVO_DIR=self.directorio):
+            archivados = archivar_bitacora(self.corte)
+            self.assertEqual(PaginadorBitacora(Bitacora.objects.all(), 20).count, total - archivados)
+
+        editar = Bitacora.objects.filter(tipo_accion='EDITAR')
+        # Con el tope por debajo del total, el conteo acotado no alcanza: se cuenta todo
+        with mock.patch('programacion_turnos.services.paginacion.contar_estimado',
+                        lambda queryset: contar_estimado(queryset, tope=5)):
+            self.assertEqual(PaginadorBitacora(editar, 20).count, editar.count())
+
+    def test_exportacion_tras_archivado_interrumpido(self):
+        desde = Bitacora.objects.order_by('fecha_hora').first().fecha_hora.date()
+        esperados = list(Bitacora.objects.order_by('fecha_hora', 'id').values_list('id', flat=True))
+        # El primer lote queda en el archivo y también en la tabla
+        filas = list(Bitacora.objects.order_by('fecha_hora', 'id').values(*CAMPOS_ARCHIVO)[:30])
+        dia = filas[0]['fecha_hora']
+        _agregar(dia.year, dia.month, filas, self.directorio)
+
+        exportados = [fila['id'] for fila in filas_exportacion({'fecha_desde': desde}, self.directorio)]
+        self.assertEqual(exportados, esperados)
+        archivar_bitacora(self.corte, directorio=self.directorio, lote=40)
+        exportados = [fila['id'] for fila in filas_exportacion({'fecha_desde': desde}, self.directorio)]
+        self.assertEqual(exportados, esperados)
+
+
+class ExportacionBitacoraTests(DatasetTestCase):
+    """La exportación recorre por lotes todos los registros filtrados, en orden."""
+    dataset = dict(terceros=4, centros=1, cargos=1, dias=5, dias_por_programacion=5, bitacoras=300)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = Usuario.objects.create_user(username='auditor', password='x')
+
+    def test_recorrer_keyset_por_lotes(self):
+        registros = Bitacora.objects.filter(tipo_accion='EDITAR').values('id', 'fecha_hora')
+        esperados = list(registros.order_by('fecha_hora', 'id').values_list('id', flat=True))
+
+        self.assertEqual([fila['id'] for fila in recorrer_keyset(registros, tamano=7)], esperados)
+        self.assertEqual([b.id for b in recorrer_keyset(Bitacora.objects.all(), tamano=50, descendente=True)],
+                         list(Bitacora.objects.order_by('-fecha_hora', '-id').values_list('id', flat=True)))
+
+    def test_vista_envia_csv_y_jsonl_con_los_filtros(self):
+        self.client.force_login(self.usuario)
+        esperados = list(Bitacora.objects.filter(tipo_accion='EDITAR', modulo='programacion')
+                         .order_by('fecha_hora', 'id').values_list('id', flat=True))
+        filtros = {'tipo_accion': 'EDITAR', 'modulo': 'programacion'}
+
+        respuesta = self.client.get(reverse('bitacora_exportar'), {**filtros, 'formato': 'csv'})
+        self.assertTrue(respuesta.streaming)
+        filas = list(csv.DictReader(io.StringIO(b''.join(respuesta.streaming_content).decode())))
+        self.assertEqual([int(fila['id']) for fila in filas], esperados)
+
+        respuesta = self.client.get(reverse('bitacora_exportar'), {**filtros, 'formato': 'jsonl'})
+        lineas = b''.join(respuesta.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(linea)['id'] for linea in lineas], esperados)
+        self.assertEqual(self.client.get(reverse('bitacora_exportar'), {'formato': 'xlsx'}).status_code, 400)
+
+
+class ListadoAsignacionesTests(DatasetTestCase):
+    """El listado de la API recorre las asignaciones filtradas por cursor (dia, id)."""
+    client_class = APIClient
+    dataset = dict(terceros=6, centros=1, cargos=1, dias=10, dias_por_programacion=10, bitacoras=0)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = Usuario.objects.create_user(username='integracion', password='x')
+        cls.asignacion = AsignacionTurno.objects.order_by('pk').first()
+
+    def _recorrer(self, parametros, direccion='siguiente'):
+        ids, cursor = [], None
+        while True:
+            respuesta = self.client.get(reverse('asignacionturno-list'),
+                                        {**parametros, **({'cursor': cursor, 'dir': direccion} if cursor else {})})
+            self.assertEqual(respuesta.status_code, 200)
+            datos = respuesta.json()
+            ids.extend(fila['id'] for fila in datos['results'])
+            cursor = datos['cursor_siguiente']
+            if cursor is None:
+                return ids, datos
+
+    def test_filtros_y_paginas_en_orden(self):
+        self.client.force_authenticate(self.usuario)
+        desde, hasta = self.asignacion.dia + timedelta(days=2), self.asignacion.dia + timedelta(days=6)
+        esperados = list(
+            AsignacionTurno.objects.filter(tercero=self.asignacion.tercero_id, dia__range=(desde, hasta))
+            .order_by('dia', 'id').values_list('id', flat=True)
+        )
+        ids, _ = self._recorrer({'tercero': self.asignacion.tercero_id, 'desde': desde, 'hasta': hasta,
+                                 'tamano': 2})
+        self.assertEqual(ids, esperados)
+        ids, _ = self._recorrer({'programacion': self.asignacion.programacion_id, 'tamano': 7})
+        self.assertEqual(ids, list(AsignacionTurno.objects.filter(programacion=self.asignacion.programacion_id)
+                                   .order_by('dia', 'id').values_list('id', flat=True)))
+
+    def test_campos_a_eleccion(self):
+        self.client.force_authenticate(self.usuario)
+        respuesta = self.client.get(reverse('asignacionturno-list'), {'fields': 'letra_turno,dia', 'tamano': 1})
+        self.assertEqual(respuesta.json()['results'],
+                         [{'letra_turno': self.asignacion.letra_turno, 'dia': self.asignacion.dia.isoformat()}])
+        completa = self.client.get(reverse('asignacionturno-list'), {'tamano': 1}).json()['results'][0]
+        detalle = self.client.get(reverse('asignacionturno-detail', args=[self.asignacion.pk])).json()
+        self.assertEqual(completa, detalle)
+        self.assertEqual(self.client.get(reverse('asignacionturno-list'), {'fields': 'dia,clave'}).status_code, 400)
+
+
+class ListadoStreamingTests(DatasetTestCase):
+    """Con stream=1 los listados de la API llegan completos, por lotes, como un arreglo JSON."""
+    client_class = APIClient
+    dataset = dict(terceros=5, centros=2, cargos=1, dias=6, dias_por_programacion=3, bitacoras=0)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = Usuario.objects.create_user(username='lector', password='x')
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def _json(self, respuesta):
+        self.assertTrue(respuesta.streaming)
+        return json.loads(b''.join(respuesta.streaming_content))
+
+    def test_mismo_contenido_que_el_listado_normal(self):
+        for nombre in ('programacion-list', 'usuarios:usuario-list'):
+            with self.subTest(url=nombre):
+                normal = sorted(self.client.get(reverse(nombre)).json(), key=lambda fila: fila['id'])
+                with mock.patch.object(ListadoStreamingMixin, 'tamano_lote_streaming', 2):
+                    self.assertEqual(self._json(self.client.get(reverse(nombre), {'stream': '1'})), normal)
+
+    def test_asignaciones_con_filtros_y_campos(self):
+        programacion = ProgramacionHorario.objects.order_by('pk').first()
+        filas = self._json(self.client.get(reverse('asignacionturno-list'),
+                                           {'stream': 'true', 'programacion': programacion.pk, 'fields': 'id,dia'}))
+        self.assertEqual(filas, [
+            {'id': id_asignacion, 'dia': dia.isoformat()}
+            for id_asignacion, dia in AsignacionTurno.objects.filter(programacion=programacion)
+            .order_by('dia', 'id').values_list('id', 'dia')
+        ])
+
+
+class CargaAsignacionesTests(DatasetTestCase):
+    """La carga masiva valida todo antes de escribir y no repite una escritura con la misma clave."""
+    client_class = APIClient
+    dataset = dict(terceros=4, centros=1, cargos=1, dias=10, dias_por_programacion=10, bitacoras=0)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.usuario = Usuario.objects.create_user(username='planificador', password='x')
+        cls.existente, cls.borrada = AsignacionTurno.objects.order_by('pk')[:2]
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+        self.borrada.delete()
+
+    def _fila(self, asignacion, letra, **extra):
+        return {'programacion': asignacion.programacion_id, 'tercero': asignacion.tercero_id,
+                'dia': asignacion.dia.isoformat(), 'letra_turno': letra, **extra}
+
+    def _csv(self, *filas):
+        salida = io.StringIO()
+        escritor = csv.DictWriter(salida, fieldnames=['programacion', 'tercero', 'dia', 'letra_turno', 'fila',
+                                                      'columna'])
+        escritor.writeheader()
+        escritor.writerows(filas)
+        return salida.getvalue()
+
+    def test_crea_y_actualiza_en_una_carga(self):
+        filas = [self._fila(self.existente, 'X'),
+                 self._fila(self.borrada, self.borrada.letra_turno, fila=self.borrada.fila,
+                            columna=self.borrada.columna)]
+        respuesta = self.client.post(reverse('carga_asignaciones_api'),
+                                     {'asignaciones': filas, 'forzar': True}, format='json')
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.json())
+        self.assertEqual((respuesta.json()['creadas'], respuesta.json()['actualizadas']), (1, 1))
+        self.assertEqual(AsignacionTurno.objects.get(pk=self.existente.pk).letra_turno, 'X')
+        creada = AsignacionTurno.objects.get(programacion=self.borrada.programacion_id,
+                                             tercero=self.borrada.tercero_id, dia=self.borrada.dia)
+        registros = {(b.tipo_accion, b.objeto_id): b for b in Bitacora.objects.filter(
+            modelo_afectado='asignacionturno', descripcion__startswith='Carga masiva')}
+        self.assertEqual(set(registros), {('CREAR', creada.pk), ('EDITAR', self.existente.pk)})
+        self.assertEqual(registros[('EDITAR', self.existente.pk)].valores_anteriores['letra_turno'],
+                         self.existente.letra_turno)
+
+    def test_mover_celda_queda_en_la_bitacora(self):
+        fila = self._fila(self.existente, self.existente.letra_turno, fila=self.existente.fila + 50)
+        respuesta = self.client.post(reverse('carga_asignaciones_api'), [fila], format='json')
+
+        self.assertEqual(respuesta.status_code, 200, respuesta.json())
+        registro = Bitacora.objects.get(modelo_afectado='asignacionturno', objeto_id=self.existente.pk)
+        self.assertEqual(registro.campos_modificados, ['fila'])
+        self.assertEqual(registro.valores_nuevos['fila'], str(self.existente.fila + 50))
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=200)
+    def test_cuerpo_mayor_que_el_limite_de_django(self):
+        filas = [self._fila(self.existente, 'X')] * 2 + [self._fila(self.borrada, 'X')]
+        respuesta = self.client.post(reverse('carga_asignaciones_api'), {'asignaciones': filas, 'forzar': True},
+                                     format='json', HTTP_IDEMPOTENCY_KEY='grande')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta['Content-Type'], 'application/json')
+        self.assertIn('errores', respuesta.json())
+
+    def test_un_error_cancela_toda_la_carga(self):
+        filas = [self._fila(self.existente, 'X'), self._fila(self.borrada, 'Z'),
+                 self._fila(self.existente, '¿?', dia='2020-02-30')]
+        respuesta = self.client.post(reverse('carga_asignaciones_api'),
+                                     {'asignaciones': filas, 'modo': 'upsert', 'forzar': True}, format='json')
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual([(e['registro'], sorted(e['errores'])) for e in respuesta.json()['errores']],
+                         [(2, ['registro']), (3, ['dia', 'letra_turno'])])
+        self.assertEqual(AsignacionTurno.objects.get(pk=self.existente.pk).letra_turno, self.existente.letra_turno)
+
+    def test_reintento_con_la_misma_clave_no_vuelve_a_escribir(self):
+        url = reverse('carga_asignaciones_api') + '?forzar=true'
+        cuerpo = self._csv(self._fila(self.existente, 'X'))
+        primera = self.client.post(url, cuerpo, content_type='text/csv', HTTP_IDEMPOTENCY_KEY='lote-1')
+        registros = Bitacora.objects.count()
+        repetida = self.client.post(url, cuerpo, content_type='text/csv', HTTP_IDEMPOTENCY_KEY='lote-1')
+
+        self.assertEqual(primera.status_code, 200, primera.json())
+        self.assertEqual((repetida.status_code, repetida.json()), (200, primera.json()))
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertEqual(Bitacora.objects.count(), registros)
+        otra = self.client.post(url, self._csv(self._fila(self.existente, 'N')), content_type='text/csv',
+                                HTTP_IDEMPOTENCY_KEY='lote-1')
+        self.assertEqual(otra.status_code, 422)
+
+
+def _extension(c):
+    # Tres días: el lote de bulk_create cabe en una sola consulta con ambos datasets
+    inicio = c.fecha_fin + timedelta(days=1)
+    return {'apply': '1', 'fecha_inicio_ext': inicio.isoformat(),
+            'fecha_fin_ext': (inicio + timedelta(days=2)).isoformat()}
+
+
+def _rango_cobertura(c):
+    return {'fecha_inicio': (c.fecha_fin - timedelta(days=29)).isoformat(), 'fecha_fin': c.fecha_fin.isoformat()}
+
+
+def _cambios_malla(c):
+    return {'cambios': [{'tercero_id': c.tercero, 'fecha': c.asignacion_dia, 'letra': 'X'}]}
+
+
+class PresupuestoConsultasProgramacionTests(presupuesto_consultas.PresupuestoConsultasTestCase):
+    """Las vistas de programacion_turnos no hacen consultas por fila."""
+    urls_modulo = 'programacion_turnos.urls'
+    casos = {
+        'programacion_dashboard': Caso(),
+        'centros_por_proyecto': Caso(lambda c: [c.proyecto]),
+        'malla_turnos': Caso(lambda c: [c.programacion]),
+        'programaciones_por_centro': Caso(lambda c: [c.centro]),
+        'crear_programacion_centro': Caso(lambda c: [c.centro]),
+        'asignacion_turno_edit': Caso(lambda c: [f'{c.tercero}_{c.asignacion_dia}']),
+        'nomina_view': Caso(lambda c: [c.programacion]),
+        'api-root': Caso(),
+        'programacion-list': Caso(),
+        'programacion-detail': Caso(lambda c: [c.programacion]),
+        'asignacionturno-list': Caso(datos=lambda c: {'programacion': c.programacion, 'tamano': 500}),
+        'asignacionturno-detail': Caso(lambda c: [c.asignacion]),
+        'editar_malla_api': Caso(lambda c: [c.programacion], 'post', _cambios_malla, 'json'),
+        # Un registro de bitácora por asignación intercambiada: sus términos se insertan por lotes
+        'intercambiar_terceros_api': Caso(
+            lambda c: [c.programacion], 'post', lambda c: {'tercero1_id': c.tercero, 'tercero2_id': c.tercero2}, 'json',
+            lotes=3),
+        'carga_asignaciones_api': Caso(metodo='post', datos=lambda c: {'forzar': True, 'asignaciones': [
+            {'programacion': c.programacion, 'tercero': c.tercero, 'dia': c.asignacion_dia, 'letra_turno': 'X'}]},
+            formato='json'),
+        'editar_letra_turno_api': Caso(
+            metodo='post', datos=lambda c: {'id': c.asignacion, 'letra_turno': 'X'}, formato='json'),
+        'conflictos_centro_api': Caso(lambda c: [c.centro]),
+        'reglas_laborales_api': Caso(lambda c: [c.programacion]),
+        'cobertura_centro_api': Caso(lambda c: [c.centro], datos=_rango_cobertura),
+        'cobertura_mapa_calor_api': Caso(lambda c: [c.centro], datos=_rango_cobertura),
+        'historial_objeto_api': Caso(lambda c: ['programacionhorario', c.programacion]),
+        'preflight_conflictos_api': Caso(datos=lambda c: {
+            'centro_operativo': c.centro, 'cargo_predefinido': c.cargo,
+            'fecha_inicio': c.asignacion_dia, 'fecha_fin': c.fecha_fin.isoformat()}),
+        'test_bitacora': Caso(),
+        'bitacora_dashboard': Caso(),
+        'bitacora_exportar': Caso(datos=lambda c: {'tipo_accion': 'EDITAR', 'formato': 'jsonl'}),
+        # Vistas del admin con los mismos patrones N+1 que las APIs
+        'admin:programacionhorario-extender': Caso(lambda c: [c.programacion], 'post', _extension, estado=302),
+        'admin:programacionhorario-intercambiar-terceros': Caso(
+            lambda c: [c.programacion], 'post', lambda c: {'tercero1': c.tercero, 'tercero2': c.tercero2}, lotes=3,
+            estado=302),
+    }
+    excluidas = {
+        'holidays_js': 'La plantilla js/holidays.js no existe (el archivo se sirve como estático)',
+    }
@@ -4,12 +4,18 @@ from django.urls import path, include
 from .views import (
     ProgramacionHorarioViewSet, 
     AsignacionTurnoViewSet, 
-    asignacion_turno_modulo, 
+    carga_asignaciones_api,
     centros_por_proyecto_view, 
     dashboard_view, 
     malla_turnos, 
     editar_malla_api, 
     intercambiar_terceros_api, 
+    conflictos_centro_api,
+    preflight_conflictos_api,
+    reglas_laborales_api,
+    cobertura_centro_api,
+    cobertura_mapa_calor_api,
+    historial_objeto_api,
     nomina_view,
     test_bitacora, 
     HolidayJsView, 
@@ -17,7 +23,8 @@ from .views import (
     crear_programacion_view, 
     editar_letra_turno_api,
     asignacion_turno_edit_view,
-    bitacora_dashboard
+    bitacora_dashboard,
+    exportar_bitacora,
 )
 
 # ========== ROUTER PARA APIs DRF ==========
@@ -36,13 +43,15 @@ urlpatterns = [
     path('programacionhorario/centro/<int:centro_id>/', programaciones_por_centro_view, name='programaciones_por_centro'),
     path('programacionhorario/crear/<int:centro_id>/', crear_programacion_view, name='crear_programacion_centro'),
     
-    # Módulos de asignación
-    path('asignacionturno/', asignacion_turno_modulo, name='asignacion_turno_modulo'),
+    # Módulos de asignación (el listado asignacionturno/ lo atiende el router: ver más abajo)
     path('asignacionturno/<str:llave>/change/', asignacion_turno_edit_view, name='asignacion_turno_edit'),
     
     # Vistas de nomina (✅ MANTENER - se usa en API)
     path('nomina/<int:programacion_id>/', nomina_view, name='nomina_view'),
 
+    # Antes del router: asignacionturno/<pk>/ también coincidiría con "carga"
+    path('asignacionturno/carga/', carga_asignaciones_api, name='carga_asignaciones_api'),
+
     # APIs del router DRF (✅ MANTENER)
     path('', include(router.urls)),
     
@@ -50,6 +59,12 @@ urlpatterns = [
     path('programacion/<int:programacion_id>/editar_malla/', editar_malla_api, name='editar_malla_api'),
     path('programacion/<int:programacion_id>/intercambiar_terceros/', intercambiar_terceros_api, name='intercambiar_terceros_api'),
     path('editar-letra-turno/', editar_letra_turno_api, name='editar_letra_turno_api'),
+    path('conflictos/centro/<int:centro_id>/', conflictos_centro_api, name='conflictos_centro_api'),
+    path('conflictos/preflight/', preflight_conflictos_api, name='preflight_conflictos_api'),
+    path('programacion/<int:programacion_id>/reglas_laborales/', reglas_laborales_api, name='reglas_laborales_api'),
+    path('cobertura/centro/<int:centro_id>/', cobertura_centro_api, name='cobertura_centro_api'),
+    path('cobertura/centro/<int:centro_id>/mapa_calor/', cobertura_mapa_calor_api, name='cobertura_mapa_calor_api'),
+    path('historial/<str:modelo>/<int:objeto_id>/', historial_objeto_api, name='historial_objeto_api'),
     
     # Archivos JS dinámicos (✅ MANTENER)
     path('js/holidays.js', HolidayJsView.as_view(), name='holidays_js'),
@@ -62,6 +77,7 @@ urlpatterns = [
 web_only_patterns = [
     # ✅ BITÁCORA - SOLO DISPONIBLE EN /programacion_turnos/
     path('bitacora/', bitacora_dashboard, name='bitacora_dashboard'),
+    path('bitacora/exportar/', exportar_bitacora, name='bitacora_exportar'),
 ]
 
 # ✅ CONCATENAR: todas las rutas + solo las de web
@@ -12,9 +12,13 @@ Componentes principales:
 - Función utilitaria para crear las asignaciones de turnos en la base de datos.
 """
 from datetime import timedelta
+from django.db import transaction
 from .models import AsignacionTurno
+from .services.revision_programacion import invalidar_programacion
+from usuarios.models import CodigoTurno
 from django.contrib.auth.models import User
 from .models import Bitacora
+from horas_sistema.metricas import BITACORA_REGISTROS
 import threading
 from django.utils.deprecation import MiddlewareMixin
 
@@ -108,6 +112,7 @@ def programar_turnos(modelo_turno, empleados, fecha_inicio, fecha_fin, programac
         filas.setdefault(l.fila, []).append(l.valor)
     filas_ordenadas = [filas[k] for k in sorted(filas.keys())]
     dias = (fecha_fin - fecha_inicio).days + 1
+    codigos_por_letra = CodigoTurno.ids_por_letra()
 
     for idx, empleado in enumerate(empleados):
         fila_idx = idx % len(filas_ordenadas)
@@ -116,7 +121,7 @@ def programar_turnos(modelo_turno, empleados, fecha_inicio, fecha_fin, programac
             fecha = fecha_inicio + timedelta(days=dia_offset)
             letra = fila[dia_offset % len(fila)]
             columna = dia_offset % len(fila)  #  cálculo correcto según tu lógica
-            AsignacionTurno.objects.create(
+            asignacion = AsignacionTurno(
                 programacion=programacion,
                 tercero=empleado,
                 dia=fecha,
@@ -124,6 +129,75 @@ def programar_turnos(modelo_turno, empleados, fecha_inicio, fecha_fin, programac
                 fila=fila_idx,
                 columna=columna
             )
+            asignacion.sincronizar_codigo_turno(codigos_por_letra)
+            asignacion.save()
+
+def cambio_letra_bitacora(asignacion, letra_anterior, descripcion):
+    """Registro de bitácora (para ``registrar_bitacora_lote``) del cambio de letra de una asignación."""
+    return {
+        'objeto_id': asignacion.pk,
+        'descripcion': descripcion,
+        'valores_anteriores': {'letra_turno': letra_anterior},
+        'valores_nuevos': {'letra_turno': asignacion.letra_turno,
+                           'codigo_turno': str(asignacion.codigo_turno_id) if asignacion.codigo_turno_id else None,
+                           # Para el historial de la programación aunque la asignación se elimine después
+                           'programacion': str(asignacion.programacion_id)},
+        'campos_modificados': ['letra_turno', 'codigo_turno'],
+    }
+
+def intercambiar_letras_terceros(programacion, tercero1, tercero2, request=None):
+    """
+    Intercambia las letras de turno de dos terceros en una programación.
+
+    Las filas se actualizan con un solo bulk_update (sin señales por fila) y
+    cada asignación modificada queda con su propio registro de bitácora
+    (``registrar_bitacora_lote``).
+
+    Args:
+        programacion: ProgramacionHorario
+        tercero1: Tercero
+        tercero2: Tercero
+        request: Request para la bitácora (opcional)
+
+    Returns:
+        Tupla (cambios_realizados, asignaciones_tercero1, asignaciones_tercero2)
+    """
+    asignaciones = list(
+        AsignacionTurno.objects.filter(
+            programacion=programacion,
+            tercero_id__in=[tercero1.pk, tercero2.pk]
+        ).only('id', 'programacion_id', 'tercero_id', 'dia', 'letra_turno', 'codigo_turno_id').order_by('dia')
+    )
+    asignaciones1 = [a for a in asignaciones if a.tercero_id == tercero1.pk]
+    asignaciones2 = [a for a in asignaciones if a.tercero_id == tercero2.pk]
+
+    letras_tercero1 = {a.dia: (a.letra_turno, a.codigo_turno_id) for a in asignaciones1}
+    letras_tercero2 = {a.dia: (a.letra_turno, a.codigo_turno_id) for a in asignaciones2}
+
+    modificadas = []
+    for asignacion in asignaciones1:
+        if asignacion.dia in letras_tercero2:
+            asignacion.letra_turno, asignacion.codigo_turno_id = letras_tercero2[asignacion.dia]
+            modificadas.append(asignacion)
+    for asignacion in asignaciones2:
+        if asignacion.dia in letras_tercero1:
+            asignacion.letra_turno, asignacion.codigo_turno_id = letras_tercero1[asignacion.dia]
+            modificadas.append(asignacion)
+
+    anteriores = {**{a.pk: letras_tercero1[a.dia][0] for a in asignaciones1},
+                  **{a.pk: letras_tercero2[a.dia][0] for a in asignaciones2}}
+    with transaction.atomic():
+        AsignacionTurno.objects.bulk_update(modificadas, ['letra_turno', 'codigo_turno'], batch_size=500)
+        if modificadas:
+            invalidar_programacion(programacion)
+            registrar_bitacora_lote(
+                request, 'EDITAR', 'programacion', 'asignacionturno',
+                [cambio_letra_bitacora(asignacion, anteriores[asignacion.pk],
+                                       f"Intercambio de letras de turno: {tercero1} <-> {tercero2}")
+                 for asignacion in modificadas],
+            )
+
+    return len(modificadas), len(asignaciones1), len(asignaciones2)
 
 def get_client_ip(request):
     """Obtiene la IP del cliente desde el request"""
@@ -173,6 +247,7 @@ def registrar_bitacora(request, tipo_accion, modulo, modelo_afectado, objeto_id=
             campos_modificados=campos_modificados
         )
         
+        BITACORA_REGISTROS.inc(modulo=modulo, tipo_accion=tipo_accion)
         print(f"✅ Bitácora registrada exitosamente: ID {bitacora.id}")
         return bitacora
         
@@ -183,6 +258,58 @@ def registrar_bitacora(request, tipo_accion, modulo, modelo_afectado, objeto_id=
         traceback.print_exc()
         return None
 
+def registrar_bitacora_lote(request, tipo_accion, modulo, modelo_afectado, registros):
+    """
+    Registra una acción por objeto en la bitácora con un solo bulk_create.
+
+    Para las escrituras masivas (bulk_update/bulk_create no disparan la
+    bitácora automática): cada objeto conserva su propio registro, como si se
+    hubiera guardado uno por uno. ``bulk_create`` tampoco dispara las señales
+    de Bitacora, así que el lote se suma aquí al resumen diario y al índice de
+    búsqueda.
+
+    Args:
+        request: Request de Django (opcional)
+        tipo_accion: CREAR, EDITAR, ELIMINAR, CONSULTAR
+        modulo: programacion, turnos, empleados, modelos, usuarios
+        modelo_afectado: Nombre del modelo de los objetos (ej: 'asignacionturno')
+        registros: Lista de dicts con objeto_id, descripcion, valores_anteriores,
+            valores_nuevos y campos_modificados (opcionales salvo objeto_id)
+
+    Returns:
+        Cantidad de registros escritos
+    """
+    from .services.indice_bitacora import indexar_bitacoras
+    from .services.resumen_bitacora import registrar_lote_en_resumen
+
+    if not registros:
+        return 0
+    usuario = request.user if request and getattr(request, 'user', None) and request.user.is_authenticated else None
+    ip_address = get_client_ip(request) if request else '127.0.0.1'
+    # Último id antes del lote: sin RETURNING (MySQL) los ids nuevos se leen después
+    anterior = Bitacora.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    bitacoras = Bitacora.objects.bulk_create([
+        Bitacora(
+            usuario=usuario, ip_address=ip_address, tipo_accion=tipo_accion, modulo=modulo,
+            modelo_afectado=modelo_afectado, objeto_id=registro['objeto_id'],
+            descripcion=registro.get('descripcion', ''),
+            valores_anteriores=registro.get('valores_anteriores'),
+            valores_nuevos=registro.get('valores_nuevos'),
+            campos_modificados=registro.get('campos_modificados'),
+        )
+        for registro in registros
+    ], batch_size=500)
+    if bitacoras[0].pk is None:
+        # Los registros de otras transacciones ya confirmadas tienen sus términos: solo quedan los del lote
+        bitacoras = list(Bitacora.objects.filter(
+            id__gt=anterior, usuario=usuario, tipo_accion=tipo_accion, modulo=modulo,
+            modelo_afectado=modelo_afectado, tokens__isnull=True,
+        ))
+    indexar_bitacoras(bitacoras)
+    registrar_lote_en_resumen(bitacoras)
+    BITACORA_REGISTROS.inc(len(bitacoras), modulo=modulo, tipo_accion=tipo_accion)
+    return len(bitacoras)
+
 def obtener_valores_anteriores(instance, fields_to_track=None):
     """
     Obtiene los valores anteriores de un objeto para comparación
@@ -241,6 +368,24 @@ def comparar_valores(valores_anteriores, valores_nuevos):
     
     return campos_modificados
 
+def _valores_auditables(instance):
+    """
+    Valores de los campos de una instancia para la bitácora automática.
+
+    Las llaves foráneas se registran por su id (``<campo>_id``) en vez de
+    cargar el objeto relacionado: así guardar una fila no dispara una
+    consulta por cada relación.
+    """
+    valores = {}
+    for field in instance._meta.fields:
+        if not field.primary_key and not field.auto_created:
+            try:
+                value = getattr(instance, field.attname if field.is_relation else field.name)
+                valores[field.name] = str(value) if value is not None else None
+            except Exception:
+                valores[field.name] = None
+    return valores
+
 def registrar_bitacora_automatica(sender, instance, created, **kwargs):
     """
     Función automática para registrar bitácora en cualquier modelo
@@ -267,17 +412,7 @@ def registrar_bitacora_automatica(sender, instance, created, **kwargs):
         tipo_accion = 'CREAR' if created else 'EDITAR'
         
         # Obtener valores del modelo
-        valores = {}
-        for field in instance._meta.fields:
-            if not field.primary_key and not field.auto_created:
-                try:
-                    value = getattr(instance, field.name)
-                    if hasattr(value, '__str__'):
-                        valores[field.name] = str(value)
-                    else:
-                        valores[field.name] = value
-                except:
-                    valores[field.name] = None
+        valores = _valores_auditables(instance)
         
         # Crear descripción
         if hasattr(instance, '__str__'):
@@ -335,17 +470,7 @@ def registrar_eliminacion_automatica(sender, instance, **kwargs):
         modulo = modulo_map.get(app_label, app_label)
         
         # Obtener valores del modelo
-        valores = {}
-        for field in instance._meta.fields:
-            if not field.primary_key and not field.auto_created:
-                try:
-                    value = getattr(instance, field.name)
-                    if hasattr(value, '__str__'):
-                        valores[field.name] = str(value)
-                    else:
-                        valores[field.name] = value
-                except:
-                    valores[field.name] = None
+        valores = _valores_auditables(instance)
         
         # Crear descripción
         if hasattr(instance, '__str__'):
@@ -373,18 +498,7 @@ def capturar_valores_anteriores_automatico(sender, instance, **kwargs):
     if instance.pk:  # Solo para objetos existentes
         try:
             old_instance = sender.objects.get(pk=instance.pk)
-            valores = {}
-            for field in instance._meta.fields:
-                if not field.primary_key and not field.auto_created:
-                    try:
-                        value = getattr(old_instance, field.name)
-                        if hasattr(value, '__str__'):
-                            valores[field.name] = str(value)
-                        else:
-                            valores[field.name] = value
-                    except:
-                        valores[field.name] = None
-            _valores_anteriores[instance.pk] = valores
+            _valores_anteriores[instance.pk] = _valores_auditables(old_instance)
         except sender.DoesNotExist:
             pass
         except Exception as e:
@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import TemplateView
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.contrib import messages
@@ -9,37 +9,85 @@ import json
 # Create your views here.
 import holidays
 from rest_framework import viewsets
+from horas_sistema.streaming import ListadoStreamingMixin, en_lotes, pide_streaming, respuesta_streaming
 from .models import ProgramacionHorario, AsignacionTurno, LetraTurno, Bitacora
 from .serializers import ProgramacionHorarioSerializer, AsignacionTurnoSerializer
 from usuarios.models import Tercero, CodigoTurno
-from .utils import programar_turnos
+from .utils import (programar_turnos, intercambiar_letras_terceros, registrar_bitacora, registrar_bitacora_lote,
+                    cambio_letra_bitacora)
 from .serializers import generar_asignaciones
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import ProgramacionExtensionSerializer
 from empresas.models import CentroOperativo
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import JSONParser
+from .parsers import CSVParser
 from rest_framework.permissions import IsAuthenticated
-from .serializers import EditarMallaRequestSerializer
+from .serializers import EditarMallaRequestSerializer, RangoConflictosSerializer, PreflightConflictosSerializer
+from .serializers import ReporteReglasLaboralesSerializer, RangoCoberturaSerializer, HistorialObjetoSerializer
+from .serializers import ListadoAsignacionesSerializer, CargaAsignacionesSerializer
 from .services.holiday_service import get_holidays_for_range
+from .services.extension_programacion import extender_programacion
+from .services.archivo_bitacora import paginar_bitacora
+from .services.carga_asignaciones import cargar_asignaciones, filas_csv
+from .services.cobertura import calcular_cobertura
+from .services.conflictos_turnos import detectar_conflictos, preflight_conflictos
+from .services.consulta_asignaciones import CAMPOS_ASIGNACION, filas_asignaciones, pagina_asignaciones
+from .services.consulta_asignaciones import TAMANO_LOTE as TAMANO_LOTE_ASIGNACIONES
+from .services.historial_objeto import historial_objeto, registro_a_dict, resolver_modelo
+from .services.idempotencia import LONGITUD_CLAVE, ClaveReutilizada, ejecutar_idempotente, huella_solicitud
+from .services.exportacion_bitacora import FORMATOS, filtrar_bitacora, lineas_exportacion
+from .services.malla_matrix import MallaMatrix
+from .services.paginacion import SIGUIENTE, contar_estimado
+from .services.resumen_bitacora import estadisticas_bitacora
+from .services.revision_programacion import invalidar_programacion
+from .services.reglas_laborales import ReglasLaborales, validar_malla, validar_cambios_malla, violacion_a_dict
+from .perfilador_python import perfilable
 from .forms import ProgramacionHorarioForm  
 
 from .serializers import EditarLetraTurnoSerializer
 from django.shortcuts import render, get_object_or_404, redirect
 
-from django.db.models import Count, Q
-from django.core.paginator import Paginator
+from django.db.models import Count, Sum
 from .forms import BitacoraFiltrosForm
 from django.contrib.auth.decorators import login_required
 
-class ProgramacionHorarioViewSet(viewsets.ModelViewSet):
+class ProgramacionHorarioViewSet(ListadoStreamingMixin, viewsets.ModelViewSet):
     queryset = ProgramacionHorario.objects.all()
     serializer_class = ProgramacionHorarioSerializer
 
 class AsignacionTurnoViewSet(viewsets.ModelViewSet):
     queryset = AsignacionTurno.objects.all()
     serializer_class = AsignacionTurnoSerializer
+
+    def list(self, request, *args, **kwargs):
+        """
+        Asignaciones ordenadas por (dia, id) y paginadas por cursor.
+
+        Filtros: programacion, tercero, desde, hasta. ``fields=id,dia,...`` limita
+        los campos de cada fila; ``cursor``/``dir``/``tamano`` recorren las páginas.
+        Con ``stream=1`` se envían todas las filas, sin paginar, en streaming.
+        """
+        serializer = ListadoAsignacionesSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data
+        if pide_streaming(request):
+            filas = filas_asignaciones(datos, campos=datos.get('fields', CAMPOS_ASIGNACION))
+            return respuesta_streaming(en_lotes(filas, TAMANO_LOTE_ASIGNACIONES))
+        filas, pagina = pagina_asignaciones(
+            datos, campos=datos.get('fields', CAMPOS_ASIGNACION), cursor=datos.get('cursor'),
+            direccion=datos['dir'], tamano=datos['tamano'],
+        )
+        return Response({
+            'results': filas,
+            'cursor_siguiente': pagina.cursor_siguiente,
+            'cursor_anterior': pagina.cursor_anterior,
+        })
     
 class HolidayJsView(TemplateView):
     content_type = 'application/javascript'
@@ -55,6 +103,7 @@ class HolidayJsView(TemplateView):
         print("Fin de perform_create")
 
     @action(detail=True, methods=['post'], url_path='extender')
+    @perfilable
     def extender(self, request, pk=None):
         """
         Extiende la programación de turnos a un nuevo rango de fechas, asignando turnos solo a empleados activos en cada fecha.
@@ -62,104 +111,18 @@ class HolidayJsView(TemplateView):
         programacion = self.get_object()
         serializer = ProgramacionExtensionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        fecha_inicio_ext = serializer.validated_data['fecha_inicio_ext']
-        fecha_fin_ext = serializer.validated_data['fecha_fin_ext']
-
-        # Validar que el nuevo rango no se solape con el existente
-        if fecha_inicio_ext <= programacion.fecha_fin:
-            return Response(
-                {"detail": "La fecha de inicio de la extensión debe ser posterior al fin de la programación actual."},
-                status=status.HTTP_400_BAD_REQUEST
+        try:
+            empleados, omitidas = extender_programacion(
+                programacion,
+                serializer.validated_data['fecha_inicio_ext'],
+                serializer.validated_data['fecha_fin_ext']
             )
-
-        # Obtener la matriz de letras del modelo de turno
-        letras_qs = LetraTurno.objects.filter(modelo_turno=programacion.modelo_turno)
-        matriz = {}
-        max_fila = 0
-        max_col = 0
-
-        for letra in letras_qs:
-            matriz[(letra.fila, letra.columna)] = letra.valor
-            max_fila = max(max_fila, letra.fila)
-            max_col = max(max_col, letra.columna)
-
-        if not matriz:
-            return Response(
-                {"detail": "No se encontraron letras de turno para el modelo."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Obtener la última posición de cada tercero en la programación actual
-        ultimas_posiciones = {}
-        for asignacion in AsignacionTurno.objects.filter(
-            programacion=programacion
-        ).order_by('tercero_id', '-dia'):
-            if asignacion.tercero.id_tercero not in ultimas_posiciones:
-                ultimas_posiciones[asignacion.tercero.id_tercero] = {
-                    'fila': asignacion.fila,
-                    'columna': asignacion.columna,
-                    'dia': asignacion.dia
-                }
-
-        dias_ext = (fecha_fin_ext - fecha_inicio_ext).days + 1
-        nuevas_asignaciones = []
-        empleados_con_asignacion = set()
-
-        for i in range(dias_ext):
-            fecha = fecha_inicio_ext + timedelta(days=i)
-
-            # Obtener terceros activos en esta fecha
-            terceros_activos_en_fecha = programacion.obtener_terceros_activos(fecha)
-            
-            for tercero in terceros_activos_en_fecha:
-                # Buscar la última asignación de este tercero
-                ultima = ultimas_posiciones.get(tercero.id_tercero)
-                if ultima:
-                    fila = ultima['fila']
-                    # Calcular días desde la última asignación
-                    dias_desde_ultima = (fecha - ultima['dia']).days
-                    nueva_columna = (ultima['columna'] + dias_desde_ultima) % (max_col + 1)
-                else:
-                    # Si es nuevo, asignar la siguiente fila disponible
-                    fila = len(ultimas_posiciones) % (max_fila + 1)
-                    nueva_columna = i % (max_col + 1)
-
-                letra = matriz.get((fila, nueva_columna))
-                if letra:
-                    nuevas_asignaciones.append(
-                        AsignacionTurno(
-                            programacion=programacion,
-                            tercero=tercero,
-                            dia=fecha,
-                            letra_turno=letra,
-                            fila=fila,
-                            columna=nueva_columna
-                        )
-                    )
-                    empleados_con_asignacion.add(tercero.id_tercero)
-                    
-                    # Actualizar la última posición para este tercero
-                    ultimas_posiciones[tercero.id_tercero] = {
-                        'fila': fila,
-                        'columna': nueva_columna,
-                        'dia': fecha
-                    }
-
-        if not nuevas_asignaciones:
-            return Response(
-                {"detail": "No hay empleados activos en ninguna fecha del rango de extensión."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Bulk create para eficiencia
-        AsignacionTurno.objects.bulk_create(nuevas_asignaciones)
-        
-        # Actualizar el rango de fechas de la programación
-        programacion.fecha_fin = fecha_fin_ext
-        programacion.save(update_fields=['fecha_fin'])
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
-            {"detail": f"Extensión realizada correctamente para {len(empleados_con_asignacion)} empleados."},
+            {"detail": f"Extensión realizada correctamente para {empleados} empleados.",
+             "omitidas_por_conflicto": omitidas},
             status=status.HTTP_200_OK
         )
 
@@ -176,21 +139,107 @@ def editar_malla_api(request, programacion_id):
     programacion = ProgramacionHorario.objects.filter(pk=programacion_id).first()
     if not programacion:
         return Response({'error': 'Programación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
-    cambios_realizados = 0
+    # Una sola consulta para todas las celdas del lote (en vez de una por cambio)
+    asignaciones = {
+        (a.tercero_id, a.dia): a
+        for a in AsignacionTurno.objects.filter(
+            programacion=programacion,
+            tercero_id__in={cambio['tercero_id'] for cambio in cambios},
+            dia__in={cambio['fecha'] for cambio in cambios}
+        ).only('id', 'programacion_id', 'tercero_id', 'dia', 'letra_turno')
+    }
+    modificadas = {}
+    valores_anteriores = {}
+    codigos_por_letra = CodigoTurno.ids_por_letra()
     for cambio in cambios:
-        tercero_id = cambio['tercero_id']
-        fecha = cambio['fecha']
+        asignacion = asignaciones.get((cambio['tercero_id'], cambio['fecha']))
         letra = cambio['letra']
-        asignacion = AsignacionTurno.objects.filter(
-            programacion=programacion,
-            tercero_id=tercero_id,
-            dia=fecha
-        ).first()
         if asignacion and letra != asignacion.letra_turno:
+            valores_anteriores.setdefault(asignacion.pk, asignacion.letra_turno)
             asignacion.letra_turno = letra
-            asignacion.save()
-            cambios_realizados += 1
-    return Response({'mensaje': f'{cambios_realizados} cambios realizados.'}, status=status.HTTP_200_OK)
+            asignacion.sincronizar_codigo_turno(codigos_por_letra)
+            try:
+                asignacion.clean()
+            except ValidationError as e:
+                return Response({'error': e.message_dict}, status=status.HTTP_400_BAD_REQUEST)
+            modificadas[asignacion.pk] = asignacion
+    # Reglas laborales: solo bloquean las violaciones que introduce este lote
+    violaciones = validar_cambios_malla(
+        programacion, [(a.tercero_id, a.dia, a.letra_turno) for a in modificadas.values()]
+    )
+    if violaciones and not data['forzar']:
+        return Response({
+            'error': 'Los cambios incumplen reglas laborales.',
+            'violaciones': [violacion_a_dict(v) for v in violaciones],
+        }, status=status.HTTP_400_BAD_REQUEST)
+    cambios_realizados = len(modificadas)
+    if modificadas:
+        with transaction.atomic():
+            AsignacionTurno.objects.bulk_update(modificadas.values(), ['letra_turno', 'codigo_turno'], batch_size=500)
+            invalidar_programacion(programacion)
+            registrar_bitacora_lote(
+                request, 'EDITAR', 'programacion', 'asignacionturno',
+                [cambio_letra_bitacora(asignacion, valores_anteriores[pk], 'Edición de malla')
+                 for pk, asignacion in modificadas.items()],
+            )
+    respuesta = {'mensaje': f'{cambios_realizados} cambios realizados.'}
+    if violaciones:
+        respuesta['advertencias'] = [violacion_a_dict(v) for v in violaciones]
+    return Response(respuesta, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser, CSVParser])
+def carga_asignaciones_api(request):
+    """
+    Crea y/o actualiza asignaciones en lote por (programacion, tercero, dia).
+
+    Cuerpo JSON ``{"asignaciones": [...], "modo": "upsert", "forzar": false}``
+    (o solo la lista) o CSV (``text/csv``, con modo y forzar en la URL). Con el
+    encabezado Idempotency-Key un reintento recibe la respuesta de la primera
+    ejecución sin volver a escribir.
+    """
+    clave = request.headers.get('Idempotency-Key')
+    if clave and len(clave) > LONGITUD_CLAVE:
+        return Response({'error': f'Idempotency-Key admite hasta {LONGITUD_CLAVE} caracteres.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if isinstance(request.data, str):
+        try:
+            datos = {**request.query_params.dict(), 'asignaciones': filas_csv(request.data)}
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    elif isinstance(request.data, list):
+        datos = {**request.query_params.dict(), 'asignaciones': request.data}
+    else:
+        datos = request.data
+    # Huella del contenido ya interpretado, en forma canónica: request.body rechazaría los cuerpos
+    # mayores que DATA_UPLOAD_MAX_MEMORY_SIZE con la página HTML de error de Django
+    huella = huella_solicitud(json.dumps(datos, sort_keys=True, separators=(',', ':'), default=str))
+    serializer = CargaAsignacionesSerializer(data=datos)
+    if not serializer.is_valid():
+        return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    datos = serializer.validated_data
+
+    def escribir():
+        resultado = cargar_asignaciones(datos['asignaciones'], modo=datos['modo'], forzar=datos['forzar'],
+                                        request=request)
+        respuesta = resultado.a_dict()
+        if resultado.errores:
+            return status.HTTP_400_BAD_REQUEST, {'error': 'La carga tiene errores: no se guardó ningún cambio.',
+                                                 **respuesta}
+        if resultado.violaciones and not datos['forzar']:
+            return status.HTTP_400_BAD_REQUEST, {'error': 'Los cambios incumplen reglas laborales.', **respuesta}
+        if resultado.violaciones:
+            respuesta['advertencias'] = respuesta.pop('violaciones')
+            respuesta['total_advertencias'] = respuesta.pop('total_violaciones')
+        return status.HTTP_200_OK, respuesta
+
+    try:
+        codigo, respuesta, repetida = ejecutar_idempotente(request.user, clave, huella, escribir)
+    except ClaveReutilizada as e:
+        return Response({'error': str(e)}, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    headers = {'Idempotent-Replayed': 'true'} if repetida else None
+    return Response(respuesta, status=codigo, headers=headers)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -219,47 +268,15 @@ def intercambiar_terceros_api(request, programacion_id):
         tercero2 = Tercero.objects.get(pk=tercero2_id)
         
         # Verificar que ambos terceros pertenecen al mismo centro operativo
-        if tercero1.centro_operativo != tercero2.centro_operativo:
+        if tercero1.centro_operativo_id != tercero2.centro_operativo_id:
             return Response({"error": "Los terceros deben pertenecer al mismo centro operativo"}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Obtener las asignaciones de ambos terceros
-        asignaciones1 = AsignacionTurno.objects.filter(
-            programacion=programacion,
-            tercero=tercero1
-        ).order_by('dia')
-        asignaciones2 = AsignacionTurno.objects.filter(
-            programacion=programacion,
-            tercero=tercero2
-        ).order_by('dia')
-        
         print(f"Intercambiando letras de turno: {tercero1} <-> {tercero2}")
-        print(f"Asignaciones tercero1: {asignaciones1.count()}")
-        print(f"Asignaciones tercero2: {asignaciones2.count()}")
-        
-        # Guardar las letras de turno originales
-        letras_tercero1_originales = {asig.dia: asig.letra_turno for asig in asignaciones1}
-        letras_tercero2_originales = {asig.dia: asig.letra_turno for asig in asignaciones2}
-        
-        # Intercambiar las letras de turno
-        cambios_realizados = 0
-        
-        # Tercero1 recibe letras de tercero2
-        for asignacion in asignaciones1:
-            if asignacion.dia in letras_tercero2_originales:
-                letra_original = asignacion.letra_turno
-                asignacion.letra_turno = letras_tercero2_originales[asignacion.dia]
-                asignacion.save()
-                cambios_realizados += 1
-                print(f"Asignación {asignacion.id} - {tercero1} día {asignacion.dia}: {letra_original} → {asignacion.letra_turno}")
-        
-        # Tercero2 recibe letras de tercero1
-        for asignacion in asignaciones2:
-            if asignacion.dia in letras_tercero1_originales:
-                letra_original = asignacion.letra_turno
-                asignacion.letra_turno = letras_tercero1_originales[asignacion.dia]
-                asignacion.save()
-                cambios_realizados += 1
-                print(f"Asignación {asignacion.id} - {tercero2} día {asignacion.dia}: {letra_original} → {asignacion.letra_turno}")
+        cambios_realizados, total_tercero1, total_tercero2 = intercambiar_letras_terceros(
+            programacion, tercero1, tercero2, request=request
+        )
+        print(f"Asignaciones tercero1: {total_tercero1}")
+        print(f"Asignaciones tercero2: {total_tercero2}")
         
         return Response({
             "mensaje": f"Letras de turno intercambiadas correctamente. {cambios_realizados} cambios realizados.",
@@ -275,8 +292,8 @@ def intercambiar_terceros_api(request, programacion_id):
             },
             "cambios_realizados": cambios_realizados,
             "asignaciones_intercambiadas": {
-                "tercero1_original": asignaciones1.count(),
-                "tercero2_original": asignaciones2.count()
+                "tercero1_original": total_tercero1,
+                "tercero2_original": total_tercero2
             }
         }, status=status.HTTP_200_OK)
         
@@ -286,6 +303,178 @@ def intercambiar_terceros_api(request, programacion_id):
         print(f"Error al intercambiar letras de turno: {str(e)}")
         return Response({"error": f"Error al intercambiar letras de turno: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def conflictos_centro_api(request, centro_id):
+    """
+    Reporte de empleados con turno en dos programaciones activas el mismo día,
+    para los cruces donde participa una programación del centro.
+    """
+    serializer = RangoConflictosSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    datos = serializer.validated_data
+    conflictos = detectar_conflictos(centro_id, datos.get('fecha_inicio'), datos.get('fecha_fin'))
+    mostrados = conflictos[:datos['limite']]
+    terceros = Tercero.all_objects.in_bulk({c.tercero_id for c in mostrados})
+    return Response({
+        'centro_operativo': centro_id,
+        'total': len(conflictos),
+        'conflictos': [
+            {
+                'tercero_id': c.tercero_id,
+                'tercero': str(terceros[c.tercero_id]) if c.tercero_id in terceros else None,
+                'dia': c.dia.isoformat(),
+                'programaciones': sorted(c.programaciones),
+            }
+            for c in mostrados
+        ],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def preflight_conflictos_api(request):
+    """
+    Revisión rápida para el formulario de creación: empleados elegibles que ya
+    tienen turno en otra programación activa dentro del rango.
+    """
+    serializer = PreflightConflictosSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    datos = serializer.validated_data
+    conflictos = preflight_conflictos(
+        datos['centro_operativo'], datos['cargo_predefinido'], datos['fecha_inicio'], datos['fecha_fin'],
+        excluir_programacion=datos.get('programacion'),
+    )
+    return Response({
+        'ok': not conflictos,
+        'terceros_en_conflicto': len(conflictos),
+        'conflictos': {str(tercero_id): [dia.isoformat() for dia in dias] for tercero_id, dias in conflictos.items()},
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def reglas_laborales_api(request, programacion_id):
+    """
+    Reporte de reglas laborales de toda la malla: horas por ventana de 7 días,
+    día de descanso semanal y descanso mínimo entre turnos.
+    """
+    programacion = ProgramacionHorario.objects.filter(pk=programacion_id).first()
+    if not programacion:
+        return Response({'error': 'Programación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+    serializer = ReporteReglasLaboralesSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    datos = serializer.validated_data
+    reglas = ReglasLaborales(
+        max_horas_ventana=datos['max_horas_ventana'], descanso_minimo_horas=datos['descanso_minimo_horas']
+    )
+    malla = MallaMatrix.desde_programacion(programacion, datos.get('fecha_inicio'), datos.get('fecha_fin'))
+    violaciones = validar_malla(malla, reglas=reglas)
+    por_regla = {}
+    for violacion in violaciones:
+        por_regla[violacion.regla] = por_regla.get(violacion.regla, 0) + 1
+    return Response({
+        'programacion': programacion.pk,
+        'terceros': len(malla.terceros),
+        'dias': malla.dias,
+        'total': len(violaciones),
+        'por_regla': por_regla,
+        'terceros_con_violaciones': len({v.tercero_id for v in violaciones}),
+        'violaciones': [violacion_a_dict(v) for v in violaciones[:datos['limite']]],
+    })
+
+def _cobertura_desde_request(request, centro_id):
+    serializer = RangoCoberturaSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return None, Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    datos = serializer.validated_data
+    return calcular_cobertura(centro_id, datos['fecha_inicio'], datos['fecha_fin']), None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cobertura_centro_api(request, centro_id):
+    """
+    Reporte de brechas de cobertura del centro: días con menos personas en
+    letras trabajadas, u horas con menos personas, que la promesa de valor.
+    """
+    cobertura, error = _cobertura_desde_request(request, centro_id)
+    if error:
+        return error
+    brechas = cobertura.brechas()
+    return Response({
+        'centro_operativo': centro_id,
+        'promesa_valor': cobertura.promesa_valor,
+        'fecha_inicio': cobertura.fecha_inicio.isoformat(),
+        'fecha_fin': cobertura.fecha_fin.isoformat(),
+        'programaciones': cobertura.programaciones,
+        'dias': len(cobertura.dias),
+        'dias_con_brecha': len(brechas),
+        'deficit_horas_total': sum(dia.deficit_horas for dia in brechas),
+        'brechas': [
+            {
+                'dia': dia.dia.isoformat(),
+                'personas': dia.personas,
+                'deficit_dia': dia.deficit_dia,
+                'minimo_hora': dia.minimo_hora,
+                'horas_con_deficit': dia.horas_con_deficit,
+                'deficit_horas': dia.deficit_horas,
+            }
+            for dia in brechas
+        ],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cobertura_mapa_calor_api(request, centro_id):
+    """
+    Mapa de calor de cobertura: personas por día (filas) y hora (columnas 0-23)
+    frente a la promesa de valor del centro.
+    """
+    cobertura, error = _cobertura_desde_request(request, centro_id)
+    if error:
+        return error
+    return Response({
+        'centro_operativo': centro_id,
+        'promesa_valor': cobertura.promesa_valor,
+        'horas': list(range(24)),
+        'dias': [dia.dia.isoformat() for dia in cobertura.dias],
+        'personas_dia': [dia.personas for dia in cobertura.dias],
+        'valores': [dia.por_hora for dia in cobertura.dias],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def historial_objeto_api(request, modelo, objeto_id):
+    """
+    Historial de cambios de un objeto según la bitácora, del más reciente al más
+    antiguo, paginado por cursor. El de una programación incluye el de sus asignaciones.
+    """
+    modelo_clase = resolver_modelo(modelo)
+    if modelo_clase is None:
+        return Response({'error': f'Modelo desconocido: {modelo}'}, status=status.HTTP_404_NOT_FOUND)
+    serializer = HistorialObjetoSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response({'error': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    datos = serializer.validated_data
+    pagina = historial_objeto(
+        modelo_clase, objeto_id, cursor=datos.get('cursor'), direccion=datos['dir'], tamano=datos['tamano'],
+        incluir_hijos=datos['hijos'],
+    )
+    return Response({
+        'modelo': modelo_clase._meta.model_name,
+        'objeto_id': objeto_id,
+        'registros': [registro_a_dict(registro) for registro in pagina],
+        'cursor_siguiente': pagina.cursor_siguiente,
+        'cursor_anterior': pagina.cursor_anterior,
+    })
+
+@perfilable
 def malla_turnos(request, programacion_id):
     programacion = get_object_or_404(ProgramacionHorario, id=programacion_id)
     
@@ -319,21 +508,23 @@ def malla_turnos(request, programacion_id):
     
     # Asignaciones - solo 'tercero' porque letra_turno es CharField
     asignaciones = AsignacionTurno.objects.filter(
-        programacion=programacion
+        programacion=programacion,
+        dia__range=(fecha_inicio, fecha_fin)
     ).select_related('tercero')
     
     # Crear matriz de turnos organizada por empleado y fecha
     matriz_turnos = {}
     matriz_empleados_fechas = {}  # Nueva estructura más fácil de usar
     
-    for asignacion in asignaciones:
-        key = f"{asignacion.tercero.id_tercero}_{asignacion.dia.strftime('%Y-%m-%d')}"
-        matriz_turnos[key] = asignacion.letra_turno
+    # Solo las columnas del índice (programacion, dia, tercero, letra_turno): no se lee la tabla
+    for tercero_id, dia, letra_turno in asignaciones.values_list('tercero_id', 'dia', 'letra_turno'):
+        key = f"{tercero_id}_{dia.strftime('%Y-%m-%d')}"
+        matriz_turnos[key] = letra_turno
         
         # Crear estructura organizada por empleado y fecha
-        if asignacion.tercero.id_tercero not in matriz_empleados_fechas:
-            matriz_empleados_fechas[asignacion.tercero.id_tercero] = {}
-        matriz_empleados_fechas[asignacion.tercero.id_tercero][asignacion.dia.strftime('%Y-%m-%d')] = asignacion.letra_turno 
+        if tercero_id not in matriz_empleados_fechas:
+            matriz_empleados_fechas[tercero_id] = {}
+        matriz_empleados_fechas[tercero_id][dia.strftime('%Y-%m-%d')] = letra_turno 
 
     # PASO 6: Obtener información de códigos de turno desde usuarios_codigoturno
     
@@ -495,7 +686,9 @@ def dashboard_view(request):
     proyectos = Proyecto.objects.filter(
         centros_operativos__isnull=False,
         activo=True
-    ).distinct().order_by('nombre')
+    ).annotate(
+        total_centros=Count('centros_operativos', distinct=True)
+    ).order_by('nombre')
     
     return render(request, 'programacion_turnos/dashboard.html', {
         'proyectos': proyectos
@@ -566,14 +759,10 @@ def crear_programacion_view(request, centro_id=None):
                 print(f"✅ Programación creada exitosamente: {programacion}")
                 
                 # PASO 2: Validar que existan terceros para programar
-                from usuarios.models import Tercero
-                
-                # Verificar que hay terceros en el centro con el cargo seleccionado
-                terceros_disponibles = Tercero.objects.filter(
-                    centro_operativo=programacion.centro_operativo,
-                    cargo_predefinido=programacion.cargo_predefinido,
-                    estado_tercero=1
-                ).count()
+                # (el resultado queda en caché y generar_asignaciones lo reutiliza)
+                terceros_disponibles = len(programacion.disponibilidad_terceros(
+                    programacion.fecha_inicio, programacion.fecha_fin
+                ).terceros)
                 
                 if terceros_disponibles == 0:
                     # Eliminar la programación si no hay terceros válidos
@@ -610,6 +799,8 @@ def crear_programacion_view(request, centro_id=None):
                         f'Programación creada pero no se generaron asignaciones. '
                         f'Verifique la configuración del modelo de turno.'
                     )
+                if form.advertencia_conflictos:
+                    messages.warning(request, form.advertencia_conflictos)
                 
                 return redirect('programaciones_por_centro', centro_id=programacion.centro_operativo.id_centro)
                 
@@ -704,15 +895,7 @@ def asignacion_turno_edit_view(request, llave):
     }
     return render(request, 'programacion_turnos/asignacion_turno_edit.html', context)
 
-def asignacion_turno_modulo(request):
-    empleado_id = request.GET.get('empleado')
-    fecha = request.GET.get('fecha')
-    # Aquí puedes buscar la asignación y pasarla al template, o solo mostrar el formulario
-    context = {
-        'empleado_id': empleado_id,
-        'fecha': fecha,
-    }
-    return render(request, 'programacion_turnos/asignacion_turno_modulo.html', context)
+@perfilable
 def nomina_view(request, programacion_id):
     from datetime import datetime, timedelta
 
@@ -741,7 +924,7 @@ def nomina_view(request, programacion_id):
     # 4. Obtener empleados asignados a la programación
     empleados = Tercero.objects.filter(
         asignacionturno__programacion=programacion
-    ).distinct().order_by('apellido_tercero')
+    ).select_related('cargo_predefinido').distinct().order_by('apellido_tercero')
 
     # 5. Obtener todos los códigos de turno
     codigos_turno = CodigoTurno.objects.all().order_by('letra_turno')
@@ -758,29 +941,29 @@ def nomina_view(request, programacion_id):
 
     # 6. Obtener asignaciones de turnos en el rango
     asignaciones = AsignacionTurno.objects.filter(
-        programacion=programacion
-    ).select_related('tercero')
+        programacion=programacion,
+        dia__range=(fecha_inicio, fecha_fin)
+    ).values_list('tercero_id', 'dia', 'letra_turno')
 
     # 7. Construir matriz de turnos por empleado y fecha
     matriz_empleados_fechas = {}
-    for asignacion in asignaciones:
-        empleado_id = asignacion.tercero.id_tercero
-        fecha_str = asignacion.dia.strftime('%Y-%m-%d')
+    for empleado_id, dia, letra_turno in asignaciones:
+        fecha_str = dia.strftime('%Y-%m-%d')
         if empleado_id not in matriz_empleados_fechas:
             matriz_empleados_fechas[empleado_id] = {}
-        matriz_empleados_fechas[empleado_id][fecha_str] = asignacion.letra_turno if asignacion.letra_turno else '-'
-
-    # 8. Calcular total de horas por empleado
-    total_horas_por_empleado = {}
-    for empleado in empleados:
-        total_horas = 0
-        for fecha in fechas:
-            fecha_str = fecha.strftime('%Y-%m-%d')
-            turno_letra = matriz_empleados_fechas.get(empleado.id_tercero, {}).get(fecha_str)
-            if turno_letra and turno_letra != '-':
-                horas = codigos_info.get(turno_letra, {}).get('horas', 0)
-                total_horas += horas
-        total_horas_por_empleado[empleado.id_tercero] = total_horas
+        matriz_empleados_fechas[empleado_id][fecha_str] = letra_turno if letra_turno else '-'
+
+    # 8. Calcular total de horas por empleado: se suman en la BD con el join a CodigoTurno
+    asignaciones_rango = AsignacionTurno.objects.filter(programacion=programacion, dia__range=(fecha_inicio, fecha_fin))
+    total_horas_por_empleado = {empleado.id_tercero: 0 for empleado in empleados}
+    for fila in (asignaciones_rango.filter(codigo_turno__isnull=False)
+                 .values('tercero_id').annotate(horas=Sum('codigo_turno__duracion_total'))):
+        total_horas_por_empleado[fila['tercero_id']] = fila['horas'] or 0
+    # Filas aún sin código (anteriores a la migración o con letra sin código): se suman por letra
+    for fila in (asignaciones_rango.filter(codigo_turno__isnull=True)
+                 .values('tercero_id', 'letra_turno').annotate(dias=Count('id'))):
+        horas = codigos_info.get(fila['letra_turno'], {}).get('horas') or 0
+        total_horas_por_empleado[fila['tercero_id']] = total_horas_por_empleado.get(fila['tercero_id'], 0) + horas * fila['dias']
 
     # 9. Obtener solo los códigos usados en la programación actual
     turnos_usados = set()
@@ -877,52 +1060,99 @@ def bitacora_dashboard(request):
     
     # Aplicar filtros
     form = BitacoraFiltrosForm(request.GET or None)
+    filtros = form.cleaned_data if form.is_valid() else {}
+    bitacoras = filtrar_bitacora(bitacoras, filtros)
     
-    if form.is_valid():
-        if form.cleaned_data.get('fecha_desde'):
-            bitacoras = bitacoras.filter(fecha_hora__date__gte=form.cleaned_data['fecha_desde'])
-        
-        if form.cleaned_data.get('fecha_hasta'):
-            bitacoras = bitacoras.filter(fecha_hora__date__lte=form.cleaned_data['fecha_hasta'])
-        
-        if form.cleaned_data.get('usuario'):
-            bitacoras = bitacoras.filter(usuario=form.cleaned_data['usuario'])
-        
-        if form.cleaned_data.get('tipo_accion'):
-            bitacoras = bitacoras.filter(tipo_accion=form.cleaned_data['tipo_accion'])
-        
-        if form.cleaned_data.get('modulo'):
-            bitacoras = bitacoras.filter(modulo=form.cleaned_data['modulo'])
-        
-        if form.cleaned_data.get('modelo_afectado'):
-            bitacoras = bitacoras.filter(modelo_afectado__icontains=form.cleaned_data['modelo_afectado'])
-        
-        if form.cleaned_data.get('busqueda'):
-            busqueda = form.cleaned_data['busqueda']
-            bitacoras = bitacoras.filter(
-                Q(descripcion__icontains=busqueda) |
-                Q(ip_address__icontains=busqueda) |
-                Q(modelo_afectado__icontains=busqueda)
-            )
-    
-    # Estadísticas
-    stats = {
-        'total_registros': Bitacora.objects.count(),
-        'registros_hoy': Bitacora.objects.filter(fecha_hora__date=timezone.now().date()).count(),
-        'usuarios_activos': Bitacora.objects.values('usuario').distinct().count(),
-        'acciones_por_tipo': list(bitacoras.values('tipo_accion').annotate(count=Count('id')).order_by('-count')),
-    }
+    # Estadísticas desde el resumen diario; el desglose por acción solo vuelve a la
+    # tabla principal si hay filtros que el resumen no tiene (modelo, texto)
+    stats = estadisticas_bitacora(
+        fecha_desde=filtros.get('fecha_desde'),
+        fecha_hasta=filtros.get('fecha_hasta'),
+        usuario=filtros.get('usuario'),
+        tipo_accion=filtros.get('tipo_accion'),
+        modulo=filtros.get('modulo'),
+    )
+    if filtros.get('modelo_afectado') or filtros.get('busqueda'):
+        stats['acciones_por_tipo'] = list(
+            bitacoras.values('tipo_accion').annotate(count=Count('id')).order_by('-count')
+        )
     
-    # Paginación
-    paginator = Paginator(bitacoras, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor sobre (fecha_hora, id): cualquier página cuesta lo mismo que la primera
+    # Si el filtro de fechas llega a meses archivados, sus registros se intercalan desde los archivos
+    page_obj = paginar_bitacora(
+        bitacoras, filtros,
+        cursor=request.GET.get('cursor'), direccion=request.GET.get('dir', SIGUIENTE), tamano=25,
+    )
+    # Conteo de filtrados: el desglose por acción ya lo suma; sin resumen aplicable, un conteo estimado
+    if filtros.get('modelo_afectado') or filtros.get('busqueda'):
+        bitacoras_count, conteo_exacto = contar_estimado(bitacoras)
+    else:
+        bitacoras_count, conteo_exacto = sum(accion['count'] for accion in stats['acciones_por_tipo']), False
+    parametros = request.GET.copy()
+    for parametro in ('cursor', 'dir', 'page'):
+        parametros.pop(parametro, None)
     
     context = {
         'page_obj': page_obj,
         'form': form,
         'stats': stats,
-        'bitacoras_count': bitacoras.count(),
+        'bitacoras_count': bitacoras_count,
+        'conteo_exacto': conteo_exacto,
+        'parametros_filtro': parametros.urlencode(),
     }
     
-    return render(request, 'bitacora/bitacora_dashboard.html', context)
\ No newline at end of file
+    return render(request, 'bitacora/bitacora_dashboard.html', context)
+
+@login_required
+def exportar_bitacora(request):
+    """Exporta la bitácora con los filtros del dashboard, en CSV o JSONL, sin armarla en memoria"""
+    form = BitacoraFiltrosForm(request.GET or None)
+    filtros = form.cleaned_data if form.is_valid() else {}
+    formato = request.GET.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return HttpResponse(f'Formato no soportado: {formato}', status=400)
+    tipo = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(lineas_exportacion(filtros, formato), content_type=f'{tipo}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="bitacora-{timezone.now():%Y%m%d-%H%M}.{formato}"'
+    return response
+
+def perfil_sql_admin(request):
+    """Reporte del perfilador SQL: peores requests por nombre de URL"""
+    from django.conf import settings
+    from django.contrib import admin
+    from .perfilador_sql import peores_requests
+
+    if request.method == 'POST' and 'limpiar' in request.POST:
+        peores_requests.limpiar()
+        return redirect('perfil_sql_admin')
+
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Perfil SQL',
+        'reporte': peores_requests.reporte(),
+        'habilitado': getattr(settings, 'SQL_PROFILER_ENABLED', False),
+        'umbral_n1': getattr(settings, 'SQL_PROFILER_N1_THRESHOLD', 5),
+    }
+    return render(request, 'admin/perfil_sql.html', context)
+
+def perfiles_capturados_admin(request):
+    """Listado de capturas de cProfile/tracemalloc guardadas en PROFILING_DIR"""
+    from django.contrib import admin
+    from .perfilador_python import listar_capturas
+
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Perfiles capturados',
+        'capturas': listar_capturas(),
+    }
+    return render(request, 'admin/perfiles_capturados.html', context)
+
+def perfil_captura_descarga(request, nombre_archivo):
+    """Descarga un archivo de captura (.prof, .txt o .json)"""
+    from django.http import FileResponse, Http404
+    from .perfilador_python import ruta_captura
+
+    ruta = ruta_captura(nombre_archivo)
+    if ruta is None:
+        raise Http404("Captura no encontrada")
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre_archivo)
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import CentroDeCosto, Usuario, Tercero, CodigoTurno
+from .models import CentroDeCosto, Usuario, Tercero, CodigoTurno, PeriodoLaboral
 
 class TimeInputSimple(forms.TimeInput):
     """Widget simple para formato 24 horas"""
@@ -51,8 +51,15 @@ class CustomUserAdmin(UserAdmin):
     def get_queryset(self, request):
         return Usuario.all_objects.all()
 
+class PeriodoLaboralInline(admin.TabularInline):
+    model = PeriodoLaboral
+    extra = 0
+    fields = ('centro_operativo', 'cargo_predefinido', 'fecha_inicio', 'fecha_fin')
+    raw_id_fields = ('centro_operativo', 'cargo_predefinido')
+
 @admin.register(Tercero)
 class TerceroAdmin(admin.ModelAdmin):
+    inlines = [PeriodoLaboralInline]
     list_display = (
         'nombre_tercero', 'apellido_tercero', 'documento',
         'centro_de_costo', 'unidad_negocio', 'centro_operativo', 'proyecto', 'estado_tercero'
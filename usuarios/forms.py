@@ -21,6 +21,17 @@ class TerceroForm(forms.ModelForm):
             'centro_de_costo', 'proyecto'
         ]
 
+class ImportarTercerosForm(forms.Form):
+    archivo = forms.FileField(help_text='CSV (UTF-8) o XLSX con encabezado en la primera fila.')
+    crear_usuarios = forms.BooleanField(required=False, label='Crear usuarios del sistema')
+    solo_validar = forms.BooleanField(required=False, label='Solo validar (no guardar)')
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise ValidationError('El archivo debe ser .csv o .xlsx')
+        return archivo
+
 class CentroDeCostoForm(forms.ModelForm):
     class Meta:
         model = CentroDeCosto
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios.services.importacion_terceros import importar_terceros
+
+
+class Command(BaseCommand):
+    help = ('Importa terceros desde un archivo CSV o XLSX (todo o nada): valida cada fila y reporta '
+            'los errores por número de fila')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument('--crear-usuarios', action='store_true',
+                            help='Crear también un usuario del sistema por tercero')
+        parser.add_argument('--solo-validar', action='store_true', help='Validar sin guardar nada')
+        parser.add_argument('--procesos', type=int, default=settings.IMPORTACION_PROCESOS_HASH,
+                            help='Procesos para derivar las contraseñas')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"📥 Importando terceros desde {options['archivo']}...")
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar_terceros(
+                    archivo, options['archivo'], crear_usuarios=options['crear_usuarios'],
+                    solo_validar=options['solo_validar'], procesos=options['procesos'],
+                    reportar=self.stdout.write,
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in resultado.errores:
+            detalle = '; '.join(f'{columna}: {mensaje}' for columna, mensaje in error['errores'].items())
+            self.stderr.write(f"   Fila {error['fila']}: {detalle}")
+        if resultado.total_errores:
+            raise CommandError(f'{resultado.total_errores:,} de {resultado.filas:,} filas con errores: '
+                               'no se importó nada')
+        if options['solo_validar']:
+            self.stdout.write(self.style.SUCCESS(f'✅ {resultado.filas:,} filas válidas'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {resultado.terceros_creados:,} terceros y {resultado.usuarios_creados:,} usuarios importados'
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0003_alter_centrooperativo_promesa_valor'),
+        ('usuarios', '0002_remove_codigoturno_segmentos_horas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tercero',
+            index=models.Index(fields=['centro_operativo', 'cargo_predefinido', 'estado_tercero', 'apellido_tercero'], name='usuarios_te_centro__fd3a7d_idx'),
+        ),
+    ]
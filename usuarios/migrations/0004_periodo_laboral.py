@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-19 12:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0003_alter_centrooperativo_promesa_valor'),
+        ('usuarios', '0003_indices_tercero'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodoLaboral',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField(blank=True, null=True)),
+                ('cargo_predefinido', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='periodos_laborales', to='empresas.cargopredefinido')),
+                ('centro_operativo', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='periodos_laborales', to='empresas.centrooperativo', verbose_name='Centro Operativo')),
+                ('tercero', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='periodos_laborales', to='usuarios.tercero')),
+            ],
+            options={
+                'verbose_name': 'Periodo Laboral',
+                'verbose_name_plural': 'Periodos Laborales',
+                'indexes': [models.Index(fields=['centro_operativo', 'cargo_predefinido', 'fecha_inicio', 'fecha_fin'], name='usuarios_pe_centro__0d4af5_idx')],
+            },
+        ),
+    ]
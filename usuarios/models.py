@@ -158,6 +158,10 @@ class Tercero(models.Model):
     class Meta:
         verbose_name = 'Tercero'
         verbose_name_plural = 'Terceros'
+        # Terceros elegibles de una programación: centro + cargo + estado, ordenados por apellido
+        indexes = [
+            models.Index(fields=['centro_operativo', 'cargo_predefinido', 'estado_tercero', 'apellido_tercero']),
+        ]
 
     def __str__(self):
         return f"{self.nombre_tercero} {self.apellido_tercero}"
@@ -170,6 +174,55 @@ class Tercero(models.Model):
         self.estado_tercero = self.Estado_Activo
         self.save()
 
+
+class PeriodoLaboral(models.Model):
+    """
+    Intervalo en que un tercero trabaja en un centro operativo con un cargo.
+
+    fecha_fin vacía significa que el periodo sigue vigente. Los terceros sin
+    periodos registrados se consideran vinculados según sus campos actuales
+    (centro, cargo y estado), como antes de existir esta tabla.
+    """
+    tercero = models.ForeignKey(Tercero, on_delete=models.CASCADE, related_name='periodos_laborales')
+    centro_operativo = models.ForeignKey(
+        'empresas.CentroOperativo',
+        on_delete=models.PROTECT,
+        related_name='periodos_laborales',
+        verbose_name='Centro Operativo'
+    )
+    cargo_predefinido = models.ForeignKey(
+        'empresas.CargoPredefinido',
+        on_delete=models.PROTECT,
+        related_name='periodos_laborales',
+        null=True,
+        blank=True
+    )
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Periodo Laboral'
+        verbose_name_plural = 'Periodos Laborales'
+        # Periodos de un centro y cargo que se cruzan con un rango de fechas
+        indexes = [
+            models.Index(fields=['centro_operativo', 'cargo_predefinido', 'fecha_inicio', 'fecha_fin']),
+        ]
+
+    def __str__(self):
+        return f"{self.tercero} - {self.centro_operativo} ({self.fecha_inicio} - {self.fecha_fin or 'vigente'})"
+
+    def clean(self):
+        if self.fecha_fin and self.fecha_fin < self.fecha_inicio:
+            raise ValidationError({'fecha_fin': 'La fecha de fin no puede ser anterior a la fecha de inicio.'})
+        if self.tercero_id:
+            solapados = PeriodoLaboral.objects.filter(tercero_id=self.tercero_id).exclude(pk=self.pk).filter(
+                models.Q(fecha_fin__isnull=True) | models.Q(fecha_fin__gte=self.fecha_inicio)
+            )
+            if self.fecha_fin:
+                solapados = solapados.filter(fecha_inicio__lte=self.fecha_fin)
+            if solapados.exists():
+                raise ValidationError('El periodo se cruza con otro periodo laboral del mismo tercero.')
+
 class CodigoTurno(models.Model):
     TIPO_CHOICES = [
         ('N', 'Normal'),
@@ -200,6 +253,22 @@ class CodigoTurno(models.Model):
         verbose_name = 'Código de Turno'
         verbose_name_plural = 'Códigos de Turnos'
 
+    @classmethod
+    def ids_por_letra(cls):
+        """
+        Id del código que representa cada letra.
+
+        La letra no es única: se prefiere el código activo y, entre varios, el de id más bajo.
+
+        Returns:
+            Dict letra -> id_codigo_turnos
+        """
+        ids = {}
+        for id_codigo, letra in cls.objects.order_by('-estado_codigo', 'id_codigo_turnos').values_list(
+                'id_codigo_turnos', 'letra_turno'):
+            ids.setdefault(letra, id_codigo)
+        return ids
+
     def save(self, *args, **kwargs):
         # Calcular duración total automáticamente
         if self.hora_inicio and self.hora_final and self.tipo not in ['D', 'ND']:
@@ -0,0 +1,378 @@
+"""
+Importación masiva de terceros desde CSV o XLSX.
+
+El archivo se lee fila por fila (``csv`` o ``openpyxl`` en modo de solo
+lectura) y cada fila se valida contra conjuntos cargados una sola vez al
+empezar: documentos y usuarios existentes, y cargos, centros operativos,
+unidades de negocio, centros de costo y proyectos por id o por nombre/código.
+Las filas válidas se insertan con ``bulk_create`` por lotes dentro de una
+transacción; si alguna fila tiene errores la transacción se deshace al final
+y no queda nada a medias, así que la memoria depende del lote y no del
+tamaño del archivo.
+
+Con ``crear_usuarios`` cada tercero recibe un Usuario del sistema (usuario =
+columna ``usuario`` o el documento; contraseña = columna ``contrasena``, o
+inutilizable hasta que se restablezca). Derivar las contraseñas es lo más
+costoso de la importación, así que se calculan en un pool de procesos que se
+crea una sola vez por proceso. El pool es para ``manage.py
+importar_terceros``: la vista deriva las contraseñas en el mismo proceso, sin
+hacer fork desde un hilo del servidor con la transacción abierta.
+
+Cada fila válida pasa además por ``Tercero.full_clean`` (sin unicidad, que ya
+se revisó contra los documentos cargados, y sin las referencias, ya
+resueltas), así que ``bulk_create`` recibe lo mismo que aceptaría un
+formulario.
+
+``bulk_create`` no dispara señales: al final se invalida la fuerza laboral de
+los centros afectados y se deja un solo registro de bitácora.
+"""
+import atexit
+import csv
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from empresas.models import CargoPredefinido, CentroOperativo, Proyecto, UnidadNegocio
+from programacion_turnos.services.fuerza_laboral import invalidar_fuerza_laboral
+from programacion_turnos.utils import registrar_bitacora
+from ..models import CentroDeCosto, Tercero, Usuario
+
+COLUMNAS_OBLIGATORIAS = ('documento', 'nombre_tercero', 'apellido_tercero', 'correo_tercero')
+COLUMNAS_REFERENCIA = ('cargo_predefinido', 'centro_operativo', 'unidad_negocio', 'centro_de_costo', 'proyecto')
+COLUMNAS_USUARIO = ('usuario', 'contrasena')
+EXTENSIONES = ('.csv', '.xlsx')
+TAMANO_LOTE = 500
+MAXIMO_ERRORES = 200
+_AMBIGUO = object()
+
+
+@dataclass
+class ResultadoImportacion:
+    filas: int = 0
+    terceros_creados: int = 0
+    usuarios_creados: int = 0
+    errores: list = field(default_factory=list)  # [{'fila': n, 'errores': {columna: mensaje}}]
+    total_errores: int = 0
+
+
+# ========== LECTURA ==========
+
+def _normalizar_encabezado(valor):
+    return str(valor or '').strip().lower()
+
+
+def _filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        lector = csv.reader(texto)
+        encabezado = [_normalizar_encabezado(valor) for valor in next(lector, [])]
+        yield encabezado
+        yield from lector
+    finally:
+        # El archivo lo cierra quien lo abrió
+        texto.detach()
+
+
+def _filas_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Para importar archivos .xlsx instale openpyxl (pip install openpyxl).')
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        yield [_normalizar_encabezado(valor) for valor in next(filas, ())]
+        for fila in filas:
+            yield ['' if valor is None else valor for valor in fila]
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre):
+    """
+    Filas de datos del archivo como dicts columna -> texto, con su número de fila (el encabezado es la 1).
+
+    Args:
+        archivo: Archivo binario abierto (subido o del disco)
+        nombre: Nombre del archivo, para elegir el formato por la extensión
+
+    Yields:
+        Tuplas (número de fila, dict)
+
+    Raises:
+        ValueError: Si el formato no es soportado o faltan columnas obligatorias
+    """
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension not in EXTENSIONES:
+        raise ValueError(f"Formato no soportado: use {' o '.join(EXTENSIONES)}.")
+    filas = _filas_csv(archivo) if extension == '.csv' else _filas_xlsx(archivo)
+    encabezado = next(filas)
+    faltantes = [columna for columna in COLUMNAS_OBLIGATORIAS if columna not in encabezado]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+    for numero, valores in enumerate(filas, start=2):
+        if not any(str(valor).strip() for valor in valores):
+            continue
+        yield numero, {columna: str(valor).strip() for columna, valor in zip(encabezado, valores) if columna}
+
+
+# ========== REFERENCIAS ==========
+
+def _clave(texto):
+    return ' '.join(str(texto).split()).lower()
+
+
+def _indice(modelo, *campos_texto):
+    # id y nombre/código -> pk; un nombre repetido no se puede usar para referenciar
+    indice = {}
+    for pk, *textos in modelo.objects.values_list('pk', *campos_texto):
+        indice[str(pk)] = pk
+        for texto in textos:
+            clave = _clave(texto)
+            indice[clave] = _AMBIGUO if clave in indice and indice[clave] != pk else pk
+    return indice
+
+
+@dataclass
+class Referencias:
+    """Conjuntos de consulta cargados una vez por importación."""
+    documentos: set
+    usuarios: set
+    indices: dict
+
+    @classmethod
+    def cargar(cls, crear_usuarios=False):
+        return cls(
+            # all_objects: el documento es único también entre los terceros inactivos
+            documentos=set(Tercero.all_objects.values_list('documento', flat=True)),
+            usuarios={_clave(nombre) for nombre in Usuario.all_objects.values_list('username', flat=True)}
+            if crear_usuarios else set(),
+            indices={
+                'cargo_predefinido': _indice(CargoPredefinido, 'nombre'),
+                'centro_operativo': _indice(CentroOperativo, 'nombre'),
+                'unidad_negocio': _indice(UnidadNegocio, 'nombre'),
+                'centro_de_costo': _indice(CentroDeCosto, 'codigo', 'nombre'),
+                'proyecto': _indice(Proyecto, 'nombre'),
+            },
+        )
+
+
+# ========== VALIDACIÓN ==========
+
+def _longitud(modelo, campo):
+    return modelo._meta.get_field(campo).max_length
+
+
+def validar_fila(fila, referencias, crear_usuarios=False):
+    """
+    Valida una fila y la marca como vista (documento y usuario) en ``referencias``.
+
+    Returns:
+        Tupla (valores para Tercero, datos del usuario o None, dict de errores)
+    """
+    errores = {}
+    valores = {}
+    for columna in COLUMNAS_OBLIGATORIAS:
+        texto = fila.get(columna, '')
+        if not texto:
+            errores[columna] = 'Este campo es obligatorio.'
+        elif len(texto) > _longitud(Tercero, columna):
+            errores[columna] = f'Máximo {_longitud(Tercero, columna)} caracteres.'
+        valores[columna] = texto
+    if 'correo_tercero' not in errores:
+        try:
+            validate_email(valores['correo_tercero'])
+        except ValidationError:
+            errores['correo_tercero'] = 'Correo inválido.'
+    if 'documento' not in errores and valores['documento'] in referencias.documentos:
+        errores['documento'] = 'Ya existe un tercero con este documento.'
+
+    for columna in COLUMNAS_REFERENCIA:
+        texto = fila.get(columna, '')
+        valores[f'{columna}_id'] = None
+        if not texto:
+            continue
+        pk = referencias.indices[columna].get(_clave(texto))
+        if pk is None:
+            errores[columna] = f'No existe: {texto}.'
+        elif pk is _AMBIGUO:
+            errores[columna] = f'Nombre repetido, use el id: {texto}.'
+        else:
+            valores[f'{columna}_id'] = pk
+
+    if not errores:
+        try:
+            Tercero(**valores).full_clean(validate_unique=False, exclude=COLUMNAS_REFERENCIA)
+        except ValidationError as e:
+            errores.update({campo: ' '.join(mensajes) for campo, mensajes in e.message_dict.items()})
+
+    usuario = None
+    if crear_usuarios:
+        username = fila.get('usuario') or valores['documento']
+        if len(username) > _longitud(Usuario, 'username'):
+            errores['usuario'] = f'Máximo {_longitud(Usuario, "username")} caracteres.'
+        elif _clave(username) in referencias.usuarios:
+            errores['usuario'] = f'El usuario {username} ya existe.'
+        usuario = {'username': username, 'contrasena': fila.get('contrasena') or None}
+        referencias.usuarios.add(_clave(username))
+    # Los repetidos dentro del archivo se detectan contra las filas anteriores
+    referencias.documentos.add(valores['documento'])
+    return valores, usuario, errores
+
+
+# ========== CONTRASEÑAS ==========
+
+def _inicializar_proceso(modulo_settings):
+    # Con el método "spawn" (macOS, Windows) el proceso hijo arranca sin Django configurado
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', modulo_settings)
+    django.setup()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _cerrar_pools():
+    for pool in _pools.values():
+        pool.shutdown()
+
+
+atexit.register(_cerrar_pools)
+
+
+def pool_contrasenas(procesos):
+    """
+    Pool para derivar contraseñas, creado una vez por proceso y cantidad de procesos.
+
+    Returns:
+        ProcessPoolExecutor, o None si basta con el proceso actual
+    """
+    if not procesos or procesos <= 1:
+        return None
+    clave = (os.getpid(), procesos)
+    with _pools_lock:
+        if clave not in _pools:
+            _pools[clave] = ProcessPoolExecutor(
+                max_workers=procesos, initializer=_inicializar_proceso,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'horas_sistema.settings'),),
+            )
+        return _pools[clave]
+
+
+def derivar_contrasenas(contrasenas, pool=None, procesos=1):
+    """
+    ``make_password`` de cada contraseña (None = contraseña inutilizable), en el pool si lo hay.
+
+    Args:
+        contrasenas: Lista de contraseñas en claro
+        pool: Pool de ``pool_contrasenas`` o None
+        procesos: Procesos del pool (para repartir el trabajo en trozos)
+    """
+    if pool is None or len(contrasenas) < 2:
+        return [make_password(contrasena) for contrasena in contrasenas]
+    trozo = max(1, len(contrasenas) // (procesos * 4))
+    return list(pool.map(make_password, contrasenas, chunksize=trozo))
+
+
+# ========== IMPORTACIÓN ==========
+
+def _insertar_lote(lote, usuarios, pool, procesos):
+    Tercero.objects.bulk_create([Tercero(**valores) for valores in lote], batch_size=TAMANO_LOTE)
+    if not usuarios:
+        return 0
+    # MySQL no devuelve los ids de bulk_create: se leen por documento
+    ids = dict(Tercero.all_objects.filter(documento__in=[valores['documento'] for valores in lote])
+               .values_list('documento', 'pk'))
+    claves = derivar_contrasenas([usuario['contrasena'] for usuario in usuarios], pool, procesos)
+    Usuario.objects.bulk_create([
+        Usuario(
+            username=usuario['username'], password=clave, email=valores['correo_tercero'],
+            nombre_usuario=f"{valores['nombre_tercero']} {valores['apellido_tercero']}"[:200],
+            tercero_id=ids[valores['documento']], centro_operativo_id=valores['centro_operativo_id'],
+            cargo_predefinido_id=valores['cargo_predefinido_id'],
+        )
+        for valores, usuario, clave in zip(lote, usuarios, claves)
+    ], batch_size=TAMANO_LOTE)
+    return len(usuarios)
+
+
+def importar_terceros(archivo, nombre, crear_usuarios=False, solo_validar=False, procesos=None,
+                      request=None, reportar=None):
+    """
+    Importa los terceros de un archivo CSV o XLSX (todo o nada).
+
+    Args:
+        archivo: Archivo binario abierto
+        nombre: Nombre del archivo (define el formato)
+        crear_usuarios: Crear también un Usuario del sistema por tercero
+        solo_validar: Validar sin guardar nada
+        procesos: Procesos para derivar contraseñas (por defecto IMPORTACION_PROCESOS_HASH; la vista usa 1)
+        request: Request para la bitácora
+        reportar: Callable opcional que recibe mensajes de progreso
+
+    Returns:
+        ResultadoImportacion
+
+    Raises:
+        ValueError: Si el formato no es soportado o faltan columnas
+    """
+    reportar = reportar or (lambda mensaje: None)
+    resultado = ResultadoImportacion()
+    referencias = Referencias.cargar(crear_usuarios)
+    procesos = settings.IMPORTACION_PROCESOS_HASH if procesos is None else procesos
+    filas = leer_filas(archivo, nombre)
+    centros = set()
+    pool = pool_contrasenas(procesos) if crear_usuarios and not solo_validar else None
+    with transaction.atomic():
+        lote, usuarios = [], []
+        for numero, fila in filas:
+            resultado.filas += 1
+            valores, usuario, errores = validar_fila(fila, referencias, crear_usuarios)
+            if errores:
+                resultado.total_errores += 1
+                if len(resultado.errores) < MAXIMO_ERRORES:
+                    resultado.errores.append({'fila': numero, 'errores': errores})
+                continue
+            if resultado.total_errores or solo_validar:
+                # Ya no se va a guardar: solo se sigue validando
+                continue
+            lote.append(valores)
+            if usuario:
+                usuarios.append(usuario)
+            centros.add(valores['centro_operativo_id'])
+            if len(lote) >= TAMANO_LOTE:
+                resultado.usuarios_creados += _insertar_lote(lote, usuarios, pool, procesos)
+                resultado.terceros_creados += len(lote)
+                reportar(f'   {resultado.terceros_creados:,} terceros importados')
+                lote, usuarios = [], []
+        if lote and not resultado.total_errores and not solo_validar:
+            resultado.usuarios_creados += _insertar_lote(lote, usuarios, pool, procesos)
+            resultado.terceros_creados += len(lote)
+
+        if resultado.total_errores or solo_validar:
+            transaction.set_rollback(True)
+            resultado.terceros_creados = resultado.usuarios_creados = 0
+            return resultado
+        if resultado.terceros_creados:
+            invalidar_fuerza_laboral(*centros)
+            registrar_bitacora(
+                request=request,
+                tipo_accion='CREAR',
+                modulo='usuarios',
+                modelo_afectado='tercero',
+                descripcion=(f'Importación de terceros desde {os.path.basename(nombre)}: '
+                             f'{resultado.terceros_creados} terceros, {resultado.usuarios_creados} usuarios'),
+                valores_nuevos={'archivo': os.path.basename(nombre), 'terceros': resultado.terceros_creados,
+                                'usuarios': resultado.usuarios_creados},
+            )
+    return resultado
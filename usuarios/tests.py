@@ -1,3 +1,130 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from empresas.models import CargoPredefinido, CentroOperativo
+from programacion_turnos import presupuesto_consultas
+from programacion_turnos.models import Bitacora
+from programacion_turnos.presupuesto_consultas import Caso
+from .models import Tercero, Usuario
+from .services.importacion_terceros import importar_terceros
+
+
+class PresupuestoConsultasUsuariosTests(presupuesto_consultas.PresupuestoConsultasTestCase):
+    """Las vistas de usuarios no hacen consultas por fila."""
+    urls_modulo = 'usuarios.urls'
+    casos = {
+        'usuarios:api-root': Caso(),
+        'usuarios:usuario-list': Caso(),
+        'usuarios:usuario-detail': Caso(lambda c: [c.usuario]),
+        'usuarios:usuario-login': Caso(metodo='post', datos=lambda c: {'username': 'presupuesto', 'password': 'x'},
+                                       formato='json'),
+        'usuarios:usuario-logout': Caso(metodo='post', datos=lambda c: {'refresh': c.refresh}, formato='json',
+                                        estado=205),
+        'usuarios:usuario-assign-group': Caso(lambda c: [c.usuario], 'post', lambda c: {'group_id': c.grupo}, 'json'),
+        'usuarios:rol-list': Caso(),
+        'usuarios:rol-detail': Caso(lambda c: [c.rol]),
+        'usuarios:token_obtain_pair': Caso(metodo='post', datos=lambda c: {'username': 'presupuesto', 'password': 'x'},
+                                           formato='json'),
+        'usuarios:token_refresh': Caso(metodo='post', datos=lambda c: {'refresh': c.refresh}, formato='json'),
+        'usuarios:tercero_create': Caso(),
+        'usuarios:tercero_list': Caso(),
+        'usuarios:tercero_detail': Caso(lambda c: [c.tercero]),
+        'usuarios:tercero_update': Caso(lambda c: [c.tercero]),
+        'usuarios:tercero_importar': Caso(),
+        'usuarios:centrodecosto_create': Caso(),
+        'usuarios:centrodecosto_list': Caso(),
+        'usuarios:centrodecosto_detail': Caso(lambda c: [c.centro_costo]),
+        'usuarios:centrodecosto_update': Caso(lambda c: [c.centro_costo]),
+        'usuarios:group_create': Caso(),
+        'usuarios:group_list': Caso(),
+        'usuarios:group_detail': Caso(lambda c: [c.grupo]),
+        'usuarios:group_update': Caso(lambda c: [c.grupo]),
+        'usuarios:codigoturno_create': Caso(),
+        'usuarios:codigoturno_list': Caso(),
+        'usuarios:codigoturno_detail': Caso(lambda c: [c.codigo_turno]),
+        'usuarios:codigoturno_update': Caso(lambda c: [c.codigo_turno]),
+        'usuarios:user_list': Caso(),
+        'usuarios:user_create': Caso(),
+        'usuarios:user_edit': Caso(lambda c: [c.usuario]),
+        'usuarios:user_toggle_status': Caso(lambda c: [c.usuario], estado=302),
+        'usuarios:horarios_tercero': Caso(lambda c: [c.tercero]),
+    }
+    excluidas = {
+        'usuarios:user_detail': 'La plantilla usuario_acess/user_detail.html no existe (la vista redirige al listado)',
+    }
+
+
+# Hashes rápidos: las pruebas miden la importación, no PBKDF2
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportacionTercerosTests(TestCase):
+    """La importación valida todas las filas y guarda todo o nada."""
+    ENCABEZADO = 'documento,nombre_tercero,apellido_tercero,correo_tercero,cargo_predefinido,centro_operativo,contrasena\n'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cargo = CargoPredefinido.objects.create(nombre='Guarda', descripcion='', salario=1)
+        cls.centro = CentroOperativo.objects.create(nombre='Sede Norte', descripcion='', direccion='', ciudad='')
+        Tercero.objects.create(documento='100', nombre_tercero='Ana', apellido_tercero='Ruiz',
+                               correo_tercero='ana@example.com')
+        cls.usuario = Usuario.objects.create_user(username='importador', password='x')
+
+    def _archivo(self, *filas):
+        return io.BytesIO((self.ENCABEZADO + ''.join(f'{fila}\n' for fila in filas)).encode('utf-8'))
+
+    def test_importa_con_referencias_por_nombre_o_id(self):
+        archivo = self._archivo(f'200,Luis,Gil,luis@example.com,guarda,{self.centro.pk},',
+                                '201,Eva,Paz,eva@example.com,,Sede  Norte,')
+        resultado = importar_terceros(archivo, 'terceros.csv')
+
+        self.assertEqual((resultado.filas, resultado.terceros_creados, resultado.total_errores), (2, 2, 0))
+        luis = Tercero.objects.get(documento='200')
+        self.assertEqual((luis.cargo_predefinido_id, luis.centro_operativo_id), (self.cargo.pk, self.centro.pk))
+        self.assertEqual(Tercero.objects.get(documento='201').centro_operativo_id, self.centro.pk)
+        self.assertTrue(Bitacora.objects.filter(modelo_afectado='tercero', tipo_accion='CREAR').exists())
+
+    def test_errores_por_fila_no_guardan_nada(self):
+        archivo = self._archivo('200,Luis,Gil,luis@example.com,,,',
+                                '100,Repetido,Doc,rep@example.com,,,',
+                                '200,Otro,Igual,otro@example.com,Inexistente,,',
+                                '202,Sin,Correo,no-es-correo,,,')
+        resultado = importar_terceros(archivo, 'terceros.csv')
+
+        self.assertEqual(resultado.total_errores, 3)
+        self.assertEqual([error['fila'] for error in resultado.errores], [3, 4, 5])
+        self.assertEqual(set(resultado.errores[1]['errores']), {'documento', 'cargo_predefinido'})
+        self.assertIn('correo_tercero', resultado.errores[2]['errores'])
+        self.assertEqual(resultado.terceros_creados, 0)
+        self.assertFalse(Tercero.all_objects.filter(documento='200').exists())
+
+    def test_cada_fila_pasa_por_full_clean(self):
+        archivo = self._archivo('200,Luis,Gil,luis@example.com,,,', '201,Eva,Paz,eva@example.com,,,')
+        with mock.patch.object(Tercero, 'full_clean', autospec=True, side_effect=Tercero.full_clean) as full_clean:
+            resultado = importar_terceros(archivo, 'terceros.csv')
+
+        self.assertEqual(resultado.terceros_creados, 2)
+        self.assertEqual(full_clean.call_count, 2)
+        self.assertFalse(full_clean.call_args.kwargs['validate_unique'])
+
+    def test_crea_usuarios_en_un_pool_de_procesos(self):
+        archivo = self._archivo('300,Luis,Gil,luis@example.com,,,clave-luis',
+                                '301,Eva,Paz,eva@example.com,,,')
+        resultado = importar_terceros(archivo, 'terceros.csv', crear_usuarios=True, procesos=2)
+
+        self.assertEqual(resultado.usuarios_creados, 2)
+        luis = Usuario.objects.get(username='300')
+        self.assertTrue(luis.check_password('clave-luis'))
+        self.assertEqual(luis.tercero.documento, '300')
+        self.assertFalse(Usuario.objects.get(username='301').has_usable_password())
+
+    def test_vista_muestra_los_errores(self):
+        self.client.force_login(self.usuario)
+        archivo = self._archivo('100,Ana,Ruiz,ana@example.com,,,')
+        archivo.name = 'terceros.csv'
+        respuesta = self.client.post(reverse('usuarios:tercero_importar'), {'archivo': archivo})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['resultado'].total_errores, 1)
+        self.assertContains(respuesta, 'Ya existe un tercero con este documento.')
@@ -21,6 +21,7 @@ urlpatterns = [
     path('tercero/', views.tercero_list, name='tercero_list'),  
     path('tercero/<int:pk>/', views.tercero_detail, name='tercero_detail'),  
     path('tercero/<int:pk>/editar/', views.tercero_update, name='tercero_update'), 
+    path('tercero/importar/', views.tercero_importar, name='tercero_importar'),
 
     #######centros de costo######
     path('centrodecosto/nuevo/', views.centrodecosto_create, name='centrodecosto_create'),
@@ -4,28 +4,30 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
+from horas_sistema.streaming import ListadoStreamingMixin
 from django.contrib.auth import authenticate, get_user_model
 
 from programacion_turnos.models import AsignacionTurno, ProgramacionHorario
 from .models import Usuario, Rol
 from .serializers import UsuarioSerializer, UsuarioCreateSerializer, RolSerializer
 from django.shortcuts import render, redirect
-from .forms import TerceroForm, CentroDeCostoForm, CodigoTurnoForm, SystemUserForm
+from .forms import TerceroForm, CentroDeCostoForm, CodigoTurnoForm, SystemUserForm, ImportarTercerosForm
 from .models import Tercero, CentroDeCosto, CodigoTurno, Usuario
+from .services.importacion_terceros import importar_terceros
 from django.shortcuts import render, redirect, get_object_or_404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.models import Group, Permission
 from django import forms
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q
 from django.core.paginator import Paginator
 from django.utils import timezone
 
 User = get_user_model()  # Esto obtiene el modelo correcto automáticamente
 
-class UsuarioViewSet(viewsets.ModelViewSet):
-    queryset = Usuario.objects.all()
+class UsuarioViewSet(ListadoStreamingMixin, viewsets.ModelViewSet):
+    queryset = Usuario.objects.prefetch_related('groups')
     serializer_class = UsuarioSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -96,8 +98,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class RolViewSet(viewsets.ModelViewSet):
-    queryset = Rol.objects.all()
+class RolViewSet(ListadoStreamingMixin, viewsets.ModelViewSet):
+    queryset = Rol.objects.prefetch_related('permisos')
     serializer_class = RolSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -115,7 +117,7 @@ def tercero_create(request):
 
 ##############TERCEROS(EMPLEAOS)#################
 def tercero_list(request):
-    terceros = Tercero.objects.all().order_by('-id_tercero')
+    terceros = Tercero.objects.select_related('cargo_predefinido', 'centro_operativo').order_by('-id_tercero')
     return render(request, 'usuarios/tercero_list.html', {'terceros': terceros})
 
 def tercero_detail(request, pk):
@@ -133,6 +135,37 @@ def tercero_update(request, pk):
         form = TerceroForm(instance=tercero)
     return render(request, 'usuarios/tercero_form.html', {'form': form, 'tercero': tercero})
 
+@login_required
+def tercero_importar(request):
+    """Importación masiva de terceros desde CSV o XLSX (ver services/importacion_terceros.py)."""
+    resultado = None
+    if request.method == 'POST':
+        form = ImportarTercerosForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            try:
+                resultado = importar_terceros(
+                    archivo, archivo.name,
+                    crear_usuarios=form.cleaned_data['crear_usuarios'],
+                    solo_validar=form.cleaned_data['solo_validar'],
+                    # Sin pool de procesos en un hilo del servidor (ver importacion_terceros.py)
+                    procesos=1, request=request,
+                )
+            except ValueError as e:
+                form.add_error('archivo', str(e))
+            else:
+                if resultado.total_errores:
+                    messages.error(request, f'{resultado.total_errores} filas con errores: no se importó nada.')
+                elif form.cleaned_data['solo_validar']:
+                    messages.success(request, f'{resultado.filas} filas válidas.')
+                else:
+                    messages.success(request, f'Se importaron {resultado.terceros_creados} terceros '
+                                              f'y {resultado.usuarios_creados} usuarios.')
+                    return redirect('usuarios:tercero_list')
+    else:
+        form = ImportarTercerosForm()
+    return render(request, 'usuarios/tercero_importar.html', {'form': form, 'resultado': resultado})
+
 def horarios_tercero(request, tercero_id):
     
     tercero = get_object_or_404(Tercero, pk=tercero_id)
@@ -229,7 +262,7 @@ class GroupForm(forms.ModelForm):
         }
 
 def group_list(request):
-    groups = Group.objects.all().order_by('name')
+    groups = Group.objects.annotate(total_permisos=Count('permissions')).order_by('name')
     return render(request, 'auth/group_list.html', {'groups': groups})
 
 def group_create(request):
@@ -243,7 +276,13 @@ def group_create(request):
     return render(request, 'auth/group_form.html', {'form': form})
 
 def group_detail(request, pk):
-    group = get_object_or_404(Group, pk=pk)
+    group = get_object_or_404(
+        Group.objects.prefetch_related(
+            Prefetch('permissions', queryset=Permission.objects.select_related('content_type')),
+            'user_set',
+        ),
+        pk=pk
+    )
     return render(request, 'auth/group_detail.html', {'group': group})
 
 def group_update(request, pk):